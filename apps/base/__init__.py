@@ -11,4 +11,19 @@
 
 import logging
 
+from django.apps import AppConfig
+
 logger = logging.getLogger(__name__)
+
+
+class BaseAppConfig(AppConfig):
+    name = 'base'
+    verbose_name = "框架基础"
+
+    def ready(self):
+        from django.apps import apps
+        from base.resp import serializer_registry
+        serializer_registry.autodiscover(apps.get_models())
+
+
+default_app_config = 'base.BaseAppConfig'
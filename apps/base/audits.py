@@ -0,0 +1,121 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/18
+#
+
+"""
+序列化查询审计: 统计 resp.serialize_data 每次序列化过程中执行的SQL数量, 用于发现N+1查询
+(如SerializerMethodField中访问未预加载的关联对象).
+
+    - 测试时: 使用 audit_serializer_queries() 收集记录, 见 runtests/plugins/query_audit.py
+    - 运行时: settings.SERIALIZER_QUERY_AUDIT = True 时, 疑似N+1的序列化将输出warning日志
+
+统计的查询不包含QuerySet本身的求值, 仅包含序列化过程中产生的查询(嵌套序列化的查询计入外层).
+"""
+
+import logging
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+
+from django.db import connection
+
+from settings import SERIALIZER_QUERY_AUDIT
+
+logger = logging.getLogger(__name__)
+
+MIN_AUDIT_ITEMS = 2     # 序列化对象数不少于该值时才判断N+1
+
+SerializeRecord = namedtuple('SerializeRecord', ('serializer', 'items', 'queries'))
+
+_local = threading.local()
+
+
+def _get_auditors():
+    if not hasattr(_local, 'auditors'):
+        _local.auditors = []
+    return _local.auditors
+
+
+def is_enabled():
+    return SERIALIZER_QUERY_AUDIT or bool(_get_auditors())
+
+
+class QueryAuditor(object):
+    """
+    收集序列化查询记录
+    """
+
+    def __init__(self):
+        self.records = []
+
+    def find_n_plus_one(self):
+        return find_n_plus_one(self.records)
+
+
+@contextmanager
+def audit_serializer_queries():
+    """
+    在上下文中收集 serialize_data 的查询记录:
+
+        with audit_serializer_queries() as auditor:
+            ...
+        auditor.find_n_plus_one()
+    """
+    auditor = QueryAuditor()
+    auditors = _get_auditors()
+    auditors.append(auditor)
+    try:
+        yield auditor
+    finally:
+        auditors.remove(auditor)
+
+
+@contextmanager
+def track_serialize(srl_cls, items_count):
+    """
+    统计一次序列化过程中执行的查询数量
+    """
+    counter = [0]
+
+    def count_query(execute, sql, params, many, context):
+        counter[0] += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count_query):
+        yield
+
+    record = SerializeRecord(srl_cls.__name__, items_count, counter[0])
+    for auditor in _get_auditors():
+        auditor.records.append(record)
+    if SERIALIZER_QUERY_AUDIT and find_n_plus_one([record]):
+        logger.warning('Possible N+1 queries in %s: %s queries for %s items',
+                       record.serializer, record.queries, record.items)
+
+
+def find_n_plus_one(records):
+    """
+    找出疑似N+1的Serializer:
+        1. 单次序列化的查询数不少于对象数;
+        2. 同一Serializer, 对象数增多时查询数随之线性增长(增加的查询数不少于增加的对象数).
+
+    :param records: SerializeRecord列表
+    :return: 疑似N+1的Serializer名称列表
+    """
+    suspects = []
+    by_serializer = {}
+    for record in records:
+        if record.items >= MIN_AUDIT_ITEMS and record.queries >= record.items:
+            if record.serializer not in suspects:
+                suspects.append(record.serializer)
+        by_serializer.setdefault(record.serializer, []).append(record)
+
+    for serializer, group in by_serializer.items():
+        if serializer in suspects:
+            continue
+        group = sorted(group, key=lambda r: (r.items, r.queries))
+        for small, large in zip(group, group[1:]):
+            if large.items > small.items and large.queries - small.queries >= large.items - small.items:
+                suspects.append(serializer)
+                break
+    return suspects
@@ -7,11 +7,16 @@
 
 import logging
 import datetime
+import threading
+import time
+from collections import OrderedDict
 
+from django.core.cache import cache
 from rest_framework.authentication import TokenAuthentication, get_authorization_header
 from rest_framework import exceptions
 
-from settings import TOKEN_EXPIRED_MINUTES
+from settings import TOKEN_EXPIRED_MINUTES, TOKEN_LRU_MAX_SIZE, TOKEN_LRU_TIMEOUT, \
+    TOKEN_CACHE_TIMEOUT
 from base.exceptions import AuthenticationTokenExpired
 
 from rest_framework.authtoken.models import Token
@@ -19,6 +24,59 @@ from rest_framework.authtoken.models import Token
 logger = logging.getLogger(__name__)
 
 
+class TokenLRUCache(object):
+    """
+    进程内(per-worker)Token解析结果LRU缓存.
+    缓存条目为 key -> (user_id, created, is_active), 每个条目仅在本进程内存活timeout秒.
+    其他进程撤销token时无法清除本进程的条目: 用户禁用由认证时的用户对象缓存is_active检查拒绝,
+    token刷新/删除后旧token在其他进程中最多仍可用timeout秒(TOKEN_LRU_TIMEOUT应保持较短)
+    """
+
+    def __init__(self, max_size=TOKEN_LRU_MAX_SIZE, timeout=TOKEN_LRU_TIMEOUT):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if not item:
+                return None
+            expire_at, value = item
+            if expire_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.time() + self.timeout, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+token_lru = TokenLRUCache()
+
+
+def make_token_cache_key(key):
+    """生成Token解析结果的Redis缓存key"""
+    return u'%s%s%s' % (__name__, 'CustomToken', key)
+
+
 class CustomToken(Token):
     """
     !!! Don't put this class into users app, CircularDependencyError would occurred
@@ -37,10 +95,56 @@ class CustomToken(Token):
     def refresh(token):
         assert isinstance(token, Token)
         user = token.user
+        CustomToken.clear_resolved_cache(token.key)
         token.delete()
         new_token = CustomToken.objects.create(user=user)
         return new_token
 
+    @staticmethod
+    def resolve(key):
+        """
+        解析token key, 返回(user_id, created, is_active)元组. 依次从进程内LRU, Redis缓存, 数据库中获取,
+        token不存在时返回None
+        """
+        resolved = token_lru.get(key)
+        if resolved:
+            return resolved
+
+        resolved = cache.get(make_token_cache_key(key))
+        if not resolved:
+            token = CustomToken.objects.select_related('user').filter(key=key).first()
+            if not token:
+                return None
+            resolved = (token.user_id, token.created, token.user.is_active)
+            cache.set(make_token_cache_key(key), resolved, timeout=TOKEN_CACHE_TIMEOUT)
+        token_lru.set(key, resolved)
+        return resolved
+
+    @staticmethod
+    def clear_resolved_cache(*keys):
+        """
+        清除token解析缓存(本进程LRU及Redis缓存), 其他进程LRU中的条目在TOKEN_LRU_TIMEOUT秒内过期
+        :param keys: token key
+        """
+        if not keys:
+            return
+        for key in keys:
+            token_lru.delete(key)
+        cache.delete_many([make_token_cache_key(key) for key in keys])
+
+    @staticmethod
+    def clear_users_resolved_cache(users):
+        """
+        清除指定用户的token解析缓存, 用户退出登录或被禁用(is_active=False)时调用
+        :param users: User对象, User对象列表或QuerySet
+        """
+        if not users:
+            return
+        if not isinstance(users, (list, tuple, set)) and not hasattr(users, 'model'):
+            users = [users]
+        keys = CustomToken.objects.filter(user__in=users).values_list('key', flat=True)
+        CustomToken.clear_resolved_cache(*keys)
+
     def refresh1(self):  # TODO: 需要测试该方法的可行性...
         """
         用原token刷新获取新的token
@@ -100,17 +204,27 @@ class CustomTokenAuthentication(TokenAuthentication):
         return self.authenticate_credentials(token)
 
     def authenticate_credentials(self, key):
-        model = self.get_model()
-        try:
-            token = model.objects.select_related('user').get(key=key)
-        except model.DoesNotExist:
+        """
+        通过token解析缓存认证, 缓存命中时不访问数据库. user对象从对象缓存中获取
+        """
+        resolved = CustomToken.resolve(key)
+        if not resolved:
             raise exceptions.AuthenticationFailed('Invalid token.')
 
-        if not token.user.is_active:
+        user_id, created, is_active = resolved
+        if not is_active:
             raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        token = CustomToken(key=key, user_id=user_id, created=created)
         if token.is_expired():
             raise AuthenticationTokenExpired('Token is expired')
-        return (token.user, token)
+
+        from users.models import User
+        user = User.objects.get_cached(user_id)
+        if not user or not user.is_active:
+            CustomToken.clear_resolved_cache(key)
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        token.user = user
+        return (user, token)
 
     def authenticate_header(self, request):
         return self.keyword
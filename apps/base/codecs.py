@@ -0,0 +1,105 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/14
+#
+
+"""
+对象缓存编解码器.
+
+    - pickle: 直接缓存模型实例(由django-redis序列化), 包含_state及所有实例属性
+    - fields: 仅缓存具体字段(concrete fields)的值, 以紧凑JSON存储, 读取时通过 Model.from_db 重建实例.
+              已缓存的正向/反向一对一关联对象(_state.fields_cache)一并编码, 避免重建后再次查询
+
+通过 settings.OBJECT_CACHE_CODEC 选择默认编解码器, 模型亦可通过 cache_codec 类属性单独指定.
+"""
+
+import json
+import logging
+
+from django.apps import apps
+from django.db import DEFAULT_DB_ALIAS
+
+from settings import OBJECT_CACHE_CODEC
+
+logger = logging.getLogger(__name__)
+
+NATIVE_TYPES = (str, int, float, bool)
+
+
+class PickleCodec(object):
+    """
+    直接缓存模型实例
+    """
+
+    def encode(self, obj):
+        return obj
+
+    def decode(self, model, data):
+        return data
+
+
+class FieldValuesCodec(object):
+    """
+    仅缓存字段值, 数据格式: [字段值列表, {关联对象缓存名: [模型label, 字段值列表, {...}] 或 null}]
+    """
+
+    max_depth = 2   # 关联对象最大编码层数
+
+    def encode(self, obj):
+        return json.dumps(self._encode(obj, 0), ensure_ascii=False, separators=(',', ':'))
+
+    def decode(self, model, data):
+        if not isinstance(data, str):  # 兼容以pickle方式缓存的旧数据
+            return data
+        try:
+            values, related = json.loads(data)
+            return self._decode(model, values, related)
+        except Exception as e:
+            logger.exception(e)
+            return None
+
+    def _encode(self, obj, depth):
+        values = []
+        for field in obj._meta.concrete_fields:
+            value = field.value_from_object(obj)
+            if value is not None and not isinstance(value, NATIVE_TYPES):
+                value = field.value_to_string(obj)
+                if not isinstance(value, str):  # 如FileField返回FieldFile对象
+                    value = str(value)
+            values.append(value)
+
+        related = {}
+        if depth < self.max_depth:
+            for name, rel_obj in obj._state.fields_cache.items():
+                if rel_obj is None:
+                    related[name] = None
+                elif hasattr(rel_obj, '_meta'):
+                    related[name] = [rel_obj._meta.label] + self._encode(rel_obj, depth + 1)
+        return [values, related]
+
+    def _decode(self, model, values, related):
+        fields = model._meta.concrete_fields
+        instance = model.from_db(
+            DEFAULT_DB_ALIAS, [field.attname for field in fields],
+            [None if value is None else field.to_python(value) for field, value in zip(fields, values)]
+        )
+        for name, rel_data in related.items():
+            if rel_data is None:
+                instance._state.fields_cache[name] = None
+            else:
+                label, rel_values, rel_related = rel_data
+                instance._state.fields_cache[name] = self._decode(apps.get_model(label), rel_values, rel_related)
+        return instance
+
+
+CODECS = {
+    'pickle': PickleCodec(),
+    'fields': FieldValuesCodec(),
+}
+
+
+def get_codec(model):
+    """
+    返回模型使用的缓存编解码器
+    """
+    return CODECS[getattr(model, 'cache_codec', None) or OBJECT_CACHE_CODEC]
@@ -0,0 +1,108 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/17
+#
+
+"""
+分页列表数据总数(total_count)统计策略. 在APIView中通过count_strategy类属性选择:
+
+    class MaintenancePlanListView(BaseAPIView):
+        count_strategy = CachedCount(timeout=60)
+
+    - ExactCount:     每次执行COUNT查询(默认)
+    - CachedCount:    精确总数按 (view, 查询条件) 缓存, 模型数据增删改后失效
+    - EstimatedCount: 使用MySQL EXPLAIN的行数估算值, 估算值低于阈值时仍返回精确总数
+"""
+
+import hashlib
+import logging
+
+from django.core.cache import cache
+from django.db import connections
+
+from base.models import get_cache_version, COUNT_VERSION_KEY_PREFIX
+
+logger = logging.getLogger(__name__)
+
+
+class ExactCount(object):
+    """
+    精确总数
+    """
+
+    def count(self, queryset, view=None):
+        """
+        :return: (总数, 是否为估算值)
+        """
+        return queryset.count(), False
+
+
+class CachedCount(ExactCount):
+    """
+    缓存的精确总数. 缓存key由view类, 模型总数版本号及查询SQL摘要组成,
+    模型数据增删改时版本号递增(见 base.models.bump_count_version), 关联表数据变更则依赖timeout过期
+    """
+
+    def __init__(self, timeout=60):
+        self.timeout = timeout
+
+    def make_key(self, queryset, view=None):
+        sql, params = queryset.query.sql_with_params()
+        digest = hashlib.md5(('%s%r' % (sql, params)).encode('utf-8')).hexdigest()
+        view_name = '%s.%s' % (type(view).__module__, type(view).__name__) if view else ''
+        return '%s.Count.%s.%s.%s' % (
+            __name__, view_name, get_cache_version(queryset.model, prefix=COUNT_VERSION_KEY_PREFIX), digest
+        )
+
+    def count(self, queryset, view=None):
+        key = self.make_key(queryset, view)
+        total_count = cache.get(key)
+        if total_count is None:
+            total_count = queryset.count()
+            cache.set(key, total_count, timeout=self.timeout)
+        return total_count, False
+
+
+class EstimatedCount(CachedCount):
+    """
+    估算总数. 使用MySQL EXPLAIN的rows估算值, 估算值不小于threshold时直接返回估算值,
+    否则返回(缓存的)精确总数. 非MySQL数据库及多表查询(关联/子查询)时退化为CachedCount
+    """
+
+    def __init__(self, threshold=10000, timeout=60):
+        super(EstimatedCount, self).__init__(timeout=timeout)
+        self.threshold = threshold
+
+    def explain_rows(self, queryset):
+        """
+        返回单表查询的估算行数(已按filtered比例折算), 无法估算时返回None.
+        EXPLAIN有多行(关联/子查询)时首行可能是外层表的全表扫描估算值, 与实际结果数相差很大, 不做估算
+        """
+        connection = connections[queryset.db]
+        if connection.vendor != 'mysql':
+            return None
+        try:
+            # 与count()一致, 不包含select_related关联及排序
+            sql, params = queryset.order_by().select_related(None).query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN ' + sql, params)
+                columns = [col[0] for col in cursor.description]
+                plan = cursor.fetchall()
+        except Exception as e:
+            logger.exception(e)
+            return None
+
+        if len(plan) != 1:
+            return None
+        row = dict(zip(columns, plan[0]))
+        rows = row.get('rows')
+        if rows is None:
+            return None
+        filtered = row.get('filtered')
+        return int(rows * float(filtered) / 100) if filtered is not None else int(rows)
+
+    def count(self, queryset, view=None):
+        estimated_rows = self.explain_rows(queryset)
+        if estimated_rows is not None and estimated_rows >= self.threshold:
+            return estimated_rows, True
+        return super(EstimatedCount, self).count(queryset, view)
@@ -0,0 +1,195 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/22
+#
+
+"""
+流式导出引擎. 数据通过 values_list().iterator(chunk_size) 分批读取, 只读取导出列且不创建模型对象,
+关联字段(如 creator__name)在同一查询中JOIN获取:
+
+    - xlsx: 使用openpyxl write_only模式逐行写入临时文件, 再以大块(EXPORT_RESPONSE_BLOCK_SIZE)流式返回,
+            返回完成后临时文件自动删除. 内存占用与导出行数无关
+    - csv:  逐行生成并直接写入StreamingHttpResponse, 无需临时文件
+
+    class XxxExporter(QuerySetExporter):
+        file_name = 'xxx'
+        sheet_name = 'Xxx'
+        columns = (
+            ExportColumn('标题', 'title'),
+            ExportColumn('创建人', 'creator__name'),
+            ExportColumn('创建时间', 'created_time', format_datetime),
+        )
+
+    return XxxExporter(queryset).xlsx_response()
+
+MySQL驱动执行iterator()时仍会一次性读取全部结果集, 大数据量导出时可指定keyset_field(唯一字段, 如id),
+按该字段倒序分批(WHERE id < 上批最后id LIMIT chunk_size)查询, 内存占用与总行数无关.
+"""
+
+import csv
+import logging
+import tempfile
+from collections import namedtuple
+from urllib.parse import quote
+
+from django.http import FileResponse, StreamingHttpResponse
+from openpyxl import Workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+from settings import EXPORT_CHUNK_SIZE, EXPORT_RESPONSE_BLOCK_SIZE
+from utils import times
+
+logger = logging.getLogger(__name__)
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+CSV_CONTENT_TYPE = 'text/csv; charset=utf-8'
+
+# 导出列: 表头, 查询字段(可跨关联, 如fault_type__title), 值格式化函数(可选)
+ExportColumn = namedtuple('ExportColumn', ('title', 'field', 'formatter'))
+ExportColumn.__new__.__defaults__ = (None, )
+
+
+def format_datetime(value):
+    return times.datetime_to_str(value) if value else ''
+
+
+def format_date(value):
+    return times.datetime_to_str(value, '%Y-%m-%d') if value else ''
+
+
+def format_choices(choices):
+    """
+    返回将choices值转为显示名称的格式化函数
+    """
+    choices_dict = dict(choices)
+    return lambda value: choices_dict.get(value, value)
+
+
+def clean_cell_value(value):
+    """
+    去除Excel不允许的控制字符, 否则openpyxl写入时抛出IllegalCharacterError
+    """
+    if isinstance(value, str):
+        return ILLEGAL_CHARACTERS_RE.sub('', value)
+    return value
+
+
+def attachment_header(file_name):
+    """
+    生成Content-Disposition响应头, 兼容中文文件名
+    """
+    return 'attachment;filename="{0}";filename*=UTF-8\'\'{0}'.format(quote(file_name))
+
+
+class ExportFileResponse(FileResponse):
+    block_size = EXPORT_RESPONSE_BLOCK_SIZE
+
+
+class _Echo(object):
+    """
+    csv.writer写入目标, 直接返回写入的行字符串
+    """
+
+    def write(self, value):
+        return value
+
+
+class QuerySetExporter(object):
+    """
+    QuerySet导出基类, 子类定义columns, file_name及sheet_name
+    """
+
+    columns = ()
+    file_name = 'export'
+    sheet_name = 'Sheet1'
+    chunk_size = EXPORT_CHUNK_SIZE
+    keyset_field = None     # 分批查询使用的唯一字段, 为None时使用queryset原有排序一次查询
+
+    def __init__(self, queryset, file_name=None):
+        self.queryset = queryset
+        self.file_name = file_name or self.file_name
+
+    def get_headers(self):
+        return [column.title for column in self.columns]
+
+    def iter_values(self, fields):
+        """
+        逐行生成查询字段值元组
+        """
+        if not self.keyset_field:
+            yield from self.queryset.values_list(*fields).iterator(chunk_size=self.chunk_size)
+            return
+
+        queryset = self.queryset.order_by('-%s' % self.keyset_field)
+        fields = list(fields) + [self.keyset_field]
+        last_value = None
+        while True:
+            chunk_queryset = queryset
+            if last_value is not None:
+                chunk_queryset = queryset.filter(**{'%s__lt' % self.keyset_field: last_value})
+            chunk = list(chunk_queryset.values_list(*fields)[:self.chunk_size])
+            for values in chunk:
+                yield values[:-1]
+            if len(chunk) < self.chunk_size:
+                return
+            last_value = chunk[-1][-1]
+
+    def iter_rows(self):
+        """
+        逐行生成导出数据(已格式化的值列表)
+        """
+        fields = [column.field for column in self.columns]
+        formatters = [column.formatter for column in self.columns]
+        for values in self.iter_values(fields):
+            yield [
+                formatter(value) if formatter else value for formatter, value in zip(formatters, values)
+            ]
+
+    def write_xlsx(self, fp):
+        """
+        以write_only模式将数据写入xlsx文件
+        :param fp: 文件路径或以二进制写模式打开的文件对象
+        :return: 写入的数据行数
+        """
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(self.sheet_name)
+        ws.append(self.get_headers())
+        count = 0
+        for row in self.iter_rows():
+            ws.append([clean_cell_value(value) for value in row])
+            count += 1
+        wb.save(fp)
+        return count
+
+    def iter_csv(self):
+        writer = csv.writer(_Echo())
+        yield '\ufeff'  # UTF-8 BOM, 使Excel正确识别中文
+        yield writer.writerow(self.get_headers())
+        for row in self.iter_rows():
+            yield writer.writerow(row)
+
+    def xlsx_response(self):
+        """
+        导出xlsx文件响应
+        """
+        temp_file = tempfile.TemporaryFile()
+        try:
+            self.write_xlsx(temp_file)
+        except Exception:
+            temp_file.close()
+            raise
+        size = temp_file.tell()
+        temp_file.seek(0)
+        # 响应结束时关闭(删除)临时文件
+        response = ExportFileResponse(temp_file, content_type=XLSX_CONTENT_TYPE)
+        response['Content-Length'] = size
+        response['Content-Disposition'] = attachment_header('%s.xlsx' % self.file_name)
+        return response
+
+    def csv_response(self):
+        """
+        导出csv文件响应, 边查询边返回
+        """
+        response = StreamingHttpResponse(self.iter_csv(), content_type=CSV_CONTENT_TYPE)
+        response['Content-Disposition'] = attachment_header('%s.csv' % self.file_name)
+        return response
@@ -0,0 +1,122 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/20
+#
+
+"""
+流式分块导入引擎. 数据行逐块(IMPORT_CHUNK_SIZE行)校验, 解析并在独立的事务(外层已有事务时为savepoint)中写入,
+内存占用只与块大小有关. 某一块校验或写入失败不影响其他块, 失败的行及原因记录在ImportResult中:
+
+    class XxxImporter(ChunkedImporter):
+        def validate_chunk(self, chunk):
+            ...                     # 校验失败的行调用 self.result.add_error(row_no, field, msg)
+            return objs             # 返回待写入的数据, 无可写入数据时返回None
+
+        def save_chunk(self, objs):
+            ...                     # 写入失败时抛出异常, 返回写入的行数
+
+    result = XxxImporter(rows, progress_callback=...).run()
+"""
+
+import logging
+from collections import namedtuple
+
+from django.db import transaction
+
+from settings import IMPORT_CHUNK_SIZE, IMPORT_MAX_REPORTED_ERRORS
+from utils.eggs import chunked
+
+logger = logging.getLogger(__name__)
+
+RowError = namedtuple('RowError', ('row_no', 'field', 'msg'))
+
+
+class ImportResult(object):
+    """
+    导入结果及进度
+    """
+
+    def __init__(self, expected=None, max_errors=IMPORT_MAX_REPORTED_ERRORS):
+        self.expected = expected    # 预计总行数, 未知时为None
+        self.total = 0              # 已处理行数
+        self.imported = 0           # 已成功写入行数
+        self.errors = []
+        self.errors_truncated = False
+        self.max_errors = max_errors
+
+    @property
+    def failed(self):
+        return self.total - self.imported
+
+    @property
+    def progress(self):
+        """
+        导入进度(0~100), 总行数未知时返回None
+        """
+        if not self.expected:
+            return None
+        return min(100, int(self.total * 100 / self.expected))
+
+    def add_error(self, row_no, field, msg):
+        if len(self.errors) >= self.max_errors:
+            self.errors_truncated = True
+            return
+        self.errors.append(RowError(row_no, field, msg))
+
+    def to_dict(self):
+        return {
+            'total': self.total,
+            'imported': self.imported,
+            'failed': self.failed,
+            'errors': [error._asdict() for error in self.errors],
+            'errors_truncated': self.errors_truncated,
+        }
+
+
+class ChunkedImporter(object):
+    """
+    分块导入基类, 子类实现validate_chunk及save_chunk方法
+    """
+
+    chunk_size = IMPORT_CHUNK_SIZE
+
+    def __init__(self, rows, expected=None, chunk_size=None, progress_callback=None):
+        """
+        :param rows: 数据行迭代器, 每个元素为(行号, 行数据)
+        :param expected: 预计总行数, 用于计算导入进度
+        :param progress_callback: 每处理完一块数据后回调, 参数为ImportResult
+        """
+        self.rows = rows
+        self.chunk_size = chunk_size or self.chunk_size
+        self.progress_callback = progress_callback
+        self.result = ImportResult(expected=expected)
+
+    def validate_chunk(self, chunk):
+        """
+        校验并解析一块数据
+        :param chunk: (行号, 行数据)列表
+        :return: 待写入的数据, 无可写入数据时返回None
+        """
+        raise NotImplementedError
+
+    def save_chunk(self, objs):
+        """
+        写入一块数据, 失败时抛出异常以回滚该块
+        :return: 写入的行数
+        """
+        raise NotImplementedError
+
+    def run(self):
+        for chunk in chunked(self.rows, self.chunk_size):
+            self.result.total += len(chunk)
+            objs = self.validate_chunk(chunk)
+            if objs:
+                try:
+                    with transaction.atomic():
+                        self.result.imported += self.save_chunk(objs)
+                except Exception as e:
+                    logger.exception(e)
+                    self.result.add_error(chunk[0][0], None, '第%s至%s行数据保存失败' % (chunk[0][0], chunk[-1][0]))
+            if self.progress_callback:
+                self.progress_callback(self.result)
+        return self.result
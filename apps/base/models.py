@@ -5,16 +5,158 @@
 #
 
 import logging
+import time
 
-from django.db import models
+from django.apps import apps
+from django.db import models, transaction
 from django.core.cache import cache
 from django.db.models import Manager
 from django.db.models.query import QuerySet
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from base.codecs import get_codec
+from settings import OBJECT_CACHE_VERSION_LOCAL_TIMEOUT, OBJECT_CACHE_BULK_INVALIDATE_THRESHOLD
 
 logger = logging.getLogger('django')
 
+CACHE_VERSION_KEY_PREFIX = '%s.CacheVersion.' % __name__
+COUNT_VERSION_KEY_PREFIX = '%s.CountVersion.' % __name__    # 列表数据总数缓存版本号
+
+_local_versions = {}    # (版本号key前缀, model label) -> (version, 进程内过期时间)
+
+
+def get_cache_version(model, prefix=CACHE_VERSION_KEY_PREFIX):
+    """
+    返回模型的对象缓存版本号. 版本号作为缓存key前缀, 递增版本号即可使该模型全部对象缓存失效.
+    版本号在进程内缓存 OBJECT_CACHE_VERSION_LOCAL_TIMEOUT 秒, 避免每次取缓存多一次Redis往返
+
+    :param prefix: 版本号key前缀, 区分对象缓存版本号(CACHE_VERSION_KEY_PREFIX)与
+                   总数缓存版本号(COUNT_VERSION_KEY_PREFIX)
+    """
+    label = model._meta.label
+    now = time.time()
+    local = _local_versions.get((prefix, label))
+    if local and local[1] > now:
+        return local[0]
+
+    key = prefix + label
+    version = cache.get(key)
+    if version is None:
+        # 以毫秒时间戳作为初始版本号, Redis被清空后新版本号也不会与旧版本号重复
+        version = int(now * 1000)
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key) or version
+    _local_versions[(prefix, label)] = (version, now + OBJECT_CACHE_VERSION_LOCAL_TIMEOUT)
+    return version
+
+
+def bump_cache_version(model, prefix=CACHE_VERSION_KEY_PREFIX):
+    """
+    递增模型的对象缓存版本号, O(1)使该模型全部对象缓存失效
+    """
+    key = prefix + model._meta.label
+    try:
+        version = cache.incr(key)
+    except ValueError:  # key不存在
+        version = int(time.time() * 1000)
+        cache.set(key, version, timeout=None)
+    _local_versions[(prefix, model._meta.label)] = (version, time.time() + OBJECT_CACHE_VERSION_LOCAL_TIMEOUT)
+    return version
+
+
+def bump_count_version(model):
+    """
+    模型数据增删改后, 使该模型相关的列表总数缓存失效. 若处于事务中, 事务提交后再递增一次
+    """
+    bump_cache_version(model, prefix=COUNT_VERSION_KEY_PREFIX)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: bump_cache_version(model, prefix=COUNT_VERSION_KEY_PREFIX))
+
+
+def bump_all_cache_versions():
+    """
+    递增所有BaseModel子类的缓存版本号
+    :return: 被刷新的模型列表
+    """
+    cached_models = [model for model in apps.get_models() if issubclass(model, BaseModel)]
+    for model in cached_models:
+        bump_cache_version(model)
+    return cached_models
+
+
+def clear_objects_cache(model, obj_ids):
+    """
+    按id批量清除对象缓存, 多表继承时同时清除父模型下同id的缓存.
+    若处于事务中, 事务提交后再清除一次, 防止提交前被其他请求以旧数据回填
+    """
+    keys = []
+    for cls in [model] + model._meta.get_parent_list():
+        manager = getattr(cls, 'objects', None)
+        if not isinstance(manager, BaseManager):
+            continue
+        version = manager.get_cache_version()
+        keys.extend([manager.make_key(obj_id, version=version) for obj_id in obj_ids])
+    if not keys:
+        return
+
+    cache.delete_many(keys)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+class CacheStats(object):
+    """
+    对象缓存命中统计
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return '<CacheStats hits=%s misses=%s>' % (self.hits, self.misses)
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return float(self.hits) / total if total else 0.0
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+
+
+_cache_stats = {}   # model label -> CacheStats
+
+
+class BaseQuerySet(QuerySet):
+
+    def update(self, **kwargs):
+        """
+        批量更新后清除受影响对象的缓存. 影响行数过多时直接递增模型缓存版本号(此时无需读取全部主键)
+        """
+        obj_ids = list(self.values_list('pk', flat=True)[:OBJECT_CACHE_BULK_INVALIDATE_THRESHOLD + 1])
+        rows = super(BaseQuerySet, self).update(**kwargs)
+        if len(obj_ids) > OBJECT_CACHE_BULK_INVALIDATE_THRESHOLD:
+            bump_cache_version(self.model)
+        elif obj_ids:
+            clear_objects_cache(self.model, obj_ids)
+        if rows:
+            bump_count_version(self.model)
+        return rows
+
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super(BaseQuerySet, self).bulk_create(objs, *args, **kwargs)
+        if objs:
+            bump_count_version(self.model)
+        return objs
+
 
 class BaseManager(Manager):
+    _queryset_class = BaseQuerySet
 
     def __init__(self):
         super(BaseManager, self).__init__()
@@ -63,32 +205,100 @@ class BaseManager(Manager):
         """
         通过对象id获取单个的缓存数据对象(仅从缓存中获取对象)
         """
-        return cache.get(self.make_key(obj_id)) if obj_id else None
+        if not obj_id:
+            return None
+        data = cache.get(self.make_key(obj_id))
+        return get_codec(self.model).decode(self.model, data) if data is not None else None
 
     def get_cached_many(self, obj_id_list):
         """
-        返回缓存中的多个对象列表, 通过id列表
-        :param obj_id_list:
-        :return:
+        通过id列表批量获取缓存对象. 缓存命中的对象直接返回, 未命中的通过一次 id__in 查询补齐,
+        并批量回写缓存(set_many).
+
+        :param obj_id_list: 对象id列表
+        :return: 与obj_id_list顺序一致的对象列表(重复id只返回一次, 不存在的id被忽略)
         """
         if not obj_id_list:
-            return None
-        obj_list_keys = []
+            return []
+
+        obj_ids, seen = [], set()
         for obj_id in obj_id_list:
-            obj_list_keys.append(self.make_key(obj_id))
-        objs = cache.get_many(obj_list_keys)
-        if not objs or len(objs) < len(obj_id_list):
-            objs = self.filter(id__in=obj_id_list)
-            if not objs:
-                return None
-            for obj in objs:
-                obj.cache()
-        return objs
+            try:
+                obj_id = int(obj_id)
+            except (TypeError, ValueError):
+                continue
+            if obj_id not in seen:
+                seen.add(obj_id)
+                obj_ids.append(obj_id)
+        if not obj_ids:
+            return []
+
+        version = self.get_cache_version()
+        keys = dict((self.make_key(obj_id, version=version), obj_id) for obj_id in obj_ids)
+        codec = get_codec(self.model)
+        objs = {}
+        for key, data in cache.get_many(list(keys.keys())).items():
+            obj = codec.decode(self.model, data)
+            if obj is not None:
+                objs[keys[key]] = obj
+        miss_ids = [obj_id for obj_id in obj_ids if obj_id not in objs]
+
+        stats = self.cache_stats
+        stats.hits += len(objs)
+        stats.misses += len(miss_ids)
+
+        if miss_ids:
+            try:
+                db_objs = dict((obj.id, obj) for obj in self.filter(id__in=miss_ids))
+            except Exception as e:
+                logger.exception(e)
+                db_objs = {}
+            if db_objs:
+                cache.set_many(
+                    dict((self.make_key(obj_id, version=version), codec.encode(obj))
+                         for obj_id, obj in db_objs.items()),
+                    timeout=self.model.default_timeout
+                )
+                objs.update(db_objs)
 
-    def make_key(self, obj_id):
-        """生成cache key """
-        # logger.debug('make cache key: %s%s%s' % (self.__module__, self.model.__name__, obj_id))
-        return u'%s%s%s' % (self.__module__, self.model.__name__, obj_id)
+        return [objs[obj_id] for obj_id in obj_ids if obj_id in objs]
+
+    @property
+    def cache_stats(self):
+        """
+        返回当前模型的批量缓存命中统计对象(进程内计数)
+        """
+        return _cache_stats.setdefault(self.model._meta.label, CacheStats())
+
+    def get_cache_version(self):
+        """返回当前模型的对象缓存版本号"""
+        return get_cache_version(self.model)
+
+    def update_by_ids(self, obj_ids, **kwargs):
+        """
+        按id批量更新: 单条UPDATE语句, 并以一次delete_many清除这些对象的缓存.
+        与QuerySet.update相比, 无需预先查询受影响对象的主键, 且不会因数量过多而使全部对象缓存失效
+        :return: 更新的行数
+        """
+        if not obj_ids:
+            return 0
+        rows = super(BaseQuerySet, self.filter(id__in=obj_ids)).update(**kwargs)
+        clear_objects_cache(self.model, obj_ids)
+        if rows:
+            bump_count_version(self.model)
+        return rows
+
+    def bump_cache_version(self):
+        """使当前模型的全部对象缓存失效"""
+        return bump_cache_version(self.model)
+
+    def make_key(self, obj_id, version=None):
+        """
+        生成cache key, 形如: nmis.devices.managersAssertDevice:<版本号>:<id>
+        """
+        if version is None:
+            version = self.get_cache_version()
+        return u'%s%s:%s:%s' % (self.__module__, self.model.__name__, version, obj_id)
 
     def clear_cache(self, objs):
         """
@@ -122,6 +332,7 @@ class BaseManager(Manager):
 
 class BaseModel(models.Model):
     default_timeout = 30 * 60    # 默认缓存30分钟, timeout=None 则表示永不过期
+    cache_codec = None           # 对象缓存编解码器名称, 为None时使用settings.OBJECT_CACHE_CODEC
 
     created_time = models.DateTimeField(u'创建时间', auto_now_add=True)
 
@@ -165,7 +376,30 @@ class BaseModel(models.Model):
         通过指定key缓存对象
         :param _key:
         """
-        cache.set(type(self).objects.make_key(_key), self, timeout=timeout if timeout else self.default_timeout)
+        cache.set(
+            type(self).objects.make_key(_key), get_codec(type(self)).encode(self),
+            timeout=timeout if timeout else self.default_timeout
+        )
                 
     def clear_cache(self):  # clear from cache
         cache.delete(type(self).objects.make_key(self.id))
+
+
+@receiver(post_save, dispatch_uid='base.models.invalidate_cache_on_save')
+def invalidate_cache_on_save(sender, instance, created=False, **kwargs):
+    """
+    对象保存后清除其缓存(下次 get_cached 时从数据库回填), 并使列表总数缓存失效
+    """
+    if not isinstance(instance, BaseModel) or instance.pk is None:
+        return
+    bump_count_version(sender)
+    if not created:
+        clear_objects_cache(sender, [instance.pk])
+
+
+@receiver(post_delete, dispatch_uid='base.models.invalidate_cache_on_delete')
+def invalidate_cache_on_delete(sender, instance, **kwargs):
+    if not isinstance(instance, BaseModel) or instance.pk is None:
+        return
+    bump_count_version(sender)
+    clear_objects_cache(sender, [instance.pk])
@@ -14,8 +14,8 @@ from django.shortcuts import render_to_response
 from django.template.context import RequestContext
 from rest_framework.response import Response as RestResponse
 
-from . import codes
-from utils.eggs import make_instance
+from . import audits, codes
+from utils.eggs import get_class_for_name
 
 logger = logging.getLogger(__name__)
 
@@ -220,21 +220,70 @@ def serialize_data(items, app_name=None, srl_cls_name=None):
         instance = items
         many = False
 
-    if app_name:
-        module_name = '%s.%s' % (app_name, SERIALIZABLE_MODULE_NAME)  # just like users.serializers
-    else:
-        # __module__ name such as: nmis.organs.models
-        module_str_list = instance.__module__.split('.')
-        # 定位models模板或包位置, 解决models模板转换为包产生的问题
-        module_str_list = module_str_list[:module_str_list.index('models')]
-        module_name = '%s.%s' % ('.'.join(module_str_list), SERIALIZABLE_MODULE_NAME)
-        # module_name = '%s.%s' % ('.'.join(instance.__module__.split('.')[:-1]), SERIALIZABLE_MODULE_NAME)
-
-    class_name = '%s%s' % (instance.__class__.__name__, SERIALIZABLE_CLASS_NAME) if not srl_cls_name else srl_cls_name
-    logger.debug('make_instance: module_name=%s class_name=%s items=' % (module_name, class_name))
-    logger.debug(items)
-
-    return make_instance(module_name, class_name, items, many=many).data
+    srl_cls = serializer_registry.get(type(instance), app_name=app_name, srl_cls_name=srl_cls_name)
+    logger.debug('serialize_data: serializer=%s many=%s items=%s', srl_cls.__name__, many, items)
+    if not audits.is_enabled():
+        return srl_cls(items, many=many).data
+    with audits.track_serialize(srl_cls, len(items) if many else 1):
+        return srl_cls(items, many=many).data
+
+
+class SerializerRegistry(object):
+    """
+    模型类 -> Serializer类 映射注册表.
+    默认Serializer在应用启动时注册(见 autodiscover), 指定名称的Serializer在首次使用时解析并缓存,
+    避免每次序列化都动态import模块
+    """
+
+    def __init__(self):
+        self._registry = {}
+
+    def register(self, model, srl_cls, app_name=None, srl_cls_name=None):
+        self._registry[(model, app_name, srl_cls_name)] = srl_cls
+
+    def get(self, model, app_name=None, srl_cls_name=None):
+        """
+        返回模型对应的Serializer类
+        :param model: 模型类
+        :param app_name: 同serialize_data参数
+        :param srl_cls_name: 同serialize_data参数
+        """
+        key = (model, app_name, srl_cls_name)
+        srl_cls = self._registry.get(key)
+        if srl_cls is None:
+            srl_cls = get_class_for_name(*self.get_class_path(model, app_name, srl_cls_name))
+            self._registry[key] = srl_cls
+        return srl_cls
+
+    @staticmethod
+    def get_class_path(model, app_name=None, srl_cls_name=None):
+        """
+        返回(Serializer模块名, Serializer类名)
+        """
+        if app_name:
+            module_name = '%s.%s' % (app_name, SERIALIZABLE_MODULE_NAME)  # just like users.serializers
+        else:
+            # __module__ name such as: nmis.organs.models
+            module_str_list = model.__module__.split('.')
+            # 定位models模板或包位置, 解决models模板转换为包产生的问题
+            module_str_list = module_str_list[:module_str_list.index('models')]
+            module_name = '%s.%s' % ('.'.join(module_str_list), SERIALIZABLE_MODULE_NAME)
+
+        class_name = '%s%s' % (model.__name__, SERIALIZABLE_CLASS_NAME) if not srl_cls_name else srl_cls_name
+        return module_name, class_name
+
+    def autodiscover(self, models):
+        """
+        注册模型的默认Serializer(XxxSerializer), 无默认Serializer的模型跳过
+        """
+        for model in models:
+            try:
+                self.get(model)
+            except (ImportError, AttributeError, ValueError):
+                continue
+
+
+serializer_registry = SerializerRegistry()
 
 
 class Response(RestResponse):
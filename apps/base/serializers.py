@@ -3,9 +3,22 @@
 # Created on 2013-8-6, by Junn
 #
 #
+import base64
+import binascii
+import json
 from collections import OrderedDict
+from functools import partial
+
+from django.conf import settings
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db.models import Manager, Q, QuerySet
+from django.utils.functional import cached_property
+from django.utils.dateparse import parse_datetime
 from rest_framework import serializers
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.settings import api_settings
+
+from base.exceptions import ParamsError
 
 
 class BaseModelSerializer(serializers.ModelSerializer):
@@ -52,6 +65,66 @@ class BaseModelSerializer(serializers.ModelSerializer):
         return queryset
 
 
+def split_ids(ids_str):
+    """
+    解析逗号分隔的id字符串, 如 '1,2,3' -> [1, 2, 3], 忽略非法id
+    """
+    if not ids_str:
+        return []
+    ids = []
+    for id_str in ids_str.split(','):
+        try:
+            ids.append(int(id_str))
+        except ValueError:
+            continue
+    return ids
+
+
+def load_objects_by_ids_strs(model, ids_strs):
+    """
+    通过多个逗号分隔的id字符串批量获取对象(优先从缓存中获取, 未命中的一次查询)
+    :param model: 模型类
+    :param ids_strs: id字符串列表, 如 ['1,2', '3']
+    :return: 字典, 对象id -> 对象
+    """
+    obj_ids = []
+    for ids_str in ids_strs:
+        obj_ids.extend(split_ids(ids_str))
+    return dict((obj.id, obj) for obj in model.objects.get_cached_many(obj_ids))
+
+
+class PrefetchListSerializer(serializers.ListSerializer):
+    """
+    序列化整个列表前调用 child.prefetch(objs), 使子Serializer可对整页数据批量加载关联数据,
+    避免在SerializerMethodField中逐行查询. 用法: 子Serializer的Meta中设置
+    list_serializer_class = PrefetchListSerializer, 并实现prefetch方法
+    """
+
+    def to_representation(self, data):
+        objs = list(data.all() if isinstance(data, Manager) else data)
+        self.child.prefetch(objs)
+        return super(PrefetchListSerializer, self).to_representation(objs)
+
+
+class CountStrategyPaginator(DjangoPaginator):
+    """
+    使用指定统计策略(见base.counts)计算总数的Paginator
+    """
+
+    def __init__(self, object_list, per_page, count_strategy=None, view=None, **kwargs):
+        super(CountStrategyPaginator, self).__init__(object_list, per_page, **kwargs)
+        self.count_strategy = count_strategy
+        self.view = view
+        self.count_estimated = False
+
+    @cached_property
+    def count(self):
+        if self.count_strategy is None or not isinstance(self.object_list, QuerySet):
+            return super(CountStrategyPaginator, self).count
+        total_count, self.count_estimated = self.count_strategy.count(self.object_list, self.view)
+        return total_count
+
+
 class PlugPageNumberPagination(PageNumberPagination):
     """
     定制DRF框架默认的PageNumberPagination, 使分页返回结果添加需要的字段.
@@ -71,6 +144,22 @@ class PlugPageNumberPagination(PageNumberPagination):
     page_size_result_param = 'page_size'            # 每页数据量
     current_page_result_param = 'current_page'      # 当前第几页
     total_count_result_param = 'total_count'        # 数据总数量
+    count_estimated_result_param = 'count_estimated'    # 数据总数量是否为估算值, 仅估算时返回
+
+    view = None
+    count_strategy = None
+
+    @property
+    def django_paginator_class(self):
+        return partial(CountStrategyPaginator, count_strategy=self.count_strategy, view=self.view)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        :param view: 若view定义了count_strategy, 则按该策略统计数据总数
+        """
+        self.view = view
+        self.count_strategy = getattr(view, 'count_strategy', None)
+        return super(PlugPageNumberPagination, self).paginate_queryset(queryset, request, view=view)
 
     def get_paginated_stuff(self):
         """
@@ -83,10 +172,105 @@ class PlugPageNumberPagination(PageNumberPagination):
                 }
         """
 
-        return {
-            self.paging_result_param: OrderedDict([
-                (self.current_page_result_param, self.page.number),
-                (self.page_size_result_param,    len(self.page)),       # 每页的数量
-                (self.total_count_result_param,  self.page.paginator.count),  # queryset结果总数
-            ])}
+        paging = OrderedDict([
+            (self.current_page_result_param, self.page.number),
+            (self.page_size_result_param,    len(self.page)),       # 每页的数量
+            (self.total_count_result_param,  self.page.paginator.count),  # queryset结果总数
+        ])
+        if getattr(self.page.paginator, 'count_estimated', False):
+            paging[self.count_estimated_result_param] = True
+        return {self.paging_result_param: paging}
+
+
+
+class KeysetPagination(object):
+    """
+    基于(created_time, id)的游标分页. 以 WHERE (created_time, id) < (上一页末条记录) 代替 OFFSET,
+    翻页越深耗时不变. 仅当view定义了count_strategy时才统计数据总数.
+
+    请求参数:
+        cursor: 游标, 首页传空值(cursor=), 之后传上一次响应paging中的next值
+        size:   每页多少条数据
+
+    返回数据形如:
+        "paging": {
+            "page_size": 10,
+            "next": "WyIyMDE4LTEyLTE1VDEwOjAwOjAwKzAwOjAwIiwgMTAwXQ"   # 无下一页时为null
+        }
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = PlugPageNumberPagination.page_size_query_param
+
+    paging_result_param = PlugPageNumberPagination.paging_result_param
+    page_size_result_param = PlugPageNumberPagination.page_size_result_param
+    next_result_param = 'next'
+    total_count_result_param = PlugPageNumberPagination.total_count_result_param
+    count_estimated_result_param = PlugPageNumberPagination.count_estimated_result_param
+
+    ordering = ('-created_time', '-id')
+
+    def __init__(self):
+        self.page = []
+        self.next_cursor = None
+        self.total_count = None
+        self.count_estimated = False
 
+    def get_page_size(self, request):
+        page_size = api_settings.PAGE_SIZE
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            pass
+        max_page_size = settings.REST_FRAMEWORK.get('MAX_PAGE_SIZE') or page_size
+        return max(1, min(page_size, max_page_size))
+
+    @staticmethod
+    def encode_cursor(obj):
+        position = json.dumps([obj.created_time.isoformat(), obj.id], separators=(',', ':'))
+        return base64.urlsafe_b64encode(position.encode('utf-8')).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """
+        :return: (created_time, id), 游标不合法时抛出ParamsError
+        """
+        try:
+            position = base64.urlsafe_b64decode((cursor + '=' * (-len(cursor) % 4)).encode('ascii'))
+            created_time, obj_id = json.loads(position.decode('utf-8'))
+            created_time = parse_datetime(created_time)
+            if created_time is None:
+                raise ValueError(cursor)
+            return created_time, int(obj_id)
+        except (TypeError, ValueError, UnicodeError, binascii.Error):
+            raise ParamsError('cursor')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_size = self.get_page_size(request)
+        count_strategy = getattr(view, 'count_strategy', None)
+        if count_strategy is not None:
+            self.total_count, self.count_estimated = count_strategy.count(queryset, view)
+
+        queryset = queryset.order_by(*self.ordering)
+        cursor = request.query_params.get(self.cursor_query_param, '').strip()
+        if cursor:
+            created_time, obj_id = self.decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(created_time__lt=created_time) | Q(created_time=created_time, id__lt=obj_id)
+            )
+
+        self.page = list(queryset[:page_size + 1])
+        if len(self.page) > page_size:
+            self.page = self.page[:page_size]
+            self.next_cursor = self.encode_cursor(self.page[-1])
+        return self.page
+
+    def get_paginated_stuff(self):
+        paging = OrderedDict([
+            (self.page_size_result_param, len(self.page)),
+            (self.next_result_param, self.next_cursor),
+        ])
+        if self.total_count is not None:
+            paging[self.total_count_result_param] = self.total_count
+            if self.count_estimated:
+                paging[self.count_estimated_result_param] = True
+        return {self.paging_result_param: paging}
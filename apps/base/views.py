@@ -18,6 +18,7 @@ from base import codes, resp
 from base.exceptions import ParamsError, CsrfError, AuthenticationTokenExpired
 from settings import DEBUG
 from .resp import LeanResponse
+from .serializers import KeysetPagination
 
 
 class BaseAPIView(GenericAPIView):
@@ -25,6 +26,28 @@ class BaseAPIView(GenericAPIView):
     customize the APIView for customize exception response
     """
 
+    # 是否支持基于(created_time, id)的游标分页. 开启后, 请求中带cursor参数时get_pages使用游标分页,
+    # 否则仍使用页码分页
+    keyset_pagination = False
+
+    # 分页数据总数统计策略(见base.counts), 为None时页码分页执行精确COUNT, 游标分页不统计总数
+    count_strategy = None
+
+    def use_keyset_pagination(self):
+        """
+        当前请求是否使用游标分页. 游标分页固定按(created_time, id)倒序, 结果需按其他字段排序时子类应返回False
+        """
+        return self.keyset_pagination and KeysetPagination.cursor_query_param in self.request.query_params
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.use_keyset_pagination():
+                self._paginator = KeysetPagination()
+            else:
+                self._paginator = self.pagination_class() if self.pagination_class else None
+        return self._paginator
+
     def check_object_any_permissions(self, request, obj):
         """
         检查是否满足任意某个权限(满足其中一个即可, 模仿check_object_permissions)
@@ -70,23 +93,19 @@ class BaseAPIView(GenericAPIView):
         :param allOrAny: 默认为字符串"ALL",还可以为"ANY"
         :return: 返回权限域标识List集合(Department类实例ID集合）
         """
-        roles = request.user.get_roles()
-        roles_tmp = []
+        perms = request.user.get_perms()
         dept_ids = []
-        if not perm_keys or not roles:
+        if not perm_keys or not perms.role_ids:
             return dept_ids
 
         if allOrAny == "ALL":
             for key in perm_keys:
-                for role in roles:
-                    for perm in role.get_permissions():
-                        if key == perm.id:
-                            roles_tmp.append(role)
-            for r in roles_tmp:
-                departments = r.get_user_role_dept_domains(request.user)
-                for dept in departments:
-                    dept_ids.append(dept.id)
+                for role_id in perms.role_ids:
+                    if key in perms.role_perm_ids.get(role_id, ()):
+                        dept_ids.extend(perms.get_role_dept_ids(role_id))
         if allOrAny == "ANY":
+            roles = request.user.get_roles()
+            roles_tmp = []
             for key in perm_keys:
                 for role in roles:
                     for perm in role.get_permissions():
@@ -148,7 +167,7 @@ class BaseAPIView(GenericAPIView):
         :return:
         """
         single_page = self.paginate_queryset(obj_list)
-        if single_page:
+        if single_page is not None:
             obj_list = single_page
         response = resp.serialize_response(
             obj_list, srl_cls_name=srl_cls_name, results_name=results_name
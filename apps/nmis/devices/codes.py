@@ -0,0 +1,132 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/24
+#
+
+"""
+资产设备编码索引: 条形码/资产编号/序列号到设备id的映射, 存放在一个Redis hash中, 供扫码查询使用:
+
+    HGET nmis.devices.codes.AssertDeviceCodeIndex b:<条形码>      -> 设备id
+    HGET nmis.devices.codes.AssertDeviceCodeIndex a:<资产编号>    -> 设备id
+    HGET nmis.devices.codes.AssertDeviceCodeIndex s:<序列号>      -> 设备id
+
+设备保存/删除时同步(见signals.py). 索引项可能过期(事务回滚, QuerySet.update直接修改编码等), 因此查询方须以设备
+实际编码校验索引结果, 校验失败时视为未命中并回退到数据库查询, 见AssertDeviceManager.lookup_by_codes
+"""
+
+import logging
+
+from django_redis import get_redis_connection
+
+from nmis.devices.consts import ASSERT_DEVICE_CODE_FIELDS
+
+logger = logging.getLogger(__name__)
+
+CODE_INDEX_KEY = '%s.AssertDeviceCodeIndex' % __name__
+
+_FIELD_PREFIXES = dict(ASSERT_DEVICE_CODE_FIELDS)
+
+
+def _get_connection():
+    return get_redis_connection('default')
+
+
+def make_index_field(code_field, code):
+    return '%s:%s' % (_FIELD_PREFIXES[code_field], code)
+
+
+def get_device_codes(device):
+    """
+    返回资产设备的[(编码字段, 编码)], 空编码不参与索引
+    """
+    return [
+        (code_field, getattr(device, code_field))
+        for code_field, _ in ASSERT_DEVICE_CODE_FIELDS if getattr(device, code_field)
+    ]
+
+
+def _make_mapping(devices):
+    mapping = {}
+    for device in devices:
+        for code_field, code in get_device_codes(device):
+            mapping[make_index_field(code_field, code)] = device.id
+    return mapping
+
+
+def get_device_ids(codes, code_fields):
+    """
+    通过一次HMGET查询编码对应的设备id
+    :param codes: 编码列表
+    :param code_fields: 参与匹配的编码字段
+    :return: {(编码字段, 编码): 设备id}, 未命中的编码不在结果中, Redis不可用时返回空dict
+    """
+    keys = [(code_field, code) for code in codes for code_field in code_fields]
+    if not keys:
+        return {}
+    try:
+        values = _get_connection().hmget(
+            CODE_INDEX_KEY, [make_index_field(code_field, code) for code_field, code in keys]
+        )
+    except Exception as e:
+        logger.exception(e)
+        return {}
+    return dict((key, int(value)) for key, value in zip(keys, values) if value is not None)
+
+
+def index_devices(devices):
+    """
+    写入资产设备的编码索引
+    :param devices: 资产设备列表
+    """
+    mapping = _make_mapping(devices)
+    if not mapping:
+        return True
+    try:
+        _get_connection().hmset(CODE_INDEX_KEY, mapping)
+        return True
+    except Exception as e:
+        logger.exception(e)
+        return False
+
+
+def remove_codes(code_items):
+    """
+    删除编码索引项
+    :param code_items: [(编码字段, 编码)]
+    """
+    if not code_items:
+        return True
+    try:
+        _get_connection().hdel(
+            CODE_INDEX_KEY, *[make_index_field(code_field, code) for code_field, code in code_items]
+        )
+        return True
+    except Exception as e:
+        logger.exception(e)
+        return False
+
+
+def rebuild_index(device_batches):
+    """
+    重建编码索引: 先写入临时key, 全部写入后RENAME替换, 重建过程中原索引仍可正常查询
+    :param device_batches: 资产设备列表的迭代器, 每次产出一批设备
+    :return: 写入索引的设备数, 失败时返回None
+    """
+    building_key = CODE_INDEX_KEY + '.building'
+    total = 0
+    try:
+        conn = _get_connection()
+        conn.delete(building_key)
+        for devices in device_batches:
+            mapping = _make_mapping(devices)
+            if mapping:
+                conn.hmset(building_key, mapping)
+            total += len(devices)
+        if conn.exists(building_key):
+            conn.rename(building_key, CODE_INDEX_KEY)
+        else:
+            conn.delete(CODE_INDEX_KEY)
+        return total
+    except Exception as e:
+        logger.exception(e)
+        return None
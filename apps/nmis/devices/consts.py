@@ -50,14 +50,20 @@ ASSERT_DEVICE_STATE_CHOICES = (
 
 # 资产设备变更操作类型
 ASSERT_DEVICE_OPERATION_SUBMIT = 'SMT'
+ASSERT_DEVICE_OPERATION_UPDATE = 'UPD'
 ASSERT_DEVICE_OPERATION_ALLOCATION = 'LAC'
 ASSERT_DEVICE_OPERATION_SCRAP = 'SCP'
 ASSERT_DEVICE_OPERATION_REPAIR = 'RPR'
+ASSERT_DEVICE_OPERATION_MAINTENANCE = 'MTN'
+ASSERT_DEVICE_OPERATION_DELETE = 'DEL'
 ASSERT_DEVICE_OPERATION_CHOICES = (
     (ASSERT_DEVICE_OPERATION_SUBMIT, '提交'),
+    (ASSERT_DEVICE_OPERATION_UPDATE, '修改'),
     (ASSERT_DEVICE_OPERATION_ALLOCATION, '调配'),
     (ASSERT_DEVICE_OPERATION_SCRAP, '报废'),
     (ASSERT_DEVICE_OPERATION_REPAIR, '维修'),
+    (ASSERT_DEVICE_OPERATION_MAINTENANCE, '维护保养'),
+    (ASSERT_DEVICE_OPERATION_DELETE, '删除'),
 )
 
 # 报修单优先级
@@ -74,6 +80,17 @@ PRIORITY_CHOICES = (
     (PRIORITY_EMERGENCY, '紧急'),
     (PRIORITY_URGENT, '非常紧急'),
 )
+# 报修单自动分派: 优先级权重, 未设置优先级的报修单按REPAIR_ORDER_DEFAULT_PRIORITY排队及分派
+REPAIR_ORDER_PRIORITY_WEIGHTS = {
+    PRIORITY_LOW: 1, PRIORITY_MEDIUM: 2, PRIORITY_HIGH: 3, PRIORITY_EMERGENCY: 4, PRIORITY_URGENT: 5,
+}
+REPAIR_ORDER_DEFAULT_PRIORITY = PRIORITY_MEDIUM
+# 优先级每高一级, 在分派队列中相当于提前排队的时长(秒). 等待足够久的低优先级报修单可排在新提交的高优先级报修单之前
+REPAIR_ORDER_DISPATCH_PRIORITY_STEP = 2 * 60 * 60
+# 每位维修工程师处理中的报修单数达到该值时不再自动分派
+REPAIR_ORDER_DISPATCH_MAX_WORKLOAD = 10
+# 单次自动分派的最大报修单数
+REPAIR_ORDER_AUTO_DISPATCH_MAX_COUNT = 200
 # 报修单状态
 REPAIR_ORDER_STATUS_SUBMITTED = 'SMT'
 REPAIR_ORDER_STATUS_DOING = 'DNG'
@@ -102,6 +119,13 @@ REPAIR_ORDER_OPERATION_CHOICES = (
     (REPAIR_ORDER_OPERATION_COMMENT, '评价'),
     (REPAIR_ORDER_OPERATION_CLOSE, '关闭')
 )
+# 报修单操作引起的状态变化: {操作: (操作前状态, 操作后状态)}, 用于增量更新报修单每日统计
+REPAIR_ORDER_OPERATION_TRANSITIONS = {
+    REPAIR_ORDER_OPERATION_SUBMIT: (None, REPAIR_ORDER_STATUS_SUBMITTED),
+    REPAIR_ORDER_OPERATION_DISPATCH: (REPAIR_ORDER_STATUS_SUBMITTED, REPAIR_ORDER_STATUS_DOING),
+    REPAIR_ORDER_OPERATION_HANDLE: (REPAIR_ORDER_STATUS_DOING, REPAIR_ORDER_STATUS_DONE),
+    REPAIR_ORDER_OPERATION_COMMENT: (REPAIR_ORDER_STATUS_DONE, REPAIR_ORDER_STATUS_CLOSED),
+}
 # 保修列表请求操作类型
 MY_REPAIR_ORDERS = 'MRO'
 TO_DISPATCH_ORDERS = 'TDO'
@@ -137,11 +161,22 @@ MAINTENANCE_PLAN_PERIOD_MEASURE_WEEK = 'W'
 MAINTENANCE_PLAN_PERIOD_MEASURE_DAY = 'D'
 
 MAINTENANCE_PLAN_PERIOD_MEASURE_CHOICES = (
-    ('MAINTENANCE_PLAN_PERIOD_MEASURE_YEAR', '年'),
-    ('MAINTENANCE_PLAN_PERIOD_MEASURE_MONTH', '月'),
-    ('MAINTENANCE_PLAN_PERIOD_MEASURE_WEEK', '周'),
-    ('MAINTENANCE_PLAN_PERIOD_MEASURE_DAY', '日'),
+    (MAINTENANCE_PLAN_PERIOD_MEASURE_YEAR, '年'),
+    (MAINTENANCE_PLAN_PERIOD_MEASURE_MONTH, '月'),
+    (MAINTENANCE_PLAN_PERIOD_MEASURE_WEEK, '周'),
+    (MAINTENANCE_PLAN_PERIOD_MEASURE_DAY, '日'),
 )
+# 执行周期计量单位对应的relativedelta参数
+MAINTENANCE_PLAN_PERIOD_UNITS = {
+    MAINTENANCE_PLAN_PERIOD_MEASURE_YEAR: 'years',
+    MAINTENANCE_PLAN_PERIOD_MEASURE_MONTH: 'months',
+    MAINTENANCE_PLAN_PERIOD_MEASURE_WEEK: 'weeks',
+    MAINTENANCE_PLAN_PERIOD_MEASURE_DAY: 'days',
+}
+# 维护计划周期生成范围: 截止日期在当前时间起该天数内的周期(须覆盖"一个月内到期")
+MAINTENANCE_PLAN_SCHEDULE_HORIZON_DAYS = 62
+# 每次为单个维护计划最多生成的周期数
+MAINTENANCE_PLAN_SCHEDULE_MAX_OCCURRENCES = 1000
 MAINTENANCE_PLAN_EXPIRED_DATE_ON_MONTH = 'OM'
 MAINTENANCE_PLAN_EXPIRED_DATE_ON_WEEK = 'OW'
 MAINTENANCE_PLAN_EXPIRED_DATE_THREE_DAY = 'TD'
@@ -175,6 +210,8 @@ MAINTENANCE_PLAN_NO_PREFIX = 'HP'
 MAINTENANCE_PLAN_NO_SEQ_CODE = SEQ_MAINTAIN_PLAN_NO
 # 维护单自增序列标识支持的最大位数
 MAINTENANCE_PLAN_NO_SEQ_DIGITS = 3
+# 报修单号/维护计划编号已被占用(Redis序列数据丢失或不可用)时重新分配编号的最大尝试次数
+ORDER_NO_ALLOCATE_ATTEMPTS = 3
 
 
 # 上传的医疗资产设备excel模板文件表头字典
@@ -251,4 +288,35 @@ UPLOADED_MEDICAL_DEVICE_CATE_EXCEL_HEADER_DICT = {
     'purpose':                  '预期用途',
     'example':                  '品名举例',
     'mgt_cate':                 '管理类别',
-}
\ No newline at end of file
+}
+
+# 资产设备搜索: 参与n-gram索引的字段及其排序权重
+ASSERT_DEVICE_SEARCH_FIELD_WEIGHTS = (
+    ('assert_no', 5),
+    ('serial_no', 5),
+    ('bar_code', 5),
+    ('title', 3),
+    ('producer', 1),
+)
+ASSERT_DEVICE_SEARCH_NGRAM_SIZE = 2         # 切分词元长度(二元组, 适用于中文及编号)
+ASSERT_DEVICE_SEARCH_MAX_RESULTS = 1000     # 单次搜索返回的最大设备数
+
+# 资产设备扫码查询: 参与匹配的编码字段(按匹配优先级排列)及其在Redis编码索引中的field前缀
+ASSERT_DEVICE_CODE_FIELDS = (
+    ('bar_code', 'b'),
+    ('assert_no', 'a'),
+    ('serial_no', 's'),
+)
+ASSERT_DEVICE_SCAN_MAX_CODES = 200          # 单次批量扫码查询的最大编码数
+
+# 资产设备库存汇总维度. 存放地点及医疗器械分类维度中, 设备同时计入其所有上级地址/上级分类, group_id为0表示未设置
+ASSERT_DEVICE_INVENTORY_HOSPITAL = 'HO'         # 全院, group_id固定为0
+ASSERT_DEVICE_INVENTORY_USE_DEPT = 'UD'
+ASSERT_DEVICE_INVENTORY_STORAGE_PLACE = 'SP'
+ASSERT_DEVICE_INVENTORY_MEDICAL_DEVICE_CATE = 'MC'
+ASSERT_DEVICE_INVENTORY_DIMENSION_CHOICES = (
+    (ASSERT_DEVICE_INVENTORY_HOSPITAL,              '全院'),
+    (ASSERT_DEVICE_INVENTORY_USE_DEPT,              '使用科室'),
+    (ASSERT_DEVICE_INVENTORY_STORAGE_PLACE,         '存放地点'),
+    (ASSERT_DEVICE_INVENTORY_MEDICAL_DEVICE_CATE,   '医疗器械分类'),
+)
@@ -0,0 +1,117 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/25
+#
+
+"""
+报修单分派队列: 待分派报修单id存放在一个Redis有序集合中, score由优先级及提交时间计算, score越小越先分派:
+
+    score = 提交时间戳 - 优先级权重 * REPAIR_ORDER_DISPATCH_PRIORITY_STEP
+
+报修单提交时入队, 分派事务提交后出队(见events.py). 队列项可能过期(事务回滚, 直接修改数据库等), 因此自动分派时须
+锁定并校验报修单状态, 非待分派状态的报修单视为过期项并从队列中删除, 见RepairOrderManager.auto_dispatch_repair_orders
+"""
+
+import logging
+
+from django_redis import get_redis_connection
+
+from nmis.devices.consts import REPAIR_ORDER_PRIORITY_WEIGHTS, REPAIR_ORDER_DEFAULT_PRIORITY, \
+    REPAIR_ORDER_DISPATCH_PRIORITY_STEP
+
+logger = logging.getLogger(__name__)
+
+DISPATCH_QUEUE_KEY = '%s.RepairOrderDispatchQueue' % __name__
+
+
+def _get_connection():
+    return get_redis_connection('default')
+
+
+def make_score(repair_order):
+    weight = REPAIR_ORDER_PRIORITY_WEIGHTS.get(
+        repair_order.priority or REPAIR_ORDER_DEFAULT_PRIORITY,
+        REPAIR_ORDER_PRIORITY_WEIGHTS[REPAIR_ORDER_DEFAULT_PRIORITY]
+    )
+    return repair_order.created_time.timestamp() - weight * REPAIR_ORDER_DISPATCH_PRIORITY_STEP
+
+
+def _make_pairs(repair_orders):
+    pairs = []
+    for repair_order in repair_orders:
+        pairs.extend((make_score(repair_order), repair_order.id))
+    return pairs
+
+
+def enqueue_orders(repair_orders):
+    """
+    待分派报修单入队, 已在队列中的报修单更新其score
+    """
+    pairs = _make_pairs(repair_orders)
+    if not pairs:
+        return True
+    try:
+        _get_connection().zadd(DISPATCH_QUEUE_KEY, *pairs)
+        return True
+    except Exception as e:
+        logger.exception(e)
+        return False
+
+
+def remove_orders(order_ids):
+    """
+    报修单出队
+    """
+    if not order_ids:
+        return True
+    try:
+        _get_connection().zrem(DISPATCH_QUEUE_KEY, *order_ids)
+        return True
+    except Exception as e:
+        logger.exception(e)
+        return False
+
+
+def get_queued_ids(count):
+    """
+    按分派顺序返回队首的报修单id列表, 不出队. Redis不可用时返回空列表
+    """
+    try:
+        return [int(order_id) for order_id in _get_connection().zrange(DISPATCH_QUEUE_KEY, 0, count - 1)]
+    except Exception as e:
+        logger.exception(e)
+        return []
+
+
+def get_queue_size():
+    try:
+        return _get_connection().zcard(DISPATCH_QUEUE_KEY)
+    except Exception as e:
+        logger.exception(e)
+        return 0
+
+
+def rebuild_queue(order_batches):
+    """
+    重建分派队列: 先写入临时key, 全部写入后RENAME替换
+    :param order_batches: 待分派报修单列表的迭代器, 每次产出一批报修单
+    :return: 入队的报修单数, 失败时返回None
+    """
+    building_key = DISPATCH_QUEUE_KEY + '.building'
+    total = 0
+    try:
+        conn = _get_connection()
+        conn.delete(building_key)
+        for repair_orders in order_batches:
+            pairs = _make_pairs(repair_orders)
+            if pairs:
+                conn.zadd(building_key, *pairs)
+            total += len(repair_orders)
+        if conn.exists(building_key):
+            conn.rename(building_key, DISPATCH_QUEUE_KEY)
+        else:
+            conn.delete(DISPATCH_QUEUE_KEY)
+        return total
+    except Exception as e:
+        logger.exception(e)
+        return None
@@ -0,0 +1,139 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/25
+#
+
+"""
+报修单状态变更事件. RepairOrderManager在提交/分派/处理/评价报修单时显式创建事件, 事件携带已加载的报修单,
+操作人及接收人, 不再由post_save根据当前状态推断状态变化:
+
+    emit_repair_order_events([
+        RepairOrderEvent(repair_order, REPAIR_ORDER_OPERATION_DISPATCH, dispatcher, receiver=maintainer),
+    ])
+
+一次调用中的事件通过一次bulk_create写入报修单操作记录, 事务提交后由notice_celery_app异步推送消息.
+提交事件在事务提交后将报修单加入分派队列, 分派事件在事务提交后将报修单移出分派队列(见dispatch.py).
+报修单每日统计(RepairOrderDailyStat)随事件在同一事务中增量更新
+"""
+
+import logging
+
+from django.db import transaction
+
+from nmis.devices import dispatch as dispatch_queue
+from nmis.devices.consts import REPAIR_ORDER_OPERATION_SUBMIT, REPAIR_ORDER_OPERATION_DISPATCH, \
+    REPAIR_ORDER_OPERATION_HANDLE, REPAIR_ORDER_OPERATION_COMMENT
+from nmis.hospitals.consts import ROLE_CODE_REPAIR_ORDER_DISPATCHER
+from utils import times
+
+logger = logging.getLogger(__name__)
+
+
+def _staff_label(staff):
+    return '%s(%s)' % (staff.name, staff.dept.name if staff.dept else '')
+
+
+class RepairOrderEvent(object):
+    """
+    报修单状态变更事件
+    """
+
+    def __init__(self, repair_order, operation, operator, receiver=None, reason=''):
+        """
+        :param repair_order: 报修单
+        :param operation: 操作, REPAIR_ORDER_OPERATION_CHOICES
+        :param operator: 操作人
+        :param receiver: 操作的接收方(分派时为维修工程师)
+        :param reason: 操作原因
+        """
+        self.repair_order = repair_order
+        self.operation = operation
+        self.operator = operator
+        self.receiver = receiver
+        self.reason = reason
+        self.time = times.now()
+
+    def get_msg_content(self):
+        order_no = self.repair_order.order_no
+        if self.operation == REPAIR_ORDER_OPERATION_SUBMIT:
+            return '%s提交了报修单(%s)' % (_staff_label(self.operator), order_no)
+        if self.operation == REPAIR_ORDER_OPERATION_DISPATCH:
+            return '%s已分派了报修单(%s)给%s' % (_staff_label(self.operator), order_no, _staff_label(self.receiver))
+        if self.operation == REPAIR_ORDER_OPERATION_HANDLE:
+            return '%s已处理完报修单(%s)' % (_staff_label(self.operator), order_no)
+        if self.operation == REPAIR_ORDER_OPERATION_COMMENT:
+            return '%s评论了报修单(%s)' % (_staff_label(self.operator), order_no)
+        return '%s操作了报修单(%s)' % (_staff_label(self.operator), order_no)
+
+    def to_record(self):
+        from nmis.devices.models import RepairOrderRecord
+        return RepairOrderRecord(
+            repair_order=self.repair_order, operation=self.operation, reason=self.reason,
+            operator=self.operator, receiver=self.receiver, msg_content=self.get_msg_content()[:128],
+        )
+
+    def get_notices(self):
+        """
+        事件需推送的消息
+        :return: send_notice任务参数dict列表
+        """
+        order_no = self.repair_order.order_no
+        prefix = '%s于%s: ' % (self.operator.name, times.datetime_strftime(d_date=self.time))
+        if self.operation == REPAIR_ORDER_OPERATION_SUBMIT:
+            return [{
+                'message': prefix + '提交报修申请,请尽快处理!', 'role_codename': ROLE_CODE_REPAIR_ORDER_DISPATCHER,
+            }]
+        if self.operation == REPAIR_ORDER_OPERATION_DISPATCH:
+            return [
+                {
+                    'message': prefix + '向你分派了报修单-%s,请尽快处理!' % order_no,
+                    'staff_ids': [self.receiver.id],
+                },
+                {
+                    'message': prefix + '报修单-%s 已分配,维修工程师-%s!' % (order_no, self.receiver.name),
+                    'staff_ids': [self.repair_order.creator_id],
+                },
+            ]
+        if self.operation == REPAIR_ORDER_OPERATION_HANDLE:
+            return [{
+                'message': prefix + '报修单-%s 已处理,维修工程师-%s!' % (order_no, self.operator.name),
+                'staff_ids': [self.repair_order.creator_id],
+            }]
+        if self.operation == REPAIR_ORDER_OPERATION_COMMENT and self.repair_order.maintainer_id:
+            return [{
+                'message': prefix + '评价了单号-%s' % order_no, 'staff_ids': [self.repair_order.maintainer_id],
+            }]
+        return []
+
+
+def emit_repair_order_events(events):
+    """
+    持久化报修单状态变更事件(一次bulk_create), 事务提交后异步推送消息.
+    应在状态变更所在的事务中调用, 写入失败时抛出异常, 由调用方回滚
+    """
+    if not events:
+        return
+    from nmis.devices.models import RepairOrderRecord, RepairOrderDailyStat
+    RepairOrderRecord.objects.bulk_create([event.to_record() for event in events])
+    RepairOrderDailyStat.objects.track_events(events)
+
+    # 入队/出队均在事务提交后: 未提交的报修单对自动分派不可见, 提前入队会被当作过期项删除; 回滚后报修单仍须在队列中
+    submitted = [event.repair_order for event in events if event.operation == REPAIR_ORDER_OPERATION_SUBMIT]
+    if submitted:
+        transaction.on_commit(lambda: dispatch_queue.enqueue_orders(submitted))
+    dispatched_ids = [event.repair_order.id for event in events if event.operation == REPAIR_ORDER_OPERATION_DISPATCH]
+    if dispatched_ids:
+        transaction.on_commit(lambda: dispatch_queue.remove_orders(dispatched_ids))
+
+    notices = [notice for event in events for notice in event.get_notices()]
+    if notices:
+        transaction.on_commit(lambda: send_notices(notices))
+
+
+def send_notices(notices):
+    from nmis.notices.tasks import send_notice
+    for notice in notices:
+        try:
+            send_notice.delay(**notice)
+        except Exception as e:
+            logger.exception(e)
@@ -0,0 +1,55 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/22
+#
+
+"""
+设备运维相关数据导出
+"""
+
+import logging
+
+from base.exports import QuerySetExporter, ExportColumn, format_datetime, format_date, format_choices
+from nmis.devices.consts import ASSERT_DEVICE_CATE_CHOICES, ASSERT_DEVICE_STATUS_CHOICES
+
+logger = logging.getLogger(__name__)
+
+
+class FaultSolutionExporter(QuerySetExporter):
+    file_name = 'operation-maintenance-knowledge'
+    sheet_name = '知识库-故障问题解决方案'
+    columns = (
+        ExportColumn('标题', 'title'),
+        ExportColumn('解决方案', 'solution'),
+        ExportColumn('故障类型', 'fault_type__title'),
+        ExportColumn('贡献人', 'creator__name'),
+        ExportColumn('创建时间', 'created_time', format_datetime),
+    )
+
+
+class AssertDeviceExporter(QuerySetExporter):
+    """
+    资产设备导出. 按id倒序分批查询, 支持百万级数据导出
+    """
+    file_name = 'assert-devices'
+    sheet_name = '资产设备'
+    keyset_field = 'id'
+    columns = (
+        ExportColumn('资产编号', 'assert_no'),
+        ExportColumn('资产名称', 'title'),
+        ExportColumn('资产设备类型', 'cate', format_choices(ASSERT_DEVICE_CATE_CHOICES)),
+        ExportColumn('医疗器械分类', 'medical_device_cate__title'),
+        ExportColumn('资产序列号', 'serial_no'),
+        ExportColumn('规格型号', 'type_spec'),
+        ExportColumn('预计使用年限', 'service_life'),
+        ExportColumn('资产负责人', 'performer__name'),
+        ExportColumn('使用科室', 'use_dept__name'),
+        ExportColumn('负责科室', 'responsible_dept__name'),
+        ExportColumn('出厂日期', 'production_date', format_date),
+        ExportColumn('设备条形码', 'bar_code'),
+        ExportColumn('厂家', 'producer'),
+        ExportColumn('存放地点', 'storage_place__title'),
+        ExportColumn('购入日期', 'purchase_date', format_date),
+        ExportColumn('资产状态', 'status', format_choices(ASSERT_DEVICE_STATUS_CHOICES)),
+        ExportColumn('创建时间', 'created_time', format_datetime),
+    )
@@ -7,11 +7,13 @@ import logging
 
 from base.forms import BaseForm
 from nmis.devices.consts import ASSERT_DEVICE_STATUS_CHOICES, ASSERT_DEVICE_CATE_CHOICES, \
-    MAINTENANCE_PLAN_TYPE_CHOICES, PRIORITY_CHOICES, ASSERT_DEVICE_CATE_INFORMATION, \
-    ASSERT_DEVICE_CATE_MEDICAL, MdcManageCateEnum
+    MAINTENANCE_PLAN_TYPE_CHOICES, PRIORITY_CHOICES, \
+    ASSERT_DEVICE_CATE_MEDICAL, MdcManageCateEnum, REPAIR_ORDER_AUTO_DISPATCH_MAX_COUNT, \
+    MAINTENANCE_PLAN_PERIOD_MEASURE_CHOICES
 from nmis.devices.models import AssertDevice, FaultType, RepairOrder, MaintenancePlan, FaultSolution, MedicalDeviceCate
 from utils import eggs
 from utils.times import now
+from nmis.hospitals.consts import ROLE_CODE_MAINTAINER
 from nmis.hospitals.models import Staff, Department, HospitalAddress
 
 from collections import defaultdict
@@ -351,7 +353,6 @@ class AssertDeviceCreateForm(BaseForm):
             assert_data['producer'] = self.data.get('producer', '').strip()
 
         assert_device = AssertDevice.objects.create_assert_device(**assert_data)
-        assert_device.cache()
         return assert_device
 
 
@@ -830,6 +831,77 @@ class RepairOrderDispatchForm(BaseForm):
         return RepairOrder.objects.dispatch_repair_order(self.repair_order, self.user_profile, maintainer, priority)
 
 
+class RepairOrderAutoDispatchForm(BaseForm):
+    """
+    从分派队列中批量自动分派报修单. 未指定维修工程师时, 分派给本医院所有拥有维修工程师角色的员工
+    """
+
+    def __init__(self, user_profile, data, *args, **kwargs):
+        BaseForm.__init__(self, data, *args, **kwargs)
+        self.user_profile = user_profile
+        self.data = data
+        self.maintainers = []
+        self.init_err_codes()
+
+    def init_err_codes(self):
+        self.ERR_CODES.update({
+            'count_error': '分派数量为空或数据错误',
+            'count_limit': '单次最多分派{}个报修单',
+            'maintainer_error': '维修工为空或数据错误',
+            'maintainer_empty': '无可分派的维修工程师',
+        })
+
+    def is_valid(self):
+        if not self.check_count() or not self.check_maintainers():
+            return False
+        return True
+
+    def check_count(self):
+        try:
+            count = int(self.data.get('count'))
+        except (TypeError, ValueError):
+            self.update_errors('count', 'count_error')
+            return False
+        if count <= 0:
+            self.update_errors('count', 'count_error')
+            return False
+        if count > REPAIR_ORDER_AUTO_DISPATCH_MAX_COUNT:
+            self.update_errors('count', 'count_limit', REPAIR_ORDER_AUTO_DISPATCH_MAX_COUNT)
+            return False
+        return True
+
+    def check_maintainers(self):
+        maintainers = Staff.objects.filter(
+            organ=self.user_profile.organ, is_deleted=False, user__role__codename=ROLE_CODE_MAINTAINER
+        ).distinct().order_by('id')
+        maintainer_ids = self.data.get('maintainer_ids')
+        if maintainer_ids:
+            if not isinstance(maintainer_ids, list):
+                self.update_errors('maintainer_ids', 'maintainer_error')
+                return False
+            try:
+                maintainer_ids = set(int(maintainer_id) for maintainer_id in maintainer_ids)
+            except (TypeError, ValueError):
+                self.update_errors('maintainer_ids', 'maintainer_error')
+                return False
+            maintainers = maintainers.filter(id__in=maintainer_ids)
+            self.maintainers = list(maintainers.select_related('dept'))
+            if len(self.maintainers) < len(maintainer_ids):
+                self.update_errors('maintainer_ids', 'maintainer_error')
+                return False
+            return True
+        self.maintainers = list(maintainers.select_related('dept'))
+        if not self.maintainers:
+            self.update_errors('maintainer_ids', 'maintainer_empty')
+            return False
+        return True
+
+    def save(self):
+        return RepairOrder.objects.auto_dispatch_repair_orders(
+            self.user_profile, self.maintainers, int(self.data.get('count'))
+        )
+
+
 class RepairOrderHandleForm(BaseForm):
 
     def __init__(self, user_profile, repair_order, data, *args, **kwargs):
@@ -1001,11 +1073,34 @@ class MaintenancePlanCreateForm(BaseForm):
                 'expired_date_format_err':          '{}: 日期为空或格式错误',
                 'start_date_lt_current_date':       '{}: 不能小于当前日期',
                 'expired_date_lt_current_date':     '{}: 不能小于当前日期',
+                'period_measure_err':               '执行周期单位错误',
+                'period_num_err':                   '执行周期数应为正整数',
             }
         )
 
     def is_valid(self):
-        if not self.check_type() or not self.check_date():
+        if not self.check_type() or not self.check_date() or not self.check_period():
+            return False
+        return True
+
+    def check_period(self):
+        """
+        校验执行周期(可选), 执行周期单位及周期数须同时提供
+        """
+        period_measure = self.data.get('period_measure')
+        period_num = self.data.get('period_num')
+        if not period_measure and not period_num:
+            return True
+        if period_measure not in dict(MAINTENANCE_PLAN_PERIOD_MEASURE_CHOICES):
+            self.update_errors('period_measure', 'period_measure_err')
+            return False
+        try:
+            period_num = int(period_num)
+        except (TypeError, ValueError):
+            self.update_errors('period_num', 'period_num_err')
+            return False
+        if period_num <= 0:
+            self.update_errors('period_num', 'period_num_err')
             return False
         return True
 
@@ -1057,6 +1152,9 @@ class MaintenancePlanCreateForm(BaseForm):
             'executor': self.executor,
             'creator': self.creator
         }
+        if self.data.get('period_measure'):
+            maintenance_plan_data['period_measure'] = self.data.get('period_measure')
+            maintenance_plan_data['period_num'] = int(self.data.get('period_num'))
         return MaintenancePlan.objects.create_maintenance_plan(
             self.storage_places, self.assert_devices, **maintenance_plan_data)
 
@@ -1286,19 +1384,26 @@ class FaultSolutionUpdateForm(BaseForm):
 
 class AssertDeviceBatchUploadForm(BaseForm):
     """
-    批量导入资产设备表单验证
+    批量导入资产设备表单验证. 逐行遍历一次完成所有字段校验, 并收集全部行错误;
+    资产编号/序列号/条形码是否已存在, 及部门/负责人/存储地点/医疗分类编号是否存在, 均在遍历后各用一次IN查询校验
     """
 
-    def __init__(self, data, creator, cate, *args, **kwargs):
+    def __init__(self, data, creator, cate, row_nos=None, *args, **kwargs):
+        """
+        :param data: 行数据列表
+        :param row_nos: 各行数据在Excel中的行号, 默认从第2行开始连续编号(分块导入时由导入引擎传入)
+        """
         BaseForm.__init__(self, data, creator, cate, *args, **kwargs)
         self.creator = creator
         self.cate = cate
-        self.default_dict = defaultdict(list)
-        self.performer_list = None
-        self.use_dept_list = None
-        self.res_dept_list = None
-        self.storage_place_list = None
-        self.medical_device_cate_list = None
+        self.row_nos = row_nos or list(range(2, len(data) + 2))
+        self.row_errors = []        # 所有行错误: (行号, 字段, 错误消息)
+        self.invalid_indexes = set()
+        # 校验通过后解析得到的关联对象, 名称/编号 -> 对象
+        self.performers = {}
+        self.depts = {}
+        self.storage_places = {}
+        self.medical_device_cates = {}
 
         self.init_err_codes()
 
@@ -1336,327 +1441,169 @@ class AssertDeviceBatchUploadForm(BaseForm):
 
         })
 
-    def is_valid(self):
-        if not self.check_medical_device_cate() or not self.check_serial_no()\
-                or not self.check_performer() or not self.check_medical_code()\
-                or not self.check_use_dept() or not self.check_responsible_dept()\
-                or not self.check_storage_place() or not self.check_assert_no()\
-                or not self.check_type_spec() or not self.check_production_date()\
-                or not self.check_purchase_date() or not self.check_status()\
-                or not self.check_service_life() or not self.check_assert_title()\
-                or not self.check_bar_code():
-            return False
-        return True
-
-    def check_assert_title(self):
-
-        for row_data in self.data:
-            title = row_data.get('title')
-            if not title or not isinstance(title, str):
-                self.update_errors('assert_title', 'assert_title_err', self.data.index(row_data)+2)
-                return False
-            if not title.strip():
-                self.update_errors('assert_title', 'assert_title_err', self.data.index(row_data)+2)
-                return False
-            if len(title.strip()) > 30:
-                self.update_errors('assert_title', 'assert_title_limit_size', self.data.index(row_data)+2)
-                return False
-        return True
-
-    def check_assert_no(self):
-        assert_no_list = []
-        for row_data in self.data:
-            assert_no = row_data.get('assert_no')
-            if not assert_no or not isinstance(assert_no, str):
-                self.update_errors('assert_no', 'assert_no_null_err', self.data.index(row_data)+2)
-                return False
-            if not assert_no.strip():
-                self.update_errors('assert_no', 'assert_no_null_err', self.data.index(row_data)+2)
-                return False
-            if len(assert_no.strip()) > 30:
-                self.update_errors('assert_no', 'assert_no_limit_size', self.data.index(row_data)+2)
-                return False
-            assert_no_list.append(assert_no.strip())
-
-        if not len(set(assert_no_list)) == len(assert_no_list):
-            self.update_errors('assert_no', 'assert_no_repeat_err')
-            return False
-
-        assert_devices = AssertDevice.objects.filter(assert_no__in=assert_no_list)
-        assert_no_db_list = [assert_device.assert_no for assert_device in assert_devices]
-
-        for assert_no in assert_no_list:
-            if assert_no in assert_no_db_list:
-                self.update_errors('assert_no', 'assert_no_exists', assert_no)
-                return False
-        return True
-
-    def check_serial_no(self):
-        serial_no_list = []
-        for row_data in self.data:
-            serial_no = row_data.get('serial_no')
-            if not serial_no or not isinstance(serial_no, str):
-                self.update_errors('serial_no', 'serial_no_null_err', self.data.index(row_data)+2)
-                return False
-            if not serial_no.strip():
-                self.update_errors('serial_no', 'serial_no_null_err', self.data.index(row_data)+2)
-                return False
-            if len(serial_no.strip()) > 30:
-                self.update_errors('serial_no', 'serial_no_limit_size', self.data.index(row_data)+2)
-                return False
-            serial_no_list.append(serial_no.strip())
-
-        if not len(set(serial_no_list)) == len(serial_no_list):
-            self.update_errors('serial_no', 'serial_no_repeat_err')
-            return False
-        # 校验数据库中属否存在相关序列号信息
-        assert_devices = AssertDevice.objects.filter(serial_no__in=serial_no_list)
-        assert_device_serial_no = [assert_device.serial_no for assert_device in assert_devices]
-
-        for serial_no in serial_no_list:
-            if serial_no in assert_device_serial_no:
-                self.update_errors('serial_no', 'serial_no_exists', serial_no)
-                return False
-        return True
-
-    def check_bar_code(self):
-        bar_code_list = []
-        for row_data in self.data:
-            bar_code = row_data.get('bar_code')
-            if not bar_code:
-                continue
-            if not isinstance(bar_code, str):
-                self.update_errors('bar_code', 'bar_code_err', self.data.index(row_data)+2)
-                return False
-            if not bar_code.strip():
-                self.update_errors('bar_code', 'bar_code_err', self.data.index(row_data)+2)
-                continue
-            if len(bar_code.strip()) > 30:
-                self.update_errors('bar_code', 'bar_code_limit_size', self.data.index(row_data)+2)
-                return False
-            bar_code_list.append(bar_code.strip())
-
-        if not len(set(bar_code_list)) == len(bar_code_list):
-            self.update_errors('bar_code', 'bar_code_repeat_err')
-            return False
-
-        assert_devices = AssertDevice.objects.filter(bar_code__in=bar_code_list)
-        assert_device_bar_codes = [assert_device.bar_code for assert_device in assert_devices]
-
-        for bar_code in bar_code_list:
-            if bar_code in assert_device_bar_codes:
-                self.update_errors('bar_code', 'bar_code_exists', bar_code)
-                return False
-        return True
-
-    def check_use_dept(self):
-        use_dept_list = []
-        for row_data in self.data:
-            use_dept_list.append(row_data.get('use_dept', '').strip())
-        use_dept_db_list = Department.objects.filter(name__in=set(use_dept_list))
-        use_dept_names = [dept_db.name for dept_db in use_dept_db_list]
-
-        if not len(set(use_dept_list)) == len(use_dept_db_list):
-            for dept in use_dept_list:
-                if dept not in use_dept_names:
-                    self.update_errors('use_dept', 'use_dept_err', dept)
-                    return False
-        self.use_dept_list = use_dept_db_list
-        return True
-
-    def check_performer(self):
-        performer_list = []
-        for row_data in self.data:
-            performer_list.append(row_data.get('performer', '').strip())
-        performer_db_list = Staff.objects.filter(name__in=set(performer_list))
-        performer_names = [performer_db.name for performer_db in performer_db_list]
-
-        if not len(set(performer_list)) == len(performer_names):
-            for performer_name in performer_list:
-                if performer_name not in performer_names:
-                    self.update_errors('performer', 'performer_err', performer_name)
-            return False
-        self.performer_list = performer_db_list
-        return True
-
-    def check_responsible_dept(self):
-        # 检验数据库是否存在相关负责部门信息
-        res_dept_list = []
-        for row_data in self.data:
-            res_dept_list.append(row_data.get('responsible_dept', '').strip())
-        resp_dept_db_list = Department.objects.filter(name__in=set(res_dept_list))
-        resp_dept_db_names = [resp_dept_db.name for resp_dept_db in resp_dept_db_list]
-
-        if not len(set(res_dept_list)) == len(resp_dept_db_names):
-            for dept_name in res_dept_list:
-                if dept_name not in resp_dept_db_names:
-                    self.update_errors('resp_dept', 'resp_dept_err', dept_name)
-                    return False
-        self.res_dept_list = resp_dept_db_list
-        return True
-
-    def check_medical_code(self):
-        # 检验数据库中是否存在医院68码分类编号相关信息
-        if self.cate == ASSERT_DEVICE_CATE_INFORMATION:
-            return True
-        code_list = []
-        for row_data in self.data:
-            code_list.append(row_data.get('code', '').strip())
-
-        if not len(code_list) == len(self.data):
-            self.update_errors('medical_code', 'medical_code_null_err')
-            return False
-
-        medical_device_cate_db_list = MedicalDeviceCate.objects.exclude(parent=None).filter(code__in=set(code_list))
-
-        medical_device_cate_db_codes = [
-            medical_device_cate.code for medical_device_cate in medical_device_cate_db_list
-        ]
-
-        if not len(set(code_list)) == len(medical_device_cate_db_codes):
-            for code in set(code_list):
-                if code not in medical_device_cate_db_codes:
-                    self.update_errors('medical_code', 'medical_code_err', code)
-            return False
+    def add_row_error(self, index, field_name, err_key, *args):
+        """
+        记录行错误. errors中每个字段仅保留第一个错误, 全部错误记录在row_errors中
+        """
+        msg = self.get_err_msg(err_key, *args)
+        self.row_errors.append((self.row_nos[index], field_name, msg))
+        self.invalid_indexes.add(index)
+        if field_name not in self.errors:
+            self.errors[field_name] = msg
 
-        self.medical_device_cate_list = medical_device_cate_db_list
-        return True
+    @property
+    def valid_count(self):
+        return len(self.data) - len(self.invalid_indexes)
 
-    def check_medical_device_cate(self):
-        # 校验医疗分类类型
-        if self.cate == ASSERT_DEVICE_CATE_INFORMATION:
-            return True
-        medical_device_cate_list = []
-        for row_data in self.data:
-            medical_device_cate_list.append(row_data.get('medical_device_cate', '').strip())
-        if not len(medical_device_cate_list) == len(self.data):
-            self.update_errors('medical_device_cate', 'medical_device_cate_err')
-            return False
-        return True
+    def is_valid(self):
+        is_medical = self.cate == ASSERT_DEVICE_CATE_MEDICAL
+        status_values = set(dict(ASSERT_DEVICE_STATUS_CHOICES).values())
+        # 唯一字段: 值 -> 首次出现的行索引; 关联字段: 名称 -> 行索引列表
+        unique_values = {'assert_no': {}, 'serial_no': {}, 'bar_code': {}}
+        related_values = {
+            'performer': defaultdict(list), 'use_dept': defaultdict(list), 'resp_dept': defaultdict(list),
+            'storage_place': defaultdict(list), 'medical_code': defaultdict(list),
+        }
 
-    def check_storage_place(self):
+        for index, row_data in enumerate(self.data):
+            title = row_data.get('title')
+            if not title or not isinstance(title, str) or not title.strip():
+                self.add_row_error(index, 'assert_title', 'assert_title_err', self.row_nos[index])
+            elif len(title.strip()) > 30:
+                self.add_row_error(index, 'assert_title', 'assert_title_limit_size', self.row_nos[index])
 
-        # 检验数据库中是否存在存储地点相关信息
-        storage_place_list = []
-        for row_data in self.data:
-            storage_place_list.append(row_data.get('storage_place', '').strip())
-        storage_place_db_list = HospitalAddress.objects.exclude(parent=None).filter(title__in=set(storage_place_list))
-        storage_place_titles = [storage_place_db.title for storage_place_db in storage_place_db_list]
-
-        if not len(set(storage_place_list)) == len(storage_place_titles):
-            for storage_place_title in storage_place_list:
-                if storage_place_title not in storage_place_titles:
-                    self.update_errors('storage_place', 'storage_place_err', storage_place_title)
-                    return False
-        self.storage_place_list = storage_place_db_list
-        return True
+            for field_name, required, max_size in (('assert_no', True, 30), ('serial_no', True, 30),
+                                                   ('bar_code', False, 30)):
+                self._check_unique_field(index, row_data, field_name, required, max_size, unique_values[field_name])
 
-    def check_type_spec(self):
-        for row_data in self.data:
             type_spec = row_data.get('type_spec')
-            if not type_spec or not isinstance(type_spec, str):
-                self.update_errors('type_spec', 'type_spec_err')
-                return False
-            if not type_spec.strip():
-                self.update_errors('type_spec', 'type_spec_err')
-                return False
-            if len(type_spec.strip()) > 30:
-                self.update_errors('type_spec', 'type_spec_limit_size')
-                return False
-        return True
+            if not type_spec or not isinstance(type_spec, str) or not type_spec.strip():
+                self.add_row_error(index, 'type_spec', 'type_spec_err')
+            elif len(type_spec.strip()) > 30:
+                self.add_row_error(index, 'type_spec', 'type_spec_limit_size')
 
-    def check_production_date(self):
-        for row_data in self.data:
-            production_date = row_data.get('production_date')
-            if not production_date or not isinstance(production_date, str):
-                self.update_errors('production_date', 'production_date_err')
-                return False
-            if not production_date.strip():
-                self.update_errors('production_date', 'production_date_err')
-                return False
-            if not eggs.check_day(production_date.strip()):
-                self.update_errors('production_date', 'production_date_err')
-                return False
-        return True
+            for field_name in ('production_date', 'purchase_date'):
+                value = row_data.get(field_name)
+                if not value or not isinstance(value, str) or not eggs.check_day(value.strip()):
+                    self.add_row_error(index, field_name, '%s_err' % field_name)
 
-    def check_purchase_date(self):
-        for row_data in self.data:
-            purchase_date = row_data.get('purchase_date')
-            if not purchase_date or not isinstance(purchase_date, str):
-                self.update_errors('purchase_date', 'purchase_date_err')
-                return False
-            if not purchase_date.strip():
-                self.update_errors('purchase_date', 'purchase_date_err')
-                return False
-            if not eggs.check_day(purchase_date.strip()):
-                self.update_errors('purchase_date', 'purchase_date_err')
-                return False
-        return True
-
-    def check_status(self):
-
-        for row_data in self.data:
             status = row_data.get('status')
-            if not status or not isinstance(status, str):
-                self.update_errors('status', 'status_null_err')
-                return False
-            if not status.strip():
-                self.update_errors('status', 'status_null_err')
-                return False
-            if status.strip() not in dict(ASSERT_DEVICE_STATUS_CHOICES).values():
-                self.update_errors('status', 'status_err', status.strip())
-                return False
-        return True
+            if not status or not isinstance(status, str) or not status.strip():
+                self.add_row_error(index, 'status', 'status_null_err')
+            elif status.strip() not in status_values:
+                self.add_row_error(index, 'status', 'status_err', status.strip())
 
-    def check_service_life(self):
-        for row_data in self.data:
             service_life = row_data.get('service_life')
             if not service_life:
-                self.update_errors('service_life', 'service_life_null_err')
-                return False
-            if not isinstance(row_data.get('service_life'), int):
-                self.update_errors('service_life', 'service_life_data_type_err')
-                return False
-        return True
+                self.add_row_error(index, 'service_life', 'service_life_null_err')
+            elif not isinstance(service_life, int):
+                self.add_row_error(index, 'service_life', 'service_life_data_type_err')
+
+            related_values['performer'][self._strip(row_data.get('performer'))].append(index)
+            related_values['use_dept'][self._strip(row_data.get('use_dept'))].append(index)
+            related_values['resp_dept'][self._strip(row_data.get('responsible_dept'))].append(index)
+            related_values['storage_place'][self._strip(row_data.get('storage_place'))].append(index)
+            if is_medical:
+                code = self._strip(row_data.get('code'))
+                if not code:
+                    self.add_row_error(index, 'medical_code', 'medical_code_null_err')
+                else:
+                    related_values['medical_code'][code].append(index)
+
+        # 唯一字段是否已存在于系统中. 数据库排序规则不区分大小写, 返回值的大小写可能与表中不同, 按小写匹配行
+        for field_name, values in unique_values.items():
+            if not values:
+                continue
+            indexes = dict((value.lower(), index) for value, index in values.items())
+            db_values = AssertDevice.objects.filter(
+                **{'%s__in' % field_name: list(values)}).values_list(field_name, flat=True)
+            for value in db_values:
+                index = indexes.get(value.lower())
+                if index is not None:
+                    self.add_row_error(index, field_name, '%s_exists' % field_name, value)
+
+        # 关联数据是否存在于系统中
+        self.performers = self._resolve_related(
+            related_values['performer'], Staff.objects.all(), 'name', 'performer', 'performer_err')
+        self.depts = self._resolve_related(
+            related_values['use_dept'], Department.objects.all(), 'name', 'use_dept', 'use_dept_err')
+        self.depts.update(self._resolve_related(
+            related_values['resp_dept'], Department.objects.all(), 'name', 'resp_dept', 'resp_dept_err'))
+        self.storage_places = self._resolve_related(
+            related_values['storage_place'], HospitalAddress.objects.exclude(parent=None),
+            'title', 'storage_place', 'storage_place_err'
+        )
+        if is_medical:
+            self.medical_device_cates = self._resolve_related(
+                related_values['medical_code'], MedicalDeviceCate.objects.exclude(parent=None),
+                'code', 'medical_code', 'medical_code_err'
+            )
+        return not self.row_errors
+
+    @staticmethod
+    def _strip(value):
+        if value is None:
+            return ''
+        return value.strip() if isinstance(value, str) else str(value).strip()
+
+    def _check_unique_field(self, index, row_data, field_name, required, max_size, seen_values):
+        """
+        校验资产编号/序列号/条形码: 非空(条形码可为空), 长度, 表中是否重复
+        """
+        value = row_data.get(field_name)
+        if not value:
+            if required:
+                self.add_row_error(index, field_name, '%s_null_err' % field_name, self.row_nos[index])
+            return
+        if not isinstance(value, str) or not value.strip():
+            err_key = '%s_null_err' % field_name if required else '%s_err' % field_name
+            self.add_row_error(index, field_name, err_key, self.row_nos[index])
+            return
+        value = value.strip()
+        if len(value) > max_size:
+            self.add_row_error(index, field_name, '%s_limit_size' % field_name, self.row_nos[index])
+        elif value in seen_values:
+            self.add_row_error(index, field_name, '%s_repeat_err' % field_name)
+        else:
+            seen_values[value] = index
+
+    def _resolve_related(self, indexes_by_name, queryset, attr_name, field_name, err_key):
+        """
+        批量查询关联对象, 不存在的名称对应的所有行记录错误
+        :param indexes_by_name: 名称 -> 行索引列表
+        :return: 名称 -> 对象(重名时取第一个)
+        """
+        objs = {}
+        names = [name for name in indexes_by_name if name]
+        if names:
+            for obj in queryset.filter(**{'%s__in' % attr_name: names}):
+                objs.setdefault(getattr(obj, attr_name), obj)
+        for name, indexes in indexes_by_name.items():
+            if name not in objs:
+                for index in indexes:
+                    self.add_row_error(index, field_name, err_key, name)
+        return objs
 
     def save(self):
+        """
+        保存校验通过的行数据
+        """
+        status_keys = dict((value, key) for key, value in ASSERT_DEVICE_STATUS_CHOICES)
         assert_devices = []
-        for row_data in self.data:
-            for key, value in dict(ASSERT_DEVICE_STATUS_CHOICES).items():
-                if row_data['status'] == value:
-                    row_data['status'] = key
-                    break
-            for performer in self.performer_list:
-                if row_data.get('performer', '').strip() == performer.name:
-                    row_data['performer'] = performer
-                    break
-
-            for use_dept in self.use_dept_list:
-                if row_data.get('use_dept', '').strip() == use_dept.name:
-                    row_data['use_dept'] = use_dept
-                    break
-
-            for resp_dept in self.res_dept_list:
-                if row_data.get('responsible_dept', '').strip() == resp_dept.name:
-                    row_data['responsible_dept'] = resp_dept
-                    break
-
-            for storage_place in self.storage_place_list:
-                if row_data.get('storage_place', '').strip() == storage_place.title:
-                    row_data['storage_place'] = storage_place
-                    break
-
+        for index, row_data in enumerate(self.data):
+            if index in self.invalid_indexes:
+                continue
+            row_data = dict(row_data)
+            row_data['status'] = status_keys[row_data['status'].strip()]
+            row_data['performer'] = self.performers[self._strip(row_data.get('performer'))]
+            row_data['use_dept'] = self.depts[self._strip(row_data.get('use_dept'))]
+            row_data['responsible_dept'] = self.depts[self._strip(row_data.get('responsible_dept'))]
+            row_data['storage_place'] = self.storage_places[self._strip(row_data.get('storage_place'))]
             if self.cate == ASSERT_DEVICE_CATE_MEDICAL:
-                for medical_device_code in self.medical_device_cate_list:
-                    if row_data.get('code', '').strip() == medical_device_code.code:
-                        row_data['medical_device_cate'] = medical_device_code
-                        break
-                del row_data['code']
+                row_data['medical_device_cate'] = self.medical_device_cates[self._strip(row_data.pop('code'))]
             row_data['creator'] = self.creator
             row_data['cate'] = self.cate
-            assert_devices.append(
-                AssertDevice(**row_data)
-            )
+            assert_devices.append(AssertDevice(**row_data))
         return AssertDevice.objects.bulk_create_assert_device(assert_devices)
 
 
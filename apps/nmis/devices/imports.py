@@ -0,0 +1,43 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/20
+#
+
+"""
+资产设备Excel流式批量导入
+"""
+
+import logging
+
+from django.db import DatabaseError
+
+from base.imports import ChunkedImporter
+from nmis.devices.forms import AssertDeviceBatchUploadForm
+
+logger = logging.getLogger(__name__)
+
+
+class AssertDeviceImporter(ChunkedImporter):
+    """
+    资产设备分块导入: 每块数据使用AssertDeviceBatchUploadForm校验, 记录校验失败的行并批量写入其余行
+    """
+
+    def __init__(self, rows, creator, cate, **kwargs):
+        super(AssertDeviceImporter, self).__init__(rows, **kwargs)
+        self.creator = creator
+        self.cate = cate
+
+    def validate_chunk(self, chunk):
+        form = AssertDeviceBatchUploadForm(
+            [row_data for _, row_data in chunk], creator=self.creator, cate=self.cate,
+            row_nos=[row_no for row_no, _ in chunk]
+        )
+        if not form.is_valid():
+            for row_no, field, msg in form.row_errors:
+                self.result.add_error(row_no, field, msg)
+        return form if form.valid_count else None
+
+    def save_chunk(self, form):
+        if not form.save():
+            raise DatabaseError('Failed to save assert devices')
+        return form.valid_count
@@ -0,0 +1,44 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/24
+#
+
+"""
+重建资产设备编码索引(上线扫码查询, Redis数据丢失或直接修改数据库数据后执行). 重建过程中原索引仍可正常查询:
+
+    python manage.py rebuild_assert_device_code_index --batch-size 5000
+"""
+
+import logging
+
+from django.core.management.base import BaseCommand
+
+from nmis.devices import codes as code_index
+from nmis.devices.models import AssertDevice
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = '重建资产设备条形码/资产编号/序列号编码索引'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='每批处理的设备数')
+
+    def handle(self, *args, **options):
+        total = code_index.rebuild_index(self.iter_batches(options['batch_size']))
+        if total is None:
+            self.stderr.write('Failed to rebuild assert device code index')
+            return
+        self.stdout.write(self.style.SUCCESS('Done, %s devices indexed' % total))
+
+    @staticmethod
+    def iter_batches(batch_size):
+        queryset = AssertDevice.objects.order_by('id').only('id', 'assert_no', 'serial_no', 'bar_code')
+        last_id = 0
+        while True:
+            devices = list(queryset.filter(id__gt=last_id)[:batch_size])
+            if not devices:
+                break
+            yield devices
+            last_id = devices[-1].id
@@ -0,0 +1,30 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/23
+#
+
+"""
+资产设备库存汇总对账: 根据资产设备表重新计算并修正库存汇总(上线库存汇总, 直接修改数据库数据或调整地址/分类层级后执行,
+也可定时执行):
+
+    python manage.py rebuild_assert_device_inventory
+"""
+
+import logging
+
+from django.core.management.base import BaseCommand
+
+from nmis.devices.models import AssertDeviceInventory
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = '重新计算资产设备库存汇总'
+
+    def handle(self, *args, **options):
+        fixed = AssertDeviceInventory.objects.rebuild()
+        if fixed is None:
+            self.stderr.write('Failed to rebuild assert device inventory')
+            return
+        self.stdout.write(self.style.SUCCESS('Done, %s inventory groups fixed' % fixed))
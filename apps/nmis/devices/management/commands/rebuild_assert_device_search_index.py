@@ -0,0 +1,43 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/19
+#
+
+"""
+重建资产设备搜索索引(上线搜索索引或直接修改数据库数据后执行):
+
+    python manage.py rebuild_assert_device_search_index --batch-size 2000
+"""
+
+import logging
+
+from django.core.management.base import BaseCommand
+
+from nmis.devices.models import AssertDevice, AssertDeviceSearchToken
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = '重建资产设备n-gram搜索索引'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='每批处理的设备数')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = AssertDevice.objects.order_by('id').only(
+            'id', 'assert_no', 'serial_no', 'bar_code', 'title', 'producer'
+        )
+        last_id, total = 0, 0
+        while True:
+            devices = list(queryset.filter(id__gt=last_id)[:batch_size])
+            if not devices:
+                break
+            if not AssertDeviceSearchToken.objects.index_devices(devices):
+                self.stderr.write('Failed to index devices after id %s' % last_id)
+                return
+            last_id = devices[-1].id
+            total += len(devices)
+            self.stdout.write('Indexed %s devices' % total)
+        self.stdout.write(self.style.SUCCESS('Done, %s devices indexed' % total))
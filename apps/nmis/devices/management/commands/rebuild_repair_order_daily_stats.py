@@ -0,0 +1,48 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/25
+#
+
+"""
+重建报修单每日统计(上线每日统计时回填历史数据, 或直接修改报修单数据后执行). 可只重建指定提交日期范围:
+
+    python manage.py rebuild_repair_order_daily_stats
+    python manage.py rebuild_repair_order_daily_stats --start-date 2018-12-01 --end-date 2018-12-31
+"""
+
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from nmis.devices.models import RepairOrderDailyStat
+from utils import times
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = '重建报修单每日统计'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start-date', help='提交日期起始(含), 格式: 2018-12-01')
+        parser.add_argument('--end-date', help='提交日期截止(含), 格式: 2018-12-31')
+        parser.add_argument('--batch-size', type=int, default=5000, help='每批处理的报修单数')
+
+    def handle(self, *args, **options):
+        start_date, end_date = self.parse_date(options['start_date']), self.parse_date(options['end_date'])
+        if start_date and end_date and start_date > end_date:
+            raise CommandError('start date must not be later than end date')
+
+        total = RepairOrderDailyStat.objects.rebuild(start_date, end_date, batch_size=options['batch_size'])
+        if total is None:
+            self.stderr.write('Failed to rebuild repair order daily stats')
+            return
+        self.stdout.write(self.style.SUCCESS('Done, %s repair orders counted' % total))
+
+    @staticmethod
+    def parse_date(value):
+        if not value:
+            return None
+        if not times.is_valid_date(value, format='%Y-%m-%d'):
+            raise CommandError('Invalid date: %s' % value)
+        return times.str_to_datetime(value, format='%Y-%m-%d').date()
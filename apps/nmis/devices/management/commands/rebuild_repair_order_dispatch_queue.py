@@ -0,0 +1,46 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/25
+#
+
+"""
+重建报修单分派队列(上线自动分派, Redis数据丢失或直接修改数据库数据后执行):
+
+    python manage.py rebuild_repair_order_dispatch_queue --batch-size 5000
+"""
+
+import logging
+
+from django.core.management.base import BaseCommand
+
+from nmis.devices import dispatch as dispatch_queue
+from nmis.devices.consts import REPAIR_ORDER_STATUS_SUBMITTED
+from nmis.devices.models import RepairOrder
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = '重建报修单分派队列'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='每批处理的报修单数')
+
+    def handle(self, *args, **options):
+        total = dispatch_queue.rebuild_queue(self.iter_batches(options['batch_size']))
+        if total is None:
+            self.stderr.write('Failed to rebuild repair order dispatch queue')
+            return
+        self.stdout.write(self.style.SUCCESS('Done, %s repair orders queued' % total))
+
+    @staticmethod
+    def iter_batches(batch_size):
+        queryset = RepairOrder.objects.filter(status=REPAIR_ORDER_STATUS_SUBMITTED).order_by('id')\
+            .only('id', 'priority', 'created_time')
+        last_id = 0
+        while True:
+            repair_orders = list(queryset.filter(id__gt=last_id)[:batch_size])
+            if not repair_orders:
+                break
+            yield repair_orders
+            last_id = repair_orders[-1].id
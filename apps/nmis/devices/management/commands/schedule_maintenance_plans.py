@@ -0,0 +1,35 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/25
+#
+
+"""
+生成设备维护计划周期, 将滚动范围向后推进(上线后执行一次以补全已有维护计划的周期, 之后每日定时执行):
+
+    python manage.py schedule_maintenance_plans --batch-size 1000
+
+    # crontab
+    10 0 * * * cd /path/to/apps && python manage.py schedule_maintenance_plans
+"""
+
+import logging
+
+from django.core.management.base import BaseCommand
+
+from nmis.devices.models import MaintenancePlanOccurrence
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = '生成设备维护计划周期'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批处理的维护计划数')
+
+    def handle(self, *args, **options):
+        total = MaintenancePlanOccurrence.objects.roll_horizon(batch_size=options['batch_size'])
+        if total is None:
+            self.stderr.write('Failed to schedule maintenance plans')
+            return
+        self.stdout.write(self.style.SUCCESS('Done, %s maintenance plan occurrences created' % total))
@@ -3,23 +3,41 @@
 # Created by gong, on 2018-10-16
 #
 
+import datetime
+import heapq
 import logging
-import threading
+from collections import Counter, namedtuple, OrderedDict, defaultdict
+from itertools import groupby, islice
+from operator import attrgetter
 
-from django.db import transaction
-from django.db.models import Q, F
+from dateutil.relativedelta import relativedelta
+from django.db import transaction, IntegrityError
+from django.db.models import Q, F, Count, Sum, Max, Func, Value, Exists, OuterRef, Manager, Case, When, IntegerField
+from django.db.models.functions import Lower
 
 from base.models import BaseManager
 from nmis.devices.consts import ASSERT_DEVICE_STATUS_USING, MAINTENANCE_PLAN_NO_PREFIX, \
+    ASSERT_DEVICE_OPERATION_ALLOCATION, ASSERT_DEVICE_OPERATION_SUBMIT, ASSERT_DEVICE_OPERATION_UPDATE, \
+    ASSERT_DEVICE_OPERATION_REPAIR, ASSERT_DEVICE_CODE_FIELDS, ORDER_NO_ALLOCATE_ATTEMPTS, \
     MAINTENANCE_PLAN_NO_SEQ_CODE, MAINTENANCE_PLAN_NO_SEQ_DIGITS, \
     REPAIR_ORDER_NO_SEQ_CODE, \
     REPAIR_ORDER_NO_PREFIX, REPAIR_ORDER_NO_SEQ_DIGITS, \
-    REPAIR_ORDER_STATUS_DONE, REPAIR_ORDER_STATUS_CLOSED, REPAIR_ORDER_STATUS_DOING, \
+    REPAIR_ORDER_STATUS_DONE, REPAIR_ORDER_STATUS_CLOSED, REPAIR_ORDER_STATUS_DOING, REPAIR_ORDER_OPERATION_SUBMIT, \
+    REPAIR_ORDER_OPERATION_DISPATCH, REPAIR_ORDER_OPERATION_HANDLE, REPAIR_ORDER_OPERATION_COMMENT, \
+    REPAIR_ORDER_STATUS_SUBMITTED, REPAIR_ORDER_DISPATCH_MAX_WORKLOAD, REPAIR_ORDER_DEFAULT_PRIORITY, \
+    REPAIR_ORDER_OPERATION_TRANSITIONS, MAINTENANCE_PLAN_STATUS_NEW, MAINTENANCE_PLAN_STATUS_DONE, \
+    MAINTENANCE_PLAN_PERIOD_UNITS, MAINTENANCE_PLAN_SCHEDULE_HORIZON_DAYS, MAINTENANCE_PLAN_SCHEDULE_MAX_OCCURRENCES, \
+    MAINTENANCE_PLAN_EXPIRED_DATE_CHOICES, \
     MAINTENANCE_PLAN_EXPIRED_DATE_ON_MONTH, MAINTENANCE_PLAN_EXPIRED_DATE_ON_WEEK, \
     MAINTENANCE_PLAN_EXPIRED_DATE_THREE_DAY, MAINTENANCE_PLAN_EXPIRED_DATE_NOW_DAY, \
-    MAINTENANCE_PLAN_EXPIRED_DATE_BE_OVERDUE
+    MAINTENANCE_PLAN_EXPIRED_DATE_BE_OVERDUE, ASSERT_DEVICE_SEARCH_FIELD_WEIGHTS, \
+    ASSERT_DEVICE_SEARCH_NGRAM_SIZE, ASSERT_DEVICE_SEARCH_MAX_RESULTS, ASSERT_DEVICE_INVENTORY_HOSPITAL, \
+    ASSERT_DEVICE_INVENTORY_USE_DEPT, ASSERT_DEVICE_INVENTORY_STORAGE_PLACE, ASSERT_DEVICE_INVENTORY_MEDICAL_DEVICE_CATE
+from nmis.devices import dispatch as dispatch_queue
+from nmis.devices.events import RepairOrderEvent, emit_repair_order_events
 from nmis.hospitals.models import Sequence
 from utils import times
+from utils.search import make_ngrams, normalize_text
 
 logger = logging.getLogger(__name__)
 
@@ -124,8 +142,15 @@ class AssertDeviceManager(BaseManager):
         :param data: 资产设备数据dict
         :return:
         """
+        from nmis.devices.models import AssertDeviceInventory, AssertDeviceRecord
         try:
-            return self.create(**data)
+            with transaction.atomic():
+                assert_device = self.create(**data)
+                AssertDeviceRecord.objects.add_records(
+                    [assert_device], ASSERT_DEVICE_OPERATION_SUBMIT, assert_device.creator, '新建了'
+                )
+                AssertDeviceInventory.objects.track_changes(new_states=[assert_device.get_inventory_state()])
+            return assert_device
         except Exception as e:
             logger.exception(e)
             return None
@@ -137,24 +162,30 @@ class AssertDeviceManager(BaseManager):
         :param data: 更新资产设备数据，dict类型
         :return:
         """
+        from nmis.devices.models import AssertDeviceInventory, AssertDeviceRecord
         try:
+            with transaction.atomic():
+                old_state = assert_device.get_inventory_state()
+                if data.get('medical_device_cate_id'):
+                    assert_device.medical_device_cate_id = data.get('medical_device_cate_id')
 
-            if data.get('medical_device_cate_id'):
-                assert_device.medical_device_cate_id = data.get('medical_device_cate_id')
-
-            if data.get('use_dept_id') or data.get('use_dept_id') is None:
-                assert_device.use_dept_id = data.get('use_dept_id')
+                if data.get('use_dept_id') or data.get('use_dept_id') is None:
+                    assert_device.use_dept_id = data.get('use_dept_id')
 
-            if data.get('responsible_dept_id') or data.get('responsible_dept_id') is None:
-                assert_device.responsible_dept_id = data.get('responsible_dept_id')
+                if data.get('responsible_dept_id') or data.get('responsible_dept_id') is None:
+                    assert_device.responsible_dept_id = data.get('responsible_dept_id')
 
-            if data.get('performer_id') or data.get('performer_id') is None:
-                assert_device.performer_id = data.get('performer_id')
+                if data.get('performer_id') or data.get('performer_id') is None:
+                    assert_device.performer_id = data.get('performer_id')
 
-            if data.get('storage_place_id'):
-                assert_device.storage_place_id = data.get('storage_place_id')
-            new_assert_device = assert_device.update(data)
-            new_assert_device.cache()
+                if data.get('storage_place_id'):
+                    assert_device.storage_place_id = data.get('storage_place_id')
+                new_assert_device = assert_device.update(data)
+                AssertDeviceRecord.objects.add_records(
+                    [new_assert_device], ASSERT_DEVICE_OPERATION_UPDATE,
+                    data.get('modifier') or new_assert_device.creator, '修改了'
+                )
+                AssertDeviceInventory.objects.track_changes([old_state], [new_assert_device.get_inventory_state()])
             return new_assert_device
         except Exception as e:
             logger.exception(e)
@@ -164,20 +195,25 @@ class AssertDeviceManager(BaseManager):
         """
         资产设备列表
         :param cate: 资产设备类型
-        :param search_key: 关键字：设备名
+        :param search_key: 关键字：设备名, 资产编号, 序列号, 条形码或厂家. 命中时按搜索相关度排序
         :param status: 资产设备状态
         :param storage_places: 设备存储地点
         """
         assert_devices = self.filter()
 
         if cate:
-            assert_devices = self.filter(cate=cate)
-        if search_key:
-            assert_devices = assert_devices.filter(title__contains=search_key)
+            assert_devices = assert_devices.filter(cate=cate)
         if status:
             assert_devices = assert_devices.filter(status__in=status)
         if storage_places:
             assert_devices = assert_devices.filter(storage_place__in=storage_places)
+        if search_key:
+            from nmis.devices.models import AssertDeviceSearchToken
+            searched = AssertDeviceSearchToken.objects.search_queryset(assert_devices, search_key)
+            if searched is None:  # 关键词过短, 无法使用索引
+                assert_devices = assert_devices.filter(title__contains=search_key)
+            else:   # 按搜索相关度排序
+                return searched.order_by('-search_score', '-created_time')
         return assert_devices.order_by('-created_time')
 
     def get_assert_device_by_assert_no(self, assert_no):
@@ -185,54 +221,481 @@ class AssertDeviceManager(BaseManager):
         通过资产设备编号查询资产设备
         :param assert_no: 资产设备编号
         """
-        return self.filter(assert_no=assert_no).first()
+        return self.lookup_by_codes([assert_no], code_fields=('assert_no', )).get(assert_no)
 
     def get_assert_device_by_serial_no(self, serial_no):
         """
         通过资产序列号查询资产设备
         :param serial_no:
         """
-        return self.filter(serial_no=serial_no).first()
+        return self.lookup_by_codes([serial_no], code_fields=('serial_no', )).get(serial_no)
 
     def get_assert_device_by_bar_code(self, bar_code):
         """
         通过资产设备条形码查询资产设备
         :param bar_code: 资产设备条形码
         """
-        return self.filter(bar_code=bar_code).first()
+        return self.lookup_by_codes([bar_code], code_fields=('bar_code', )).get(bar_code)
+
+    def lookup_by_codes(self, codes, code_fields=None):
+        """
+        扫码查询: 按条形码/资产编号/序列号批量查询资产设备. 编码先经一次HMGET查询Redis编码索引,
+        命中的设备id再经一次get_many从对象缓存中获取; 未命中(或索引项已过期)的编码以一条
+        基于各编码字段索引的查询回退到数据库, 并回填编码索引
+        :param codes: 编码列表
+        :param code_fields: 参与匹配的编码字段, 默认为ASSERT_DEVICE_CODE_FIELDS中全部字段;
+                            同一编码匹配多个设备时, 按字段顺序优先
+        :return: {编码: 资产设备}, 未找到的编码不在结果中
+        """
+        from nmis.devices import codes as code_index
+        code_fields = code_fields or [code_field for code_field, _ in ASSERT_DEVICE_CODE_FIELDS]
+        codes = list(OrderedDict.fromkeys(code for code in codes if code))
+        if not codes:
+            return {}
+
+        def match(code, candidates):
+            for code_field in code_fields:
+                device = candidates.get((code_field, code))
+                if device is not None and getattr(device, code_field) == code:
+                    return device
+            return None
+
+        device_ids = code_index.get_device_ids(codes, code_fields)
+        cached_devices = dict(
+            (device.id, device) for device in self.get_cached_many(list(device_ids.values()))
+        )
+        candidates = dict((key, cached_devices.get(device_id)) for key, device_id in device_ids.items())
+        found = {}
+        for code in codes:
+            device = match(code, candidates)
+            if device is not None:
+                found[code] = device
+
+        missed = set(code for code in codes if code not in found)
+        if not missed:
+            return found
+        query = Q()
+        for code_field in code_fields:
+            query |= Q(**{'%s__in' % code_field: missed})
+        db_devices = list(self.filter(query).order_by('id'))
+        candidates = {}
+        for device in db_devices:
+            for code_field in code_fields:
+                candidates.setdefault((code_field, getattr(device, code_field)), device)
+        for code in missed:
+            device = match(code, candidates)
+            if device is not None:
+                found[code] = device
+        # 未通过校验的索引项均已过期, 先删除再以数据库结果回填
+        code_index.remove_codes([key for key in device_ids if key[1] in missed])
+        code_index.index_devices(db_devices)
+        return found
 
     def get_assert_device_by_ids(self, device_ids):
         """
-        通过资产设备ID集合查询资产设备
+        通过资产设备ID集合查询资产设备(优先从缓存中批量获取)
         :param device_ids: 资产设备ID list
-        :return:
+        :return: 与device_ids顺序一致的资产设备列表
         """
-        return self.filter(id__in=device_ids)
+        return self.get_cached_many(device_ids)
 
-    def update_assert_devices_use_dept(self, assert_devices, use_dept):
+    def update_assert_devices_use_dept(self, assert_devices, use_dept, operator):
         """
-        单个或多个资产设备调配使用科室（调配之后资产设备状态变成使用中）
-        :return:
+        单个或多个资产设备调配使用科室（调配之后资产设备状态变成使用中）.
+        无论设备数量多少: 一条UPDATE语句, 一次批量写入调配记录, 一次delete_many清除缓存,
+        事务提交后向设备负责人发送一条合并的调配消息
+        :param assert_devices: 资产设备列表
+        :param use_dept: 调配的目标科室
+        :param operator: 操作人
+        :return: 调配后的资产设备列表, 失败时返回None
         """
+        from nmis.devices.models import AssertDeviceInventory, AssertDeviceRecord
+        modified_time = times.now()
         try:
             with transaction.atomic():
-                assert_devices.update(use_dept=use_dept, status=ASSERT_DEVICE_STATUS_USING)
+                old_states = [assert_device.get_inventory_state() for assert_device in assert_devices]
+                self.update_by_ids(
+                    [assert_device.id for assert_device in assert_devices], use_dept=use_dept,
+                    status=ASSERT_DEVICE_STATUS_USING, modifier=operator, modified_time=modified_time,
+                )
                 for assert_device in assert_devices:
-                    assert_device.cache()
+                    assert_device.use_dept = use_dept
+                    assert_device.status = ASSERT_DEVICE_STATUS_USING
+                    assert_device.modifier = operator
+                    assert_device.modified_time = modified_time
+                AssertDeviceRecord.objects.add_records(
+                    assert_devices, ASSERT_DEVICE_OPERATION_ALLOCATION, operator, '将',
+                    detail='调配至%s' % use_dept.name
+                )
+                AssertDeviceInventory.objects.track_changes(
+                    old_states, [assert_device.get_inventory_state() for assert_device in assert_devices]
+                )
+                performer_ids = set(
+                    assert_device.performer_id for assert_device in assert_devices if assert_device.performer_id
+                )
+                transaction.on_commit(
+                    lambda: self.send_allocation_notice(performer_ids, len(assert_devices), use_dept)
+                )
                 return assert_devices
         except Exception as e:
             logger.exception(e)
             return None
 
+    @staticmethod
+    def send_allocation_notice(performer_ids, device_count, use_dept):
+        """
+        向被调配设备的负责人发送一条合并的调配消息
+        """
+        if not performer_ids:
+            return
+        from nmis.hospitals.models import Staff
+        from nmis.notices.models import Notice
+        Notice.objects.create_and_send_notice(
+            Staff.objects.get_cached_many(list(performer_ids)),
+            '您负责的%s台资产设备已调配至%s' % (device_count, use_dept.name)
+        )
+
     def bulk_create_assert_device(self, assert_devices):
 
         try:
             self.bulk_create(assert_devices)
+            # MySQL下bulk_create不回填主键, 通过资产编号查询新建设备后建立搜索索引, 编码索引并记录新建事件
+            from nmis.devices import codes as code_index
+            from nmis.devices.models import AssertDeviceSearchToken, AssertDeviceInventory, AssertDeviceRecord
+            new_devices = list(
+                self.select_related('creator__dept').filter(assert_no__in=[device.assert_no for device in assert_devices])
+            )
+            AssertDeviceSearchToken.objects.index_devices(new_devices)
+            code_index.index_devices(new_devices)
+            for creator_id, devices in groupby(sorted(new_devices, key=attrgetter('creator_id')), attrgetter('creator_id')):
+                devices = list(devices)
+                AssertDeviceRecord.objects.add_records(
+                    devices, ASSERT_DEVICE_OPERATION_SUBMIT, devices[0].creator, '导入了'
+                )
+            AssertDeviceInventory.objects.track_changes(
+                new_states=[assert_device.get_inventory_state() for assert_device in assert_devices]
+            )
+            return True
+        except Exception as e:
+            logger.exception(e)
+            return False
+
+
+class AssertDeviceSearchTokenManager(Manager):
+    """
+    资产设备n-gram搜索索引. 设备新建/修改时(见signals.py)及批量导入后同步索引,
+    使用QuerySet.update直接更新索引字段时需自行调用index_devices
+    """
+
+    @staticmethod
+    def make_device_tokens(device):
+        """
+        返回资产设备所有索引字段切分后的词元集合
+        """
+        tokens = set()
+        for field_name, _ in ASSERT_DEVICE_SEARCH_FIELD_WEIGHTS:
+            tokens |= make_ngrams(getattr(device, field_name), ASSERT_DEVICE_SEARCH_NGRAM_SIZE)
+        return tokens
+
+    def index_devices(self, devices, batch_size=2000):
+        """
+        (重新)建立资产设备的搜索索引
+        :param devices: 资产设备列表或QuerySet
+        """
+        devices = list(devices)
+        if not devices:
+            return True
+        try:
+            with transaction.atomic():
+                self.filter(device_id__in=[device.id for device in devices]).delete()
+                self.bulk_create([
+                    self.model(token=token, device_id=device.id)
+                    for device in devices for token in self.make_device_tokens(device)
+                ], batch_size=batch_size)
+            return True
+        except Exception as e:
+            logger.exception(e)
+            return False
+
+    def index_device(self, device, created=False):
+        """
+        更新单个资产设备的搜索索引, 仅写入有变化的词元(如仅修改设备状态时不产生写操作)
+        :param created: 是否为新建设备, 新建设备无需查询已有词元
+        """
+        try:
+            # savepoint: 写入失败时不影响调用方(保存设备)的事务
+            with transaction.atomic():
+                tokens = self.make_device_tokens(device)
+                old_tokens = set() if created else set(
+                    self.filter(device_id=device.id).values_list('token', flat=True))
+                if old_tokens - tokens:
+                    self.filter(device_id=device.id, token__in=old_tokens - tokens).delete()
+                if tokens - old_tokens:
+                    self.bulk_create([self.model(token=token, device_id=device.id) for token in tokens - old_tokens])
             return True
         except Exception as e:
             logger.exception(e)
             return False
 
+    def search_queryset(self, queryset, keyword):
+        """
+        在资产设备QuerySet中搜索关键词, 匹配及相关度计算均在SQL中完成, 不截断结果:
+        通过索引子查询找出包含关键词所有词元的候选设备, 再按字段(转为小写并去除空格)确实包含关键词计算相关度search_score.
+        字段权重见ASSERT_DEVICE_SEARCH_FIELD_WEIGHTS, 完全相同/前缀匹配/包含分别计4/2/1倍权重
+
+        :param queryset: 资产设备QuerySet, 其他筛选条件应在此之前或之后直接作用于同一QuerySet
+        :param keyword: 搜索关键词
+        :return: 带search_score的QuerySet(仅含search_score > 0的设备); 关键词长度不足n-gram长度时返回None,
+            由调用方退化为LIKE查询
+        """
+        keyword = normalize_text(keyword)
+        tokens = make_ngrams(keyword, ASSERT_DEVICE_SEARCH_NGRAM_SIZE)
+        if not tokens:
+            return None
+
+        candidates = self.filter(token__in=tokens)
+        if len(tokens) > 1:
+            candidates = candidates.values('device_id').annotate(
+                token_count=Count('token')).filter(token_count=len(tokens))
+        queryset = queryset.filter(id__in=candidates.values('device_id'))
+
+        scores = []
+        for field_name, weight in ASSERT_DEVICE_SEARCH_FIELD_WEIGHTS:
+            alias = '_search_%s' % field_name
+            queryset = queryset.annotate(**{
+                alias: Lower(Func(F(field_name), Value(' '), Value(''), function='REPLACE'))
+            })
+            scores.append(Case(
+                When(**{alias: keyword, 'then': Value(weight * 4)}),
+                When(**{'%s__startswith' % alias: keyword, 'then': Value(weight * 2)}),
+                When(**{'%s__contains' % alias: keyword, 'then': Value(weight)}),
+                default=Value(0), output_field=IntegerField(),
+            ))
+        return queryset.annotate(search_score=sum(scores[1:], scores[0])).filter(search_score__gt=0)
+
+    def search_device_ids(self, keyword, limit=ASSERT_DEVICE_SEARCH_MAX_RESULTS):
+        """
+        搜索资产设备, 见search_queryset
+        :param limit: 返回的最大设备数
+        :return: 按相关度从高到低排序的设备id列表; 关键词长度不足n-gram长度时返回None
+        """
+        from nmis.devices.models import AssertDevice
+        queryset = self.search_queryset(AssertDevice.objects.all(), keyword)
+        if queryset is None:
+            return None
+        return list(queryset.order_by('-search_score', '-id').values_list('id', flat=True)[:limit])
+
+
+# 资产设备库存汇总相关字段快照, 用于比较设备变更前后所属的汇总分组
+AssertDeviceInventoryState = namedtuple(
+    'AssertDeviceInventoryState', ('cate', 'status', 'use_dept_id', 'storage_place_id', 'medical_device_cate_id')
+)
+
+
+class AssertDeviceInventoryManager(Manager):
+    """
+    资产设备库存汇总. 设备新建/修改/调配/报废/删除时增量更新(计数变化量按分组合并后每组一条UPDATE),
+    直接使用QuerySet.update修改设备或调整地址/分类层级后, 需执行rebuild_assert_device_inventory命令对账
+    """
+
+    @staticmethod
+    def get_ancestor_paths(model, ids):
+        """
+        逐层查询树形数据(存放地点/医疗器械分类)的上级节点, 每层一次查询
+        :param model: 含parent字段的模型类
+        :return: {节点id: [节点id, 上级节点id, ...]}
+        """
+        parents = {}
+        pending = set(ids)
+        while pending:
+            rows = list(model.objects.filter(id__in=pending).values_list('id', 'parent_id'))
+            parents.update(rows)
+            pending = set(parent_id for _, parent_id in rows if parent_id and parent_id not in parents)
+
+        paths = {}
+        for node_id in ids:
+            path, current_id = [], node_id
+            while current_id and current_id not in path:
+                path.append(current_id)
+                current_id = parents.get(current_id)
+            paths[node_id] = path
+        return paths
+
+    def count_groups(self, states):
+        """
+        统计设备在各汇总分组中的数量
+        :param states: (AssertDeviceInventoryState, 设备数量)列表, 数量为负数时表示移出分组
+        :return: Counter, {(维度, 分组id, 设备类型, 设备状态): 设备数量}
+        """
+        from nmis.devices.models import MedicalDeviceCate
+        from nmis.hospitals.models import HospitalAddress
+        address_paths = self.get_ancestor_paths(
+            HospitalAddress, set(s.storage_place_id for s, _ in states if s.storage_place_id)
+        )
+        cate_paths = self.get_ancestor_paths(
+            MedicalDeviceCate, set(s.medical_device_cate_id for s, _ in states if s.medical_device_cate_id)
+        )
+        counter = Counter()
+        for state, num in states:
+            groups = [
+                (ASSERT_DEVICE_INVENTORY_HOSPITAL, 0),
+                (ASSERT_DEVICE_INVENTORY_USE_DEPT, state.use_dept_id or 0),
+            ]
+            groups.extend(
+                (ASSERT_DEVICE_INVENTORY_STORAGE_PLACE, address_id)
+                for address_id in address_paths.get(state.storage_place_id) or [0]
+            )
+            groups.extend(
+                (ASSERT_DEVICE_INVENTORY_MEDICAL_DEVICE_CATE, cate_id)
+                for cate_id in cate_paths.get(state.medical_device_cate_id) or [0]
+            )
+            for dimension, group_id in groups:
+                counter[(dimension, group_id, state.cate, state.status)] += num
+        return counter
+
+    def track_changes(self, old_states=(), new_states=()):
+        """
+        根据设备变更前后的状态快照增量更新库存汇总
+        :param old_states: 变更前的AssertDeviceInventoryState列表, 新建设备时为空
+        :param new_states: 变更后的AssertDeviceInventoryState列表, 删除设备时为空
+        """
+        try:
+            deltas = self.count_groups(
+                [(state, 1) for state in new_states] + [(state, -1) for state in old_states]
+            )
+            with transaction.atomic():
+                for (dimension, group_id, cate, status), delta in deltas.items():
+                    if delta:
+                        self.add_count(dimension, group_id, cate, status, delta)
+            return True
+        except Exception as e:
+            logger.exception(e)
+            return False
+
+    def add_count(self, dimension, group_id, cate, status, delta):
+        group = dict(dimension=dimension, group_id=group_id, cate=cate, status=status)
+        if self.filter(**group).update(count=F('count') + delta):
+            return
+        try:
+            with transaction.atomic():
+                self.create(count=delta, **group)
+        except IntegrityError:  # 并发创建同一分组
+            self.filter(**group).update(count=F('count') + delta)
+
+    def rebuild(self):
+        """
+        根据资产设备表重新计算库存汇总并修正不一致的分组
+        :return: 修正的分组数, 失败时返回None
+        """
+        from nmis.devices.models import AssertDevice
+        try:
+            with transaction.atomic():
+                current = {
+                    (inv.dimension, inv.group_id, inv.cate, inv.status): inv
+                    for inv in self.select_for_update()
+                }
+                rows = AssertDevice.objects.order_by().values_list(
+                    *AssertDeviceInventoryState._fields
+                ).annotate(num=Count('id'))
+                expected = self.count_groups([(AssertDeviceInventoryState(*row[:-1]), row[-1]) for row in rows])
+
+                fixed, new_inventories = 0, []
+                for key, count in expected.items():
+                    inventory = current.pop(key, None)
+                    if inventory is None:
+                        new_inventories.append(self.model(
+                            dimension=key[0], group_id=key[1], cate=key[2], status=key[3], count=count
+                        ))
+                    elif inventory.count != count:
+                        self.filter(id=inventory.id).update(count=count)
+                        fixed += 1
+                self.bulk_create(new_inventories)
+                # 已无设备的分组
+                stale_ids = [inv.id for inv in current.values() if inv.count]
+                if stale_ids:
+                    self.filter(id__in=stale_ids).update(count=0)
+                return fixed + len(new_inventories) + len(stale_ids)
+        except Exception as e:
+            logger.exception(e)
+            return None
+
+    @staticmethod
+    def get_group_names(dimension, group_ids):
+        """
+        返回分组名称: {分组id: 科室名/地址名/分类名}
+        """
+        from nmis.devices.models import MedicalDeviceCate
+        from nmis.hospitals.models import Department, HospitalAddress
+        group_models = {
+            ASSERT_DEVICE_INVENTORY_USE_DEPT: (Department, 'name'),
+            ASSERT_DEVICE_INVENTORY_STORAGE_PLACE: (HospitalAddress, 'title'),
+            ASSERT_DEVICE_INVENTORY_MEDICAL_DEVICE_CATE: (MedicalDeviceCate, 'title'),
+        }
+        if dimension not in group_models:
+            return {}
+        model, name_field = group_models[dimension]
+        return dict(model.objects.filter(id__in=group_ids).values_list('id', name_field))
+
+    def get_summary(self, dimension, cate=None):
+        """
+        按维度查询库存汇总, 查询量与分组数相关, 与设备数无关
+        :return: [{'group_id': 分组id, 'total': 设备总数, 'status': {设备状态: 设备数}}], 按设备总数倒序
+        """
+        inventories = self.filter(dimension=dimension, count__gt=0)
+        if cate:
+            inventories = inventories.filter(cate=cate)
+        groups = {}
+        for group_id, status, count in inventories.values_list('group_id', 'status', 'count'):
+            group = groups.setdefault(group_id, {'group_id': group_id, 'total': 0, 'status': {}})
+            group['total'] += count
+            group['status'][status] = group['status'].get(status, 0) + count
+        return sorted(groups.values(), key=lambda g: (-g['total'], g['group_id']))
+
+
+class AssertDeviceRecordManager(Manager):
+    """
+    资产设备事件日志, 只追加不修改. 设备的新建, 修改, 调配, 报废, 维修, 维护保养及删除均在同一事务中写入事件.
+    按设备/科室查询历史分别对应(assert_device, created_time, id)/(dept, created_time, id)索引上的一次范围扫描
+    """
+
+    def add_records(self, assert_devices, operation, operator, action, detail='', reason='', receiver=None):
+        """
+        为每个资产设备写入一条事件, 事件所属科室为设备当前的使用科室. 写入失败时抛出异常, 由调用方回滚事务
+        :param assert_devices: 资产设备列表
+        :param operation: 操作类型
+        :param operator: 操作人
+        :param action: 操作描述, 操作内容形如: 操作人(科室) + action + 资产设备名称(资产编号) + detail
+        :return: 写入的事件数
+        """
+        operator_label = '%s(%s)' % (operator.name, operator.dept.name if operator.dept else '')
+        records = [
+            self.model(
+                assert_device_id=assert_device.id, dept_id=assert_device.use_dept_id, operation=operation,
+                operator=operator, receiver=receiver, reason=reason,
+                msg_content=('%s%s资产设备%s(%s)%s' % (
+                    operator_label, action, assert_device.title, assert_device.assert_no, detail
+                ))[:128]
+            )
+            for assert_device in assert_devices
+        ]
+        self.bulk_create(records, batch_size=1000)
+        return len(records)
+
+    def get_device_records(self, device_id):
+        """
+        资产设备的历史事件(含已删除设备)
+        """
+        return self.filter(assert_device_id=device_id).order_by('-created_time', '-id')
+
+    def get_dept_records(self, dept_id, operation=None):
+        """
+        科室内资产设备的历史事件
+        """
+        records = self.filter(dept_id=dept_id)
+        if operation:
+            records = records.filter(operation=operation)
+        return records.order_by('-created_time', '-id')
+
 
 class FaultTypeManager(BaseManager):
 
@@ -296,6 +759,29 @@ class FaultTypeManager(BaseManager):
             for child in children:
                 self.gen_tree(child, fault_types)
 
+
+def allocate_daily_no(model, no_field, prefix, seq_code, seq_max_digits, gen_no):
+    """
+    分配形如 前缀 + 日期 + 当日序号 的编号(报修单号/维护计划编号). 序号由Sequence.objects.next_daily_value分配,
+    不锁定序列行; Redis序列需要校准时, 以当天已使用的最大编号为准
+    :param model: 编号所属模型
+    :param no_field: 编号字段
+    :param gen_no: 编号生成函数, 参数为(prefix, timestamp, seq, seq_max_digits)
+    :return: 编号, 序号超出最大位数时返回None
+    """
+    timestamp = times.datetime_to_str(times.now(), format='%Y%m%d')
+    day_prefix = prefix + timestamp
+
+    def get_used_max():
+        used_no = model.objects.filter(**{'%s__startswith' % no_field: day_prefix}) \
+            .order_by('-%s' % no_field).values_list(no_field, flat=True).first()
+        used_seq = used_no[len(day_prefix):] if used_no else ''
+        return int(used_seq) if used_seq.isdigit() else 0
+
+    seq = Sequence.objects.next_daily_value(seq_code, timestamp, get_used_max=get_used_max)
+    return gen_no(prefix, timestamp, seq, seq_max_digits=seq_max_digits)
+
+
 class RepairOrderManager(BaseManager):
 
     def create_order(self, applicant, fault_type, creator, *args, **kwargs):
@@ -307,29 +793,27 @@ class RepairOrderManager(BaseManager):
         :param creator: 创建人
         :return: 返回(boolean, RepairOrder对象/string)元祖
         """
-        lock = threading.RLock()
         try:
-            with transaction.atomic():
-                lock.acquire()
-                seq = Sequence.objects.select_for_update().get(seq_code=REPAIR_ORDER_NO_SEQ_CODE)
-                if not seq:
-                    logger.warning('The sequence not exists')
-                    return False, '序列未设置，请联系管理员'
-                seq.curr_value()
-                next_value = seq.next_value()
-                timestamp = times.datetime_to_str(times.now(), format='%Y%m%d')
-                order_no = RepairOrderManager.gen_repair_order_no(REPAIR_ORDER_NO_PREFIX, timestamp, next_value, seq_max_digits=REPAIR_ORDER_NO_SEQ_DIGITS)
+            for _ in range(ORDER_NO_ALLOCATE_ATTEMPTS):
+                order_no = allocate_daily_no(
+                    self.model, 'order_no', REPAIR_ORDER_NO_PREFIX, REPAIR_ORDER_NO_SEQ_CODE,
+                    REPAIR_ORDER_NO_SEQ_DIGITS, self.gen_repair_order_no
+                )
                 if not order_no:
                     return False, '生成编号异常'
-                repair_order = self.create(
-                    order_no=order_no, applicant=applicant, fault_type=fault_type,
-                    creator=creator, **kwargs
-                )
-                seq.seq_value = next_value
-                seq.save()
-                seq.cache()
-                lock.release()
-                return True, repair_order
+                try:
+                    with transaction.atomic():
+                        repair_order = self.create(
+                            order_no=order_no, applicant=applicant, applicant_dept_id=applicant.dept_id,
+                            fault_type=fault_type, creator=creator, **kwargs
+                        )
+                        emit_repair_order_events([
+                            RepairOrderEvent(repair_order, REPAIR_ORDER_OPERATION_SUBMIT, creator)
+                        ])
+                    return True, repair_order
+                except IntegrityError:
+                    logger.warning('Repair order no %s already exists, reallocating', order_no)
+            return False, '生成编号异常'
         except Exception as e:
             logger.exception(e)
             return False, '创建报修单异常'
@@ -353,8 +837,11 @@ class RepairOrderManager(BaseManager):
                 },
                 **kwargs
             )
-            repair_order.update(update_data)
-            repair_order.cache()
+            with transaction.atomic():
+                repair_order.update(update_data)
+                emit_repair_order_events([
+                    RepairOrderEvent(repair_order, REPAIR_ORDER_OPERATION_DISPATCH, dispatcher, receiver=maintainer)
+                ])
             return repair_order
         except Exception as e:
             logger.exception(e)
@@ -378,11 +865,17 @@ class RepairOrderManager(BaseManager):
                 },
                 **kwargs
             )
+            from nmis.devices.models import AssertDeviceRecord
             repair_devices = kwargs.get('repair_devices')
-            repair_order.update(update_data)
-            if repair_devices:
-                repair_order.repair_devices.set(repair_devices)
-            repair_order.cache()
+            with transaction.atomic():
+                repair_order.update(update_data)
+                if repair_devices:
+                    repair_order.repair_devices.set(repair_devices)
+                AssertDeviceRecord.objects.add_records(
+                    repair_order.repair_devices.all(), ASSERT_DEVICE_OPERATION_REPAIR, operator, '维修了',
+                    detail=', 报修单号: %s' % repair_order.order_no
+                )
+                emit_repair_order_events([RepairOrderEvent(repair_order, REPAIR_ORDER_OPERATION_HANDLE, operator)])
             return repair_order
         except Exception as e:
             logger.exception(e)
@@ -406,13 +899,95 @@ class RepairOrderManager(BaseManager):
             **kwargs
         )
         try:
-            repair_order.update(update_data)
-            repair_order.cache()
+            with transaction.atomic():
+                repair_order.update(update_data)
+                emit_repair_order_events([
+                    RepairOrderEvent(repair_order, REPAIR_ORDER_OPERATION_COMMENT, commentator)
+                ])
             return repair_order
         except Exception as e:
             logger.exception(e)
             return None
 
+    def get_maintainer_workloads(self, maintainers):
+        """
+        返回维修工程师处理中的报修单数, {维修工程师id: 报修单数}
+        """
+        return dict(
+            self.filter(status=REPAIR_ORDER_STATUS_DOING, maintainer__in=maintainers)
+            .values_list('maintainer').annotate(Count('id')).order_by()
+        )
+
+    def auto_dispatch_repair_orders(self, dispatcher, maintainers, count):
+        """
+        按优先级及排队时间从分派队列中取出待分派的报修单, 依次分派给处理中报修单数最少的维修工程师,
+        所有分派在一个事务中完成. 维修工程师处理中的报修单数均达到REPAIR_ORDER_DISPATCH_MAX_WORKLOAD时,
+        剩余报修单留在队列中
+        :param dispatcher: 分派人
+        :param maintainers: 可分派的维修工程师列表
+        :param count: 最多分派的报修单数
+        :return: 已分派的[(报修单, 维修工程师)]列表, 失败时返回None
+        """
+        if not maintainers or count <= 0:
+            return []
+        try:
+            # 多取一倍以容忍队列中的过期项
+            order_ids = dispatch_queue.get_queued_ids(count * 2)
+            if not order_ids:
+                return []
+            ranks = dict((order_id, rank) for rank, order_id in enumerate(order_ids))
+
+            assignments = []
+            with transaction.atomic():
+                repair_orders = sorted(
+                    self.select_for_update().filter(id__in=order_ids, status=REPAIR_ORDER_STATUS_SUBMITTED),
+                    key=lambda repair_order: ranks[repair_order.id]
+                )
+                stale_ids = set(order_ids) - set(repair_order.id for repair_order in repair_orders)
+
+                workloads = self.get_maintainer_workloads(maintainers)
+                heap = [
+                    (workloads.get(maintainer.id, 0), index, maintainer) for index, maintainer in enumerate(maintainers)
+                    if workloads.get(maintainer.id, 0) < REPAIR_ORDER_DISPATCH_MAX_WORKLOAD
+                ]
+                heapq.heapify(heap)
+                for repair_order in repair_orders[:count]:
+                    if not heap:
+                        break
+                    workload, index, maintainer = heapq.heappop(heap)
+                    assignments.append((repair_order, maintainer))
+                    if workload + 1 < REPAIR_ORDER_DISPATCH_MAX_WORKLOAD:
+                        heapq.heappush(heap, (workload + 1, index, maintainer))
+                if assignments:
+                    modified_time = times.now()
+                    by_maintainer = sorted(assignments, key=lambda assignment: assignment[1].id)
+                    for _, group in groupby(by_maintainer, key=lambda assignment: assignment[1].id):
+                        group = list(group)
+                        self.filter(id__in=[repair_order.id for repair_order, _ in group]).update(
+                            maintainer=group[0][1], status=REPAIR_ORDER_STATUS_DOING,
+                            modifier=dispatcher, modified_time=modified_time,
+                        )
+                    self.filter(id__in=[repair_order.id for repair_order, _ in assignments]).filter(
+                        Q(priority='') | Q(priority__isnull=True)
+                    ).update(priority=REPAIR_ORDER_DEFAULT_PRIORITY)
+
+                    for repair_order, maintainer in assignments:
+                        repair_order.maintainer = maintainer
+                        repair_order.status = REPAIR_ORDER_STATUS_DOING
+                        repair_order.priority = repair_order.priority or REPAIR_ORDER_DEFAULT_PRIORITY
+                        repair_order.modifier = dispatcher
+                        repair_order.modified_time = modified_time
+                    emit_repair_order_events([
+                        RepairOrderEvent(repair_order, REPAIR_ORDER_OPERATION_DISPATCH, dispatcher, receiver=maintainer)
+                        for repair_order, maintainer in assignments
+                    ])
+            if stale_ids:
+                dispatch_queue.remove_orders(list(stale_ids))
+            return assignments
+        except Exception as e:
+            logger.exception(e)
+            return None
+
     @staticmethod
     def gen_repair_order_no(prefix, timestamp, seq, seq_max_digits=2):
         """
@@ -461,31 +1036,207 @@ class RepairOrderManager(BaseManager):
         return query_set
 
 
+class RepairOrderDailyStatManager(Manager):
+    """
+    报修单每日统计. 报修单状态变更事件写入时增量更新(变化量按分组合并后每组一条UPDATE, 见events.py),
+    直接修改报修单数据后需执行rebuild_repair_order_daily_stats命令重建
+    """
+
+    STAT_FIELDS = ('count', 'dispatched', 'dispatch_seconds', 'repaired', 'repair_seconds')
+
+    @staticmethod
+    def get_elapsed_seconds(begin_time, end_time):
+        return max(0, int((end_time - begin_time).total_seconds()))
+
+    def track_events(self, events):
+        """
+        根据报修单状态变更事件增量更新每日统计
+        :param events: RepairOrderEvent列表
+        """
+        try:
+            deltas = defaultdict(Counter)
+            for event in events:
+                if event.operation not in REPAIR_ORDER_OPERATION_TRANSITIONS:
+                    continue
+                old_status, new_status = REPAIR_ORDER_OPERATION_TRANSITIONS[event.operation]
+                repair_order = event.repair_order
+                # 科室取提交时的快照, 各状态变更事件均计入同一科室分组
+                group = (
+                    repair_order.created_time.date(), repair_order.fault_type_id, repair_order.applicant_dept_id or 0,
+                )
+                if old_status:
+                    deltas[(group[0], old_status) + group[1:]]['count'] -= 1
+                delta = deltas[(group[0], new_status) + group[1:]]
+                delta['count'] += 1
+                seconds = self.get_elapsed_seconds(repair_order.created_time, event.time)
+                if event.operation == REPAIR_ORDER_OPERATION_DISPATCH:
+                    delta['dispatched'] += 1
+                    delta['dispatch_seconds'] += seconds
+                elif event.operation == REPAIR_ORDER_OPERATION_HANDLE:
+                    delta['repaired'] += 1
+                    delta['repair_seconds'] += seconds
+
+            with transaction.atomic():
+                for key, delta in deltas.items():
+                    values = dict((field, value) for field, value in delta.items() if value)
+                    if values:
+                        self.add_stats(key, values)
+            return True
+        except Exception as e:
+            logger.exception(e)
+            return False
+
+    def add_stats(self, key, values):
+        group = dict(zip(('date', 'status', 'fault_type_id', 'dept_id'), key))
+        if self.filter(**group).update(**dict((field, F(field) + value) for field, value in values.items())):
+            return
+        try:
+            with transaction.atomic():
+                self.create(**dict(group, **values))
+        except IntegrityError:  # 并发创建同一分组
+            self.filter(**group).update(**dict((field, F(field) + value) for field, value in values.items()))
+
+    @staticmethod
+    def get_transition_times(order_ids):
+        """
+        根据报修单操作记录查询报修单首次分派及处理完成的时间
+        :return: {(报修单id, 操作): 时间}
+        """
+        from nmis.devices.models import RepairOrderRecord
+        records = RepairOrderRecord.objects.filter(
+            repair_order_id__in=order_ids,
+            operation__in=(REPAIR_ORDER_OPERATION_DISPATCH, REPAIR_ORDER_OPERATION_HANDLE)
+        ).order_by('-created_time').values_list('repair_order_id', 'operation', 'created_time')
+        return dict(((order_id, operation), created_time) for order_id, operation, created_time in records)
+
+    def rebuild(self, start_date=None, end_date=None, batch_size=5000):
+        """
+        根据报修单及其操作记录重新计算提交日期在[start_date, end_date]内的每日统计, 未指定日期时重建全部.
+        重建期间的增量更新可能丢失, 应在业务低峰期执行
+        :return: 统计的报修单数, 失败时返回None
+        """
+        from nmis.devices.models import RepairOrder
+        try:
+            queryset = RepairOrder.objects.order_by('id')
+            if start_date:
+                queryset = queryset.filter(created_time__gte=start_date)
+            if end_date:
+                queryset = queryset.filter(created_time__lt=end_date + datetime.timedelta(days=1))
+
+            stats, total, last_id = defaultdict(Counter), 0, 0
+            while True:
+                rows = list(queryset.filter(id__gt=last_id).values_list(
+                    'id', 'created_time', 'status', 'fault_type_id', 'applicant_dept_id'
+                )[:batch_size])
+                if not rows:
+                    break
+                transition_times = self.get_transition_times([row[0] for row in rows])
+                for order_id, created_time, status, fault_type_id, dept_id in rows:
+                    stat = stats[(created_time.date(), status, fault_type_id, dept_id or 0)]
+                    stat['count'] += 1
+                    dispatch_time = transition_times.get((order_id, REPAIR_ORDER_OPERATION_DISPATCH))
+                    if dispatch_time:
+                        stat['dispatched'] += 1
+                        stat['dispatch_seconds'] += self.get_elapsed_seconds(created_time, dispatch_time)
+                    handle_time = transition_times.get((order_id, REPAIR_ORDER_OPERATION_HANDLE))
+                    if handle_time:
+                        stat['repaired'] += 1
+                        stat['repair_seconds'] += self.get_elapsed_seconds(created_time, handle_time)
+                total += len(rows)
+                last_id = rows[-1][0]
+
+            with transaction.atomic():
+                stale = self.all()
+                if start_date:
+                    stale = stale.filter(date__gte=start_date)
+                if end_date:
+                    stale = stale.filter(date__lte=end_date)
+                stale.delete()
+                self.bulk_create([
+                    self.model(
+                        date=date, status=status, fault_type_id=fault_type_id, dept_id=dept_id,
+                        **dict((field, stat[field]) for field in self.STAT_FIELDS)
+                    )
+                    for (date, status, fault_type_id, dept_id), stat in stats.items()
+                ], batch_size=batch_size)
+            return total
+        except Exception as e:
+            logger.exception(e)
+            return None
+
+    def get_report(self, start_date, end_date):
+        """
+        汇总提交日期在[start_date, end_date]内的每日统计
+        :return: 报修单状态/故障类型/科室Top3分布, 平均分派时长及平均维修时长(秒, 无数据时为None)
+        """
+        from nmis.devices.models import FaultType
+        from nmis.hospitals.models import Department
+
+        queryset = self.filter(date__range=(start_date, end_date))
+        status_rows = queryset.values('status').annotate(nums=Sum('count')).filter(nums__gt=0).order_by('status')
+        fault_type_rows = list(
+            queryset.values('fault_type_id').annotate(nums=Sum('count')).filter(nums__gt=0)
+            .order_by('-nums', 'fault_type_id')
+        )
+        dept_rows = list(
+            queryset.values('dept_id').annotate(nums=Sum('count')).filter(nums__gt=0).order_by('-nums', 'dept_id')[:3]
+        )
+        totals = queryset.aggregate(
+            dispatched=Sum('dispatched'), dispatch_seconds=Sum('dispatch_seconds'),
+            repaired=Sum('repaired'), repair_seconds=Sum('repair_seconds'),
+        )
+
+        # 与原报表一致, 按故障类型名称合并
+        fault_type_titles = dict(FaultType.objects.filter(
+            id__in=[row['fault_type_id'] for row in fault_type_rows]
+        ).values_list('id', 'title'))
+        fault_type_nums = Counter()
+        for row in fault_type_rows:
+            fault_type_nums[fault_type_titles.get(row['fault_type_id'])] += row['nums']
+        dept_names = dict(Department.objects.filter(
+            id__in=[row['dept_id'] for row in dept_rows if row['dept_id']]
+        ).values_list('id', 'name'))
+        return {
+            'rp_order_nums_status': list(status_rows),
+            'rp_order_nums_fault_type': [
+                {'fault_type_title': title, 'nums': nums} for title, nums in fault_type_nums.most_common()
+            ],
+            'rp_order_nums_top_dept': [
+                {'dept': dept_names.get(row['dept_id']), 'nums': row['nums']} for row in dept_rows
+            ],
+            'mean_time_to_dispatch': (
+                totals['dispatch_seconds'] / totals['dispatched'] if totals['dispatched'] else None
+            ),
+            'mean_time_to_repair': totals['repair_seconds'] / totals['repaired'] if totals['repaired'] else None,
+        }
+
+
 class MaintenancePlanManager(BaseManager):
 
     def create_maintenance_plan(self, storage_places, assert_devices, **data):
+        from nmis.devices.models import MaintenancePlanOccurrence
         try:
-            with transaction.atomic():
-                seq = Sequence.objects.select_for_update().get(seq_code=MAINTENANCE_PLAN_NO_SEQ_CODE)
-                if not seq:
-                    logger.warning('The sequence not exists')
-                    return None
-                seq.curr_value()
-                next_value = seq.next_value()
-                timestamp = times.datetime_to_str(times.now(), format='%Y%m%d')
-                plan_no = MaintenancePlanManager.gen_maintenance_plan_no(
-                    MAINTENANCE_PLAN_NO_PREFIX, timestamp, next_value, seq_max_digits=MAINTENANCE_PLAN_NO_SEQ_DIGITS)
+            for _ in range(ORDER_NO_ALLOCATE_ATTEMPTS):
+                plan_no = allocate_daily_no(
+                    self.model, 'plan_no', MAINTENANCE_PLAN_NO_PREFIX, MAINTENANCE_PLAN_NO_SEQ_CODE,
+                    MAINTENANCE_PLAN_NO_SEQ_DIGITS, self.gen_maintenance_plan_no
+                )
                 if not plan_no:
-                    return False
+                    return None
                 data['plan_no'] = plan_no
-                maintenance_plan = self.create(**data)
-                maintenance_plan.places.set(storage_places)
-                maintenance_plan.assert_devices.set(assert_devices)
-                seq.seq_value = next_value
-                seq.save()
-                seq.cache()
-                maintenance_plan.cache()
+                try:
+                    with transaction.atomic():
+                        maintenance_plan = self.create(**data)
+                        maintenance_plan.places.set(storage_places)
+                        maintenance_plan.assert_devices.set(assert_devices)
+                        # 日期参数可能为字符串, 重新读取后生成计划周期
+                        maintenance_plan.refresh_from_db(fields=['start_date', 'expired_date'])
+                        MaintenancePlanOccurrence.objects.schedule_plans([maintenance_plan])
+                except IntegrityError:
+                    logger.warning('Maintenance plan no %s already exists, reallocating', plan_no)
+                    continue
                 return maintenance_plan
+            return None
         except Exception as e:
             logger.exception(e)
             return None
@@ -534,34 +1285,157 @@ class MaintenancePlanManager(BaseManager):
         if type:
             query_set = query_set.filter(type=type)
         if period:
-            if period == MAINTENANCE_PLAN_EXPIRED_DATE_BE_OVERDUE:
-                query_set = query_set.filter(expired_date__lt=times.get_day_begin_time(times.now()))
-            if period == MAINTENANCE_PLAN_EXPIRED_DATE_NOW_DAY:
+            # 未执行的计划按其未执行周期的截止日期筛选(见MaintenancePlanOccurrenceManager.get_due_queryset);
+            # 已执行的计划及尚未生成周期的计划仍按计划截止日期筛选
+            from nmis.devices.models import MaintenancePlanOccurrence
+            begin, end = MaintenancePlanOccurrence.objects.get_due_window(period)
+            expired_q = Q(expired_date__lt=end) if begin is None else Q(expired_date__range=(begin, end))
+            query_set = query_set.annotate(
+                has_occurrences=Exists(MaintenancePlanOccurrence.objects.filter(plan=OuterRef('pk')))
+            ).filter(
+                Q(id__in=MaintenancePlanOccurrence.objects.get_due_queryset(period).values('plan_id')) |
+                expired_q & (~Q(status=MAINTENANCE_PLAN_STATUS_NEW) | Q(has_occurrences=False))
+            )
+        return query_set.order_by('-created_time')
 
-                query_set = query_set.filter(
-                    expired_date__range=(times.get_day_begin_time(times.now()),
-                                         times.get_day_end_time(times.now()))
-                        )
-            if period == MAINTENANCE_PLAN_EXPIRED_DATE_THREE_DAY:
 
-                query_set = query_set.filter(
-                    expired_date__range=(
-                        times.get_day_begin_time(times.now()),
-                        times.get_day_end_time(times.after_days(interval=2)))
-                        )
-            if period == MAINTENANCE_PLAN_EXPIRED_DATE_ON_WEEK:
+class MaintenancePlanOccurrenceManager(Manager):
+    """
+    维护计划周期. 新建维护计划时生成其截止日期在滚动范围(MAINTENANCE_PLAN_SCHEDULE_HORIZON_DAYS天)内的周期,
+    schedule_maintenance_plans命令每日执行, 将范围向后滚动并生成新进入范围的周期
+    """
 
-                query_set = query_set.filter(
-                    expired_date__range=(
-                        times.get_day_begin_time(times.now()),
-                        times.get_day_end_time(times.after_days(interval=6)))
-                )
-            if period == MAINTENANCE_PLAN_EXPIRED_DATE_ON_MONTH:
+    @staticmethod
+    def iter_periods(plan, first_seq=0):
+        """
+        按执行周期展开维护计划, 依次产出(周期序号, 周期开始时间, 周期截止日期). 最后一个周期截止于计划截止日期
+        :param first_seq: 起始周期序号
+        """
+        unit = MAINTENANCE_PLAN_PERIOD_UNITS.get(plan.period_measure)
+        if not unit or not plan.period_num or plan.period_num <= 0:
+            if first_seq == 0:
+                yield 0, plan.start_date, plan.expired_date
+            return
+
+        seq = first_seq
+        while True:
+            period_start = plan.start_date + relativedelta(**{unit: seq * plan.period_num})
+            if seq and period_start >= plan.expired_date:
+                return
+            due_date = min(plan.start_date + relativedelta(**{unit: (seq + 1) * plan.period_num}), plan.expired_date)
+            yield seq, period_start, due_date
+            if due_date >= plan.expired_date:
+                return
+            seq += 1
+
+    def schedule_plans(self, plans, horizon=None):
+        """
+        为未执行的维护计划生成截止日期不晚于horizon的周期, 已生成的周期不重复生成
+        :param plans: 维护计划列表, start_date/expired_date须为datetime
+        :param horizon: 生成范围, 默认为当前时间起MAINTENANCE_PLAN_SCHEDULE_HORIZON_DAYS天
+        :return: 新生成的周期数
+        """
+        horizon = horizon or times.now() + datetime.timedelta(days=MAINTENANCE_PLAN_SCHEDULE_HORIZON_DAYS)
+        plans = [plan for plan in plans if plan.status == MAINTENANCE_PLAN_STATUS_NEW]
+        if not plans:
+            return 0
+        last_seqs = dict(
+            self.filter(plan__in=[plan.id for plan in plans]).values_list('plan').annotate(Max('seq')).order_by()
+        )
+        occurrences = []
+        for plan in plans:
+            periods = islice(
+                self.iter_periods(plan, last_seqs.get(plan.id, -1) + 1), MAINTENANCE_PLAN_SCHEDULE_MAX_OCCURRENCES
+            )
+            for seq, period_start, due_date in periods:
+                if due_date > horizon:
+                    break
+                occurrences.append(self.model(plan=plan, seq=seq, period_start=period_start, due_date=due_date))
+        self.bulk_create(occurrences, batch_size=1000)
+        return len(occurrences)
+
+    def roll_horizon(self, batch_size=1000):
+        """
+        为所有未执行的维护计划生成新进入滚动范围的周期, 每日定时执行
+        :return: 新生成的周期数, 失败时返回None
+        """
+        from nmis.devices.models import MaintenancePlan
+        horizon = times.now() + datetime.timedelta(days=MAINTENANCE_PLAN_SCHEDULE_HORIZON_DAYS)
+        queryset = MaintenancePlan.objects.filter(status=MAINTENANCE_PLAN_STATUS_NEW).order_by('id').only(
+            'id', 'start_date', 'expired_date', 'period_measure', 'period_num', 'status'
+        )
+        total, last_id = 0, 0
+        try:
+            while True:
+                plans = list(queryset.filter(id__gt=last_id)[:batch_size])
+                if not plans:
+                    break
+                with transaction.atomic():
+                    total += self.schedule_plans(plans, horizon=horizon)
+                last_id = plans[-1].id
+            return total
+        except Exception as e:
+            logger.exception(e)
+            return None
 
-                query_set = query_set.filter(expired_date__range=(
-                    times.get_day_begin_time(times.now()),
-                    times.get_day_end_time(times.before_days(times.get_next_month(), interval=1))))
-        return query_set.order_by('-created_time')
+    def execute_next(self, plan):
+        """
+        将维护计划最早的未执行周期标记为已执行. 未执行周期尚未生成(提前执行超出滚动范围的周期)时先生成下一个周期
+        :return: 执行的周期, 计划已无剩余周期时返回None
+        """
+        occurrence = self.select_for_update().filter(
+            plan=plan, status=MAINTENANCE_PLAN_STATUS_NEW
+        ).order_by('seq').first()
+        if not occurrence:
+            last_seq = self.filter(plan=plan).aggregate(Max('seq'))['seq__max']
+            period = next(self.iter_periods(plan, 0 if last_seq is None else last_seq + 1), None)
+            if not period:
+                return None
+            seq, period_start, due_date = period
+            occurrence = self.create(plan=plan, seq=seq, period_start=period_start, due_date=due_date)
+        occurrence.status = MAINTENANCE_PLAN_STATUS_DONE
+        occurrence.executed_time = times.now()
+        occurrence.save(update_fields=['status', 'executed_time'])
+        return occurrence
+
+    @staticmethod
+    def get_due_window(bucket, now=None):
+        """
+        返回到期分组对应的截止日期范围(begin, end), 逾期分组的begin为None
+        :param bucket: MAINTENANCE_PLAN_EXPIRED_DATE_CHOICES
+        """
+        today = (now or times.now()).date()
+        today_begin = datetime.datetime.combine(today, datetime.time.min)
+        if bucket == MAINTENANCE_PLAN_EXPIRED_DATE_BE_OVERDUE:
+            return None, today_begin
+        last_day = {
+            MAINTENANCE_PLAN_EXPIRED_DATE_NOW_DAY: today,
+            MAINTENANCE_PLAN_EXPIRED_DATE_THREE_DAY: today + datetime.timedelta(days=2),
+            MAINTENANCE_PLAN_EXPIRED_DATE_ON_WEEK: today + datetime.timedelta(days=6),
+            MAINTENANCE_PLAN_EXPIRED_DATE_ON_MONTH: today + relativedelta(months=1) - datetime.timedelta(days=1),
+        }[bucket]
+        return today_begin, datetime.datetime.combine(last_day, datetime.time.max)
+
+    def get_due_queryset(self, bucket, status=MAINTENANCE_PLAN_STATUS_NEW, now=None):
+        """
+        查询截止日期在到期分组范围内的周期, 使用(status, due_date)或(due_date, plan)索引范围扫描
+        :param status: 周期状态, 为None时不限状态
+        """
+        begin, end = self.get_due_window(bucket, now=now)
+        queryset = self.filter(status=status) if status else self.all()
+        if begin is None:
+            return queryset.filter(due_date__lt=end)
+        return queryset.filter(due_date__range=(begin, end))
+
+    def count_due_buckets(self, now=None):
+        """
+        统计各到期分组的未执行周期数
+        :return: [{'bucket': 到期分组, 'count': 周期数}]
+        """
+        return [
+            {'bucket': bucket, 'count': self.get_due_queryset(bucket, now=now).count()}
+            for bucket, _ in MAINTENANCE_PLAN_EXPIRED_DATE_CHOICES
+        ]
 
 
 class FaultSolutionManager(BaseManager):
@@ -617,7 +1491,6 @@ class FaultSolutionManager(BaseManager):
         )
         try:
             fs = fault_solution.update(data)
-            fs.cache()
             return fs
         except Exception as e:
             logger.info(e)
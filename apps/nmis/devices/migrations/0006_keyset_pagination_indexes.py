@@ -0,0 +1,21 @@
+# Generated by Django 2.0 on 2018-12-16 10:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('devices', '0005_auto_20181130_1607'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assertdevice',
+            index=models.Index(fields=['created_time', 'id'], name='assert_device_ctime_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='repairorder',
+            index=models.Index(fields=['created_time', 'id'], name='repair_order_ctime_id_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 2.0 on 2018-12-19 15:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('devices', '0006_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssertDeviceSearchToken',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=8, verbose_name='词元')),
+                ('device', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='devices.AssertDevice', verbose_name='资产设备')),
+            ],
+            options={
+                'verbose_name': '资产设备搜索索引',
+                'verbose_name_plural': '资产设备搜索索引',
+                'db_table': 'devices_assert_device_search_token',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='assertdevicesearchtoken',
+            unique_together={('token', 'device')},
+        ),
+    ]
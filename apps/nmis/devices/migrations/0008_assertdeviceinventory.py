@@ -0,0 +1,34 @@
+# Generated by Django 2.0 on 2018-12-23 10:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('devices', '0007_assertdevicesearchtoken'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssertDeviceInventory',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('HO', '全院'), ('UD', '使用科室'), ('SP', '存放地点'), ('MC', '医疗器械分类')], max_length=2, verbose_name='汇总维度')),
+                ('group_id', models.PositiveIntegerField(default=0, verbose_name='分组id')),
+                ('cate', models.CharField(choices=[('ME', '医疗设备'), ('IN', '信息化设备')], max_length=10, verbose_name='资产设备类型')),
+                ('status', models.CharField(choices=[('FR', '闲置'), ('US', '使用中'), ('IM', '维修中'), ('SC', '已报废')], max_length=10, verbose_name='资产状态')),
+                ('count', models.IntegerField(default=0, verbose_name='设备数量')),
+                ('modified_time', models.DateTimeField(auto_now=True, verbose_name='修改时间')),
+            ],
+            options={
+                'verbose_name': '资产设备库存汇总',
+                'verbose_name_plural': '资产设备库存汇总',
+                'db_table': 'devices_assert_device_inventory',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='assertdeviceinventory',
+            unique_together={('dimension', 'group_id', 'cate', 'status')},
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 2.0 on 2018-12-24 10:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hospitals', '0003_auto_20181130_1103'),
+        ('devices', '0008_assertdeviceinventory'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='assertdevicerecord',
+            name='assert_device',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, to='devices.AssertDevice', verbose_name='资产设备'),
+        ),
+        migrations.AddField(
+            model_name='assertdevicerecord',
+            name='dept',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='hospitals.Department', verbose_name='使用科室'),
+        ),
+        migrations.AlterField(
+            model_name='assertdevicerecord',
+            name='operation',
+            field=models.CharField(choices=[('SMT', '提交'), ('UPD', '修改'), ('LAC', '调配'), ('SCP', '报废'), ('RPR', '维修'), ('MTN', '维护保养'), ('DEL', '删除')], default='SMT', max_length=10, verbose_name='操作'),
+        ),
+        migrations.AlterField(
+            model_name='assertdevicerecord',
+            name='operator',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='operate_assert_device_record', to='hospitals.Staff', verbose_name='操作人'),
+        ),
+        migrations.AlterField(
+            model_name='assertdevicerecord',
+            name='receiver',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, to='hospitals.Staff', verbose_name='操作的接受方'),
+        ),
+        migrations.AddIndex(
+            model_name='assertdevicerecord',
+            index=models.Index(fields=['assert_device', 'created_time', 'id'], name='device_record_device_ctime_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assertdevicerecord',
+            index=models.Index(fields=['dept', 'created_time', 'id'], name='device_record_dept_ctime_idx'),
+        ),
+    ]
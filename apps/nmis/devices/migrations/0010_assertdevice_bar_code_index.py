@@ -0,0 +1,18 @@
+# Generated by Django 2.0 on 2018-12-24 16:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('devices', '0009_assert_device_record_event_log'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='assertdevice',
+            name='bar_code',
+            field=models.CharField(blank=True, db_index=True, max_length=128, null=True, verbose_name='设备条形码'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 2.0 on 2018-12-25 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('devices', '0010_assertdevice_bar_code_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RepairOrderDailyStat',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='提交日期')),
+                ('status', models.CharField(choices=[('SMT', '已提交/待分派'), ('DNG', '处理中/已分派'), ('DNE', '已处理'), ('RTN', '已退回'), ('CLS', '已关闭')], max_length=10, verbose_name='状态')),
+                ('fault_type_id', models.PositiveIntegerField(verbose_name='故障类型id')),
+                ('dept_id', models.PositiveIntegerField(default=0, verbose_name='申请人科室id')),
+                ('count', models.IntegerField(default=0, verbose_name='报修单数')),
+                ('dispatched', models.IntegerField(default=0, verbose_name='已分派报修单数')),
+                ('dispatch_seconds', models.BigIntegerField(default=0, verbose_name='提交至分派总秒数')),
+                ('repaired', models.IntegerField(default=0, verbose_name='已处理报修单数')),
+                ('repair_seconds', models.BigIntegerField(default=0, verbose_name='提交至处理完成总秒数')),
+                ('modified_time', models.DateTimeField(auto_now=True, verbose_name='修改时间')),
+            ],
+            options={
+                'verbose_name': '报修单每日统计',
+                'verbose_name_plural': '报修单每日统计',
+                'db_table': 'devices_repair_order_daily_stat',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='repairorderdailystat',
+            unique_together={('date', 'status', 'fault_type_id', 'dept_id')},
+        ),
+    ]
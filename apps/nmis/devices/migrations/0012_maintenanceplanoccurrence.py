@@ -0,0 +1,49 @@
+# Generated by Django 2.0 on 2018-12-25 15:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('devices', '0011_repairorderdailystat'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='maintenanceplan',
+            name='period_measure',
+            field=models.CharField(blank=True, choices=[('Y', '年'), ('M', '月'), ('W', '周'), ('D', '日')], default='D', max_length=10, null=True, verbose_name='执行周期计量单位'),
+        ),
+        migrations.CreateModel(
+            name='MaintenancePlanOccurrence',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.PositiveIntegerField(verbose_name='周期序号')),
+                ('period_start', models.DateTimeField(verbose_name='周期开始时间')),
+                ('due_date', models.DateTimeField(verbose_name='周期截止日期')),
+                ('status', models.CharField(choices=[('NW', ' 新建/未执行'), ('DN', '已执行')], default='NW', max_length=10, verbose_name='状态')),
+                ('executed_time', models.DateTimeField(blank=True, null=True, verbose_name='执行时间')),
+                ('created_time', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('plan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occurrences', to='devices.MaintenancePlan', verbose_name='维护计划')),
+            ],
+            options={
+                'verbose_name': '维护计划周期',
+                'verbose_name_plural': '维护计划周期',
+                'db_table': 'devices_maintenance_plan_occurrence',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='maintenanceplanoccurrence',
+            index=models.Index(fields=['status', 'due_date'], name='plan_occurrence_status_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='maintenanceplanoccurrence',
+            index=models.Index(fields=['due_date', 'plan'], name='plan_occurrence_due_plan_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='maintenanceplanoccurrence',
+            unique_together={('plan', 'seq')},
+        ),
+    ]
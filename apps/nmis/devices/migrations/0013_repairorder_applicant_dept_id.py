@@ -0,0 +1,31 @@
+# Generated by Django 2.0 on 2018-12-26 10:20
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_applicant_dept_id(apps, schema_editor):
+    """
+    已有报修单以申请人当前所在科室作为提交时的科室
+    """
+    RepairOrder = apps.get_model('devices', 'RepairOrder')
+    Staff = apps.get_model('hospitals', 'Staff')
+    RepairOrder.objects.update(
+        applicant_dept_id=Subquery(Staff.objects.filter(id=OuterRef('applicant_id')).values('dept_id')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('devices', '0012_maintenanceplanoccurrence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repairorder',
+            name='applicant_dept_id',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='提交时申请人科室id'),
+        ),
+        migrations.RunPython(fill_applicant_dept_id, migrations.RunPython.noop),
+    ]
@@ -7,7 +7,7 @@
 
 import logging
 
-from django.db import models
+from django.db import models, transaction
 
 from base.models import BaseModel
 from nmis.devices.consts import ASSERT_DEVICE_CATE_CHOICES, \
@@ -23,9 +23,12 @@ from nmis.devices.consts import ASSERT_DEVICE_CATE_CHOICES, \
     ASSERT_DEVICE_OPERATION_CHOICES, \
     ASSERT_DEVICE_OPERATION_SUBMIT, FAULT_SOLUTION_STATUS_CHOICES, \
     FAULT_SOLUTION_STATUS_NEW, ASSERT_DEVICE_STATUS_SCRAPPED, \
-    MAINTENANCE_PLAN_STATUS_DONE, MdcManageCateEnum
+    MAINTENANCE_PLAN_STATUS_DONE, MdcManageCateEnum, ASSERT_DEVICE_INVENTORY_DIMENSION_CHOICES, \
+    ASSERT_DEVICE_OPERATION_SCRAP, ASSERT_DEVICE_OPERATION_DELETE, ASSERT_DEVICE_OPERATION_MAINTENANCE
 from nmis.devices.managers import AssertDeviceManager, MedicalDeviceCateManager, FaultTypeManager, \
-    RepairOrderManager, MaintenancePlanManager, FaultSolutionManager
+    RepairOrderManager, MaintenancePlanManager, FaultSolutionManager, AssertDeviceSearchTokenManager, \
+    AssertDeviceInventoryManager, AssertDeviceInventoryState, AssertDeviceRecordManager, RepairOrderDailyStatManager, \
+    MaintenancePlanOccurrenceManager
 
 logger = logging.getLogger(__name__)
 
@@ -265,7 +268,7 @@ class AssertDevice(BaseModel):
         on_delete=models.PROTECT, null=True, blank=True
     )
     production_date = models.DateField('出厂日期',)
-    bar_code = models.CharField('设备条形码', max_length=128, null=True, blank=True)
+    bar_code = models.CharField('设备条形码', max_length=128, null=True, blank=True, db_index=True)
     producer = models.CharField('厂家', max_length=128, null=True, blank=True)
     storage_place = models.ForeignKey(
         'hospitals.HospitalAddress', related_name='storage_assert_devices', verbose_name='存放地点',
@@ -296,6 +299,9 @@ class AssertDevice(BaseModel):
             ('allocate_assert_device', 'can allocate assert device'),  # 调配设备
             ('import_fault_solution', 'can import fault_solution'),  # 导入设备
         )
+        indexes = [
+            models.Index(fields=['created_time', 'id'], name='assert_device_ctime_id_idx'),   # 游标分页
+        ]
 
     VALID_ATTRS = [
         'assert_no', 'title', 'cate', 'medical_device_cate', 'serial_no', 'type_spec',
@@ -306,24 +312,44 @@ class AssertDevice(BaseModel):
     def __str__(self):
         return '%d %s' % (self.id, self.title)
 
-    def deleted(self):
+    def get_inventory_state(self):
+        """
+        返回库存汇总相关字段的快照
+        """
+        return AssertDeviceInventoryState(
+            self.cate, self.status, self.use_dept_id, self.storage_place_id, self.medical_device_cate_id
+        )
 
+    def deleted(self, operator):
+        """
+        删除资产设备, 设备的历史事件保留
+        :param operator: 操作人
+        """
         try:
-            self.clear_cache()
-            self.delete()
+            with transaction.atomic():
+                old_state = self.get_inventory_state()
+                AssertDeviceRecord.objects.add_records([self], ASSERT_DEVICE_OPERATION_DELETE, operator, '删除了')
+                self.clear_cache()
+                self.delete()
+                AssertDeviceInventory.objects.track_changes(old_states=[old_state])
             return True
         except Exception as e:
             logger.exception(e)
             return False
 
-    def assert_device_scrapped(self):
+    def assert_device_scrapped(self, operator):
         """
         资产设备报废
+        :param operator: 操作人
         """
         try:
-            self.status = ASSERT_DEVICE_STATUS_SCRAPPED
-            self.save()
-            self.cache()
+            with transaction.atomic():
+                old_state = self.get_inventory_state()
+                self.status = ASSERT_DEVICE_STATUS_SCRAPPED
+                self.modifier = operator
+                self.save()
+                AssertDeviceRecord.objects.add_records([self], ASSERT_DEVICE_OPERATION_SCRAP, operator, '报废了')
+                AssertDeviceInventory.objects.track_changes([old_state], [self.get_inventory_state()])
             return True
         except Exception as e:
             logger.exception(e)
@@ -365,24 +391,78 @@ class AssertDevice(BaseModel):
         pass
 
 
+class AssertDeviceSearchToken(models.Model):
+    """
+    资产设备n-gram搜索索引: 资产名称, 资产编号, 序列号, 条形码及厂家切分后的词元, 每个设备每个词元一条记录
+    """
+    token = models.CharField('词元', max_length=8)
+    device = models.ForeignKey(
+        'devices.AssertDevice', verbose_name='资产设备', related_name='+', on_delete=models.CASCADE
+    )
+
+    objects = AssertDeviceSearchTokenManager()
+
+    class Meta:
+        verbose_name = '资产设备搜索索引'
+        verbose_name_plural = verbose_name
+        db_table = 'devices_assert_device_search_token'
+        unique_together = ('token', 'device')
+
+    def __str__(self):
+        return '%s %s' % (self.device_id, self.token)
+
+
+class AssertDeviceInventory(models.Model):
+    """
+    资产设备库存汇总: 按维度(全院/使用科室/存放地点/医疗器械分类)及分组, 统计各设备类型, 设备状态的设备数量
+    """
+    dimension = models.CharField('汇总维度', max_length=2, choices=ASSERT_DEVICE_INVENTORY_DIMENSION_CHOICES)
+    group_id = models.PositiveIntegerField('分组id', default=0)   # 科室/地址/分类id, 0表示未设置
+    cate = models.CharField('资产设备类型', max_length=10, choices=ASSERT_DEVICE_CATE_CHOICES)
+    status = models.CharField('资产状态', max_length=10, choices=ASSERT_DEVICE_STATUS_CHOICES)
+    count = models.IntegerField('设备数量', default=0)
+    modified_time = models.DateTimeField('修改时间', auto_now=True)
+
+    objects = AssertDeviceInventoryManager()
+
+    class Meta:
+        verbose_name = '资产设备库存汇总'
+        verbose_name_plural = verbose_name
+        db_table = 'devices_assert_device_inventory'
+        unique_together = ('dimension', 'group_id', 'cate', 'status')
+
+    def __str__(self):
+        return '%s %s %s %s' % (self.dimension, self.group_id, self.cate, self.status)
+
+
 class AssertDeviceRecord(BaseModel):
     """
-    设备变更记录
+    设备变更记录: 只追加的资产设备事件日志. 为便于按created_time分区及归档, 各外键均不建立数据库约束,
+    设备删除后其历史事件仍保留
     """
     assert_device = models.ForeignKey(
-        'devices.AssertDevice', verbose_name='资产设备', on_delete=models.PROTECT
+        'devices.AssertDevice', verbose_name='资产设备', on_delete=models.DO_NOTHING, db_constraint=False
+    )
+    # 事件发生时设备的使用科室
+    dept = models.ForeignKey(
+        'hospitals.Department', related_name='+', verbose_name='使用科室', on_delete=models.DO_NOTHING,
+        db_constraint=False, null=True, blank=True
     )
     operation = models.CharField('操作', choices=ASSERT_DEVICE_OPERATION_CHOICES, max_length=10, default=ASSERT_DEVICE_OPERATION_SUBMIT)
     reason = models.CharField('执行当前操作的原因', max_length=128, null=True, blank=True, default='')
     operator = models.ForeignKey(
-        'hospitals.Staff', related_name='operate_assert_device_record', verbose_name='操作人', on_delete=models.PROTECT
+        'hospitals.Staff', related_name='operate_assert_device_record', verbose_name='操作人',
+        on_delete=models.DO_NOTHING, db_constraint=False
     )
     # 调配给了谁
     receiver = models.ForeignKey(
-        'hospitals.Staff', verbose_name='操作的接受方', on_delete=models.PROTECT, null=True, blank=True
+        'hospitals.Staff', verbose_name='操作的接受方', on_delete=models.DO_NOTHING, db_constraint=False,
+        null=True, blank=True
     )
     msg_content = models.CharField('操作内容', max_length=128)
 
+    objects = AssertDeviceRecordManager()
+
     class Meta:
         verbose_name = '设备变更记录'
         verbose_name_plural = verbose_name
@@ -390,6 +470,11 @@ class AssertDeviceRecord(BaseModel):
         permissions = (
             ('view_assert_device_record', 'can view assert device record'),  # 查看设备变更记录
         )
+        indexes = [
+            # 设备历史/科室历史的游标分页
+            models.Index(fields=['assert_device', 'created_time', 'id'], name='device_record_device_ctime_idx'),
+            models.Index(fields=['dept', 'created_time', 'id'], name='device_record_dept_ctime_idx'),
+        ]
 
     VALID_ATTRS = [
         'operation', 'msg_content', 'reason'
@@ -447,6 +532,8 @@ class RepairOrder(BaseModel):
         'hospitals.Staff', related_name='applied_repair_order', verbose_name='报修人/申请人',
         on_delete=models.PROTECT
     )
+    # 提交时申请人所在科室(快照), 报修单每日统计按此分组, 申请人之后调动科室不影响统计
+    applicant_dept_id = models.PositiveIntegerField('提交时申请人科室id', null=True, blank=True)
     fault_type = models.ForeignKey('devices.FaultType', verbose_name='故障分类', on_delete=models.PROTECT)
     desc = models.TextField('故障描述', max_length=1024, null=True, blank=True)
     maintainer = models.ForeignKey(
@@ -488,6 +575,9 @@ class RepairOrder(BaseModel):
             ('dispatch_repair_order', 'can dispatch repair order'),  # 分派报修单
         )
         ordering = ['id']
+        indexes = [
+            models.Index(fields=['created_time', 'id'], name='repair_order_ctime_id_idx'),    # 游标分页
+        ]
 
     VALID_ATTRS = [
         'applicant', 'fault_type', 'desc', 'maintainer', 'expenses', 'result', 'repair_device_list',
@@ -567,6 +657,35 @@ class RepairOrderRecord(BaseModel):
         return '%d' % (self.id, )
 
 
+class RepairOrderDailyStat(models.Model):
+    """
+    报修单每日统计: 按提交日期, 当前状态, 故障类型及申请人科室统计报修单数量, 以及分派/处理完成的报修单数和
+    提交至分派/处理完成的总耗时(用于计算平均分派时长MTTD及平均维修时长MTTR, 按各状态合计).
+    报修单状态变更时增量更新, 历史数据或直接修改数据库后执行rebuild_repair_order_daily_stats命令重建
+    """
+    date = models.DateField('提交日期')
+    status = models.CharField('状态', max_length=10, choices=REPAIR_ORDER_STATUS_CHOICES)
+    fault_type_id = models.PositiveIntegerField('故障类型id')
+    dept_id = models.PositiveIntegerField('申请人科室id', default=0)     # 0表示未设置
+    count = models.IntegerField('报修单数', default=0)
+    dispatched = models.IntegerField('已分派报修单数', default=0)
+    dispatch_seconds = models.BigIntegerField('提交至分派总秒数', default=0)
+    repaired = models.IntegerField('已处理报修单数', default=0)
+    repair_seconds = models.BigIntegerField('提交至处理完成总秒数', default=0)
+    modified_time = models.DateTimeField('修改时间', auto_now=True)
+
+    objects = RepairOrderDailyStatManager()
+
+    class Meta:
+        verbose_name = '报修单每日统计'
+        verbose_name_plural = verbose_name
+        db_table = 'devices_repair_order_daily_stat'
+        unique_together = ('date', 'status', 'fault_type_id', 'dept_id')
+
+    def __str__(self):
+        return '%s %s %s %s' % (self.date, self.status, self.fault_type_id, self.dept_id)
+
+
 class MaintenancePlan(BaseModel):
     """
     设备维护保养计划
@@ -626,22 +745,65 @@ class MaintenancePlan(BaseModel):
     def __str__(self):
         return '%d' % (self.id, )
 
-    def change_status(self, result):
+    def change_status(self, result, operator=None):
         """
-        执行操作改变资产设备维护计划的状态：改为已执行状态
+        执行操作改变资产设备维护计划的状态：将最早的未执行周期标记为已执行, 最后一个周期执行后(或无周期数据时)
+        计划改为已执行状态, 并为计划中的设备记录维护保养事件
         :param result: 处理结果
+        :param operator: 操作人, 默认为计划执行人
         """
+        operator = operator or self.executor
         try:
-            self.result = result
-            self.status = MAINTENANCE_PLAN_STATUS_DONE
-            self.save()
-            self.cache()
+            with transaction.atomic():
+                occurrence = MaintenancePlanOccurrence.objects.execute_next(self)
+                self.result = result
+                if not occurrence or occurrence.due_date >= self.expired_date:
+                    self.status = MAINTENANCE_PLAN_STATUS_DONE
+                self.modifier = operator
+                self.save()
+                AssertDeviceRecord.objects.add_records(
+                    self.assert_devices.all(), ASSERT_DEVICE_OPERATION_MAINTENANCE, operator, '维护保养了',
+                    detail=', 维护计划编号: %s' % self.plan_no
+                )
             return True
         except Exception as e:
             logger.exception(e)
             return False
 
 
+class MaintenancePlanOccurrence(models.Model):
+    """
+    维护计划周期: 按执行周期(period_measure/period_num)将维护计划展开为具体的执行周期, 每个周期须在截止日期前执行.
+    未设置执行周期的计划只有一个周期, 截止日期为计划截止日期. 周期按滚动范围生成, 见MaintenancePlanOccurrenceManager
+    """
+    plan = models.ForeignKey(
+        'devices.MaintenancePlan', related_name='occurrences', verbose_name='维护计划', on_delete=models.CASCADE
+    )
+    seq = models.PositiveIntegerField('周期序号')     # 从0开始
+    period_start = models.DateTimeField('周期开始时间')
+    due_date = models.DateTimeField('周期截止日期')
+    status = models.CharField(
+        '状态', choices=MAINTENANCE_PLAN_STATUS_CHOICES, default=MAINTENANCE_PLAN_STATUS_NEW, max_length=10
+    )
+    executed_time = models.DateTimeField('执行时间', null=True, blank=True)
+    created_time = models.DateTimeField('创建时间', auto_now_add=True)
+
+    objects = MaintenancePlanOccurrenceManager()
+
+    class Meta:
+        verbose_name = '维护计划周期'
+        verbose_name_plural = verbose_name
+        db_table = 'devices_maintenance_plan_occurrence'
+        unique_together = ('plan', 'seq')
+        indexes = [
+            models.Index(fields=['status', 'due_date'], name='plan_occurrence_status_due_idx'),   # 到期分组查询
+            models.Index(fields=['due_date', 'plan'], name='plan_occurrence_due_plan_idx'),       # 维护计划列表到期筛选
+        ]
+
+    def __str__(self):
+        return '%s-%s' % (self.plan_id, self.seq)
+
+
 class FaultSolution(BaseModel):
     """
     故障/问题解决方案
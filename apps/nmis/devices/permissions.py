@@ -11,7 +11,6 @@ from base.common.permissions import is_login
 from nmis.devices.models import RepairOrder, MaintenancePlan
 from nmis.hospitals.consts import ROLE_CODE_PRO_DISPATCHER, ROLE_CODE_MAINTAINER, ROLE_CODE_REPAIR_ORDER_DISPATCHER, \
     ROLE_CODE_ASSERT_DEVICE_ADMIN
-from nmis.hospitals.models import Role
 
 
 logger = logging.getLogger(__name__)
@@ -29,8 +28,7 @@ class AssertDeviceAdminPermission(BasePermission):
     def has_object_permission(self, request, view, obj):
         """
         """
-        role = Role.objects.get_role_by_keyword(codename=ROLE_CODE_ASSERT_DEVICE_ADMIN)
-        return request.user.has_role(role)
+        return request.user.has_role_codename(ROLE_CODE_ASSERT_DEVICE_ADMIN)
 
 
 class RepairOrderCreatorPermission(BasePermission):
@@ -63,8 +61,7 @@ class RepairOrderDispatchPermission(BasePermission):
     def has_object_permission(self, request, view, obj):
         """
         """
-        role = Role.objects.get_role_by_keyword(codename=ROLE_CODE_REPAIR_ORDER_DISPATCHER)
-        return request.user.has_role(role)
+        return request.user.has_role_codename(ROLE_CODE_REPAIR_ORDER_DISPATCHER)
 
 
 class MaintenancePlanExecutePermission(BasePermission):
@@ -114,7 +111,6 @@ class KnowledgeManagePermission(BasePermission):
 
     def has_object_permission(self, request, view, obj):
 
-        role = Role.objects.get_role_by_keyword(codename=ROLE_CODE_MAINTAINER)
-        return request.user.has_role(role)
+        return request.user.has_role_codename(ROLE_CODE_MAINTAINER)
 
 
@@ -10,11 +10,11 @@ import logging
 from rest_framework import serializers
 
 from base import resp
-from base.serializers import BaseModelSerializer
+from base.serializers import BaseModelSerializer, PrefetchListSerializer, load_objects_by_ids_strs, split_ids
 from nmis.documents.models import File
 from .models import OrderedDevice, SoftwareDevice, ContractDevice, AssertDevice, \
-    MedicalDeviceCate, MaintenancePlan
-from nmis.devices.models import RepairOrder, FaultType, FaultSolution, RepairOrderRecord
+    MedicalDeviceCate, MaintenancePlan, MaintenancePlanOccurrence
+from nmis.devices.models import RepairOrder, FaultType, FaultSolution, RepairOrderRecord, AssertDeviceRecord
 from nmis.hospitals.serializers import StaffSerializer, HospitalAddressSerializer
 
 
@@ -212,6 +212,7 @@ class RepairOrderSerializer(BaseModelSerializer):
             'comment_grade', 'comment_content', 'comment_time',
             'creator_id', 'creator_name', 'created_time', 'modifier_id', 'modifier_name', 'modified_time'
         )
+        list_serializer_class = PrefetchListSerializer
 
     @staticmethod
     def setup_eager_loading(queryset):
@@ -242,12 +243,19 @@ class RepairOrderSerializer(BaseModelSerializer):
     def _get_modifier_name(self, obj):
         return obj.modifier.name if obj.modifier else ''
 
+    def prefetch(self, objs):
+        """
+        批量加载当前页所有数据的附件
+        """
+        self._files_map = load_objects_by_ids_strs(File, [obj.files for obj in objs])
+
     def _get_files(self, obj):
         if not obj.files:
             return []
-        file_ids_str = obj.files.split(',')
-        file_ids = [int(id_str) for id_str in file_ids_str]
-        file_list = File.objects.filter(id__in=file_ids).all()
+        files_map = getattr(self, '_files_map', None)
+        if files_map is None:   # 序列化单个对象
+            files_map = load_objects_by_ids_strs(File, [obj.files])
+        file_list = [files_map[file_id] for file_id in split_ids(obj.files) if file_id in files_map]
         return resp.serialize_data(file_list, srl_cls_name='FileSerializer') if file_list else []
 
 
@@ -281,6 +289,36 @@ class RepairOrderRecordSerializer(BaseModelSerializer):
         return obj.receiver.dept.name if obj.receiver and obj.receiver.dept else ''
 
 
+class AssertDeviceRecordSerializer(BaseModelSerializer):
+    dept_name = serializers.SerializerMethodField('_get_dept_name')
+    operator_name = serializers.SerializerMethodField('_get_operator_name')
+    operator_dept_name = serializers.SerializerMethodField('_get_operator_dept_name')
+    receiver_name = serializers.SerializerMethodField('_get_receiver_name')
+
+    class Meta:
+        model = AssertDeviceRecord
+        fields = (
+            'id', 'assert_device_id', 'dept_id', 'dept_name', 'operation', 'reason', 'operator_id', 'operator_name',
+            'operator_dept_name', 'receiver_id', 'receiver_name', 'msg_content', 'created_time'
+        )
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related('dept', 'operator__dept', 'receiver')
+
+    def _get_dept_name(self, obj):
+        return obj.dept.name if obj.dept else ''
+
+    def _get_operator_name(self, obj):
+        return obj.operator.name if obj.operator else ''
+
+    def _get_operator_dept_name(self, obj):
+        return obj.operator.dept.name if obj.operator and obj.operator.dept else ''
+
+    def _get_receiver_name(self, obj):
+        return obj.receiver.name if obj.receiver else ''
+
+
 class MaintenancePlanSerializer(BaseModelSerializer):
 
     assert_devices = AssertDeviceSerializer(many=True)
@@ -346,6 +384,44 @@ class MaintenancePlanListSerializer(BaseModelSerializer):
         return resp.serialize_data(storage_places) if storage_places else []
 
 
+class MaintenancePlanOccurrenceSerializer(BaseModelSerializer):
+
+    plan_no = serializers.SerializerMethodField('_get_plan_no')
+    title = serializers.SerializerMethodField('_get_title')
+    type = serializers.SerializerMethodField('_get_type')
+    executor_id = serializers.SerializerMethodField('_get_executor_id')
+    executor_name = serializers.SerializerMethodField('_get_executor_name')
+
+    class Meta:
+        model = MaintenancePlanOccurrence
+        fields = ('id', 'plan_id', 'plan_no', 'title', 'type', 'executor_id', 'executor_name',
+                  'seq', 'period_start', 'due_date', 'status', 'executed_time')
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related('plan__executor')
+
+    def _get_plan_no(self, obj):
+
+        return obj.plan.plan_no
+
+    def _get_title(self, obj):
+
+        return obj.plan.title
+
+    def _get_type(self, obj):
+
+        return obj.plan.type
+
+    def _get_executor_id(self, obj):
+
+        return obj.plan.executor_id
+
+    def _get_executor_name(self, obj):
+
+        return obj.plan.executor.name if obj.plan.executor else ''
+
+
 class FaultSolutionSerializer(BaseModelSerializer):
     fault_type_title = serializers.SerializerMethodField('_get_fault_type_title')
     creator_name = serializers.SerializerMethodField('_get_creator_name')
@@ -361,9 +437,11 @@ class FaultSolutionSerializer(BaseModelSerializer):
             'creator_id', 'created_time', 'creator_name', 'creator_dept_name', 'creator_contact',
             'modifier_id', 'modified_time', 'auditor_id',  'audited_time'
         )
+        list_serializer_class = PrefetchListSerializer
 
+    @staticmethod
     def setup_eager_loading(queryset):
-        return queryset
+        return queryset.select_related('fault_type', 'creator', 'creator__dept')
 
     def _get_fault_type_title(self, obj):
         return obj.fault_type.title if obj.fault_type else ''
@@ -377,10 +455,17 @@ class FaultSolutionSerializer(BaseModelSerializer):
     def _get_creator_contact(self, obj):
         return obj.creator.contact if obj.creator else ''
 
+    def prefetch(self, objs):
+        """
+        批量加载当前页所有数据的附件
+        """
+        self._files_map = load_objects_by_ids_strs(File, [obj.files for obj in objs])
+
     def _get_files(self, obj):
         if not obj.files:
             return []
-        file_ids_str = obj.files.split(',')
-        file_ids = [int(id_str) for id_str in file_ids_str]
-        file_list = File.objects.filter(id__in=file_ids).all()
+        files_map = getattr(self, '_files_map', None)
+        if files_map is None:   # 序列化单个对象
+            files_map = load_objects_by_ids_strs(File, [obj.files])
+        file_list = [files_map[file_id] for file_id in split_ids(obj.files) if file_id in files_map]
         return resp.serialize_data(file_list, srl_cls_name='FileSerializer') if file_list else []
\ No newline at end of file
@@ -2,58 +2,28 @@
 import logging
 
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
-from nmis.devices.consts import REPAIR_ORDER_OPERATION_SUBMIT, REPAIR_ORDER_OPERATION_CHOICES, \
-    REPAIR_ORDER_STATUS_DOING, REPAIR_ORDER_OPERATION_DISPATCH, REPAIR_ORDER_STATUS_DONE, REPAIR_ORDER_OPERATION_HANDLE, \
-    REPAIR_ORDER_OPERATION_COMMENT, REPAIR_ORDER_STATUS_CLOSED
-from nmis.devices.models import RepairOrder, RepairOrderRecord
+from nmis.devices import codes as code_index
+from nmis.devices.models import AssertDevice, AssertDeviceSearchToken
 
 logger = logging.getLogger(__name__)
 
 
-@receiver(post_save, sender=RepairOrder)
-def gen_repair_order_operation_record(sender, **kwargs):
-    repair_order = kwargs.get('instance')
-    created = kwargs.get('created')
-    creator = repair_order.creator
-    if created:
-        msg_content = '%s(%s)%s%s(%s)' % (
-            creator.name, creator.dept.name,
-            dict(REPAIR_ORDER_OPERATION_CHOICES).get(REPAIR_ORDER_OPERATION_SUBMIT),
-            '了报修单', repair_order.order_no,
-        )
-        RepairOrderRecord.objects.create(
-            repair_order=repair_order, operation=REPAIR_ORDER_OPERATION_SUBMIT,
-            operator=creator, msg_content=msg_content
-        )
-    if repair_order.status == REPAIR_ORDER_STATUS_DOING:
-        operator = repair_order.modifier
-        maintainer = repair_order.maintainer
-        msg_content = '%s(%s)%s(%s)%s%s(%s)' % (
-            operator.name, operator.dept.name, '已分派了报修单', repair_order.order_no,
-            '给', maintainer.name, maintainer.dept.name,
-        )
-        RepairOrderRecord.objects.create(
-            repair_order=repair_order, operation=REPAIR_ORDER_OPERATION_DISPATCH,
-            operator=operator, msg_content=msg_content, receiver=maintainer
-        )
-    if repair_order.status == REPAIR_ORDER_STATUS_DONE:
-        operator = repair_order.modifier
-        msg_content = '%s(%s)%s(%s)' % (
-            operator.name, operator.dept.name, '已处理完报修单', repair_order.order_no,
-        )
-        RepairOrderRecord.objects.create(
-            repair_order=repair_order, operation=REPAIR_ORDER_OPERATION_HANDLE,
-            operator=operator, msg_content=msg_content
-        )
-    if repair_order.status == REPAIR_ORDER_STATUS_CLOSED and repair_order.comment_time:
-        operator = repair_order.modifier
-        msg_content = '%s(%s)%s(%s)' % (
-            operator.name, operator.dept.name, '评论了报修单', repair_order.order_no,
-        )
-        RepairOrderRecord.objects.create(
-            repair_order=repair_order, operation=REPAIR_ORDER_OPERATION_COMMENT,
-            operator=operator, msg_content=msg_content
-        )
+@receiver(post_save, sender=AssertDevice)
+def index_assert_device(sender, **kwargs):
+    """
+    资产设备新建/修改后同步搜索索引及编码索引
+    """
+    AssertDeviceSearchToken.objects.index_device(kwargs.get('instance'), created=kwargs.get('created'))
+    code_index.index_devices([kwargs.get('instance')])
+
+
+@receiver(post_delete, sender=AssertDevice)
+def remove_assert_device_codes(sender, **kwargs):
+    """
+    资产设备删除后删除其编码索引
+    """
+    code_index.remove_codes(code_index.get_device_codes(kwargs.get('instance')))
+
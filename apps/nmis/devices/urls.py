@@ -22,6 +22,14 @@ urlpatterns = [
 
     # 资产设备列表API接口
     path("assert-devices", views.AssertDeviceListView.as_view()),
+    # 资产设备导出(xlsx/csv)
+    path("assert-devices/export", views.AssertDeviceExportView.as_view()),
+    # 资产设备库存汇总
+    path("assert-devices/inventory", views.AssertDeviceInventoryView.as_view()),
+    # 扫码查询资产设备(条形码/资产编号/序列号)
+    path("assert-devices/scan", views.AssertDeviceScanView.as_view()),
+    # 科室资产设备历史事件
+    path("assert-devices/records", views.DeptAssertDeviceRecordListView.as_view()),
 
     # 医疗器械分类列表
     path('medical-device-cates', views.MedicalDeviceSecondGradeCateListView.as_view(), ),
@@ -36,6 +44,9 @@ urlpatterns = [
     # 资产设备详情/修改/删除
     path('<int:device_id>', views.AssertDeviceView.as_view(), ),
 
+    # 资产设备历史事件
+    path('<int:device_id>/records', views.AssertDeviceRecordListView.as_view(), ),
+
     # 资产设备报废处理
     path('<int:device_id>/scrap', views.AssertDeviceScrapView.as_view(), ),
 
@@ -53,6 +64,12 @@ urlpatterns = [
     # 设备维护计划列表
     path('maintenance_plans', views.MaintenancePlanListView.as_view(), ),
 
+    # 设备维护计划各到期分组的未执行周期数
+    path('maintenance_plans/due-buckets', views.MaintenancePlanDueBucketView.as_view(), ),
+
+    # 设备维护计划到期周期列表
+    path('maintenance_plans/due', views.MaintenancePlanDueView.as_view(), ),
+
     # 执行资产设备维护计划
     path('maintenance_plan/<int:maintenance_plan_id>/execute', views.MaintenancePlanExecuteView.as_view(), ),
 
@@ -67,6 +84,8 @@ urlpatterns = [
 
     # 提交/新建报修单
     path('repair_orders/create', views.RepairOrderCreateView.as_view(), ),
+    # 从分派队列中批量自动分派报修单
+    path('repair_orders/auto-dispatch', views.RepairOrderAutoDispatchView.as_view(), ),
     # 单个报修单详情/修改/删除/分派/处理/评价
     path('repair_orders/<int:order_id>', views.RepairOrderView.as_view(), ),
     # 报修单列表
@@ -4,15 +4,17 @@
 #
 
 import logging
+from collections import OrderedDict
 
 from django.db import transaction
 from rest_framework.decorators import permission_classes
-from django.db.models import Q, Count, F
+from django.db.models import Q, prefetch_related_objects
 
 import settings
 from base import resp
 from base.common.decorators import check_params_not_null, check_id
 from base.common.param_utils import get_id_list
+from base.counts import CachedCount, EstimatedCount
 from base.resp import Response
 from base.views import BaseAPIView
 from nmis.devices.consts import ASSERT_DEVICE_STATUS_CHOICES, REPAIR_ORDER_STATUS_CHOICES, \
@@ -23,91 +25,234 @@ from nmis.devices.consts import ASSERT_DEVICE_STATUS_CHOICES, REPAIR_ORDER_STATU
     MY_MAINTAIN_ORDERS, ALL_ORDERS, \
     TO_DISPATCH_ORDERS, REPAIR_ORDER_STATUS_DOING, REPAIR_ORDER_STATUS_DONE, \
     MAINTENANCE_PLAN_STATUS_CHOICES, MAINTENANCE_PLAN_EXPIRED_DATE_CHOICES, \
-    MAINTENANCE_PLAN_STATUS_DONE, UPLOADED_FS_EXCEL_HEAD_DICT, ASSERT_DEVICE_CATE_MEDICAL, \
-    UPLOADED_MEDICAL_ASSERT_DEVICE_EXCEL_HEADER_DICT, \
-    UPLOADED_INFORMATION_ASSERT_DEVICE_EXCEL_HEADER_DICT, MAINTENANCE_PLAN_TYPE_CHOICES, \
-    UPLOADED_MEDICAL_DEVICE_CATE_EXCEL_HEADER_DICT
+    MAINTENANCE_PLAN_STATUS_DONE, ASSERT_DEVICE_CATE_MEDICAL, MAINTENANCE_PLAN_TYPE_CHOICES, \
+    ASSERT_DEVICE_INVENTORY_HOSPITAL, \
+    ASSERT_DEVICE_INVENTORY_DIMENSION_CHOICES, ASSERT_DEVICE_OPERATION_CHOICES, ASSERT_DEVICE_SCAN_MAX_CODES
+from nmis.devices.exports import FaultSolutionExporter, AssertDeviceExporter
 from nmis.devices.forms import AssertDeviceCreateForm, AssertDeviceUpdateForm, \
     RepairOrderCreateForm, MaintenancePlanCreateForm, RepairOrderHandleForm, \
     RepairOrderCommentForm, \
-    RepairOrderDispatchForm, FaultSolutionCreateForm, FaultSolutionsImportForm, \
-    AssertDeviceBatchUploadForm, FaultSolutionUpdateForm, MedicalDeviceCateImportForm, \
-    FaultTypeCreateForm
+    RepairOrderDispatchForm, RepairOrderAutoDispatchForm, FaultSolutionCreateForm, \
+    FaultSolutionUpdateForm, FaultTypeCreateForm
 
 from nmis.devices.models import AssertDevice, MedicalDeviceCate, RepairOrder, \
-    FaultType, FaultSolution, MaintenancePlan
+    FaultType, FaultSolution, MaintenancePlan, AssertDeviceInventory, AssertDeviceRecord, RepairOrderDailyStat, \
+    MaintenancePlanOccurrence
 from nmis.devices.permissions import AssertDeviceAdminPermission, RepairOrderCreatorPermission, \
     MaintenancePlanExecutePermission, RepairOrderHandlePermission, RepairOrderDispatchPermission, \
     KnowledgeManagePermission
-from nmis.documents.consts import FILE_CATE_CHOICES, DOC_DOWNLOAD_BASE_DIR
+from nmis.documents.consts import FILE_CATE_CHOICES
 from nmis.documents.forms import FileBulkCreateOrUpdateForm
 from nmis.documents.models import File
 from nmis.hospitals.consts import ARCHIVE, ROLE_CODE_HOSP_SUPER_ADMIN, \
-    ROLE_CODE_ASSERT_DEVICE_ADMIN, ROLE_CODE_REPAIR_ORDER_DISPATCHER, ROLE_CODE_MAINTAINER
+    ROLE_CODE_ASSERT_DEVICE_ADMIN, ROLE_CODE_MAINTAINER
 from nmis.hospitals.models import Staff, Department, HospitalAddress
+from nmis.jobs.consts import IMPORT_JOB_TYPE_ASSERT_DEVICE, IMPORT_JOB_TYPE_FAULT_SOLUTION, \
+    IMPORT_JOB_TYPE_MEDICAL_DEVICE_CATE
+from nmis.jobs.models import ImportJob
 from nmis.devices.serializers import RepairOrderSerializer, FaultSolutionSerializer, \
-    AssertDeviceSerializer, MedicalDeviceSecondGradeCateSerializer
+    AssertDeviceSerializer, MedicalDeviceSecondGradeCateSerializer, AssertDeviceRecordSerializer
 from nmis.hospitals.permissions import IsHospSuperAdmin, SystemManagePermission, HospGlobalReportAssessPermission, \
     HospitalStaffPermission
-from nmis.notices.models import Notice
 from utils import times
-from utils.files import ExcelBasedOXL, file_read_iterator, remove, is_file_exist
+from utils.files import remove, is_file_exist
 
 from utils.times import fn_timer
 
 logger = logging.getLogger(__name__)
 
 
-class AssertDeviceListView(BaseAPIView):
-
-    permission_classes = (AssertDeviceAdminPermission, IsHospSuperAdmin, HospitalStaffPermission)
+class AssertDeviceFilterMixin(object):
+    """
+    资产设备列表及导出共用的筛选条件
+    """
 
-    def get(self, req):
+    def filter_assert_devices(self, req):
         """
-        获取资产设备列表（
-        筛选条件：关键词搜索（设备名称）、设备状态（维修、使用中、报废、闲置）、资产存储地点、设备类型
-        ）
+        根据请求参数筛选资产设备
+        筛选条件：关键词搜索（设备名称、资产编号、序列号、条形码、厂家, 按相关度排序）、设备状态（维修、使用中、报废、闲置）、
+        资产存储地点、设备类型. type为TL且为资产管理员/超级管理员时返回全部设备, 否则仅返回当前用户负责的设备
+        :return: (资产设备QuerySet, 错误信息)
         """
-        self.check_object_any_permissions(req, req.user)
         search_key = req.GET.get('search_key', '').strip()
         str_status = req.GET.get('status', '').strip()
         cate = req.GET.get('cate', '').strip()
         # 获取列表类型（total: 代表获取资产设备总览）
         devices_type = req.GET.get('type', '').strip()
         if not devices_type:
-            return resp.failed('不存在type值')
+            return None, '不存在type值'
         else:
             if devices_type not in ('TL', 'PF'):
-                return resp.failed('不合法的type值')
+                return None, '不合法的type值'
 
         storage_place_ids = get_id_list(req.GET.get('storage_place_ids', '').strip())
         if cate:
             if cate not in dict(ASSERT_DEVICE_CATE_CHOICES):
-                return resp.failed('资产设备类型错误')
+                return None, '资产设备类型错误'
         storage_places = HospitalAddress.objects.get_hospital_address_by_ids(storage_place_ids)
         if len(storage_places) < len(storage_place_ids):
-            return resp.failed('请确认是否有不存在的存储地点信息')
+            return None, '请确认是否有不存在的存储地点信息'
 
         status_list = None
         if str_status:
             status_list = list(set([status.strip() for status in str_status.split(',')]))
             for status in status_list:
                 if status not in dict(ASSERT_DEVICE_STATUS_CHOICES):
-                    return resp.failed('资产设备状态错误')
+                    return None, '资产设备状态错误'
 
         assert_devices = AssertDevice.objects.get_assert_devices(
             cate=cate, search_key=search_key, status=status_list, storage_places=storage_places)
-        assert_devices = AssertDeviceSerializer.setup_eager_loading(assert_devices)
 
-        for role in req.user.get_roles():
-            if role.codename in (ROLE_CODE_ASSERT_DEVICE_ADMIN, ROLE_CODE_HOSP_SUPER_ADMIN):
-                if devices_type == 'TL':
-                    return self.get_pages(assert_devices, results_name='assert_devices')
+        if devices_type == 'TL' and \
+                req.user.has_role_codename(ROLE_CODE_ASSERT_DEVICE_ADMIN, ROLE_CODE_HOSP_SUPER_ADMIN):
+            return assert_devices, None
+        return assert_devices.filter(performer=req.user.get_profile()), None
+
 
-        assert_devices = assert_devices.filter(performer=req.user.get_profile())
+class AssertDeviceListView(AssertDeviceFilterMixin, BaseAPIView):
+
+    permission_classes = (AssertDeviceAdminPermission, IsHospSuperAdmin, HospitalStaffPermission)
+    keyset_pagination = True
+    count_strategy = EstimatedCount(threshold=10000)
+
+    def use_keyset_pagination(self):
+        # 关键字搜索结果按相关度排序, 使用页码分页
+        if self.request.GET.get('search_key', '').strip():
+            return False
+        return super(AssertDeviceListView, self).use_keyset_pagination()
+
+    def get(self, req):
+        """
+        获取资产设备列表, 筛选条件见AssertDeviceFilterMixin. 带search_key时忽略cursor参数, 按相关度排序并使用页码分页
+        """
+        self.check_object_any_permissions(req, req.user)
+        assert_devices, err_msg = self.filter_assert_devices(req)
+        if err_msg:
+            return resp.failed(err_msg)
+        assert_devices = AssertDeviceSerializer.setup_eager_loading(assert_devices)
         return self.get_pages(assert_devices, results_name='assert_devices')
 
 
+class AssertDeviceExportView(AssertDeviceFilterMixin, BaseAPIView):
+
+    permission_classes = (AssertDeviceAdminPermission, IsHospSuperAdmin, HospitalStaffPermission)
+
+    def get(self, req):
+        """
+        导出资产设备, 筛选条件与资产设备列表相同. 关键词搜索在SQL中完成, 导出全部匹配的设备(按id倒序), 不截断
+        file_format: 导出文件格式, xlsx(默认)/csv. 数据量大时建议使用csv, 查询的同时即开始返回数据
+        """
+        self.check_object_any_permissions(req, req.user)
+        file_format = req.GET.get('file_format', 'xlsx').strip()
+        if file_format not in ('xlsx', 'csv'):
+            return resp.failed('不支持的导出文件格式')
+        assert_devices, err_msg = self.filter_assert_devices(req)
+        if err_msg:
+            return resp.failed(err_msg)
+        exporter = AssertDeviceExporter(assert_devices)
+        return exporter.csv_response() if file_format == 'csv' else exporter.xlsx_response()
+
+
+class AssertDeviceInventoryView(BaseAPIView):
+
+    permission_classes = (AssertDeviceAdminPermission, IsHospSuperAdmin, HospGlobalReportAssessPermission)
+
+    def get(self, req):
+        """
+        资产设备库存汇总(基于预计算的汇总表, 耗时与分组数相关, 与设备数无关)
+        dimension: 汇总维度, HO: 全院(默认), UD: 使用科室, SP: 存放地点(含上级地址), MC: 医疗器械分类(含上级分类)
+        cate: 资产设备类型, 为空时统计全部类型
+        """
+        self.check_object_any_permissions(req, req.user)
+        dimension = req.GET.get('dimension', ASSERT_DEVICE_INVENTORY_HOSPITAL).strip()
+        if dimension not in dict(ASSERT_DEVICE_INVENTORY_DIMENSION_CHOICES):
+            return resp.failed('汇总维度错误')
+        cate = req.GET.get('cate', '').strip()
+        if cate and cate not in dict(ASSERT_DEVICE_CATE_CHOICES):
+            return resp.failed('资产设备类型错误')
+
+        groups = AssertDeviceInventory.objects.get_summary(dimension, cate=cate)
+        group_names = AssertDeviceInventory.objects.get_group_names(dimension, [g['group_id'] for g in groups])
+        for group in groups:
+            group['group_name'] = group_names.get(group['group_id'], '') if group['group_id'] else ''
+        return resp.ok('ok', {'dimension': dimension, 'inventory': groups})
+
+
+class AssertDeviceScanView(BaseAPIView):
+
+    permission_classes = (AssertDeviceAdminPermission, IsHospSuperAdmin, HospitalStaffPermission)
+
+    def get(self, req):
+        """
+        扫码查询资产设备, 编码可以是条形码, 资产编号或序列号
+        codes: 编码, 批量查询时以逗号分隔
+        返回: 找到的资产设备(按编码顺序), 编码与设备id的对应关系, 未找到的编码
+        """
+        self.check_object_any_permissions(req, req.user)
+        codes = [code.strip() for code in req.GET.get('codes', '').split(',') if code.strip()]
+        if not codes:
+            return resp.failed('请输入设备编码')
+        if len(codes) > ASSERT_DEVICE_SCAN_MAX_CODES:
+            return resp.failed('单次最多查询%s个设备编码' % ASSERT_DEVICE_SCAN_MAX_CODES)
+
+        found = AssertDevice.objects.lookup_by_codes(codes)
+        assert_devices = list(OrderedDict(
+            (found[code].id, found[code]) for code in codes if code in found
+        ).values())
+        # 设备来自对象缓存, 关联对象按类型批量加载
+        prefetch_related_objects(
+            assert_devices, 'use_dept', 'creator', 'responsible_dept', 'medical_device_cate', 'performer',
+            'storage_place', 'modifier'
+        )
+        return resp.ok('ok', {
+            'assert_devices': resp.serialize_data(assert_devices),
+            'codes': dict((code, assert_device.id) for code, assert_device in found.items()),
+            'not_found': [code for code in codes if code not in found],
+        })
+
+
+class AssertDeviceRecordListView(BaseAPIView):
+
+    permission_classes = (AssertDeviceAdminPermission, IsHospSuperAdmin)
+    keyset_pagination = True
+
+    def get(self, req, device_id):
+        """
+        资产设备历史事件(设备删除后仍可查询), 按时间倒序, 支持游标分页(cursor)
+        """
+        self.check_object_any_permissions(req, req.user)
+        records = AssertDeviceRecordSerializer.setup_eager_loading(
+            AssertDeviceRecord.objects.get_device_records(device_id)
+        )
+        return self.get_pages(records, results_name='assert_device_records')
+
+
+class DeptAssertDeviceRecordListView(BaseAPIView):
+
+    permission_classes = (AssertDeviceAdminPermission, IsHospSuperAdmin)
+    keyset_pagination = True
+    count_strategy = EstimatedCount(threshold=10000)
+
+    def get(self, req):
+        """
+        科室资产设备历史事件, 按时间倒序, 支持游标分页(cursor)
+        dept_id: 科室ID, 事件所属科室为事件发生时设备的使用科室
+        operation: 操作类型, 为空时查询全部类型
+        """
+        self.check_object_any_permissions(req, req.user)
+        dept_id = req.GET.get('dept_id', '').strip()
+        if not dept_id.isdigit():
+            return resp.failed('请选择科室')
+        operation = req.GET.get('operation', '').strip()
+        if operation and operation not in dict(ASSERT_DEVICE_OPERATION_CHOICES):
+            return resp.failed('操作类型错误')
+        dept = self.get_object_or_404(int(dept_id), Department)
+        records = AssertDeviceRecordSerializer.setup_eager_loading(
+            AssertDeviceRecord.objects.get_dept_records(dept.id, operation=operation)
+        )
+        return self.get_pages(records, results_name='assert_device_records')
+
+
 class AssertDeviceCreateView(BaseAPIView):
 
     permission_classes = (AssertDeviceAdminPermission, IsHospSuperAdmin)
@@ -199,11 +344,9 @@ class MedicalDeviceCateCatalogListView(BaseAPIView):
 class MedicalDeviceCateImportView(BaseAPIView):
     permission_classes = (AssertDeviceAdminPermission, IsHospSuperAdmin, SystemManagePermission)
 
-    @transaction.atomic()
-    @times.fn_timer
     def post(self, req):
         """
-        获取医疗器械分类目录
+        导入医疗器械分类目录
         """
         self.check_object_any_permissions(req, None)
 
@@ -215,21 +358,10 @@ class MedicalDeviceCateImportView(BaseAPIView):
         elif file_obj.content_type not in (ARCHIVE['.xlsx'], ARCHIVE['.xlsx-wps'], ARCHIVE['.rar']):
             return resp.failed('系统不支持该类型文件，请使用正确的模板文件')
 
-        # 将文件存放到服务器
-        # import os
-        # file_server_path = open(os.path.join('/media/', '', file_obj.name), 'wb')
-        # file = open('file_server_path', 'wb')
-        # file_info = files.upload_file(file_obj, DOC_UPLOAD_BASE_DIR)
-
-        is_success, ret = ExcelBasedOXL.open_excel(file_obj)
-        success, result = ExcelBasedOXL.read_excel(ret, UPLOADED_MEDICAL_DEVICE_CATE_EXCEL_HEADER_DICT)
-        ExcelBasedOXL.close(ret)
-        if not success:
-            return resp.failed(result)
-        form = MedicalDeviceCateImportForm(req.user.get_profile(), result)
-        if not form.is_valid():
-            return resp.form_err(form.errors)
-        return resp.ok('导入成功') if form.save() else resp.failed('导入失败')
+        job = ImportJob.objects.submit_job(IMPORT_JOB_TYPE_MEDICAL_DEVICE_CATE, req.user.get_profile(), file_obj)
+        if not job:
+            return resp.failed('导入任务提交失败')
+        return resp.serialize_response(job, results_name='import_job')
 
 
 class AssertDeviceView(BaseAPIView):
@@ -284,7 +416,7 @@ class AssertDeviceView(BaseAPIView):
         self.check_object_any_permissions(req, req.user.get_profile().organ)
         assert_device = self.get_object_or_404(device_id, AssertDevice)
 
-        if not assert_device.deleted():
+        if not assert_device.deleted(req.user.get_profile()):
             return resp.failed('操作失败')
         return resp.ok('操作成功')
 
@@ -301,7 +433,7 @@ class AssertDeviceScrapView(BaseAPIView):
 
         assert_device = self.get_object_or_404(device_id, AssertDevice)
 
-        if not assert_device.assert_device_scrapped():
+        if not assert_device.assert_device_scrapped(req.user.get_profile()):
             return resp.failed('操作失败')
 
         return resp.serialize_response(assert_device, results_name='assert_device')
@@ -329,49 +461,13 @@ class AssertDeviceBatchUploadView(BaseAPIView):
         elif file_obj.content_type not in (ARCHIVE['.xlsx'], ARCHIVE['.xlsx-wps'], ARCHIVE['.rar']):
             return resp.failed('系统不支持该类型文件，请使用正确的模板文件')
 
-        success, result = ExcelBasedOXL.open_excel(file_obj)
-        if not success:
-            return resp.failed(result)
-        if req.data.get('cate') == ASSERT_DEVICE_CATE_MEDICAL:
-            head_dict = UPLOADED_MEDICAL_ASSERT_DEVICE_EXCEL_HEADER_DICT
-        else:
-            head_dict = UPLOADED_INFORMATION_ASSERT_DEVICE_EXCEL_HEADER_DICT
-        success, result = ExcelBasedOXL.read_excel(result, head_dict)
-        if not success:
-            return resp.failed(msg=result)
-
-        # sheet = result.worksheets[0]
-        # max_row = sheet.max_row
-        # # 校验表头信息是否一致
-        # dict_keys = []
-        # for cell in list(sheet.rows)[0]:
-        #     for key, value in head_dict.items():
-        #         if cell.value == value:
-        #             dict_keys.append(key)
-        #             break
-        # if not len(dict_keys) == len(head_dict):
-        #     return resp.failed('表头数据和指定的标准不一致')
-        # import datetime
-        # # 封装assert_device数据
-        # assert_devices = []
-        # for i in range(1, max_row):
-        #     row_list = []
-        #     for cell in list(sheet.rows)[i]:
-        #         if isinstance(cell.value, datetime.datetime):
-        #             value = cell.value.strftime('%Y-%m-%d')
-        #         else:
-        #             value = cell.value
-        #         row_list.append(value)
-        #     assert_device = dict(zip(dict_keys, row_list))
-        #     assert_devices.append(assert_device)
-
-        form = AssertDeviceBatchUploadForm(result[0], creator=req.user.get_profile(),
-                                           cate=cate)
-        if not form.is_valid():
-            return resp.failed(form.errors)
-        if not form.save():
-            return resp.failed('导入失败')
-        return resp.ok('导入成功')
+        # 文件保存后提交为后台导入任务, 客户端通过任务id轮询进度
+        job = ImportJob.objects.submit_job(
+            IMPORT_JOB_TYPE_ASSERT_DEVICE, req.user.get_profile(), file_obj, cate=cate
+        )
+        if not job:
+            return resp.failed('导入任务提交失败')
+        return resp.serialize_response(job, results_name='import_job')
 
 
 class AssertDeviceAllocateView(BaseAPIView):
@@ -393,10 +489,14 @@ class AssertDeviceAllocateView(BaseAPIView):
             return resp.failed('请确认是否有不存在的资产设备信息')
         use_dept_id = req.data.get('use_dept_id')
         use_dept = self.get_object_or_404(use_dept_id, Department)
-        result = AssertDevice.objects.update_assert_devices_use_dept(assert_devices, use_dept)
+        result = AssertDevice.objects.update_assert_devices_use_dept(assert_devices, use_dept, req.user.get_profile())
         if not result:
             return resp.failed('调配失败')
-        return resp.serialize_response(result, results_name='assert_devices')
+        # 一次查询加载关联数据后序列化, 避免逐个设备查询关联对象
+        assert_devices = AssertDeviceSerializer.setup_eager_loading(
+            AssertDevice.objects.filter(id__in=[assert_device.id for assert_device in result])
+        ).order_by('-created_time')
+        return resp.serialize_response(list(assert_devices), results_name='assert_devices')
 
 
 class MaintenancePlanCreateView(BaseAPIView):
@@ -452,6 +552,7 @@ class MaintenancePlanListView(BaseAPIView):
 
     permission_classes = (MaintenancePlanExecutePermission, HospitalStaffPermission,
                           AssertDeviceAdminPermission, IsHospSuperAdmin)
+    count_strategy = CachedCount(timeout=60)
 
     def get(self, req):
         """
@@ -479,12 +580,11 @@ class MaintenancePlanListView(BaseAPIView):
             type=req.GET.get('type', '').strip()
         )
 
-        for role in req.user.get_roles():
-            if role.codename in (ROLE_CODE_ASSERT_DEVICE_ADMIN, ROLE_CODE_HOSP_SUPER_ADMIN):
-                return self.get_pages(
-                    maintenance_plans, srl_cls_name='MaintenancePlanListSerializer',
-                    results_name='maintenance_plans'
-                )
+        if req.user.has_role_codename(ROLE_CODE_ASSERT_DEVICE_ADMIN, ROLE_CODE_HOSP_SUPER_ADMIN):
+            return self.get_pages(
+                maintenance_plans, srl_cls_name='MaintenancePlanListSerializer',
+                results_name='maintenance_plans'
+            )
 
         maintenance_plans = maintenance_plans.filter(executor=req.user.get_profile())
 
@@ -494,6 +594,57 @@ class MaintenancePlanListView(BaseAPIView):
         )
 
 
+class MaintenancePlanDueBucketView(BaseAPIView):
+
+    permission_classes = (MaintenancePlanExecutePermission, HospitalStaffPermission,
+                          AssertDeviceAdminPermission, IsHospSuperAdmin)
+
+    def get(self, req):
+        """
+        资产设备维护计划各到期分组(逾期、今天到期、三日内到期、一周内到期、一个月内到期)的未执行周期数
+        """
+        self.check_object_any_permissions(req, req.user.get_profile().organ)
+        if req.user.has_role_codename(ROLE_CODE_ASSERT_DEVICE_ADMIN, ROLE_CODE_HOSP_SUPER_ADMIN):
+            buckets = MaintenancePlanOccurrence.objects.count_due_buckets()
+        else:
+            executor = req.user.get_profile()
+            buckets = [
+                {
+                    'bucket': bucket,
+                    'count': MaintenancePlanOccurrence.objects.get_due_queryset(bucket).filter(
+                        plan__executor=executor).count()
+                }
+                for bucket, _ in MAINTENANCE_PLAN_EXPIRED_DATE_CHOICES
+            ]
+        return resp.ok('ok', {'buckets': buckets})
+
+
+class MaintenancePlanDueView(BaseAPIView):
+
+    permission_classes = (MaintenancePlanExecutePermission, HospitalStaffPermission,
+                          AssertDeviceAdminPermission, IsHospSuperAdmin)
+
+    def get(self, req):
+        """
+        资产设备维护计划到期周期列表, 按截止日期排序
+        搜索字段：
+            bucket: 到期分组（逾期、今天到期、三日内到期、一周内到期、一个月内到期）
+        """
+        self.check_object_any_permissions(req, req.user.get_profile().organ)
+        bucket = req.GET.get('bucket', '').strip()
+        if bucket not in dict(MAINTENANCE_PLAN_EXPIRED_DATE_CHOICES):
+            return resp.failed('截止时间段错误')
+
+        occurrences = MaintenancePlanOccurrence.objects.get_due_queryset(bucket)
+        if not req.user.has_role_codename(ROLE_CODE_ASSERT_DEVICE_ADMIN, ROLE_CODE_HOSP_SUPER_ADMIN):
+            occurrences = occurrences.filter(plan__executor=req.user.get_profile())
+
+        return self.get_pages(
+            occurrences.order_by('due_date', 'id'), srl_cls_name='MaintenancePlanOccurrenceSerializer',
+            results_name='occurrences'
+        )
+
+
 class MaintenancePlanExecuteView(BaseAPIView):
 
     permission_classes = (MaintenancePlanExecutePermission, AssertDeviceAdminPermission, IsHospSuperAdmin)
@@ -510,7 +661,7 @@ class MaintenancePlanExecuteView(BaseAPIView):
         result = req.data.get('result', '').strip()
         if not result:
             return resp.failed('请输入处理结果')
-        success = maintenance_plan.change_status(result)
+        success = maintenance_plan.change_status(result, operator=req.user.get_profile())
 
         if not success:
             return resp.failed('操作失败')
@@ -587,17 +738,32 @@ class RepairOrderCreateView(BaseAPIView):
         success, repair_order = form.save()
         if not success:
             return resp.failed("操作失败")
-
-        # 生成消息，给维修任务分配者推送消息
-        staffs = Staff.objects.filter(user__role__codename=ROLE_CODE_REPAIR_ORDER_DISPATCHER)
-        message = "%s于%s: 提交报修申请,请尽快处理!" % (
-            req.user.get_profile().name, times.datetime_strftime(d_date=times.now())
-        )
-        Notice.objects.create_and_send_notice(staffs, message)
         return resp.serialize_response(repair_order, results_name='repair_order',
                                        srl_cls_name='RepairOrderSerializer')
 
 
+class RepairOrderAutoDispatchView(BaseAPIView):
+    """
+    按优先级及排队时间从分派队列中批量自动分派报修单
+    """
+    permission_classes = (RepairOrderDispatchPermission, IsHospSuperAdmin)
+
+    def post(self, req):
+        self.check_object_any_permissions(req, None)
+        form = RepairOrderAutoDispatchForm(req.user.get_profile(), req.data)
+        if not form.is_valid():
+            return resp.form_err(form.errors)
+        assignments = form.save()
+        if assignments is None:
+            return resp.failed('操作失败')
+        queryset = RepairOrderSerializer.setup_eager_loading(
+            RepairOrder.objects.filter(id__in=[repair_order.id for repair_order, _ in assignments])
+        )
+        return resp.serialize_response(
+            list(queryset), results_name='repair_orders', srl_cls_name='RepairOrderSerializer'
+        )
+
+
 class RepairOrderView(BaseAPIView):
 
     permission_classes = (
@@ -631,17 +797,6 @@ class RepairOrderView(BaseAPIView):
 
             if not new_order:
                 return resp.failed('操作失败')
-            # 生成消息，给维修任务分配者推送消息
-            message = "%s于%s: 向你分派了报修单-%s,请尽快处理!" % (
-                req.user.get_profile().name, times.datetime_strftime(d_date=times.now()), repair_order.order_no
-            )
-            Notice.objects.create_and_send_notice([repair_order.maintainer], message)
-            # 生成消息，给申请者推送消息
-            message = "%s于%s: 报修单-%s 已分配,维修工程师-%s!" % (
-                req.user.get_profile().name, times.datetime_strftime(d_date=times.now()),
-                repair_order.order_no, repair_order.maintainer.name
-            )
-            Notice.objects.create_and_send_notice([repair_order.creator], message)
 
         """ 维修工处理报修单 """
         if action == REPAIR_ORDER_OPERATION_HANDLE:
@@ -661,13 +816,6 @@ class RepairOrderView(BaseAPIView):
             if not new_order:
                 return resp.failed('操作失败')
 
-            # 处理完成后生成消息，给申请者推送消息
-            message = "%s于%s: 报修单-%s 已处理,维修工程师-%s!" % (
-                req.user.get_profile().name, times.datetime_strftime(d_date=times.now()),
-                repair_order.order_no, repair_order.maintainer.name
-            )
-            Notice.objects.create_and_send_notice([repair_order.creator], message)
-
         """ 评论此次报修 """
         if action == REPAIR_ORDER_OPERATION_COMMENT:
             if not repair_order.status == REPAIR_ORDER_STATUS_DONE:
@@ -679,13 +827,6 @@ class RepairOrderView(BaseAPIView):
             if not new_order:
                 return resp.failed('操作失败')
 
-            # 评价完成后生成消息，给维修工程推送消息
-            message = "%s于%s: 评价了单号-%s" % (
-                req.user.get_profile().name, times.datetime_strftime(d_date=times.now()),
-                repair_order.order_no
-            )
-            Notice.objects.create_and_send_notice([repair_order.maintainer], message)
-
         queryset = RepairOrderSerializer.setup_eager_loading(RepairOrder.objects.filter(id=order_id))
         return resp.serialize_response(
             queryset.first(), results_name='repair_order', srl_cls_name='RepairOrderSerializer'
@@ -697,6 +838,8 @@ class RepairOrderListView(BaseAPIView):
     permission_classes = (
          RepairOrderDispatchPermission, IsHospSuperAdmin, HospitalStaffPermission,
     )
+    keyset_pagination = True
+    count_strategy = CachedCount(timeout=60)
 
     def get_queryset(self):
         return RepairOrder.objects.all().order_by('-created_time')
@@ -891,6 +1034,7 @@ class FaultSolutionListView(BaseAPIView):
             queryset = queryset.filter(
                 Q(fault_type__title__contains=search) | Q(title__contains=search)
             )
+        queryset = FaultSolutionSerializer.setup_eager_loading(queryset)
         return self.get_pages(queryset, results_name='fault_solutions', srl_cls_name='FaultSolutionSerializer')
 
 
@@ -910,7 +1054,6 @@ class FaultSolutionFileDeleteView(BaseAPIView):
                 file_ids_str.remove(str(file_id))
                 fs.files = ",".join(file_ids_str)
                 fs.save()
-                fs.cache()
                 file.clear_cache()
                 file.delete()
             if file_path:
@@ -945,27 +1088,10 @@ class FaultSolutionsImportView(BaseAPIView):
         elif file_obj.content_type not in (ARCHIVE['.xlsx'], ARCHIVE['.xlsx-wps'], ARCHIVE['.rar']):
             return resp.failed('系统不支持该类型文件，请使用正确的模板文件')
 
-
-
-        # 将文件存放到服务器
-        # import os
-        # file_server_path = open(os.path.join('/media/', '', file_obj.name), 'wb')
-        # file = open('file_server_path', 'wb')
-        # file_info = files.upload_file(file_obj, DOC_UPLOAD_BASE_DIR)
-
-        is_success, ret = ExcelBasedOXL.open_excel(file_obj)
-        if not is_success:
-            return resp.failed(ret)
-        success, result = ExcelBasedOXL.read_excel(ret, UPLOADED_FS_EXCEL_HEAD_DICT)
-        ExcelBasedOXL.close(ret)
-        if not success:
-            return resp.failed(result)
-
-        form = FaultSolutionsImportForm(req.user.get_profile(), result)
-        if not form.is_valid():
-            return resp.form_err(form.errors)
-
-        return resp.ok('导入成功') if form.save() else resp.failed('导入失败')
+        job = ImportJob.objects.submit_job(IMPORT_JOB_TYPE_FAULT_SOLUTION, req.user.get_profile(), file_obj)
+        if not job:
+            return resp.failed('导入任务提交失败')
+        return resp.serialize_response(job, results_name='import_job')
 
 
 class FaultSolutionsExportView(BaseAPIView):
@@ -983,25 +1109,7 @@ class FaultSolutionsExportView(BaseAPIView):
             queryset = queryset.filter(
                 Q(fault_type__title__contains=search) | Q(title__contains=search)
             )
-        records = list()
-        for item in queryset:
-            records.append([item.title, item.solution, item.fault_type.title,  item.creator.name, times.datetime_to_str(item.created_time)])
-        header_rows = [['标题', '解决方案', '故障类型', '贡献人', '创建时间'], ]
-        name = 'operation-maintenance-knowledge'
-        excel_file_name, file_path = ExcelBasedOXL.export_excel(
-            DOC_DOWNLOAD_BASE_DIR,
-            name,
-            [records],
-            ['知识库-故障问题解决方案', ],
-            header_rows
-        )
-        from django.http import StreamingHttpResponse
-        import os
-        path = os.path.join(settings.MEDIA_ROOT, file_path)
-        response = StreamingHttpResponse(file_read_iterator(path))
-        response['Content-Type'] = 'application/octet-stream'
-        response['Content-Disposition'] = 'attachment;filename="{0}"'.format(u'%s' % excel_file_name)
-        return response
+        return FaultSolutionExporter(queryset.order_by('-created_time')).xlsx_response()
 
 
 class OperationMaintenanceReportView(BaseAPIView):
@@ -1010,7 +1118,6 @@ class OperationMaintenanceReportView(BaseAPIView):
     """
 
     permission_classes = (IsHospSuperAdmin, HospGlobalReportAssessPermission)
-    queryset = RepairOrder.objects.all()
 
     def get(self, req):
         self.check_object_any_permissions(req, None)
@@ -1026,30 +1133,9 @@ class OperationMaintenanceReportView(BaseAPIView):
                 times.str_to_datetime(expired_date, format=date_format):
             return resp.form_err({'start_date > expired_date': '开始日期不能大于截止日期, 请检查'})
 
-        # 已处理维修总数、维修申请总数、维修完成率
-        rp_order_nums_status_queryset = self.queryset.filter(
-            created_time__range=(start_date, expired_date)
-        ).values('status').annotate(nums=Count('id', distinct=True)).order_by('status')
-
-        # 按故障类型统计报修单数量
-        rp_order_nums_fault_type_queryset = self.queryset.filter(
-            created_time__range=(start_date, expired_date)
-        ).annotate(
-            fault_type_title=F('fault_type__title')
-        ).values(
-            'fault_type_title'
-        ).annotate(nums=Count('id', distinct=True)).order_by('-nums')
-
-        # 科室故障申请Top3
-        rp_order_nums_top_dept_queryset = self.queryset.filter(
-            created_time__range=(start_date, expired_date)
-        ).annotate(
-            dept=F('applicant__dept__name')
-        ).values('dept').annotate(nums=Count('id', distinct=True)).order_by('-nums')[0:3]
-
-        data = {
-            'rp_order_nums_status': list(rp_order_nums_status_queryset),
-            'rp_order_nums_fault_type': list(rp_order_nums_fault_type_queryset),
-            'rp_order_nums_top_dept': list(rp_order_nums_top_dept_queryset),
-        }
+        # 报修单状态/故障类型/科室Top3分布, 平均分派时长及平均维修时长, 基于报修单每日统计汇总
+        data = RepairOrderDailyStat.objects.get_report(
+            times.str_to_datetime(start_date, format=date_format).date(),
+            times.str_to_datetime(expired_date, format=date_format).date(),
+        )
         return resp.ok('ok', data)
@@ -138,6 +138,9 @@ SEQ_CODE_CHOICES = (
     (SEQ_MAINTAIN_PLAN_NO, '维护保养计划自增序列'),
 )
 
+# 每日重置的序列(见SequenceManager.next_daily_value)在Redis中的保留时长(秒), 超过一天以覆盖跨零点的请求
+SEQ_DAILY_VALUE_TIMEOUT = 2 * 24 * 60 * 60
+
 SEQUENCES = {
     SEQ_REPAIR_ORDER_NO: {
         "seq_code": SEQ_REPAIR_ORDER_NO,
@@ -19,6 +19,7 @@ from base.forms import BaseForm
 from nmis.hospitals.consts import ROLE_CATE_NORMAL, ROLE_CODE_NORMAL_STAFF, DPT_ATTRI_OTHER
 
 from users.models import User
+from users.perms import bump_role_version
 
 
 logger = logging.getLogger(__name__)
@@ -625,7 +626,6 @@ class DepartmentUpdateFrom(BaseForm):
             data['desc'] = desc.strip()
 
         updated_dept = self.dept.update(data)
-        updated_dept.cache()
         return updated_dept
 
 
@@ -703,7 +703,6 @@ class DepartmentCreateForm(BaseForm):
 
         try:
             new_dept = self.hospital.create_department(**dept_data)
-            new_dept.cache()
             return new_dept
         except Exception as e:
             logging.exception(e)
@@ -970,7 +969,7 @@ class RoleUpdateForm(BaseForm):
         role_data['permissions'] = permissions
         try:
             new_role = self.old_role.update(role_data)
-            new_role.cache()
+            bump_role_version()
             return new_role
         except Exception as e:
             logger.exception(e)
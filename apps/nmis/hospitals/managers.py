@@ -8,9 +8,10 @@
 import logging
 from django.db import transaction
 from django.db.models import Q, F
+from django_redis import get_redis_connection
 
 from nmis.hospitals.consts import ROLE_CODE_HOSP_SUPER_ADMIN, ROLES, ROLE_CODE_CHOICES, \
-    ROLE_CODE_NORMAL_STAFF, SEQ_CODE_CHOICES, SEQUENCES
+    ROLE_CODE_NORMAL_STAFF, SEQ_CODE_CHOICES, SEQUENCES, SEQ_DAILY_VALUE_TIMEOUT
 from settings import USER_DEFAULT_PWD
 from users.models import User
 
@@ -142,7 +143,6 @@ class RoleManager(BaseManager):
             if commit:
                 role.save()
                 role.permissions.set(permissions)
-                role.cache()
             return role
         except Exception as e:
             logger.exception(e)
@@ -279,11 +279,12 @@ class HospitalAddressManager(BaseManager):
 
     def get_hospital_address_by_ids(self, ids):
         """
-        通过存储地点ID集合查询存储地点
+        通过存储地点ID集合查询存储地点(优先从缓存中批量获取)
         :param ids: 资产设备存储地点list
+        :return: 与ids顺序一致的存储地点列表
         """
         try:
-            return self.filter(id__in=ids)
+            return self.get_cached_many(ids)
         except Exception as e:
             logger.exception(e)
             return None
@@ -439,3 +440,33 @@ class SequenceManager(BaseManager):
         except Exception as e:
             logger.exception(e)
             return None
+
+    @staticmethod
+    def make_daily_value_key(seq_code, day):
+        return '%s.DailySequence.%s.%s' % (__name__, seq_code, day)
+
+    def next_daily_value(self, seq_code, day, get_used_max=None):
+        """
+        分配每日重置的序列值(如报修单号中的序号). 基于Redis INCR原子递增, 不在业务事务中锁定序列行,
+        并发分配互不等待. 每天首次分配(或Redis数据丢失)时, 以get_used_max()返回的当天已使用的最大值校准.
+        Redis不可用时返回校准值+1, 并发时可能重复, 由调用方依赖唯一约束重新分配
+
+        :param seq_code: 序列编码
+        :param day: 日期字符串, 如'20181224'
+        :param get_used_max: 返回当天已使用的最大序列值的函数, 为None时从1开始
+        :return: 序列值
+        """
+        get_used_max = get_used_max or (lambda: 0)
+        try:
+            conn = get_redis_connection('default')
+            key = self.make_daily_value_key(seq_code, day)
+            value = conn.incr(key)
+            if value == 1:
+                conn.expire(key, SEQ_DAILY_VALUE_TIMEOUT)
+                used_max = get_used_max()
+                if used_max:
+                    value = conn.incrby(key, used_max)
+            return value
+        except Exception as e:
+            logger.exception(e)
+        return get_used_max() + 1
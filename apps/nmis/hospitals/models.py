@@ -20,6 +20,7 @@ from nmis.hospitals.managers import RoleManager, SequenceManager, \
 
 from organs.models import BaseOrgan, BaseStaff, BaseDepartment
 from users.models import User
+from users.perms import bump_role_version
 from .managers import StaffManager, HospitalManager
 
 logger = logging.getLogger(__name__)
@@ -46,10 +47,6 @@ class Hospital(BaseOrgan):
     def __str__(self):
         return '%s %s' % (self.id, self.organ_name)
 
-    def save(self, *args, **kwargs):  # 重写save函数，当admin后台保存表单后，更新缓存
-        super(self.__class__, self).save(*args, **kwargs)
-        self.cache()
-
     def get_all_flows(self):
         from nmis.projects.models import ProjectFlow
         return ProjectFlow.objects.filter(organ=self)
@@ -137,7 +134,6 @@ class Hospital(BaseOrgan):
                 if ship_args:
                     for ship in ship_args:
                         ship.save()
-                        ship.cache()
                         ship.dept_domains.set(depts)
                 if old_ships:
                     for ship in old_ships:
@@ -148,6 +144,7 @@ class Hospital(BaseOrgan):
                     for s in same_ships:
                         s.dept_domains.set(depts)
                         s.cache
+                bump_role_version()
                 return True
         except Exception as e:
             logger.info(e.__cause__)
@@ -238,8 +235,7 @@ class Staff(BaseStaff):
             return False
         if not self.organ == hospital:
             return False
-        role = Role.objects.get_role_by_keyword(codename=ROLE_CODE_HOSP_SUPER_ADMIN)
-        return self.user.has_role(role)
+        return self.user.has_role_codename(ROLE_CODE_HOSP_SUPER_ADMIN)
 
 
 class Doctor(Staff):
@@ -313,6 +309,7 @@ class Role(BaseModel):
         """
         self.permissions.set(perms)
         self.save()
+        bump_role_version()
 
     def add_permission(self, perm):
         """
@@ -320,6 +317,7 @@ class Role(BaseModel):
         :param perm: 权限对象,
         """
         self.permissions.set(perm)
+        bump_role_version()
 
     def get_permissions(self):
         """获取去角色下的权限"""
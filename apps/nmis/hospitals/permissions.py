@@ -21,7 +21,7 @@ from restfw_composed_permissions.generic.components import (
 from base.common.permissions import is_login
 from nmis.hospitals.consts import ROLE_CODE_HOSP_SUPER_ADMIN, ROLE_CODE_NORMAL_STAFF, ROLE_CODE_PRO_DISPATCHER, \
     ROLE_CODE_HOSP_REPORT_ASSESS, ROLE_CODE_SYSTEM_SETTING_ADMIN
-from nmis.hospitals.models import Hospital, Role
+from nmis.hospitals.models import Hospital
 
 logger = logging.getLogger(__name__)
 
@@ -50,8 +50,7 @@ class IsHospSuperAdmin(BasePermission):
         对象级权限检查.
         :param obj:  None
         """
-        role = Role.objects.get_role_by_keyword(codename=ROLE_CODE_HOSP_SUPER_ADMIN)
-        return request.user.has_role(role)
+        return request.user.has_role_codename(ROLE_CODE_HOSP_SUPER_ADMIN)
 
 
 class HospGlobalReportAssessPermission(BasePermission):
@@ -71,8 +70,7 @@ class HospGlobalReportAssessPermission(BasePermission):
         对象级权限检查.
         :param obj: None
         """
-        role = Role.objects.get_role_by_keyword(codename=ROLE_CODE_HOSP_REPORT_ASSESS)
-        return request.user.has_role(role)
+        return request.user.has_role_codename(ROLE_CODE_HOSP_REPORT_ASSESS)
 
 
 class SystemManagePermission(BasePermission):
@@ -92,8 +90,7 @@ class SystemManagePermission(BasePermission):
         对象级权限检查.
         :param obj: None
         """
-        role = Role.objects.get_role_by_keyword(codename=ROLE_CODE_SYSTEM_SETTING_ADMIN)
-        return request.user.has_role(role)
+        return request.user.has_role_codename(ROLE_CODE_SYSTEM_SETTING_ADMIN)
 
 
 class HospitalStaffPermission(BasePermission):
@@ -141,8 +138,7 @@ class ProjectDispatcherPermission(BasePermission):
         #     return True
         # if not isinstance(obj, Hospital):
         #     return False
-        role = Role.objects.get_role_by_keyword(codename=ROLE_CODE_PRO_DISPATCHER)
-        return request.user.has_role(role)
+        return request.user.has_role_codename(ROLE_CODE_PRO_DISPATCHER)
 
 
 class IsOwnerOrReadOnly(BasePermission):
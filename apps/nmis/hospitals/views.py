@@ -16,6 +16,7 @@ from base.common.decorators import check_params_not_all_null, check_params_not_n
 from django.conf import settings
 from django.db import transaction
 
+from base.authtoken import CustomToken
 from base.common.param_utils import get_id_list
 from base.resp import Response
 from nmis.devices.models import RepairOrder
@@ -24,17 +25,17 @@ from nmis.hospitals.serializers import StaffSerializer, RoleSerializer, \
     DepartmentStaffsCountSerializer, StaffWithRoleSerializer
 from nmis.projects.models import ProjectPlan
 from users.models import User
-
-from utils.files import ExcelBasedOXL
+from users.perms import bump_role_version
 
 from base import resp
 from base.views import BaseAPIView
-from nmis.hospitals.forms import StaffUpdateForm, StaffBatchUploadForm, \
-    DepartmentBatchUploadForm, RoleCreateForm, RoleUpdateForm, \
+from nmis.hospitals.forms import StaffUpdateForm, RoleCreateForm, RoleUpdateForm, \
     HospitalAddressCreateForm, HospitalAddressUpdateForm
 from nmis.hospitals.permissions import IsHospSuperAdmin, HospitalStaffPermission, \
     ProjectDispatcherPermission, IsSuperAdmin, SystemManagePermission
 from nmis.hospitals.models import Hospital, Department, Staff, Role, HospitalAddress
+from nmis.jobs.consts import IMPORT_JOB_TYPE_STAFF, IMPORT_JOB_TYPE_DEPT
+from nmis.jobs.models import ImportJob
 from .forms import (
     HospitalSignupForm,
     DepartmentUpdateFrom,
@@ -42,8 +43,7 @@ from .forms import (
     DepartmentCreateForm
 )
 
-from nmis.hospitals.consts import UPLOADED_STAFF_EXCEL_HEADER_DICT, \
-    UPLOADED_DEPT_EXCEL_HEADER_DICT, ARCHIVE, ROLE_CODE_MAINTAINER
+from nmis.hospitals.consts import ARCHIVE, ROLE_CODE_MAINTAINER
 
 logger = logging.getLogger(__name__)
 
@@ -271,10 +271,9 @@ class StaffView(BaseAPIView):
             with transaction.atomic():
                 staff.is_deleted = True
                 staff.save()
-                staff.cache()
                 user.is_active = False
                 user.save()
-                user.cache()
+                CustomToken.clear_users_resolved_cache(user)
                 return resp.ok('删除成功')
         except Exception as e:
             logging.exception(e)
@@ -306,6 +305,7 @@ class StaffBatchDeleteView(BaseAPIView):
                 User.objects.clear_cache(users)
                 staffs.update(is_deleted=True)
                 users.update(is_active=False)
+                CustomToken.clear_users_resolved_cache(users)
                 return resp.ok('删除成功')
         except ProtectedError as pe:
             logger.exception(pe)
@@ -390,26 +390,12 @@ class StaffBatchUploadView(BaseAPIView):
         elif file_obj.content_type not in (ARCHIVE['.xlsx'], ARCHIVE['.xlsx-wps'], ARCHIVE['.rar']):
             return resp.failed('系统不支持该类型文件，请使用正确的模板文件')
 
-        # 将文件存放到服务器
-        # import os
-        # file_server_path = open(os.path.join('/media/', '', file_obj.name), 'wb')
-        # file = open('file_server_path', 'wb')
-
-        is_success, ret = ExcelBasedOXL.open_excel(file_obj)
-        if not is_success:
-            return resp.failed(ret)
-
-        head_dict = UPLOADED_STAFF_EXCEL_HEADER_DICT
-        success, result = ExcelBasedOXL.read_excel(ret, head_dict)
-        ExcelBasedOXL.close(ret)
-        if not success:
-            return resp.failed(result)
-
-        form = StaffBatchUploadForm(organ, result)
-        if not form.is_valid():
-            return resp.form_err(form.errors)
-
-        return resp.ok('导入员工信息成功') if form.save() else resp.failed('导入失败')
+        job = ImportJob.objects.submit_job(
+            IMPORT_JOB_TYPE_STAFF, req.user.get_profile(), file_obj, organ_id=organ.id
+        )
+        if not job:
+            return resp.failed('导入任务提交失败')
+        return resp.serialize_response(job, results_name='import_job')
 
 
 class DepartmentCreateView(BaseAPIView):
@@ -549,26 +535,12 @@ class DepartmentBatchUploadView(BaseAPIView):
         elif file_obj.content_type not in (ARCHIVE['.xlsx'], ARCHIVE['.xlsx-wps'], ARCHIVE['.rar']):
             return resp.failed('系统不支持该类型文件，请使用正确的模板文件')
 
-        # 将文件存放到服务器
-        # import os
-        # file_server_path = open(os.path.join('/media/', '', file_obj.name), 'wb')
-        # file = open('file_server_path', 'wb')
-
-        is_success, ret = ExcelBasedOXL.open_excel(file_obj)
-        if not is_success:
-            return resp.failed(ret)
-
-        head_dict = UPLOADED_DEPT_EXCEL_HEADER_DICT
-        success, result = ExcelBasedOXL.read_excel(ret, head_dict)
-        ExcelBasedOXL.close(ret)
-        if not success:
-            return resp.failed(result)
-
-        form = DepartmentBatchUploadForm(organ, result)
-        if not form.is_valid():
-            return resp.form_err(form.errors)
-
-        return resp.ok('导入成功') if form.save() else resp.failed('导入失败')
+        job = ImportJob.objects.submit_job(
+            IMPORT_JOB_TYPE_DEPT, req.user.get_profile(), file_obj, organ_id=organ.id
+        )
+        if not job:
+            return resp.failed('导入任务提交失败')
+        return resp.serialize_response(job, results_name='import_job')
 
 
 class RoleCreateView(BaseAPIView):
@@ -618,6 +590,7 @@ class RoleView(BaseAPIView):
         role = self.get_object_or_404(role_id, Role)
         role.clear_cache()
         role.delete()
+        bump_role_version()
         return resp.ok("操作成功")
 
 
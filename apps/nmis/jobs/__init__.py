@@ -0,0 +1,20 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/21
+#
+
+# 后台任务: Excel批量导入等耗时操作提交为任务, 由Celery worker异步执行, 客户端轮询任务进度
+
+import logging
+
+from django.apps import AppConfig
+
+logger = logging.getLogger(__name__)
+
+
+class JobsAppConfig(AppConfig):
+    name = 'nmis.jobs'
+    verbose_name = '后台任务'
+
+
+default_app_config = 'nmis.jobs.JobsAppConfig'
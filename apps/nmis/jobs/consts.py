@@ -0,0 +1,36 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/21
+#
+
+# 导入任务类型
+IMPORT_JOB_TYPE_ASSERT_DEVICE = 'AD'
+IMPORT_JOB_TYPE_FAULT_SOLUTION = 'FS'
+IMPORT_JOB_TYPE_MEDICAL_DEVICE_CATE = 'MC'
+IMPORT_JOB_TYPE_STAFF = 'SF'
+IMPORT_JOB_TYPE_DEPT = 'DP'
+IMPORT_JOB_TYPE_CHOICES = (
+    (IMPORT_JOB_TYPE_ASSERT_DEVICE,         '资产设备导入'),
+    (IMPORT_JOB_TYPE_FAULT_SOLUTION,        '故障解决方案导入'),
+    (IMPORT_JOB_TYPE_MEDICAL_DEVICE_CATE,   '医疗器械分类导入'),
+    (IMPORT_JOB_TYPE_STAFF,                 '员工导入'),
+    (IMPORT_JOB_TYPE_DEPT,                  '部门导入'),
+)
+
+# 导入任务状态
+IMPORT_JOB_STATUS_PENDING = 'PE'
+IMPORT_JOB_STATUS_RUNNING = 'RU'
+IMPORT_JOB_STATUS_DONE = 'DO'
+IMPORT_JOB_STATUS_FAILED = 'FA'
+IMPORT_JOB_STATUS_CHOICES = (
+    (IMPORT_JOB_STATUS_PENDING,     '等待执行'),
+    (IMPORT_JOB_STATUS_RUNNING,     '执行中'),
+    (IMPORT_JOB_STATUS_DONE,        '已完成'),
+    (IMPORT_JOB_STATUS_FAILED,      '失败'),
+)
+
+# 上传的待导入文件存放目录(相对MEDIA_ROOT), 任务执行完成后删除
+IMPORT_JOB_FILE_DIR = 'upload/imports/'
+
+# 执行中的任务超过该时间(秒)未更新心跳即视为worker已中断(每处理完一块数据更新一次心跳)
+IMPORT_JOB_HEARTBEAT_TIMEOUT = 10 * 60
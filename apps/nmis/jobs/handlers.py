@@ -0,0 +1,114 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/21
+#
+
+"""
+各类导入任务的执行函数. 函数签名为 handler(job, workbook, progress_callback), 返回base.imports.ImportResult,
+文件内容错误等导致任务无法执行时抛出ImportJobError
+"""
+
+import logging
+
+from django.db import transaction
+
+from base.imports import ImportResult
+from nmis.devices.consts import ASSERT_DEVICE_CATE_MEDICAL, UPLOADED_MEDICAL_ASSERT_DEVICE_EXCEL_HEADER_DICT, \
+    UPLOADED_INFORMATION_ASSERT_DEVICE_EXCEL_HEADER_DICT, UPLOADED_FS_EXCEL_HEAD_DICT, \
+    UPLOADED_MEDICAL_DEVICE_CATE_EXCEL_HEADER_DICT
+from nmis.devices.forms import FaultSolutionsImportForm, MedicalDeviceCateImportForm
+from nmis.devices.imports import AssertDeviceImporter
+from nmis.hospitals.consts import UPLOADED_STAFF_EXCEL_HEADER_DICT, UPLOADED_DEPT_EXCEL_HEADER_DICT
+from nmis.hospitals.forms import StaffBatchUploadForm, DepartmentBatchUploadForm
+from nmis.hospitals.models import Hospital
+from nmis.jobs.consts import IMPORT_JOB_TYPE_ASSERT_DEVICE, IMPORT_JOB_TYPE_FAULT_SOLUTION, \
+    IMPORT_JOB_TYPE_MEDICAL_DEVICE_CATE, IMPORT_JOB_TYPE_STAFF, IMPORT_JOB_TYPE_DEPT
+from utils.files import ExcelBasedOXL
+
+logger = logging.getLogger(__name__)
+
+
+class ImportJobError(Exception):
+    """
+    导入任务无法执行(如文件表头错误), 异常消息将作为任务结果消息返回给用户
+    """
+    pass
+
+
+def import_assert_devices(job, workbook, progress_callback):
+    """
+    资产设备: 流式分块导入
+    """
+    cate = job.get_params().get('cate')
+    if cate == ASSERT_DEVICE_CATE_MEDICAL:
+        head_dict = UPLOADED_MEDICAL_ASSERT_DEVICE_EXCEL_HEADER_DICT
+    else:
+        head_dict = UPLOADED_INFORMATION_ASSERT_DEVICE_EXCEL_HEADER_DICT
+    sheet = workbook.worksheets[0]
+    success, rows = ExcelBasedOXL.iter_sheet(sheet, head_dict)
+    if not success:
+        raise ImportJobError(rows)
+    return AssertDeviceImporter(
+        rows, creator=job.creator, cate=cate, expected=sheet.max_row - 1 if sheet.max_row else None,
+        progress_callback=progress_callback,
+    ).run()
+
+
+def import_by_form(workbook, header_dict, make_form):
+    """
+    读取全部数据后使用表单整体校验并保存, 校验失败时不保存任何数据
+    :param make_form: 函数, 参数为读取的Excel数据, 返回表单对象
+    """
+    success, data = ExcelBasedOXL.read_excel(workbook, header_dict)
+    if not success:
+        raise ImportJobError(data)
+    result = ImportResult()
+    result.total = sum(len(sheet_data) for sheet_data in data)
+    form = make_form(data)
+    if not form.is_valid():
+        for field, msg in form.errors.items():
+            result.add_error(None, field, str(msg))
+        return result
+    with transaction.atomic():
+        if not form.save():
+            raise ImportJobError('数据保存失败')
+    result.imported = result.total
+    return result
+
+
+def import_fault_solutions(job, workbook, progress_callback):
+    return import_by_form(
+        workbook, UPLOADED_FS_EXCEL_HEAD_DICT, lambda data: FaultSolutionsImportForm(job.creator, data)
+    )
+
+
+def import_medical_device_cates(job, workbook, progress_callback):
+    return import_by_form(
+        workbook, UPLOADED_MEDICAL_DEVICE_CATE_EXCEL_HEADER_DICT,
+        lambda data: MedicalDeviceCateImportForm(job.creator, data)
+    )
+
+
+def import_staffs(job, workbook, progress_callback):
+    organ = Hospital.objects.get_by_id(job.get_params().get('organ_id'))
+    if not organ:
+        raise ImportJobError('机构不存在')
+    return import_by_form(workbook, UPLOADED_STAFF_EXCEL_HEADER_DICT, lambda data: StaffBatchUploadForm(organ, data))
+
+
+def import_depts(job, workbook, progress_callback):
+    organ = Hospital.objects.get_by_id(job.get_params().get('organ_id'))
+    if not organ:
+        raise ImportJobError('机构不存在')
+    return import_by_form(
+        workbook, UPLOADED_DEPT_EXCEL_HEADER_DICT, lambda data: DepartmentBatchUploadForm(organ, data)
+    )
+
+
+IMPORT_JOB_HANDLERS = {
+    IMPORT_JOB_TYPE_ASSERT_DEVICE:          import_assert_devices,
+    IMPORT_JOB_TYPE_FAULT_SOLUTION:         import_fault_solutions,
+    IMPORT_JOB_TYPE_MEDICAL_DEVICE_CATE:    import_medical_device_cates,
+    IMPORT_JOB_TYPE_STAFF:                  import_staffs,
+    IMPORT_JOB_TYPE_DEPT:                   import_depts,
+}
@@ -0,0 +1,58 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/21
+#
+
+import json
+import logging
+import os
+
+import settings
+from base.models import BaseManager
+from nmis.jobs.consts import IMPORT_JOB_FILE_DIR
+from utils.files import upload_file, remove
+
+logger = logging.getLogger(__name__)
+
+
+class ImportJobManager(BaseManager):
+
+    def submit_job(self, job_type, creator, file_obj, **params):
+        """
+        保存上传的文件, 创建导入任务并提交到Celery队列. 任务创建或提交失败时删除上传的文件
+        :param job_type: 导入任务类型
+        :param creator: 提交任务的员工
+        :param file_obj: 上传的Excel文件
+        :param params: 导入参数, 如资产设备类型, 机构id等
+        :return: 导入任务对象, 失败时返回None
+        """
+        file_info = upload_file(file_obj, IMPORT_JOB_FILE_DIR)
+        if not file_info:
+            return None
+        try:
+            job = self.create(
+                type=job_type, creator=creator, file_name=file_info['name'], file_path=file_info['path'],
+                params=json.dumps(params),
+            )
+        except Exception as e:
+            logger.exception(e)
+            remove(os.path.join(settings.MEDIA_ROOT, file_info['path']))
+            return None
+
+        from nmis.jobs.tasks import run_import_job
+        try:
+            run_import_job.delay(job.id)
+        except Exception as e:
+            logger.exception(e)
+            job.mark_failed('导入任务提交失败')
+            remove(job.get_file_abspath())
+            return job
+        # CELERY_ALWAYS_EAGER时任务已同步执行完成
+        job.refresh_from_db()
+        return job
+
+    def get_staff_job(self, staff, job_id):
+        """
+        获取员工提交的导入任务
+        """
+        return self.filter(id=job_id, creator=staff).first()
@@ -0,0 +1,42 @@
+# Generated by Django 2.0 on 2018-12-21 10:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('hospitals', '0003_auto_20181130_1103'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_time', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('type', models.CharField(choices=[('AD', '资产设备导入'), ('FS', '故障解决方案导入'), ('MC', '医疗器械分类导入'), ('SF', '员工导入'), ('DP', '部门导入')], max_length=10, verbose_name='任务类型')),
+                ('status', models.CharField(choices=[('PE', '等待执行'), ('RU', '执行中'), ('DO', '已完成'), ('FA', '失败')], default='PE', max_length=10, verbose_name='任务状态')),
+                ('file_name', models.CharField(max_length=128, verbose_name='上传文件名')),
+                ('file_path', models.CharField(max_length=255, verbose_name='文件存放路径')),
+                ('params', models.TextField(default='{}', verbose_name='导入参数(JSON)')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='已处理行数')),
+                ('imported', models.PositiveIntegerField(default=0, verbose_name='成功导入行数')),
+                ('failed', models.PositiveIntegerField(default=0, verbose_name='导入失败行数')),
+                ('progress', models.PositiveSmallIntegerField(default=0, verbose_name='进度(0~100)')),
+                ('msg', models.CharField(blank=True, default='', max_length=255, verbose_name='结果消息')),
+                ('errors', models.TextField(default='[]', verbose_name='行错误列表(JSON)')),
+                ('started_time', models.DateTimeField(blank=True, null=True, verbose_name='开始执行时间')),
+                ('finished_time', models.DateTimeField(blank=True, null=True, verbose_name='结束时间')),
+                ('creator', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='hospitals.Staff', verbose_name='提交人')),
+            ],
+            options={
+                'verbose_name': '导入任务',
+                'verbose_name_plural': '导入任务',
+                'db_table': 'jobs_import_job',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.0 on 2018-12-26 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='heartbeat_time',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='心跳时间'),
+        ),
+    ]
@@ -0,0 +1,128 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/21
+#
+
+import datetime
+import json
+import logging
+import os
+
+from django.db import models
+
+import settings
+from base.models import BaseModel
+from nmis.jobs.consts import IMPORT_JOB_TYPE_CHOICES, IMPORT_JOB_STATUS_CHOICES, IMPORT_JOB_STATUS_PENDING, \
+    IMPORT_JOB_STATUS_RUNNING, IMPORT_JOB_STATUS_DONE, IMPORT_JOB_STATUS_FAILED, IMPORT_JOB_HEARTBEAT_TIMEOUT
+from nmis.jobs.managers import ImportJobManager
+from utils import times
+
+logger = logging.getLogger(__name__)
+
+
+class ImportJob(BaseModel):
+    """
+    Excel批量导入任务. 记录任务状态, 进度及行错误, 供客户端轮询
+    """
+    type = models.CharField('任务类型', max_length=10, choices=IMPORT_JOB_TYPE_CHOICES)
+    status = models.CharField(
+        '任务状态', max_length=10, choices=IMPORT_JOB_STATUS_CHOICES, default=IMPORT_JOB_STATUS_PENDING
+    )
+    creator = models.ForeignKey('hospitals.Staff', verbose_name='提交人', on_delete=models.PROTECT)
+    file_name = models.CharField('上传文件名', max_length=128)
+    file_path = models.CharField('文件存放路径', max_length=255)
+    params = models.TextField('导入参数(JSON)', default='{}')
+    total = models.PositiveIntegerField('已处理行数', default=0)
+    imported = models.PositiveIntegerField('成功导入行数', default=0)
+    failed = models.PositiveIntegerField('导入失败行数', default=0)
+    progress = models.PositiveSmallIntegerField('进度(0~100)', default=0)
+    msg = models.CharField('结果消息', max_length=255, default='', blank=True)
+    errors = models.TextField('行错误列表(JSON)', default='[]')
+    started_time = models.DateTimeField('开始执行时间', null=True, blank=True)
+    heartbeat_time = models.DateTimeField('心跳时间', null=True, blank=True)
+    finished_time = models.DateTimeField('结束时间', null=True, blank=True)
+
+    objects = ImportJobManager()
+
+    class Meta:
+        verbose_name = '导入任务'
+        verbose_name_plural = verbose_name
+        db_table = 'jobs_import_job'
+
+    VALID_ATTRS = [
+        'status', 'total', 'imported', 'failed', 'progress', 'msg', 'errors', 'started_time', 'heartbeat_time',
+        'finished_time',
+    ]
+
+    def __str__(self):
+        return '%s %s' % (self.id, self.type)
+
+    def get_params(self):
+        return json.loads(self.params) if self.params else {}
+
+    def get_errors(self):
+        return json.loads(self.errors) if self.errors else []
+
+    def get_file_abspath(self):
+        return os.path.join(settings.MEDIA_ROOT, self.file_path)
+
+    def is_finished(self):
+        return self.status in (IMPORT_JOB_STATUS_DONE, IMPORT_JOB_STATUS_FAILED)
+
+    def is_stale(self):
+        """
+        执行中的任务是否已中断(执行任务的worker退出, 超过IMPORT_JOB_HEARTBEAT_TIMEOUT秒未更新心跳)
+        """
+        if self.status != IMPORT_JOB_STATUS_RUNNING:
+            return False
+        last_beat = self.heartbeat_time or self.started_time
+        return not last_beat or \
+            last_beat < times.now() - datetime.timedelta(seconds=IMPORT_JOB_HEARTBEAT_TIMEOUT)
+
+    def mark_running(self):
+        """
+        将等待执行的任务标记为执行中, 任务已被其他worker领取时返回False
+        """
+        now = times.now()
+        claimed = ImportJob.objects.filter(id=self.id, status=IMPORT_JOB_STATUS_PENDING).update(
+            status=IMPORT_JOB_STATUS_RUNNING, started_time=now, heartbeat_time=now
+        )
+        if claimed:
+            self.status, self.started_time, self.heartbeat_time = IMPORT_JOB_STATUS_RUNNING, now, now
+        return bool(claimed)
+
+    def update_progress(self, result):
+        """
+        根据导入结果(base.imports.ImportResult)更新进度及心跳
+        """
+        self.total, self.imported, self.failed = result.total, result.imported, result.failed
+        if result.progress is not None:
+            self.progress = result.progress
+        self.heartbeat_time = times.now()
+        self.save(update_fields=['total', 'imported', 'failed', 'progress', 'heartbeat_time'])
+
+    def mark_finished(self, result):
+        """
+        导入结束: 全部行导入失败时任务状态为失败, 否则为已完成(可能部分行失败)
+        """
+        self.total, self.imported, self.failed = result.total, result.imported, result.failed
+        self.progress = 100
+        self.errors = json.dumps(result.to_dict()['errors'], ensure_ascii=False)
+        if not result.total:
+            self.status, self.msg = IMPORT_JOB_STATUS_FAILED, '%s失败: 文件中没有数据' % self.get_type_display()
+        elif result.failed and not result.imported:
+            self.status, self.msg = IMPORT_JOB_STATUS_FAILED, '%s失败' % self.get_type_display()
+        elif result.failed:
+            self.status = IMPORT_JOB_STATUS_DONE
+            self.msg = '%s完成, 成功%s条, 失败%s条' % (self.get_type_display(), result.imported, result.failed)
+        else:
+            self.status = IMPORT_JOB_STATUS_DONE
+            self.msg = '%s成功, 共%s条' % (self.get_type_display(), result.imported)
+        self.finished_time = times.now()
+        self.save()
+
+    def mark_failed(self, msg):
+        self.status = IMPORT_JOB_STATUS_FAILED
+        self.msg = '%s失败: %s' % (self.get_type_display(), msg)
+        self.finished_time = times.now()
+        self.save(update_fields=['status', 'msg', 'finished_time'])
@@ -0,0 +1,27 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/21
+#
+
+import logging
+
+from rest_framework import serializers
+
+from base.serializers import BaseModelSerializer
+from nmis.jobs.models import ImportJob
+
+logger = logging.getLogger(__name__)
+
+
+class ImportJobSerializer(BaseModelSerializer):
+    errors = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ImportJob
+        fields = (
+            'id', 'type', 'status', 'file_name', 'total', 'imported', 'failed', 'progress', 'msg', 'errors',
+            'created_time', 'started_time', 'finished_time',
+        )
+
+    def get_errors(self, obj):
+        return obj.get_errors()
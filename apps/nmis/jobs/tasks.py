@@ -0,0 +1,60 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/21
+#
+
+"""
+导入任务的Celery task, 由import_celery_app的worker执行(见settings/subs/celery_app.py):
+
+    DJANGO_SETTINGS_MODULE=settings celery worker -A settings.subs.celery_app:import_celery_app -Q import_job_queue
+"""
+
+import logging
+
+from settings import import_celery_app
+from utils.files import ExcelBasedOXL, remove
+
+logger = logging.getLogger(__name__)
+
+
+@import_celery_app.task(ignore_result=True)
+def run_import_job(job_id):
+    """
+    执行导入任务, 结束后删除上传的文件, 并通过消息(websocket)通知任务提交人.
+    CELERY_ACKS_LATE下worker中断时任务会被重新投递: 此时任务仍为执行中且心跳已超时, 已导入的数据块已提交,
+    重新执行会重复导入, 因此将任务标记为失败并通知提交人核对后重新导入
+    """
+    from nmis.jobs.handlers import IMPORT_JOB_HANDLERS, ImportJobError
+    from nmis.jobs.models import ImportJob
+    from nmis.notices.models import Notice
+
+    job = ImportJob.objects.get_by_id(job_id)
+    if not job:
+        logger.warning('Import job not found: %s', job_id)
+        return
+    if job.is_stale():
+        logger.warning('Import job interrupted: %s', job_id)
+        job.mark_failed('任务执行中断(已处理%s行, 成功导入%s行), 请核对数据后重新导入' % (job.total, job.imported))
+        remove(job.get_file_abspath())
+        Notice.objects.create_and_send_notice([job.creator], job.msg)
+        return
+    if not job.mark_running():
+        logger.warning('Import job already executed or running: %s', job_id)
+        return
+
+    success, workbook = ExcelBasedOXL.open_excel(job.get_file_abspath())
+    try:
+        if not success:
+            raise ImportJobError(workbook)
+        job.mark_finished(IMPORT_JOB_HANDLERS[job.type](job, workbook, job.update_progress))
+    except ImportJobError as e:
+        job.mark_failed(str(e))
+    except Exception as e:
+        logger.exception(e)
+        job.mark_failed('导入异常')
+    finally:
+        if success:
+            ExcelBasedOXL.close(workbook)
+        remove(job.get_file_abspath())
+
+    Notice.objects.create_and_send_notice([job.creator], job.msg)
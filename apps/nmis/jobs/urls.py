@@ -0,0 +1,18 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/21
+#
+
+import logging
+
+from django.urls import path
+
+from . import views
+
+logger = logging.getLogger(__name__)
+app_name = 'nmis.jobs'
+# /api/v1/jobs/
+urlpatterns = [
+    # 查询导入任务状态及进度
+    path('imports/<int:job_id>', views.ImportJobView.as_view(), ),
+]
@@ -0,0 +1,28 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/21
+#
+
+import logging
+
+from base import resp
+from base.views import BaseAPIView
+from nmis.hospitals.permissions import HospitalStaffPermission
+from nmis.jobs.models import ImportJob
+
+logger = logging.getLogger(__name__)
+
+
+class ImportJobView(BaseAPIView):
+
+    permission_classes = (HospitalStaffPermission, )
+
+    def get(self, req, job_id):
+        """
+        查询导入任务的状态及进度, 仅任务提交人可查询
+        """
+        self.check_object_any_permissions(req, None)
+        job = ImportJob.objects.get_staff_job(req.user.get_profile(), job_id)
+        if not job:
+            return resp.object_not_found()
+        return resp.serialize_response(job, results_name='import_job')
@@ -0,0 +1,17 @@
+# Generated by Django 2.0 on 2018-12-16 10:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notices', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usernotice',
+            index=models.Index(fields=['staff', 'created_time', 'id'], name='user_notice_staff_ctime_idx'),
+        ),
+    ]
@@ -53,6 +53,9 @@ class UserNotice(BaseModel):
         verbose_name_plural = 'A 用户与消息关系'
         unique_together = ('staff', 'notice',)
         db_table = 'notices_user_notice'
+        indexes = [
+            models.Index(fields=['staff', 'created_time', 'id'], name='user_notice_staff_ctime_idx'),  # 游标分页
+        ]
 
     VALID_ATTRS = [
         'is_read', 'is_delete', 'read_time', 'delete_time',
@@ -0,0 +1,35 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/25
+#
+
+"""
+消息异步推送的Celery task, 由notice_celery_app的worker执行(见settings/subs/celery_app.py):
+
+    DJANGO_SETTINGS_MODULE=settings celery worker -A settings.subs.celery_app:notice_celery_app -Q notice_queue
+"""
+
+import logging
+
+from settings import notice_celery_app
+
+logger = logging.getLogger(__name__)
+
+
+@notice_celery_app.task(ignore_result=True)
+def send_notice(message, staff_ids=None, role_codename=None):
+    """
+    生成并推送消息
+    :param message: 消息内容
+    :param staff_ids: 接收消息的员工id列表
+    :param role_codename: 角色编码, 拥有该角色的员工均接收消息
+    """
+    from nmis.hospitals.models import Staff
+    from nmis.notices.models import Notice
+
+    staffs = Staff.objects.get_cached_many(staff_ids) if staff_ids else []
+    if role_codename:
+        staffs.extend(Staff.objects.filter(user__role__codename=role_codename))
+    if not staffs:
+        return
+    Notice.objects.create_and_send_notice(staffs, message)
@@ -18,6 +18,7 @@ logger = logging.getLogger(__name__)
 
 class NoticeListView(BaseAPIView):
     permission_classes = (HospitalStaffPermission,)
+    keyset_pagination = True
 
     def get(self, req):
         """
@@ -820,7 +820,6 @@ class ProjectFlowUpdateForm(BaseForm):
             'title': self.data.get('flow_title', '').strip(),
         }
         new_flow = self.old_flow.update(data)
-        new_flow.cache()
         return new_flow
 
 
@@ -1535,7 +1534,6 @@ class SupplierSelectionPlanBatchSaveForm(BaseForm):
                 plan_data = dict()
                 supplier_name = item.get('supplier_name').strip()
                 supplier, created = Supplier.objects.update_or_create(name=supplier_name)
-                supplier.cache()
                 plan_data['supplier'] = supplier
                 plan_data['total_amount'] = float(item.get('total_amount'))
                 if item.get('remark') is not None:
@@ -1553,11 +1551,9 @@ class SupplierSelectionPlanBatchSaveForm(BaseForm):
                     plan = SupplierSelectionPlan.objects.filter(id=int(item.get('id'))).first()
                     if plan:
                         plan.update(plan_data)
-                        plan.cache()
                 else:
 
                     plan = SupplierSelectionPlan.objects.create(project_milestone_state=self.project_milestone_state, **plan_data)
-                    plan.cache()
 
             return self.project_milestone_state
         except Exception as e:
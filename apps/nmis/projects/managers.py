@@ -309,7 +309,6 @@ class ProjectOperationRecordManager(BaseManager):
     def add_operation_records(self, **data):
         project_operation_record = self.model(**data)
         project_operation_record.save()
-        project_operation_record.cache()
 
         return project_operation_record
 
@@ -355,7 +354,6 @@ class ProjectDocumentManager(BaseManager):
             return False, '已存在相同资料类别的同名文件'
         doc = self.model(name=name, category=category, path=path)
         doc.save()
-        doc.cache()
         return True, doc
 
     def update_project_document(self, ):
@@ -395,7 +393,6 @@ class ProjectDocumentManager(BaseManager):
                     name=doc_name, category=tag, path=path
                 )
                 if created:
-                    doc.cache()
                     doc_list.append(doc)
         return doc_list
 
@@ -416,7 +413,6 @@ class ProjectDocumentManager(BaseManager):
                         path=project_document.get('path')
                     )
                     if is_create:
-                        doc.cache()
                         doc_list.append(doc)
                 return doc_list
         except Exception as e:
@@ -467,7 +463,6 @@ class ProjectMilestoneStateManager(BaseManager):
         """
         try:
             project_milestone_state.update(data)
-            project_milestone_state.cache()
             return project_milestone_state
         except Exception as e:
             logger.exception(e)
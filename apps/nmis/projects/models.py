@@ -183,7 +183,6 @@ class ProjectPlan(BaseModel):
                 self.status = status
                 self.save()
                 ProjectOperationRecord.objects.add_operation_records(**data)
-                self.cache()
             return True
         except Exception as e:
             logger.exception(e)
@@ -196,7 +195,6 @@ class ProjectPlan(BaseModel):
         try:
             self.purchase_method = purchase_method
             self.save()
-            self.cache()
             return True
         except Exception as e:
             logger.exception(e)
@@ -209,7 +207,6 @@ class ProjectPlan(BaseModel):
         try:
             self.status = PRO_STATUS_STARTED
             self.save()
-            self.cache()
             return True
         except Exception as e:
             logger.exception(e)
@@ -243,7 +240,6 @@ class ProjectPlan(BaseModel):
 
                 self.startup_project_milestone_state(project_milestone_state)
                 self.save()
-                self.cache()
             return True, project_milestone_state
         except Exception as e:
             logger.exception(e)
@@ -257,7 +253,6 @@ class ProjectPlan(BaseModel):
         try:
             self.assistant = assistant
             self.save()
-            self.cache()
             return True
         except Exception as e:
             logger.exception(e)
@@ -275,7 +270,6 @@ class ProjectPlan(BaseModel):
                     self.assistant = assistant
                 self.performer = performer
                 self.save()
-                self.cache()
             return True
         except Exception as e:
             logger.exception(e)
@@ -303,7 +297,6 @@ class ProjectPlan(BaseModel):
                                                                  milestone=milestone)
                 self.current_stone = project_milestone_state
                 self.save()
-                self.cache()
             return True
         except Exception as e:
             logger.exception(e)
@@ -522,7 +515,6 @@ class ProjectPlan(BaseModel):
                 curr_stone_state.status = PRO_MILESTONE_DONE
                 curr_stone_state.finished_time = times.now()
                 curr_stone_state.save()
-                curr_stone_state.cache()
                 # 当前里程碑为某始祖里程碑最后一个子孙里程碑
                 if curr_stone_state.milestone.is_last_descendant(curr_stone_state.milestone.first_ancestor()):
                     # 当前里程碑为流程中最后一个子孙里程碑
@@ -534,7 +526,6 @@ class ProjectPlan(BaseModel):
                             anc_stone_state.status = PRO_MILESTONE_DONE
                             anc_stone_state.finished_time = times.now()
                             anc_stone_state.save()
-                            anc_stone_state.cache()
                     if not curr_stone_state.milestone.is_flow_last_descendant():
                         next_milestone = curr_stone_state.milestone.next()
                         next_stone_state = ProjectMilestoneState.objects.filter(project=self,
@@ -544,12 +535,10 @@ class ProjectPlan(BaseModel):
                         self.status = PRO_STATUS_DONE
                         self.finished_time = times.now()
                         self.save()
-                        self.cache()
                 elif curr_stone_state.milestone.is_last_main_milestone():
                     self.status = PRO_STATUS_DONE
                     self.finished_time = times.now()
                     self.save()
-                    self.cache()
                 else:
                     next_milestone = curr_stone_state.milestone.next()
                     next_stone_state = ProjectMilestoneState.objects.filter(
@@ -570,7 +559,6 @@ class ProjectPlan(BaseModel):
         """
         milestone_state.status = PRO_MILESTONE_DOING
         milestone_state.save()
-        milestone_state.cache()
         milestone = milestone_state.milestone
         self.current_stone = milestone_state
         if milestone.has_children():
@@ -578,10 +566,8 @@ class ProjectPlan(BaseModel):
             first_child_stone_state = ProjectMilestoneState.objects.filter(project=self, milestone=first_child_milestone).first()
             first_child_stone_state.status = PRO_MILESTONE_DOING
             first_child_stone_state.save()
-            first_child_stone_state.cache()
             self.current_stone = first_child_stone_state
         self.save()
-        self.cache()
 
 
 class ProjectFlow(BaseModel):
@@ -1028,7 +1014,6 @@ class ProjectMilestoneState(BaseModel):
             else:
                 self.doc_list = '%s%s%s' % (self.doc_list, ',', doc_id_str)
             self.save()
-            self.cache()
             return True
         except Exception as e:
             logger.exception(e)
@@ -1042,7 +1027,6 @@ class ProjectMilestoneState(BaseModel):
 
             self.doc_list = doc_id_str
             self.save()
-            self.cache()
             return True
         except Exception as e:
             logger.exception(e)
@@ -1055,7 +1039,6 @@ class ProjectMilestoneState(BaseModel):
         try:
             self.summary = summary
             self.save()
-            self.cache()
             return True
         except Exception as e:
             logger.exception(e)
@@ -12,7 +12,7 @@ from collections import OrderedDict
 from rest_framework import serializers
 
 from base import resp
-from base.serializers import BaseModelSerializer
+from base.serializers import BaseModelSerializer, PrefetchListSerializer, load_objects_by_ids_strs, split_ids
 from nmis.projects.consts import PRO_DOC_CATE_OTHERS, \
     PRO_DOC_CATE_SUPPLIER_SELECTION_PLAN, PRO_STATUS_DONE
 from nmis.projects.models import ProjectPlan, ProjectFlow, Milestone, \
@@ -70,25 +70,34 @@ class SupplierSelectionPlanSerializer(BaseModelSerializer):
             'supplier_id', 'supplier_name', 'total_amount', 'plan_files', 'other_files',
             'remark', 'selected',
         )
+        list_serializer_class = PrefetchListSerializer
 
     def _get_supplier_name(self, obj):
         return obj.supplier.name if obj.supplier else ''
 
-    def _get_plan_files(self, obj):
+    def prefetch(self, objs):
+        """
+        批量加载当前列表中所有方案的文档
+        """
+        self._docs_map = load_objects_by_ids_strs(ProjectDocument, [obj.doc_list for obj in objs])
+
+    def _get_docs(self, obj, category):
         if not obj.doc_list:
             return []
-        doc_ids_str = obj.doc_list.split(',')
-        doc_ids = [int(id_str) for id_str in doc_ids_str]
-        plan_docs = ProjectDocument.objects.filter(id__in=doc_ids, category=PRO_DOC_CATE_SUPPLIER_SELECTION_PLAN)
-        return resp.serialize_data(plan_docs) if plan_docs else []
+        docs_map = getattr(self, '_docs_map', None)
+        if docs_map is None:    # 序列化单个对象
+            docs_map = load_objects_by_ids_strs(ProjectDocument, [obj.doc_list])
+        docs = [
+            docs_map[doc_id] for doc_id in split_ids(obj.doc_list)
+            if doc_id in docs_map and docs_map[doc_id].category == category
+        ]
+        return resp.serialize_data(docs) if docs else []
+
+    def _get_plan_files(self, obj):
+        return self._get_docs(obj, PRO_DOC_CATE_SUPPLIER_SELECTION_PLAN)
 
     def _get_other_files(self, obj):
-        if not obj.doc_list:
-            return []
-        doc_ids_str = obj.doc_list.split(',')
-        doc_ids = [int(id_str) for id_str in doc_ids_str]
-        other_docs = ProjectDocument.objects.filter(id__in=doc_ids, category=PRO_DOC_CATE_OTHERS)
-        return resp.serialize_data(other_docs) if other_docs else []
+        return self._get_docs(obj, PRO_DOC_CATE_OTHERS)
 
 
 class ProjectMilestoneStateSerializer(BaseModelSerializer):
@@ -1056,7 +1056,6 @@ class ProjectMilestoneStateResearchInfoCreateView(BaseAPIView):
             if req.data.get('summary') is not None:
                 milestone_state.summary = req.data.get('summary').strip()
                 milestone_state.save()
-                milestone_state.cache()
         if req.data.get('cate_documents'):
             form = ProjectDocumentBulkCreateOrUpdateForm(req.data.get('cate_documents'))
             if not form.is_valid():
@@ -1073,7 +1072,6 @@ class ProjectMilestoneStateResearchInfoCreateView(BaseAPIView):
                     return resp.failed('保存失败')
         milestone_state.modified_time = times.now()
         milestone_state.save()
-        milestone_state.cache()
         return resp.serialize_response(
             milestone_state, results_name='project_milestone_state',
             srl_cls_name='ChunkProjectMilestoneStateSerializer'
@@ -1120,7 +1118,6 @@ class ProjectMilestoneStatePlanGatheredCreateView(BaseAPIView):
             if req.data.get('summary') is not None:
                 milestone_state.summary = req.data.get('summary').strip()
                 milestone_state.save()
-                milestone_state.cache()
         form = SupplierSelectionPlanBatchSaveForm(milestone_state, req.data)
         if not form.is_valid():
             return resp.form_err(form.errors)
@@ -1129,7 +1126,6 @@ class ProjectMilestoneStatePlanGatheredCreateView(BaseAPIView):
             return resp.failed("操作失败")
         milestone_state.modified_time = times.now()
         milestone_state.save()
-        milestone_state.cache()
         return resp.serialize_response(
             milestone_state, results_name='project_milestone_state',
             srl_cls_name='ProjectMilestoneStateWithSupplierSelectionPlanSerializer'
@@ -1188,7 +1184,6 @@ class ProjectMilestoneStatePlanGatheredFileView(BaseAPIView):
                     doc_ids_str.remove(str(doc_id))
                     plan.doc_list = ",".join(doc_ids_str)
                     plan.save()
-                    plan.cache()
                     doc.clear_cache()
                     doc.delete()
                 if doc_path:
@@ -1276,7 +1271,6 @@ class ProjectMilestoneStatePlanArgumentCreateView(BaseAPIView):
         selected_plan = self.get_object_or_404(req.data.get('selected_plan_id'), SupplierSelectionPlan)
         selected_plan.selected = True
         selected_plan.save()
-        selected_plan.cache()
         others_plans = SupplierSelectionPlan.objects.filter(
             project_milestone_state=selected_plan.project_milestone_state
         ).exclude(id=selected_plan.id).all()
@@ -1288,7 +1282,6 @@ class ProjectMilestoneStatePlanArgumentCreateView(BaseAPIView):
             if req.data.get('summary') is not None:
                 milestone_state.summary = req.data.get('summary').strip()
                 milestone_state.save()
-                milestone_state.cache()
         if req.data.get("cate_documents"):
             form = ProjectDocumentBulkCreateOrUpdateForm(req.data.get('cate_documents'))
             if not form.is_valid():
@@ -1302,7 +1295,6 @@ class ProjectMilestoneStatePlanArgumentCreateView(BaseAPIView):
                     return resp.failed('操作异常，请重新保存')
         milestone_state.modified_time = times.now()
         milestone_state.save()
-        milestone_state.cache()
         plans = SupplierSelectionPlan.objects.filter(project_milestone_state=selected_plan.project_milestone_state)
         milestone_state.supplier_selection_plans = plans
         return resp.serialize_response(
@@ -1378,7 +1370,6 @@ class MilestoneRecordPurchaseCreateView(BaseAPIView):
         if not req.data.get('summary') and not new_doc_list:
             pro_milestone_state.modified_time = times.now()
             pro_milestone_state.save()
-            pro_milestone_state.cache()
             return resp.serialize_response(
                 pro_milestone_state, srl_cls_name='ChunkProjectMilestoneStateSerializer',
                 results_name='project_milestone_state'
@@ -1445,7 +1436,6 @@ class MilestoneStartUpPurchaseCreateView(BaseAPIView):
         if not req.data.get('summary') and not doc_list:
             pro_milestone_state.modified_time = times.now()
             pro_milestone_state.save()
-            pro_milestone_state.cache()
             return resp.serialize_response(
                 pro_milestone_state, srl_cls_name='ChunkProjectMilestoneStateSerializer',
                 results_name='project_milestone_state'
@@ -1528,7 +1518,6 @@ class MilestonePurchaseContractCreateView(BaseAPIView):
         if not req.data.get('summary') and not doc_list:
             pro_milestone_state.modified_time = times.now()
             pro_milestone_state.save()
-            pro_milestone_state.cache()
             return resp.serialize_response(
                 pro_milestone_state, srl_cls_name='ProjectMilestoneStateAndPurchaseContractSerializer',
                 results_name='project_milestone_state'
@@ -1632,7 +1621,6 @@ class MilestoneTakeDeliveryCreateOrUpdateView(BaseAPIView):
         if not req.data.get('summary') and not doc_list:
             project_milestone_state.modified_time = times.now()
             project_milestone_state.save()
-            project_milestone_state.cache()
             return resp.serialize_response(
                 project_milestone_state, srl_cls_name='ChunkProjectMilestoneStateSerializer',
                 results_name='project_milestone_state'
@@ -1948,7 +1936,6 @@ class PrefabMilestoneStateDataHandler(object):
             return resp.failed("操作失败")
         milestone_state.modified_time = times.now()
         milestone_state.save()
-        milestone_state.cache()
         return resp.serialize_response(
             milestone_state, results_name='project_milestone_state',
             srl_cls_name='ProjectMilestoneStateWithSupplierSelectionPlanSerializer'
@@ -1975,7 +1962,6 @@ class PrefabMilestoneStateDataHandler(object):
                                                SupplierSelectionPlan)
         selected_plan.selected = True
         selected_plan.save()
-        selected_plan.cache()
         others_plans = SupplierSelectionPlan.objects.filter(
             project_milestone_state=selected_plan.project_milestone_state
         ).exclude(id=selected_plan.id).all()
@@ -4,15 +4,5 @@
 #
 
 """
-系统缓存管理
+系统缓存管理. 对象缓存按模型版本号命名空间隔离, 通过 FlushDataView 递增版本号刷新缓存
 """
-
-import logging
-from django_redis import get_redis_connection
-
-
-logger = logging.getLogger(__name__)
-
-cache_conn = get_redis_connection('default')
-if cache_conn:
-    cache_conn.flushall()
@@ -13,9 +13,10 @@ logger = logging.getLogger(__name__)
 
 from django.urls import path
 
+from nmis.systems import views
 
 urlpatterns = [
-    # 刷新渠道职位类别缓存
-    # path('flush_data',  views.FlushDataView.as_view(), ),
+    # 刷新对象缓存
+    path('flush_data',  views.FlushDataView.as_view(), ),
 
 ]
\ No newline at end of file
@@ -9,10 +9,13 @@
 
 import logging
 
-from base import resp
+from django.apps import apps
 
+from base import resp
+from base.models import BaseModel, bump_all_cache_versions, bump_cache_version
 from base.views import BaseAPIView
 from users.permissions import IsSuperAdmin
+from users.perms import bump_role_version
 
 logger = logging.getLogger(__name__)
 
@@ -21,4 +24,25 @@ class FlushDataView(BaseAPIView):
     permission_classes = [IsSuperAdmin, ]
 
     def post(self, req):
-        return resp.ok('缓存刷新成功')
+        """
+        刷新对象缓存: 递增模型缓存版本号, 使旧缓存整体失效.
+        可传入models参数(如 "devices.AssertDevice,hospitals.Staff")仅刷新指定模型, 否则刷新全部
+        """
+        labels = [label.strip() for label in req.data.get('models', '').split(',') if label.strip()]
+        if not labels:
+            flushed = bump_all_cache_versions()
+            bump_role_version()
+            return resp.ok('缓存刷新成功', {'models': [model._meta.label for model in flushed]})
+
+        cached_models = []
+        for label in labels:
+            try:
+                model = apps.get_model(label)
+            except (LookupError, ValueError):
+                return resp.failed('模型不存在: %s' % label)
+            if not issubclass(model, BaseModel):
+                return resp.failed('模型不支持缓存: %s' % label)
+            cached_models.append(model)
+        for model in cached_models:
+            bump_cache_version(model)
+        return resp.ok('缓存刷新成功', {'models': [model._meta.label for model in cached_models]})
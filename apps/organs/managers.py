@@ -6,7 +6,6 @@
 
 import logging
 
-from django.core.cache import cache
 from base.models import BaseManager
 
 logger = logging.getLogger(__name__)
@@ -68,20 +67,11 @@ class StaffManager(BaseManager):
 
     def get_cached_many(self, obj_id_list):
         """
-        返回缓存中的多个对象列表, 通过id列表
+        返回缓存中的多个对象列表, 通过id列表(过滤掉非正常状态的员工)
         :param obj_id_list:
         :return:
         """
-        if not obj_id_list:
-            return None
-
-        objs = cache.get_many(obj_id_list)
-        if not objs or len(objs) < len(obj_id_list):
-            objs = self.custom_filter(id__in=obj_id_list)
-            if not objs:
-                return None
-            for obj in objs:
-                obj.cache()
-        return objs
+        objs = super(StaffManager, self).get_cached_many(obj_id_list)
+        return [obj for obj in objs if self.filter_obj(obj)]
 
 
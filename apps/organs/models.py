@@ -13,6 +13,7 @@ from django.db import models, transaction
 
 import settings
 from utils import times
+from base.authtoken import CustomToken
 from base.models import BaseModel
 from users.models import UserSecureRecord
 
@@ -94,7 +95,6 @@ class BaseOrgan(BaseModel):
         """通过审核"""
         self.auth_status = self.AUTH_APPROVED
         self.save()
-        self.cache()
 
     def show_auth_status(self):
         """ 显示审核状态 """
@@ -299,6 +299,7 @@ class BaseStaff(BaseModel):
         self.save()
         self.user.clear_cache()
         self.clear_cache()
+        CustomToken.clear_users_resolved_cache(self.user)
 
     def add_to_organ(self, name, contact, organ, group):
         """用于恢复删除用户操作"""
@@ -159,6 +159,15 @@ class BaseTestCase(TestCase, TestCaseDataUtils):
         from django_redis import get_redis_connection
         get_redis_connection("default").flushall()
 
+    def run_commit_hooks(self):
+        """
+        执行已注册的transaction.on_commit回调. TestCase中测试事务不会提交, 回调不会自动执行
+        """
+        from django.db import connection
+        callbacks, connection.run_on_commit = connection.run_on_commit, []
+        for _, callback in callbacks:
+            callback()
+
     def login(self, user):
         return self.request_login('email', user.email, user.raw_password)
 
@@ -0,0 +1,70 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/10
+#
+
+"""
+性能基准测试. 基准测试模块以bench_开头命名, 不会被pytest默认收集, 需显式指定模块运行:
+
+    cd apps/runtests && pytest -s benchmarks/bench_authtoken.py
+"""
+
+import logging
+import time
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+logger = logging.getLogger(__name__)
+
+
+class BenchmarkMixin(object):
+    """
+    基准测试工具方法
+    """
+
+    def bench(self, func, rounds=1000, *args, **kwargs):
+        """
+        执行func共rounds次, 返回(平均耗时毫秒数, 平均SQL查询次数)
+        """
+        with CaptureQueriesContext(connection) as ctx:
+            begin_time = time.perf_counter()
+            for _ in range(rounds):
+                func(*args, **kwargs)
+            cost = time.perf_counter() - begin_time
+        return cost * 1000 / rounds, len(ctx.captured_queries) / rounds
+
+    def report(self, title, results):
+        """
+        打印基准测试结果
+        :param title: 测试名称
+        :param results: 列表, 每个元素为(场景名称, 平均耗时毫秒数, 平均SQL查询次数)元组
+        """
+        print('')
+        print('========== %s ==========' % title)
+        for name, ms, queries in results:
+            print('%-40s %10.4f ms/op %8.2f queries/op' % (name, ms, queries))
+
+    def report_sizes(self, title, results):
+        """
+        打印数据大小对比结果
+        :param title: 测试名称
+        :param results: 列表, 每个元素为(场景名称, 总字节数, 对象个数)元组
+        """
+        print('')
+        print('========== %s ==========' % title)
+        for name, total_bytes, count in results:
+            print('%-40s %10d bytes %10.1f bytes/obj' % (name, total_bytes, float(total_bytes) / (count or 1)))
+
+    def report_throughput(self, title, results):
+        """
+        打印并发吞吐量测试结果
+        :param title: 测试名称
+        :param results: 列表, 每个元素为(场景名称, 完成操作数, 总耗时秒数, 各操作等待耗时秒数列表)元组
+        """
+        print('')
+        print('========== %s ==========' % title)
+        for name, ops, seconds, waits in results:
+            print('%-40s %10.1f ops/s %10.4f ms avg wait %10.4f ms max wait' % (
+                name, ops / seconds, sum(waits) * 1000 / (len(waits) or 1), max(waits or [0]) * 1000
+            ))
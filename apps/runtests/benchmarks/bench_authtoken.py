@@ -0,0 +1,55 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/10
+#
+
+"""
+Token认证开销基准测试: 对比每次请求直接查询数据库与使用Token解析缓存(进程内LRU + Redis)的耗时
+"""
+
+import logging
+
+from base.authtoken import CustomToken, CustomTokenAuthentication, token_lru
+from runtests import BaseTestCase
+from runtests.benchmarks import BenchmarkMixin
+
+logger = logging.getLogger(__name__)
+
+
+class AuthTokenBenchmark(BaseTestCase, BenchmarkMixin):
+
+    ROUNDS = 2000
+
+    def test_authenticate_credentials(self):
+        token, _ = CustomToken.objects.get_or_create(user=self.user)
+        self.user.cache()
+        auth = CustomTokenAuthentication()
+
+        def authenticate_from_db():
+            # 模拟优化前的认证逻辑: 每次请求查询Token及User
+            db_token = CustomToken.objects.select_related('user').get(key=token.key)
+            db_token.is_expired()
+
+        def authenticate_cold():
+            CustomToken.clear_resolved_cache(token.key)
+            auth.authenticate_credentials(token.key)
+
+        def authenticate_redis_only():
+            token_lru.clear()
+            auth.authenticate_credentials(token.key)
+
+        def authenticate_warm():
+            auth.authenticate_credentials(token.key)
+
+        auth.authenticate_credentials(token.key)
+        results = []
+        for name, func in (
+                ('db lookup (before)', authenticate_from_db),
+                ('cache miss, fill LRU/redis', authenticate_cold),
+                ('redis hit, LRU miss', authenticate_redis_only),
+                ('LRU hit (after)', authenticate_warm),):
+            ms, queries = self.bench(func, self.ROUNDS)
+            results.append((name, ms, queries))
+        self.report('CustomTokenAuthentication.authenticate_credentials', results)
+
+        self.assertEqual(results[-1][2], 0)
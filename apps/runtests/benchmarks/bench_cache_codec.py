@@ -0,0 +1,92 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/14
+#
+
+"""
+对象缓存编解码基准测试: 基于resources/fixtures中的数据, 对比pickle整个模型实例与仅缓存字段值(fields)
+两种方式的缓存大小及读写耗时, 并以按主键查询数据库作为参照
+"""
+
+import logging
+import pickle
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from base.codecs import CODECS
+from nmis.devices.models import FaultType
+from nmis.hospitals.models import Hospital, Department, Staff, HospitalAddress, Role, Sequence
+from nmis.projects.models import Milestone, ProjectFlow
+from runtests.benchmarks import BenchmarkMixin
+from users.models import User
+
+logger = logging.getLogger(__name__)
+
+
+class CacheCodecBenchmark(TestCase, BenchmarkMixin):
+
+    fixtures = ['users.json', 'roles.json', 'hospitals.json', 'devices.json', 'project_flow.json']
+
+    ROUNDS = 200
+
+    def setUp(self):
+        self.objs = []
+        for model in (Hospital, Department, HospitalAddress, Role, Sequence, FaultType, Milestone, ProjectFlow):
+            self.objs.extend(model.objects.all())
+        # 员工及用户对象带上已加载的关联对象, 与实际缓存时的对象状态一致
+        for staff in Staff.objects.select_related('organ', 'dept', 'user'):
+            self.objs.append(staff)
+        for user in User.objects.select_related('staff'):
+            self.objs.append(user)
+
+    def tearDown(self):
+        from django_redis import get_redis_connection
+        get_redis_connection("default").flushall()
+
+    def test_codec_size_and_latency(self):
+        self.assertTrue(self.objs)
+
+        sizes = []
+        for name in ('pickle', 'fields'):
+            codec = CODECS[name]
+            total = sum(len(pickle.dumps(codec.encode(obj), pickle.HIGHEST_PROTOCOL)) for obj in self.objs)
+            sizes.append((name, total, len(self.objs)))
+        self.report_sizes('object cache size (%s objects)' % len(self.objs), sizes)
+
+        def db_lookup():
+            for obj in self.objs:
+                type(obj).objects.get(pk=obj.pk)
+
+        def make_redis_roundtrip(codec):
+            def redis_roundtrip():
+                for obj in self.objs:
+                    key = 'bench_cache_codec.%s.%s' % (obj._meta.label, obj.pk)
+                    cache.set(key, codec.encode(obj))
+                    codec.decode(type(obj), cache.get(key))
+            return redis_roundtrip
+
+        def make_redis_get(codec):
+            keys = []
+            for obj in self.objs:
+                key = 'bench_cache_codec.get.%s.%s.%s' % (id(codec), obj._meta.label, obj.pk)
+                cache.set(key, codec.encode(obj))
+                keys.append((type(obj), key))
+
+            def redis_get():
+                for model, key in keys:
+                    codec.decode(model, cache.get(key))
+            return redis_get
+
+        results = []
+        for name, func in (
+                ('db pk lookup', db_lookup),
+                ('pickle set+get', make_redis_roundtrip(CODECS['pickle'])),
+                ('fields set+get', make_redis_roundtrip(CODECS['fields'])),
+                ('pickle get', make_redis_get(CODECS['pickle'])),
+                ('fields get', make_redis_get(CODECS['fields'])),):
+            ms, queries = self.bench(func, self.ROUNDS)
+            results.append((name, ms / len(self.objs), queries / len(self.objs)))
+        self.report('object cache codec (per object)', results)
+
+        self.assertLess(sizes[1][1], sizes[0][1])
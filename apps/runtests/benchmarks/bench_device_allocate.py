@@ -0,0 +1,70 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/24
+#
+
+"""
+资产设备批量调配基准测试: 对比原实现(QuerySet.update后逐个设备回写缓存, 无调配记录)与批量调配
+(单条UPDATE, bulk_create调配记录, 一次delete_many清除缓存, 一条合并消息)在不同设备数下的耗时及SQL查询次数:
+
+    cd apps/runtests && pytest -s benchmarks/bench_device_allocate.py
+"""
+
+import logging
+
+from nmis.devices.consts import ASSERT_DEVICE_STATUS_USING
+from nmis.devices.models import AssertDevice
+from runtests import BaseTestCase
+from runtests.benchmarks import BenchmarkMixin
+
+logger = logging.getLogger(__name__)
+
+
+class AssertDeviceAllocateBenchmark(BaseTestCase, BenchmarkMixin):
+
+    DEVICE_COUNTS = (100, 1000, 5000)
+    ROUNDS = 3
+
+    def setUp(self):
+        super(AssertDeviceAllocateBenchmark, self).setUp()
+        self.depts = [self.create_department(self.organ, dept_name='调配科室%s' % i) for i in range(2)]
+        performers = [self.create_completed_staff(self.organ, self.dept, name='负责人%s' % i) for i in range(10)]
+        AssertDevice.objects.bulk_create([
+            AssertDevice(
+                title='多参数监护仪%s' % i, assert_no='ZC%08d' % i, serial_no='SN%08d' % i,
+                type_spec='BN3004', production_date='2018-09-12', purchase_date='2018-10-09',
+                creator=self.admin_staff, performer=performers[i % len(performers)],
+            ) for i in range(max(self.DEVICE_COUNTS))
+        ], batch_size=1000)
+        self.device_ids = list(AssertDevice.objects.order_by('id').values_list('id', flat=True))
+
+    def legacy_allocate(self, assert_devices, use_dept):
+        AssertDevice.objects.filter(id__in=[device.id for device in assert_devices]).update(
+            use_dept=use_dept, status=ASSERT_DEVICE_STATUS_USING
+        )
+        for assert_device in assert_devices:
+            assert_device.use_dept = use_dept
+            assert_device.status = ASSERT_DEVICE_STATUS_USING
+            assert_device.cache()
+
+    def test_allocate(self):
+        results = []
+        for count in self.DEVICE_COUNTS:
+            assert_devices = AssertDevice.objects.get_assert_device_by_ids(self.device_ids[:count])
+            rounds = iter(range(self.ROUNDS * 2))
+
+            def legacy():
+                self.legacy_allocate(assert_devices, self.depts[next(rounds) % 2])
+
+            def batched():
+                assert AssertDevice.objects.update_assert_devices_use_dept(
+                    assert_devices, self.depts[next(rounds) % 2], self.admin_staff
+                )
+
+            for name, func in (('legacy', legacy), ('batched', batched)):
+                ms, queries = self.bench(func, self.ROUNDS)
+                results.append(('%s %s devices' % (name, count), ms, queries))
+        self.report('assert device allocate', results)
+
+        # 批量调配的查询次数与设备数无关(调配记录每1000条一次INSERT)
+        self.assertEqual(results[1][2], results[3][2])
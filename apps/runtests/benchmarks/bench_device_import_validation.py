@@ -0,0 +1,69 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/21
+#
+
+"""
+资产设备批量导入校验基准测试: 基于合成的2千/2万行上传数据, 测试AssertDeviceBatchUploadForm单次遍历校验的耗时
+及SQL查询次数(应与行数无关), 并对比在每行均有错误时收集全部行错误的耗时
+"""
+
+import logging
+
+from nmis.devices.consts import ASSERT_DEVICE_CATE_INFORMATION
+from nmis.devices.forms import AssertDeviceBatchUploadForm
+from runtests import BaseTestCase
+from runtests.benchmarks import BenchmarkMixin
+from runtests.common.mixins import HospitalMixin
+
+logger = logging.getLogger(__name__)
+
+
+class AssertDeviceImportValidationBenchmark(BaseTestCase, BenchmarkMixin, HospitalMixin):
+
+    ROWS = (2000, 20000)
+    ROUNDS = 3
+
+    def setUp(self):
+        super(AssertDeviceImportValidationBenchmark, self).setUp()
+        self.performers = [
+            self.create_completed_staff(self.organ, self.dept, name='负责人%s' % i) for i in range(10)
+        ]
+        self.depts = [self.create_department(self.organ, dept_name='导入科室%s' % i) for i in range(20)]
+        hospital_address = self.create_hospital_address(title='信息综合大楼')
+        self.storage_places = [
+            self.create_storage_place(dept=self.dept, parent=hospital_address, title='存储室%s' % i)
+            for i in range(20)
+        ]
+
+    def make_rows(self, count, valid=True):
+        rows = []
+        for i in range(count):
+            rows.append({
+                'assert_no': 'BENCH%06d' % i, 'title': '电脑%s' % i, 'serial_no': 'BENCHSN%06d' % i,
+                'type_spec': 'BN3004', 'service_life': 3,
+                'performer': self.performers[i % len(self.performers)].name,
+                'responsible_dept': self.depts[i % len(self.depts)].name,
+                'use_dept': self.depts[(i + 1) % len(self.depts)].name,
+                'production_date': '2018-09-12' if valid else '2018/09/12', 'bar_code': 'BENCHBC%06d' % i,
+                'status': '使用中', 'storage_place': self.storage_places[i % len(self.storage_places)].title,
+                'producer': '联想', 'purchase_date': '2018-10-09',
+            })
+        return rows
+
+    def test_validate(self):
+        results = []
+        for count in self.ROWS:
+            for name, valid in (('valid rows', True), ('invalid rows', False)):
+                rows = self.make_rows(count, valid=valid)
+
+                def validate():
+                    form = AssertDeviceBatchUploadForm(rows, creator=self.admin_staff, cate=ASSERT_DEVICE_CATE_INFORMATION)
+                    assert form.is_valid() == valid
+
+                ms, queries = self.bench(validate, self.ROUNDS)
+                results.append(('%s rows, %s' % (count, name), ms, queries))
+        self.report('AssertDeviceBatchUploadForm.is_valid', results)
+
+        # 查询次数与行数无关
+        self.assertEqual(results[0][2], results[2][2])
@@ -0,0 +1,75 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/24
+#
+
+"""
+资产设备扫码查询基准测试: 一车200个扫描编码(条形码/资产编号/序列号混合), 对比逐个编码查询数据库与
+lookup_by_codes批量查询(编码索引及对象缓存命中/编码索引未命中回退到数据库)的耗时及SQL查询次数.
+设备数量通过环境变量BENCH_DEVICE_COUNT指定(默认2万):
+
+    cd apps/runtests && BENCH_DEVICE_COUNT=100000 pytest -s benchmarks/bench_device_scan.py
+"""
+
+import logging
+import os
+import random
+
+from django.db.models import Q
+
+from nmis.devices import codes as code_index
+from nmis.devices.models import AssertDevice
+from runtests import BaseTestCase
+from runtests.benchmarks import BenchmarkMixin
+
+logger = logging.getLogger(__name__)
+
+
+class AssertDeviceScanBenchmark(BaseTestCase, BenchmarkMixin):
+
+    DEVICE_COUNT = int(os.environ.get('BENCH_DEVICE_COUNT', 20000))
+    BATCH_SIZE = 5000
+    CART_SIZE = 200
+    ROUNDS = 20
+
+    def setUp(self):
+        super(AssertDeviceScanBenchmark, self).setUp()
+        for begin in range(0, self.DEVICE_COUNT, self.BATCH_SIZE):
+            AssertDevice.objects.bulk_create([
+                AssertDevice(
+                    title='监护仪%s' % i, assert_no='SC%08d' % i, serial_no='SCSN%08d' % i, bar_code='6901%08d' % i,
+                    type_spec='BN3004', production_date='2018-09-12', purchase_date='2018-10-09',
+                    creator=self.admin_staff,
+                ) for i in range(begin, min(begin + self.BATCH_SIZE, self.DEVICE_COUNT))
+            ])
+        code_index.index_devices(AssertDevice.objects.filter(assert_no__startswith='SC').only(
+            'id', 'assert_no', 'serial_no', 'bar_code'
+        ))
+
+        rand = random.Random(2018)
+        self.codes = []
+        for i in rand.sample(range(self.DEVICE_COUNT), self.CART_SIZE):
+            self.codes.append(rand.choice(('6901%08d', 'SC%08d', 'SCSN%08d')) % i)
+
+    def test_scan(self):
+        def query_each():
+            for code in self.codes:
+                AssertDevice.objects.filter(Q(bar_code=code) | Q(assert_no=code) | Q(serial_no=code)).first()
+
+        def lookup():
+            assert len(AssertDevice.objects.lookup_by_codes(self.codes)) == self.CART_SIZE
+
+        def lookup_index_missed():
+            code_index.remove_codes([(code_field, code) for code in self.codes
+                                     for code_field in ('bar_code', 'assert_no', 'serial_no')])
+            lookup()
+
+        lookup()    # 预热对象缓存
+        results = []
+        for name, func in (('query each code', query_each), ('lookup_by_codes', lookup),
+                           ('lookup_by_codes, index missed', lookup_index_missed)):
+            ms, queries = self.bench(func, self.ROUNDS)
+            results.append((name, ms, queries))
+        self.report('scan %s codes (%s devices)' % (self.CART_SIZE, self.DEVICE_COUNT), results)
+
+        self.assertEqual(results[1][2], 0)
@@ -0,0 +1,82 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/19
+#
+
+"""
+资产设备搜索基准测试: 对比 title LIKE '%..%' 全表扫描与n-gram索引搜索的耗时.
+设备数量通过环境变量BENCH_DEVICE_COUNT指定(默认10万), 100万设备:
+
+    cd apps/runtests && BENCH_DEVICE_COUNT=1000000 pytest -s benchmarks/bench_device_search.py
+"""
+
+import logging
+import os
+import random
+
+from django.db.models import Q
+
+from nmis.devices.models import AssertDevice, AssertDeviceSearchToken
+from runtests import BaseTestCase
+from runtests.benchmarks import BenchmarkMixin
+
+logger = logging.getLogger(__name__)
+
+TITLES = (
+    '多参数监护仪', '彩色超声诊断仪', '呼吸机', '输液泵', '注射泵', '心电图机', '除颤仪', '麻醉机',
+    '电子胃镜', '全自动生化分析仪', '血液透析机', '数字化X射线摄影系统', '台式电脑', '激光打印机',
+)
+PRODUCERS = ('迈瑞', '飞利浦', 'GE医疗', '西门子', '联想', '惠普', '理邦', '鱼跃')
+
+
+class AssertDeviceSearchBenchmark(BaseTestCase, BenchmarkMixin):
+
+    DEVICE_COUNT = int(os.environ.get('BENCH_DEVICE_COUNT', 100000))
+    BATCH_SIZE = 5000
+    ROUNDS = 20
+
+    def setUp(self):
+        super(AssertDeviceSearchBenchmark, self).setUp()
+        rand = random.Random(2018)
+        for begin in range(0, self.DEVICE_COUNT, self.BATCH_SIZE):
+            devices = []
+            for i in range(begin, min(begin + self.BATCH_SIZE, self.DEVICE_COUNT)):
+                devices.append(AssertDevice(
+                    title='%s%s型' % (rand.choice(TITLES), rand.randint(1, 999)),
+                    assert_no='ZC%08d' % i, serial_no='SN%010d' % rand.randint(0, 10 ** 10),
+                    bar_code='69%011d' % i, producer=rand.choice(PRODUCERS), type_spec='BN3004',
+                    production_date='2018-09-12', purchase_date='2018-10-09', creator=self.admin_staff,
+                ))
+            AssertDevice.objects.bulk_create(devices)
+            AssertDeviceSearchToken.objects.index_devices(
+                AssertDevice.objects.filter(assert_no__in=[device.assert_no for device in devices])
+            )
+
+    def test_search(self):
+        keywords = ('监护仪', '超声诊断', '飞利浦', 'ZC0000123', '690000000', '生化分析仪9')
+
+        def like_search(keyword):
+            def search():
+                list(AssertDevice.objects.filter(
+                    Q(title__icontains=keyword) | Q(assert_no__icontains=keyword) |
+                    Q(serial_no__icontains=keyword) | Q(bar_code__icontains=keyword) |
+                    Q(producer__icontains=keyword)
+                ).order_by('-created_time').values_list('id', flat=True)[:1000])
+            return search
+
+        def index_search(keyword):
+            def search():
+                AssertDeviceSearchToken.objects.search_device_ids(keyword)
+            return search
+
+        results = []
+        for keyword in keywords:
+            for name, func in (('LIKE', like_search(keyword)), ('ngram', index_search(keyword))):
+                ms, queries = self.bench(func, self.ROUNDS)
+                results.append(('%s %s' % (name, keyword), ms, queries))
+        self.report('assert device search (%s devices)' % self.DEVICE_COUNT, results)
+
+        self.assertIn(
+            AssertDevice.objects.get(assert_no='ZC00000123').id,
+            AssertDeviceSearchToken.objects.search_device_ids('ZC00000123')
+        )
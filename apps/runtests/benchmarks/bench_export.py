@@ -0,0 +1,118 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/22
+#
+
+"""
+导出基准测试:
+    - 对比原全量内存Workbook导出(逐行访问关联对象)与write_only流式导出的耗时, SQL查询次数及内存峰值
+    - 资产设备按id分批导出CSV时, 内存峰值不随数据量增长
+数据量通过环境变量BENCH_EXPORT_COUNT指定(默认2万):
+
+    cd apps/runtests && BENCH_EXPORT_COUNT=100000 pytest -s benchmarks/bench_export.py
+"""
+
+import io
+import logging
+import os
+import tracemalloc
+
+from nmis.devices.exports import FaultSolutionExporter, AssertDeviceExporter
+from nmis.devices.models import FaultSolution, AssertDevice
+from runtests import BaseTestCase
+from runtests.benchmarks import BenchmarkMixin
+from runtests.common.mixins import AssertDevicesMixin
+from utils import times
+from utils.files import ExcelBasedOXL, remove
+import settings
+
+logger = logging.getLogger(__name__)
+
+EXPORT_COUNT = int(os.environ.get('BENCH_EXPORT_COUNT', 20000))
+
+
+def peak_memory(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+class ExportBenchmark(BaseTestCase, BenchmarkMixin, AssertDevicesMixin):
+
+    EXPORT_COUNT = EXPORT_COUNT
+    BATCH_SIZE = 5000
+    ROUNDS = 3
+
+    def setUp(self):
+        super(ExportBenchmark, self).setUp()
+        fault_types = self.init_fault_types(self.admin_staff)
+        creators = [self.create_completed_staff(self.organ, self.dept, name='贡献人%s' % i) for i in range(10)]
+        for begin in range(0, self.EXPORT_COUNT, self.BATCH_SIZE):
+            FaultSolution.objects.bulk_create([
+                FaultSolution(
+                    title='故障解决方案%s' % i, fault_type=fault_types[i % len(fault_types)], desc='故障描述',
+                    solution='重启设备后检查电源及连接线%s' % i, creator=creators[i % len(creators)],
+                ) for i in range(begin, min(begin + self.BATCH_SIZE, self.EXPORT_COUNT))
+            ])
+
+    def legacy_export(self):
+        records = []
+        for item in FaultSolution.objects.all():
+            records.append([
+                item.title, item.solution, item.fault_type.title, item.creator.name,
+                times.datetime_to_str(item.created_time)
+            ])
+        _, file_path = ExcelBasedOXL.export_excel(
+            'bench/', 'bench-export', [records], ['故障问题解决方案'], [['标题', '解决方案', '故障类型', '贡献人', '创建时间']]
+        )
+        remove(os.path.join(settings.MEDIA_ROOT, file_path))
+
+    def stream_export(self):
+        FaultSolutionExporter(FaultSolution.objects.all()).write_xlsx(io.BytesIO())
+
+
+    def test_export(self):
+        results, sizes = [], []
+        for name, func in (('in-memory workbook', self.legacy_export), ('write_only stream', self.stream_export)):
+            ms, queries = self.bench(func, self.ROUNDS)
+            results.append((name, ms, queries))
+            sizes.append((name, peak_memory(func), self.EXPORT_COUNT))
+        self.report('fault solution export (%s rows)' % self.EXPORT_COUNT, results)
+        self.report_sizes('fault solution export peak memory', sizes)
+
+        self.assertEqual(results[1][2], 1)
+
+
+class AssertDeviceExportBenchmark(BaseTestCase, BenchmarkMixin):
+
+    EXPORT_COUNT = EXPORT_COUNT
+    BATCH_SIZE = 5000
+
+    def create_devices(self, begin, end):
+        for batch_begin in range(begin, end, self.BATCH_SIZE):
+            AssertDevice.objects.bulk_create([
+                AssertDevice(
+                    title='多参数监护仪%s' % i, assert_no='ZC%08d' % i, serial_no='SN%08d' % i,
+                    bar_code='69%011d' % i, producer='迈瑞', type_spec='BN3004',
+                    production_date='2018-09-12', purchase_date='2018-10-09', creator=self.admin_staff,
+                ) for i in range(batch_begin, min(batch_begin + self.BATCH_SIZE, end))
+            ])
+
+    def test_export(self):
+        def export_csv():
+            for _ in AssertDeviceExporter(AssertDevice.objects.all()).iter_csv():
+                pass
+
+        results, sizes = [], []
+        created = 0
+        for count in (self.EXPORT_COUNT // 4, self.EXPORT_COUNT):
+            self.create_devices(created, count)
+            created = count
+            ms, queries = self.bench(export_csv, 1)
+            results.append(('csv %s rows' % count, ms, queries))
+            sizes.append(('csv %s rows' % count, peak_memory(export_csv), count))
+        self.report('assert device export', results)
+        self.report_sizes('assert device export peak memory', sizes)
@@ -0,0 +1,127 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/24
+#
+
+"""
+报修单号分配并发基准测试: N个线程(各自独立的数据库连接)并发创建报修单, 对比原实现(在业务事务中以
+select_for_update锁定序列行)与基于Redis INCR的每日序列的吞吐量, 以及分配单号时的等待耗时(原实现为行锁等待).
+线程数通过环境变量BENCH_THREADS指定(默认8):
+
+    cd apps/runtests && BENCH_THREADS=16 pytest -s benchmarks/bench_order_no.py
+"""
+
+import logging
+import os
+import threading
+import time
+
+from django.db import connection, transaction
+from django.test import TransactionTestCase
+from django_redis import get_redis_connection
+
+from nmis.devices.consts import REPAIR_ORDER_NO_SEQ_CODE, REPAIR_ORDER_NO_SEQ_DIGITS
+from nmis.devices.managers import RepairOrderManager
+from nmis.devices.models import RepairOrder
+from nmis.hospitals.models import Sequence
+from runtests import TestCaseDataUtils
+from runtests.benchmarks import BenchmarkMixin
+from runtests.common.mixins import AssertDevicesMixin
+from utils import times
+
+logger = logging.getLogger(__name__)
+
+LEGACY_ORDER_NO_PREFIX = 'LG'
+
+
+def legacy_create_order(applicant, fault_type, creator, lock_waits, **kwargs):
+    """
+    原实现: 在创建报修单的事务中锁定序列行, 事务提交前其他请求均在行锁上等待
+    """
+    with transaction.atomic():
+        begin_time = time.perf_counter()
+        seq = Sequence.objects.select_for_update().get(seq_code=REPAIR_ORDER_NO_SEQ_CODE)
+        lock_waits.append(time.perf_counter() - begin_time)
+        next_value = seq.next_value()
+        timestamp = times.datetime_to_str(times.now(), format='%Y%m%d')
+        order_no = RepairOrderManager.gen_repair_order_no(
+            LEGACY_ORDER_NO_PREFIX, timestamp, next_value, seq_max_digits=REPAIR_ORDER_NO_SEQ_DIGITS
+        )
+        RepairOrder.objects.create(
+            order_no=order_no, applicant=applicant, fault_type=fault_type, creator=creator, **kwargs
+        )
+        seq.seq_value = next_value
+        seq.save()
+
+
+class OrderNoConcurrencyBenchmark(TransactionTestCase, TestCaseDataUtils, BenchmarkMixin, AssertDevicesMixin):
+
+    THREADS = int(os.environ.get('BENCH_THREADS', 8))
+    ORDERS_PER_THREAD = 50      # 单号每日序号最多3位, 两种实现各创建 THREADS * ORDERS_PER_THREAD 个报修单
+
+    def setUp(self):
+        self.organ = self.create_completed_organ()
+        self.admin_staff = self.organ.creator.get_profile()
+        self.fault_type = self.init_fault_types(self.admin_staff)[0]
+
+    def tearDown(self):
+        get_redis_connection('default').flushall()
+
+    def run_threads(self, create_order):
+        """
+        :return: (创建的报修单数, 总耗时秒数)
+        """
+        errors = []
+
+        def worker():
+            try:
+                for _ in range(self.ORDERS_PER_THREAD):
+                    create_order()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        begin_time = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        cost = time.perf_counter() - begin_time
+        self.assertEqual(errors, [])
+        return self.THREADS * self.ORDERS_PER_THREAD, cost
+
+    def test_concurrent_create_orders(self):
+        staff = self.admin_staff
+        lock_waits, alloc_waits = [], []
+
+        def legacy():
+            legacy_create_order(staff, self.fault_type, staff, lock_waits, desc='office无法使用')
+
+        next_daily_value = Sequence.objects.next_daily_value
+
+        def timed_next_daily_value(*args, **kwargs):
+            begin_time = time.perf_counter()
+            try:
+                return next_daily_value(*args, **kwargs)
+            finally:
+                alloc_waits.append(time.perf_counter() - begin_time)
+
+        def daily_sequence():
+            success, _ = RepairOrder.objects.create_order(staff, self.fault_type, staff, desc='office无法使用')
+            assert success
+
+        results = [('select_for_update',) + self.run_threads(legacy) + (lock_waits, )]
+        Sequence.objects.next_daily_value = timed_next_daily_value
+        try:
+            results.append(('redis daily sequence',) + self.run_threads(daily_sequence) + (alloc_waits, ))
+        finally:
+            del Sequence.objects.next_daily_value
+        self.report_throughput('%s threads create repair orders' % self.THREADS, results)
+
+        total = self.THREADS * self.ORDERS_PER_THREAD
+        self.assertEqual(RepairOrder.objects.exclude(order_no__startswith=LEGACY_ORDER_NO_PREFIX).count(), total)
+        self.assertEqual(
+            RepairOrder.objects.values('order_no').distinct().count(), RepairOrder.objects.count()
+        )
@@ -0,0 +1,170 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/25
+#
+
+"""
+报修单自动分派模拟基准测试: 基于合成的报修单流(按优先级分布随机到达), 每个模拟周期将到达的报修单入队,
+批量自动分派并由维修工程师完成部分处理中的报修单. 统计:
+    1. 逐单手工分派与批量自动分派的耗时及SQL查询次数;
+    2. 按优先级统计的平均/最大排队时长, 并与按提交时间先到先分派(优先级步长为0)对比;
+    3. 维修工程师处理中报修单数的最大差值.
+
+报修单数及维修工程师数通过环境变量BENCH_ORDERS(默认2000), BENCH_MAINTAINERS(默认20)指定:
+
+    cd apps/runtests && BENCH_ORDERS=10000 pytest -s benchmarks/bench_repair_order_dispatch.py
+"""
+
+import datetime
+import logging
+import os
+import random
+from unittest import mock
+
+from nmis.devices import dispatch as dispatch_queue
+from nmis.devices.consts import PRIORITY_LOW, PRIORITY_MEDIUM, PRIORITY_HIGH, PRIORITY_EMERGENCY, PRIORITY_URGENT, \
+    REPAIR_ORDER_STATUS_SUBMITTED, REPAIR_ORDER_STATUS_DOING, REPAIR_ORDER_STATUS_DONE, \
+    REPAIR_ORDER_DISPATCH_PRIORITY_STEP
+from nmis.devices.models import RepairOrder
+from runtests import BaseTestCase
+from runtests.benchmarks import BenchmarkMixin
+from runtests.common.mixins import AssertDevicesMixin
+from utils import times
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_DISTRIBUTION = (
+    (PRIORITY_LOW, 30), (PRIORITY_MEDIUM, 40), (PRIORITY_HIGH, 20), (PRIORITY_EMERGENCY, 7), (PRIORITY_URGENT, 3),
+)
+
+
+class RepairOrderDispatchBenchmark(BaseTestCase, BenchmarkMixin, AssertDevicesMixin):
+
+    ORDER_COUNT = int(os.environ.get('BENCH_ORDERS', 2000))
+    MAINTAINER_COUNT = int(os.environ.get('BENCH_MAINTAINERS', 20))
+    PERIOD_MINUTES = 15
+    PERIODS = 32                # 模拟8小时
+    COMPLETED_PER_PERIOD = 1    # 每个周期每位维修工程师完成的报修单数
+
+    def setUp(self):
+        super(RepairOrderDispatchBenchmark, self).setUp()
+        self.fault_types = self.init_fault_types(self.admin_staff)
+        self.maintainers = [
+            self.create_completed_staff(self.organ, self.dept, name='维修工程师%s' % i)
+            for i in range(self.MAINTAINER_COUNT)
+        ]
+
+    def make_stream(self, seed=2018):
+        """
+        生成合成报修单流: [(到达周期, 报修单)], 报修单已写入数据库, created_time为模拟到达时间(仅在内存中)
+        """
+        rand = random.Random(seed)
+        priorities = [priority for priority, weight in PRIORITY_DISTRIBUTION for _ in range(weight)]
+        begin_time = times.now()
+        stream = []
+        for i in range(self.ORDER_COUNT):
+            period = rand.randrange(self.PERIODS)
+            repair_order = RepairOrder(
+                order_no='BENCH%08d' % i, applicant=self.admin_staff, fault_type=self.fault_types[0],
+                creator=self.admin_staff, priority=rand.choice(priorities),
+            )
+            stream.append((period, repair_order))
+        RepairOrder.objects.bulk_create([repair_order for _, repair_order in stream])
+        ids = dict(RepairOrder.objects.filter(order_no__startswith='BENCH').values_list('order_no', 'id'))
+        for period, repair_order in stream:
+            repair_order.id = ids[repair_order.order_no]
+            repair_order.created_time = begin_time + datetime.timedelta(
+                minutes=period * self.PERIOD_MINUTES + rand.random() * self.PERIOD_MINUTES
+            )
+        return stream
+
+    def simulate(self, stream, batch_size):
+        """
+        :return: (各次自动分派的(耗时毫秒数, SQL查询次数)列表, {优先级: 排队分钟数列表}, 处理中报修单数最大差值)
+        """
+        arrivals = {}
+        for period, repair_order in stream:
+            arrivals.setdefault(period, []).append(repair_order)
+        arrival_times = dict((repair_order.id, repair_order.created_time) for _, repair_order in stream)
+        begin_time = min(arrival_times.values())
+
+        dispatch_costs, waits, max_spread = [], {}, 0
+        for period in range(self.PERIODS * 2):
+            dispatch_queue.enqueue_orders(arrivals.get(period, []))
+            now = begin_time + datetime.timedelta(minutes=(period + 1) * self.PERIOD_MINUTES)
+
+            results = []
+
+            def dispatch():
+                results.append(RepairOrder.objects.auto_dispatch_repair_orders(
+                    self.admin_staff, self.maintainers, batch_size
+                ))
+            ms, queries = self.bench(dispatch, 1)
+            dispatch_costs.append((ms, queries))
+            for repair_order, _ in results[0]:
+                waits.setdefault(repair_order.priority, []).append(
+                    (now - arrival_times[repair_order.id]).total_seconds() / 60
+                )
+
+            workloads = RepairOrder.objects.get_maintainer_workloads(self.maintainers)
+            loads = [workloads.get(maintainer.id, 0) for maintainer in self.maintainers]
+            max_spread = max(max_spread, max(loads) - min(loads))
+
+            # 维修工程师完成最早分派的报修单
+            for maintainer in self.maintainers:
+                done_ids = list(RepairOrder.objects.filter(
+                    maintainer=maintainer, status=REPAIR_ORDER_STATUS_DOING
+                ).order_by('modified_time', 'id').values_list('id', flat=True)[:self.COMPLETED_PER_PERIOD])
+                RepairOrder.objects.filter(id__in=done_ids).update(status=REPAIR_ORDER_STATUS_DONE)
+        return dispatch_costs, waits, max_spread
+
+    def reset(self, stream):
+        """
+        恢复为待分派状态并清空分派队列
+        """
+        order_ids = [repair_order.id for _, repair_order in stream]
+        RepairOrder.objects.filter(id__in=order_ids).update(status=REPAIR_ORDER_STATUS_SUBMITTED, maintainer=None)
+        dispatch_queue.remove_orders(order_ids)
+
+    def test_dispatch(self):
+        stream = self.make_stream()
+        batch_size = self.MAINTAINER_COUNT
+
+        # 逐单手工分派
+        manual_orders = iter(RepairOrder.objects.filter(id__in=[repair_order.id for _, repair_order in stream[:50]]))
+        ms, queries = self.bench(lambda: RepairOrder.objects.dispatch_repair_order(
+            next(manual_orders), self.admin_staff, self.maintainers[0], PRIORITY_MEDIUM
+        ), 50)
+        results = [('manual dispatch, 1 order', ms, queries)]
+        self.reset(stream)
+
+        waits_by_mode = []
+        for name, step in (('priority aware', REPAIR_ORDER_DISPATCH_PRIORITY_STEP), ('FIFO', 0)):
+            with mock.patch('nmis.devices.dispatch.REPAIR_ORDER_DISPATCH_PRIORITY_STEP', step):
+                costs, waits, max_spread = self.simulate(stream, batch_size)
+            costs = [cost for cost in costs if cost[1]]
+            results.append((
+                'auto dispatch (%s), %s orders' % (name, batch_size),
+                sum(ms for ms, _ in costs) / (len(costs) or 1), sum(queries for _, queries in costs) / (len(costs) or 1)
+            ))
+            waits_by_mode.append((name, waits, max_spread))
+            self.reset(stream)
+        self.report('repair order dispatch (%s orders, %s maintainers)' % (self.ORDER_COUNT, self.MAINTAINER_COUNT),
+                    results)
+
+        print('')
+        print('========== simulated queueing time (minutes) ==========')
+        for name, waits, max_spread in waits_by_mode:
+            for priority, _ in PRIORITY_DISTRIBUTION:
+                values = waits.get(priority, [])
+                print('%-20s %-4s %8d orders %10.1f avg %10.1f max' % (
+                    name, priority, len(values), sum(values) / (len(values) or 1), max(values or [0])
+                ))
+            print('%-20s max workload spread: %s' % (name, max_spread))
+
+        # 优先级越高平均排队时长越短
+        priority_waits = waits_by_mode[0][1]
+        self.assertLessEqual(
+            sum(priority_waits[PRIORITY_URGENT]) / len(priority_waits[PRIORITY_URGENT]),
+            sum(priority_waits[PRIORITY_LOW]) / len(priority_waits[PRIORITY_LOW])
+        )
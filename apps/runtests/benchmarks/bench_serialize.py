@@ -0,0 +1,57 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/15
+#
+
+"""
+serialize_response基准测试: 对比每次动态import解析Serializer类与使用Serializer注册表的耗时(50条数据分页)
+"""
+
+import logging
+
+from base import resp
+from base.resp import SerializerRegistry
+from nmis.hospitals.models import Department
+from runtests import BaseTestCase
+from runtests.benchmarks import BenchmarkMixin
+from utils.eggs import make_instance
+
+logger = logging.getLogger(__name__)
+
+
+class SerializeResponseBenchmark(BaseTestCase, BenchmarkMixin):
+
+    ROUNDS = 500
+    PAGE_SIZE = 50
+
+    def test_serialize_response(self):
+        for i in range(self.PAGE_SIZE):
+            self.create_department(self.organ, dept_name='科室_%s_%s' % (i, self.get_random_suffix()))
+        depts = list(Department.objects.all()[:self.PAGE_SIZE])
+        self.assertEqual(len(depts), self.PAGE_SIZE)
+
+        def serialize_by_import():
+            # 优化前: 每次调用都拼接模块路径并动态import
+            module_name, class_name = SerializerRegistry.get_class_path(Department)
+            return resp.Response(make_instance(module_name, class_name, depts, many=True).data, 'depts')
+
+        def serialize_by_registry():
+            return resp.serialize_response(depts, results_name='depts')
+
+        def resolve_by_import():
+            make_instance(*SerializerRegistry.get_class_path(Department), depts[:1], many=True)
+
+        def resolve_by_registry():
+            resp.serializer_registry.get(Department)(depts[:1], many=True)
+
+        results = []
+        for name, func in (
+                ('serialize_response, import (before)', serialize_by_import),
+                ('serialize_response, registry (after)', serialize_by_registry),
+                ('resolve only, import (before)', resolve_by_import),
+                ('resolve only, registry (after)', resolve_by_registry),):
+            ms, queries = self.bench(func, self.ROUNDS)
+            results.append((name, ms, queries))
+        self.report('serialize_response (%s items)' % self.PAGE_SIZE, results)
+
+        self.assertEqual(serialize_by_import().data, serialize_by_registry().data)
@@ -499,11 +499,7 @@ class AssertDevicesMixin(object):
             "cate": "IN",
             "creator_id": creator.id
         }
-        try:
-            return AssertDevice.objects.create(**assert_device_data)
-        except Exception as e:
-            logger.exception(e)
-            return None
+        return AssertDevice.objects.create_assert_device(**assert_device_data)
 
     def create_medical_device_cate(self, creator):
         """
@@ -9,6 +9,8 @@ from settings import configure_logging_params
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings')
 
+pytest_plugins = ('runtests.plugins.query_audit', )
+
 LOGGING_SETTINGS = {
     'log_file_root':        os.path.join(os.path.dirname(__file__), '../../logs'),
     'log_file_path':        'nmis-back/runtests.log',
@@ -45,3 +47,9 @@ def pytest_configure():
     # )
     settings.LOGGING = configure_logging_params(**LOGGING_SETTINGS)
     django.setup()
+
+    # 测试时后台导入任务及消息推送任务在当前进程中同步执行
+    from settings import import_celery_app, notice_celery_app
+    for celery_app in (import_celery_app, notice_celery_app):
+        celery_app.conf.CELERY_ALWAYS_EAGER = True
+        celery_app.conf.CELERY_EAGER_PROPAGATES_EXCEPTIONS = True
@@ -5,12 +5,17 @@
 
 #
 
+import csv
+import io
 import logging
 
 from django.core.files.uploadedfile import UploadedFile
+from openpyxl import load_workbook
 
 import settings
 from nmis.devices.consts import ASSERT_DEVICE_STATUS_SCRAPPED
+from nmis.devices.models import RepairOrder
+from nmis.jobs.consts import IMPORT_JOB_STATUS_DONE
 from runtests import BaseTestCase
 from runtests.common.mixins import AssertDevicesMixin, HospitalMixin
 from utils.files import remove, upload_file
@@ -211,6 +216,192 @@ class AssertDevicesApiTestCase(BaseTestCase, AssertDevicesMixin, HospitalMixin):
             self.assertEqual(assert_device.get('status'), 'US')
             self.assertEqual(assert_device.get('storage_place_id'), storage_place.id)
 
+    def test_assert_devices_search_with_cursor(self):
+        """
+        API测试: 搜索资产设备时带cursor参数, 结果仍按相关度排序并使用页码分页
+        """
+        api = '/api/v1/devices/assert-devices'
+
+        self.login_with_username(self.user)
+        hospital_address = self.create_hospital_address(title='信息综合大楼')
+        storage_place = self.create_storage_place(dept=self.dept, parent=hospital_address, title='设备存储室')
+        # 后创建的设备在游标分页中排在前面, 相关度更低
+        devices = [
+            self.create_assert_device(
+                title=title, dept=self.dept, storage_place=storage_place, creator=self.admin_staff,
+                assert_no='CUR%04d' % i, bar_code='CURBC%04d' % i, serial_no='CURSN%04d' % i,
+            ) for i, title in enumerate(['监护仪', '监护仪A型', '多参数监护仪'])
+        ]
+        data = {'cate': 'IN', 'search_key': '监护仪', 'cursor': '', 'size': 2, 'type': 'TL'}
+        response = self.get(api, data=data)
+        self.assert_response_success(response)
+        device_ids = [device.get('id') for device in response.get('assert_devices')]
+        self.assertEqual(device_ids, [devices[0].id, devices[1].id])
+        self.assertEqual(response.get('paging').get('current_page'), 1)
+        self.assertEqual(response.get('paging').get('total_count'), 3)
+        self.assertNotIn('next', response.get('paging'))
+
+    def test_export_assert_devices(self):
+        """
+        API测试: 资产设备导出API接口测试
+        """
+        api = '/api/v1/devices/assert-devices/export'
+
+        self.login_with_username(self.user)
+        hospital_address = self.create_hospital_address(title='信息综合大楼')
+        storage_place = self.create_storage_place(
+            dept=self.dept, parent=hospital_address, title='信息设备存储室_{}'.format(self.get_random_suffix())
+        )
+        other_storage_place = self.create_storage_place(
+            dept=self.dept, parent=hospital_address, title='信息设备存储室_{}'.format(self.get_random_suffix())
+        )
+        for i in range(5):
+            self.create_assert_device(
+                title="电脑_{}".format(self.get_random_suffix()),
+                dept=self.dept, storage_place=storage_place if i < 3 else other_storage_place,
+                creator=self.admin_staff,
+                assert_no="TEST0009_{}".format(self.get_random_suffix()),
+                bar_code="123123125_{}".format(self.get_random_suffix()),
+                serial_no="TEST03420354_{}".format(self.get_random_suffix()),
+            )
+
+        data = {'type': 'TL', 'storage_place_ids': str(storage_place.id), 'file_format': 'csv'}
+        response = self.client.get(api, data=data)
+        self.assertEqual(response.status_code, 200)
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8-sig'))))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0][0], '资产编号')
+        for row in rows[1:]:
+            self.assertEqual(row[13], storage_place.title)
+
+        data['file_format'] = 'xlsx'
+        response = self.client.get(api, data=data)
+        self.assertEqual(response.status_code, 200)
+        workbook = load_workbook(io.BytesIO(b''.join(response.streaming_content)))
+        response.close()
+        self.assertEqual(workbook.active.max_row, 4)
+
+        # 关键词搜索与其他筛选条件同时使用时导出全部匹配的设备
+        data = {'type': 'TL', 'storage_place_ids': str(storage_place.id), 'search_key': '电脑', 'file_format': 'csv'}
+        response = self.client.get(api, data=data)
+        self.assertEqual(response.status_code, 200)
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8-sig'))))
+        self.assertEqual(len(rows), 4)
+
+        # 筛选条件错误时与列表接口返回相同的错误
+        response = self.get(api, data={'type': 'TL', 'status': 'XX'})
+        self.assert_response_failure(response)
+
+    def test_assert_device_inventory(self):
+        """
+        API测试: 资产设备库存汇总API接口测试
+        """
+        api = '/api/v1/devices/assert-devices/inventory'
+
+        self.login_with_username(self.user)
+        hospital_address = self.create_hospital_address(title='信息综合大楼')
+        storage_place = self.create_storage_place(dept=self.dept, parent=hospital_address, title='信息设备存储室')
+        for i in range(3):
+            self.create_assert_device(
+                title="电脑_{}".format(self.get_random_suffix()),
+                dept=self.dept, storage_place=storage_place, creator=self.admin_staff,
+                assert_no="TEST0010_{}".format(self.get_random_suffix()),
+                bar_code="123123126_{}".format(self.get_random_suffix()),
+                serial_no="TEST03420355_{}".format(self.get_random_suffix()),
+            )
+
+        response = self.get(api, data={'dimension': 'SP', 'cate': 'IN'})
+        self.assert_response_success(response)
+        inventory = {group.get('group_id'): group for group in response.get('inventory')}
+        self.assertEqual(inventory[storage_place.id].get('group_name'), storage_place.title)
+        self.assertEqual(inventory[storage_place.id].get('total'), 3)
+        self.assertEqual(inventory[hospital_address.id].get('status'), {'US': 3})
+
+        response = self.get(api, data={'dimension': 'XX'})
+        self.assert_response_failure(response)
+
+    def test_assert_device_scan(self):
+        """
+        API测试: 扫码(条形码/资产编号/序列号)批量查询资产设备API接口测试
+        """
+        api = '/api/v1/devices/assert-devices/scan'
+
+        self.login_with_username(self.user)
+        hospital_address = self.create_hospital_address(title='信息综合大楼')
+        storage_place = self.create_storage_place(dept=self.dept, parent=hospital_address, title='信息设备存储室')
+        assert_devices = [
+            self.create_assert_device(
+                title="电脑_{}".format(self.get_random_suffix()),
+                dept=self.dept, storage_place=storage_place, creator=self.admin_staff,
+                assert_no="TEST0012_{}".format(self.get_random_suffix()),
+                bar_code="123123128_{}".format(self.get_random_suffix()),
+                serial_no="TEST03420357_{}".format(self.get_random_suffix()),
+            ) for _ in range(2)
+        ]
+        codes = [assert_devices[1].serial_no, assert_devices[0].bar_code, assert_devices[1].assert_no, 'NOT_EXISTS']
+        response = self.get(api, data={'codes': ','.join(codes)})
+        self.assert_response_success(response)
+        self.assertEqual(
+            [device.get('id') for device in response.get('assert_devices')],
+            [assert_devices[1].id, assert_devices[0].id]
+        )
+        self.assertEqual(response.get('codes').get(assert_devices[0].bar_code), assert_devices[0].id)
+        self.assertEqual(response.get('not_found'), ['NOT_EXISTS'])
+
+        response = self.get(api, data={'codes': ' , '})
+        self.assert_response_failure(response)
+        response = self.get(api, data={'codes': ','.join(['CODE%s' % i for i in range(201)])})
+        self.assert_response_failure(response)
+
+    def test_assert_device_records(self):
+        """
+        API测试: 资产设备历史事件及科室历史事件API接口测试(游标分页, 设备删除后仍可查询)
+        """
+        api = '/api/v1/devices/{}/records'
+
+        self.login_with_username(self.user)
+        hospital_address = self.create_hospital_address(title='信息综合大楼')
+        storage_place = self.create_storage_place(dept=self.dept, parent=hospital_address, title='信息设备存储室')
+        assert_device = self.create_assert_device(
+            title="电脑_{}".format(self.get_random_suffix()),
+            dept=self.dept, storage_place=storage_place, creator=self.admin_staff,
+            assert_no="TEST0011_{}".format(self.get_random_suffix()),
+            bar_code="123123127_{}".format(self.get_random_suffix()),
+            serial_no="TEST03420356_{}".format(self.get_random_suffix()),
+        )
+        department = self.create_department(self.organ, dept_name='设备科_{}'.format(self.get_random_suffix()))
+        self.assert_response_success(self.put(
+            '/api/v1/devices/allocate', data={'use_dept_id': department.id, 'assert_device_ids': str(assert_device.id)}
+        ))
+        self.assert_response_success(self.put('/api/v1/devices/{}/scrap'.format(assert_device.id)))
+        self.assert_response_success(self.delete('/api/v1/devices/{}'.format(assert_device.id)))
+
+        response = self.get(api.format(assert_device.id), data={'cursor': '', 'size': 2})
+        self.assert_response_success(response)
+        records = response.get('assert_device_records')
+        self.assertEqual([record.get('operation') for record in records], ['DEL', 'SCP'])
+        self.assertEqual(records[0].get('dept_id'), department.id)
+        self.assertEqual(records[0].get('operator_id'), self.user.get_profile().id)
+        next_cursor = response.get('paging').get('next')
+        self.assertIsNotNone(next_cursor)
+
+        response = self.get(api.format(assert_device.id), data={'cursor': next_cursor, 'size': 2})
+        self.assert_response_success(response)
+        self.assertEqual(
+            [record.get('operation') for record in response.get('assert_device_records')], ['LAC', 'SMT']
+        )
+
+        response = self.get(
+            '/api/v1/devices/assert-devices/records', data={'dept_id': department.id, 'operation': 'SCP'}
+        )
+        self.assert_response_success(response)
+        records = response.get('assert_device_records')
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0].get('assert_device_id'), assert_device.id)
+
+        response = self.get('/api/v1/devices/assert-devices/records', data={'dept_id': department.id, 'operation': 'XX'})
+        self.assert_response_failure(response)
+
     def test_update_assert_device(self):
         """
         API测试: 修改资产设备API接口测试
@@ -338,6 +529,13 @@ class AssertDevicesApiTestCase(BaseTestCase, AssertDevicesMixin, HospitalMixin):
         for assert_device in assert_device_list:
             self.assertIsNotNone(assert_device.get('use_dept_id'))
             self.assertEqual(assert_device.get('use_dept_id'), department.id)
+        # 每个设备写入一条调配记录
+        from nmis.devices.models import AssertDeviceRecord
+        self.assertEqual(
+            AssertDeviceRecord.objects.filter(
+                assert_device_id__in=[device.id for device in assert_devices], operation='LAC'
+            ).count(), 5
+        )
 
     def test_assert_device_batch_upload(self):
         """
@@ -382,6 +580,10 @@ class AssertDevicesApiTestCase(BaseTestCase, AssertDevicesMixin, HospitalMixin):
                 })
         self.assert_response_success(response)
         self.assertEqual(response.get('code'), 10000)
+        import_job = response.get('import_job')
+        self.assertEqual(import_job.get('status'), IMPORT_JOB_STATUS_DONE)
+        self.assertEqual(import_job.get('failed'), 0)
+        self.assertEqual(import_job.get('imported'), import_job.get('total'))
 
 
 class MaintenancePlanTestCase(BaseTestCase, AssertDevicesMixin, HospitalMixin):
@@ -503,6 +705,43 @@ class MaintenancePlanTestCase(BaseTestCase, AssertDevicesMixin, HospitalMixin):
         for maintenance_plan in maintenance_plan_list:
             self.assertEqual(maintenance_plan.get('status'), 'NW')
 
+    def test_maintenance_plan_due(self):
+        """
+        API测试: 资产设备维护计划到期分组及到期周期列表API接口测试
+        """
+        self.login_with_username(self.user)
+
+        hospital_address = self.create_hospital_address(title='信息综合大楼')
+        storage_place = self.create_storage_place(
+            dept=self.dept, parent=hospital_address, title='信息设备存储室_{}'.format(self.get_random_suffix())
+        )
+        maintenance_plans = [
+            self.create_maintenance_plan(
+                title="资产设备维护计划_{}".format(self.get_random_suffix()),
+                storage_places=[storage_place], executor=self.admin_staff,
+                creator=self.admin_staff, assert_devices=[]
+            ) for _ in range(2)
+        ]
+        self.assertTrue(all(maintenance_plans))
+
+        response = self.get('/api/v1/devices/maintenance_plans/due-buckets')
+        self.assert_response_success(response)
+        buckets = {item['bucket']: item['count'] for item in response.get('buckets')}
+        self.assertEqual(buckets.get('BO'), 0)
+        self.assertEqual(buckets.get('OM'), 2)
+
+        api = '/api/v1/devices/maintenance_plans/due'
+        response = self.get(api, data={'bucket': 'OM', 'page': '1', 'size': '1'})
+        self.assert_response_success(response)
+        occurrences = response.get('occurrences')
+        self.assertEqual(len(occurrences), 1)
+        self.assertIn(occurrences[0].get('plan_id'), [plan.id for plan in maintenance_plans])
+        self.assertEqual(occurrences[0].get('executor_name'), self.admin_staff.name)
+        self.assertEqual(occurrences[0].get('status'), 'NW')
+
+        response = self.get(api, data={'bucket': 'XX'})
+        self.assert_response_failure(response)
+
     def test_maintenance_plan_detail(self):
         """
         API测试: 资产设备维护计划详情
@@ -677,6 +916,50 @@ class RepairOrderTestCase(BaseTestCase, AssertDevicesMixin, HospitalMixin):
         self.assertEqual(response.get('repair_order').get('comment_content'), comment_data.get('comment_content'))
 
 
+    def test_auto_dispatch_repair_orders(self):
+        api = '/api/v1/devices/repair_orders/auto-dispatch'
+
+        self.login_with_username(self.user)
+        fault_types = self.init_fault_types(self.admin_staff)
+        orders = [
+            RepairOrder.objects.create_order(self.admin_staff, fault_types[0], self.admin_staff, priority=priority)[1]
+            for priority in ('L', 'U', 'M')
+        ]
+        self.run_commit_hooks()
+
+        response = self.post(api, data={'count': 0})
+        self.assert_response_form_errors(response)
+        response = self.post(api, data={'count': 2, 'maintainer_ids': [self.admin_staff.id]})
+        self.assert_response_success(response)
+        repair_orders = response.get('repair_orders')
+        self.assertEqual(sorted(order.get('id') for order in repair_orders), sorted([orders[1].id, orders[2].id]))
+        for order in repair_orders:
+            self.assertEqual(order.get('status'), 'DNG')
+            self.assertEqual(order.get('maintainer_id'), self.admin_staff.id)
+
+        # 未指定维修工程师时分派给本医院所有维修工程师
+        response = self.post(api, data={'count': 2})
+        self.assert_response_success(response)
+        self.assertEqual([order.get('id') for order in response.get('repair_orders')], [orders[0].id])
+
+
+    def test_repair_order_report(self):
+        api = '/api/v1/devices/reports/hosp_dev_report?start_date={}&expired_date={}'
+
+        self.login_with_username(self.user)
+        self.init_repair_orders(self.admin_staff, self.admin_staff)
+        today = now().strftime('%Y-%m-%d')
+
+        response = self.get(api.format(today, '2018-01-01'))
+        self.assert_response_form_errors(response)
+        response = self.get(api.format(today, today))
+        self.assert_response_success(response)
+        self.assertEqual(response.get('rp_order_nums_status'), [{'status': 'SMT', 'nums': 2}])
+        self.assertEqual(len(response.get('rp_order_nums_fault_type')), 2)
+        self.assertEqual(response.get('rp_order_nums_top_dept'), [{'dept': self.dept.name, 'nums': 2}])
+        self.assertIsNone(response.get('mean_time_to_dispatch'))
+
+
 class FaultSolutionsTestCase(BaseTestCase, AssertDevicesMixin, HospitalMixin):
 
     def test_create_fault_solution(self):
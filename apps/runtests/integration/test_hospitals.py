@@ -9,6 +9,7 @@ from unittest import skip
 
 import pytest
 
+from nmis.jobs.consts import IMPORT_JOB_STATUS_FAILED, IMPORT_JOB_STATUS_DONE
 from runtests import BaseTestCase
 from runtests.common.mixins import HospitalMixin
 
@@ -162,6 +163,7 @@ class DepartmentApiTestCase(BaseTestCase):
         with open(curr_path+'/data/dept-normal-test.xlsx', 'rb') as file:
             response = self.raw_post(api.format(self.organ.id), {'dept_excel_file': file})
             self.assert_response_success(response)
+            self.assertEqual(response.get('import_job').get('status'), IMPORT_JOB_STATUS_DONE)
 
 
 class StaffAPITestCase(BaseTestCase):
@@ -323,13 +325,18 @@ class StaffAPITestCase(BaseTestCase):
         curr_path = os.path.dirname(__file__)
         with open(curr_path+'/data/staff-normal-test.xlsx', 'rb') as file:
             response = self.raw_post(api.format(self.organ.id), {'staff_excel_file': file})
-            self.assert_response_form_errors(response)
+            self.assert_response_success(response)
+            # 科室不存在, 导入任务失败
+            import_job = response.get('import_job')
+            self.assertEqual(import_job.get('status'), IMPORT_JOB_STATUS_FAILED)
+            self.assertTrue(import_job.get('errors'))
 
             self.create_department(self.organ, dept_name='信息科')
             self.create_department(self.organ, dept_name='测试部门')
         with open(curr_path + '/data/staff-normal-test.xlsx', 'rb') as file:
             response = self.raw_post(api.format(self.organ.id), {'staff_excel_file': file})
             self.assert_response_success(response)
+            self.assertEqual(response.get('import_job').get('status'), IMPORT_JOB_STATUS_DONE)
 
 
 class RoleAPITestCase(BaseTestCase):
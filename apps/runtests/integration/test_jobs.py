@@ -0,0 +1,86 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/21
+#
+
+import datetime
+import logging
+import os
+
+from nmis.jobs.consts import IMPORT_JOB_STATUS_DONE, IMPORT_JOB_TYPE_DEPT, IMPORT_JOB_STATUS_RUNNING, \
+    IMPORT_JOB_STATUS_FAILED, IMPORT_JOB_HEARTBEAT_TIMEOUT
+from nmis.jobs.models import ImportJob
+from nmis.jobs.tasks import run_import_job
+from runtests import BaseTestCase
+from utils import times
+from utils.files import is_file_exist
+
+logger = logging.getLogger('runtests')
+
+
+class ImportJobAPITestCase(BaseTestCase):
+
+    upload_api = '/api/v1/hospitals/{0}/departments/batch-upload'
+    job_api = '/api/v1/jobs/imports/{0}'
+
+    def upload_depts(self):
+        curr_path = os.path.dirname(__file__)
+        with open(curr_path + '/data/dept-normal-test.xlsx', 'rb') as file:
+            response = self.raw_post(self.upload_api.format(self.organ.id), {'dept_excel_file': file})
+        self.assert_response_success(response)
+        return response.get('import_job')
+
+    def test_get_import_job(self):
+        """
+        测试提交导入任务后轮询任务状态
+        """
+        self.login_with_username(self.user)
+        import_job = self.upload_depts()
+        self.assertEqual(import_job.get('type'), IMPORT_JOB_TYPE_DEPT)
+
+        response = self.get(self.job_api.format(import_job.get('id')))
+        self.assert_response_success(response)
+        import_job = response.get('import_job')
+        self.assertEqual(import_job.get('status'), IMPORT_JOB_STATUS_DONE)
+        self.assertEqual(import_job.get('progress'), 100)
+        self.assertTrue(import_job.get('total') > 0)
+        self.assertEqual(import_job.get('imported'), import_job.get('total'))
+        self.assertEqual(import_job.get('errors'), [])
+
+        # 任务执行完成后删除上传的文件
+        job = ImportJob.objects.get_by_id(import_job.get('id'))
+        self.assertFalse(is_file_exist(job.get_file_abspath()))
+
+    def test_get_import_job_of_other_staff(self):
+        """
+        测试不能查询其他员工提交的导入任务
+        """
+        self.login_with_username(self.user)
+        import_job = self.upload_depts()
+
+        other_staff = self.create_completed_staff(self.organ, self.dept, name='其他员工')
+        self.login_with_username(other_staff.user)
+        response = self.get(self.job_api.format(import_job.get('id')))
+        self.assert_response_not_success(response)
+
+    def test_redelivered_interrupted_job(self):
+        """
+        测试worker中断后重新投递的任务: 心跳超时的执行中任务标记为失败, 未超时的不重复执行
+        """
+        self.login_with_username(self.user)
+        import_job = self.upload_depts()
+        job_id = import_job.get('id')
+
+        # 心跳未超时, 视为仍在执行中, 不做处理
+        ImportJob.objects.filter(id=job_id).update(
+            status=IMPORT_JOB_STATUS_RUNNING, heartbeat_time=times.now(), finished_time=None
+        )
+        run_import_job(job_id)
+        self.assertEqual(ImportJob.objects.get(id=job_id).status, IMPORT_JOB_STATUS_RUNNING)
+
+        stale_time = times.now() - datetime.timedelta(seconds=IMPORT_JOB_HEARTBEAT_TIMEOUT + 60)
+        ImportJob.objects.filter(id=job_id).update(heartbeat_time=stale_time)
+        run_import_job(job_id)
+        job = ImportJob.objects.get(id=job_id)
+        self.assertEqual(job.status, IMPORT_JOB_STATUS_FAILED)
+        self.assertIsNotNone(job.finished_time)
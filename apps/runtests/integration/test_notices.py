@@ -41,6 +41,30 @@ class NoticeApiTestCase(BaseTestCase, NoticeMixin):
         self.assertIsNotNone(res)
         self.assertEquals(len(res.get('notices')), 0)
 
+    def test_notices_keyset_pagination(self):
+        """
+        API测试: 消息列表游标分页
+        """
+        api = "/api/v1/notices/"
+
+        self.login_with_username(self.user)
+        for i in range(0, 5):
+            self.assertTrue(self.create_notice(staff=self.admin_staff))
+
+        notice_ids = []
+        cursor = ''
+        for page_size in (2, 2, 1):
+            response = self.get(api, data={'cursor': cursor, 'size': 2})
+            self.assert_response_success(response)
+            self.assertEqual(len(response.get('notices')), page_size)
+            notice_ids.extend([notice.get('id') for notice in response.get('notices')])
+            cursor = response.get('paging').get('next')
+        self.assertIsNone(cursor)
+        self.assertEqual(len(set(notice_ids)), 5)
+
+        response = self.get(api, data={'cursor': 'invalid', 'size': 2})
+        self.assert_response_not_success(response)
+
     def test_read_or_del_notices(self):
         """
         API测试: 读取消息/删除消息（标记单个/多条消息为删除状态，标记单个/多条消息为已读状态）API接口测试
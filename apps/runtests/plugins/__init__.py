@@ -0,0 +1,8 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/18
+#
+
+"""
+pytest插件
+"""
@@ -0,0 +1,55 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/18
+#
+
+"""
+N+1查询检测pytest插件. 开启后, 每个测试用例中所有经 resp.serialize_data 序列化的数据(即所有列表接口)
+都会被审计, 出现疑似N+1查询的Serializer时用例失败:
+
+    cd apps/runtests && pytest --detect-n-plus-one
+
+已知且暂不处理的Serializer可在pytest.ini中配置 n_plus_one_allowed_serializers 忽略,
+单个用例可用 @pytest.mark.allow_n_plus_one 标记跳过检测.
+"""
+
+import logging
+
+import pytest
+
+from base.audits import audit_serializer_queries
+
+logger = logging.getLogger(__name__)
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('query_audit', 'N+1查询检测')
+    group.addoption(
+        '--detect-n-plus-one', action='store_true', dest='detect_n_plus_one', default=False,
+        help='序列化过程出现N+1查询时用例失败'
+    )
+    parser.addini(
+        'n_plus_one_allowed_serializers', type='linelist', default=[],
+        help='不做N+1检测的Serializer类名'
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'allow_n_plus_one: 当前用例不做N+1查询检测')
+
+
+@pytest.fixture(autouse=True)
+def detect_n_plus_one(request):
+    config = request.config
+    if not config.getoption('detect_n_plus_one') or request.node.get_closest_marker('allow_n_plus_one'):
+        yield
+        return
+
+    allowed = set(config.getini('n_plus_one_allowed_serializers'))
+    with audit_serializer_queries() as auditor:
+        yield
+    suspects = [name for name in auditor.find_n_plus_one() if name not in allowed]
+    if suspects:
+        details = ['%s: %s queries / %s items' % (r.serializer, r.queries, r.items)
+                   for r in auditor.records if r.serializer in suspects]
+        pytest.fail('N+1 queries detected in %s\n%s' % (', '.join(suspects), '\n'.join(details)), pytrace=False)
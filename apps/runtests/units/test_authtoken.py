@@ -0,0 +1,87 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/10
+#
+
+#
+
+import logging
+
+from rest_framework import exceptions
+
+from base.authtoken import TokenLRUCache, CustomToken, CustomTokenAuthentication, token_lru
+from runtests import BaseTestCase
+
+logger = logging.getLogger(__name__)
+
+
+def test_token_lru_cache_evict():
+    lru = TokenLRUCache(max_size=2, timeout=60)
+    lru.set('a', 1)
+    lru.set('b', 2)
+    lru.get('a')
+    lru.set('c', 3)
+    assert lru.get('a') == 1
+    assert lru.get('b') is None
+    assert lru.get('c') == 3
+    assert len(lru) == 2
+
+
+def test_token_lru_cache_expired():
+    lru = TokenLRUCache(max_size=2, timeout=-1)
+    lru.set('a', 1)
+    assert lru.get('a') is None
+
+
+class CustomTokenAuthenticationTestCase(BaseTestCase):
+
+    def test_authenticate_with_resolved_cache(self):
+        token, _ = CustomToken.objects.get_or_create(user=self.user)
+        auth = CustomTokenAuthentication()
+
+        user, auth_token = auth.authenticate_credentials(token.key)
+        self.assertEqual(user.id, self.user.id)
+        self.assertEqual(auth_token.key, token.key)
+        self.assertIsNotNone(token_lru.get(token.key))
+
+        with self.assertNumQueries(0):
+            auth.authenticate_credentials(token.key)
+
+    def test_deactivated_user_cache_cleared(self):
+        token, _ = CustomToken.objects.get_or_create(user=self.user)
+        auth = CustomTokenAuthentication()
+        auth.authenticate_credentials(token.key)
+
+        self.user.is_active = False
+        self.user.save()
+        self.user.clear_cache()
+        CustomToken.clear_users_resolved_cache(self.user)
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            auth.authenticate_credentials(token.key)
+
+    def test_refreshed_token_invalid(self):
+        token, _ = CustomToken.objects.get_or_create(user=self.user)
+        auth = CustomTokenAuthentication()
+        auth.authenticate_credentials(token.key)
+
+        new_token = CustomToken.refresh(token)
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            auth.authenticate_credentials(token.key)
+        user, _ = auth.authenticate_credentials(new_token.key)
+        self.assertEqual(user.id, self.user.id)
+
+    def test_deactivated_in_other_process(self):
+        token, _ = CustomToken.objects.get_or_create(user=self.user)
+        auth = CustomTokenAuthentication()
+        auth.authenticate_credentials(token.key)
+        resolved = token_lru.get(token.key)
+
+        # 其他进程禁用用户: 本进程LRU中仍有旧条目, 由用户对象缓存的is_active检查拒绝
+        self.user.is_active = False
+        self.user.save()
+        self.user.clear_cache()
+        CustomToken.clear_users_resolved_cache(self.user)
+        token_lru.set(token.key, resolved)
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            auth.authenticate_credentials(token.key)
+        self.assertIsNone(token_lru.get(token.key))
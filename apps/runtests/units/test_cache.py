@@ -0,0 +1,115 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/13
+#
+
+#
+
+import logging
+
+from base.codecs import CODECS
+from nmis.hospitals.models import Department, Staff
+from runtests import BaseTestCase
+from users.models import User
+
+logger = logging.getLogger(__name__)
+
+
+class CachedManyTestCase(BaseTestCase):
+
+    def setUp(self):
+        super(CachedManyTestCase, self).setUp()
+        self.depts = [
+            self.create_department(self.organ, dept_name='科室_%s' % self.get_random_suffix()) for _ in range(3)
+        ]
+        Department.objects.clear_cache(self.depts)
+        Department.objects.cache_stats.reset()
+
+    def test_partial_fill(self):
+        self.depts[0].cache()
+        ids = [self.depts[2].id, self.depts[0].id, self.depts[1].id]
+
+        # 仅未命中的对象查库, 且只查询一次
+        with self.assertNumQueries(1):
+            objs = Department.objects.get_cached_many(ids)
+        self.assertEqual([obj.id for obj in objs], ids)
+
+        stats = Department.objects.cache_stats
+        self.assertEqual((stats.hits, stats.misses), (1, 2))
+
+        # 未命中对象已回写缓存
+        with self.assertNumQueries(0):
+            objs = Department.objects.get_cached_many([str(obj_id) for obj_id in ids])
+        self.assertEqual([obj.id for obj in objs], ids)
+        self.assertEqual((stats.hits, stats.misses), (4, 2))
+
+    def test_not_exists_ignored(self):
+        objs = Department.objects.get_cached_many([self.depts[0].id, 0, 'x', self.depts[0].id])
+        self.assertEqual([obj.id for obj in objs], [self.depts[0].id])
+        self.assertEqual(Department.objects.get_cached_many([]), [])
+
+
+class CacheInvalidationTestCase(BaseTestCase):
+
+    def test_save_invalidates_cache(self):
+        self.dept.cache()
+        self.dept.name = '新科室名称'
+        self.dept.save()
+        self.assertIsNone(Department.objects.get_cached_only(self.dept.id))
+        self.assertEqual(Department.objects.get_cached(self.dept.id).name, '新科室名称')
+
+    def test_queryset_update_invalidates_cache(self):
+        self.dept.cache()
+        Department.objects.filter(id=self.dept.id).update(name='批量更新')
+        self.assertIsNone(Department.objects.get_cached_only(self.dept.id))
+        self.assertEqual(Department.objects.get_cached(self.dept.id).name, '批量更新')
+
+    def test_update_by_ids_invalidates_cache(self):
+        self.dept.cache()
+        old_key = Department.objects.make_key(self.dept.id)
+        with self.assertNumQueries(1):
+            self.assertEqual(Department.objects.update_by_ids([self.dept.id], name='按id批量更新'), 1)
+        # 仅清除更新对象的缓存, 不递增缓存版本号
+        self.assertEqual(Department.objects.make_key(self.dept.id), old_key)
+        self.assertIsNone(Department.objects.get_cached_only(self.dept.id))
+        self.assertEqual(Department.objects.get_cached(self.dept.id).name, '按id批量更新')
+
+    def test_delete_invalidates_cache(self):
+        dept = self.create_department(self.organ, dept_name='待删除科室')
+        dept.cache()
+        dept_id = dept.id
+        dept.delete()
+        self.assertIsNone(Department.objects.get_cached_only(dept_id))
+
+    def test_bump_cache_version(self):
+        self.dept.cache()
+        old_key = Department.objects.make_key(self.dept.id)
+        Department.objects.bump_cache_version()
+        self.assertNotEqual(Department.objects.make_key(self.dept.id), old_key)
+        self.assertIsNone(Department.objects.get_cached_only(self.dept.id))
+
+
+class FieldValuesCodecTestCase(BaseTestCase):
+
+    def test_roundtrip(self):
+        codec = CODECS['fields']
+        staff = Staff.objects.select_related('organ', 'dept').get(id=self.admin_staff.id)
+        decoded = codec.decode(Staff, codec.encode(staff))
+
+        for field in Staff._meta.concrete_fields:
+            self.assertEqual(field.value_from_object(decoded), field.value_from_object(staff))
+        self.assertFalse(decoded._state.adding)
+        with self.assertNumQueries(0):
+            self.assertEqual(decoded.organ.id, self.organ.id)
+            self.assertEqual(decoded.dept.id, self.dept.id)
+
+    def test_cached_user_profile(self):
+        user = User.objects.get(id=self.user.id)
+        user.get_profile()
+        # get_profile()不再写入对象缓存, 显式缓存已加载profile的用户
+        user.cache()
+
+        cached_user = User.objects.get_cached_only(self.user.id)
+        self.assertIsInstance(cached_user, User)
+        with self.assertNumQueries(0):
+            self.assertEqual(cached_user.get_profile().id, self.admin_staff.id)
@@ -0,0 +1,62 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/24
+#
+
+#
+
+import logging
+
+from nmis.devices import codes as code_index
+from nmis.devices.models import AssertDevice
+from runtests import BaseTestCase
+from runtests.common.mixins import AssertDevicesMixin, HospitalMixin
+
+logger = logging.getLogger(__name__)
+
+
+class AssertDeviceCodeIndexTestCase(BaseTestCase, AssertDevicesMixin, HospitalMixin):
+
+    def setUp(self):
+        super(AssertDeviceCodeIndexTestCase, self).setUp()
+        storage_place = self.create_storage_place(
+            dept=self.dept, parent=self.create_hospital_address(title='信息综合大楼'), title='信息设备存储室'
+        )
+        self.devices = [
+            self.create_assert_device(
+                title='电脑%s' % i, dept=self.dept, storage_place=storage_place, creator=self.admin_staff,
+                assert_no='SCAN%s' % i, bar_code='SCANBC%s' % i, serial_no='SCANSN%s' % i,
+            ) for i in range(3)
+        ]
+
+    def test_lookup_by_codes(self):
+        found = AssertDevice.objects.lookup_by_codes(['SCANBC0', 'SCAN1', 'SCANSN2', 'NOT_EXISTS', 'SCANBC0'])
+        self.assertEqual(
+            dict((code, device.id) for code, device in found.items()),
+            {'SCANBC0': self.devices[0].id, 'SCAN1': self.devices[1].id, 'SCANSN2': self.devices[2].id}
+        )
+        self.assertEqual(AssertDevice.objects.get_assert_device_by_bar_code('SCANBC1').id, self.devices[1].id)
+        self.assertIsNone(AssertDevice.objects.get_assert_device_by_bar_code('SCAN1'))
+        self.assertEqual(AssertDevice.objects.get_assert_device_by_serial_no('SCANSN0').id, self.devices[0].id)
+
+    def test_lookup_without_db_queries(self):
+        codes = ['SCANBC0', 'SCAN1', 'SCANSN2']
+        AssertDevice.objects.lookup_by_codes(codes)
+        # 编码索引及对象缓存均已命中
+        with self.assertNumQueries(0):
+            self.assertEqual(len(AssertDevice.objects.lookup_by_codes(codes)), 3)
+
+    def test_stale_index(self):
+        device = self.devices[0]
+        # QuerySet.update不维护编码索引, 旧条形码的索引项在查询时被校验并删除
+        AssertDevice.objects.filter(id=device.id).update(bar_code='SCANBC0_NEW')
+        self.assertEqual(AssertDevice.objects.lookup_by_codes(['SCANBC0']), {})
+        self.assertEqual(AssertDevice.objects.lookup_by_codes(['SCANBC0_NEW'])['SCANBC0_NEW'].id, device.id)
+        device_ids = code_index.get_device_ids(['SCANBC0', 'SCANBC0_NEW'], ['bar_code'])
+        self.assertEqual(device_ids, {('bar_code', 'SCANBC0_NEW'): device.id})
+
+    def test_delete_device(self):
+        device = self.devices[1]
+        self.assertTrue(device.deleted(self.admin_staff))
+        self.assertEqual(code_index.get_device_ids(['SCAN1', 'SCANBC1', 'SCANSN1'], ['assert_no', 'bar_code', 'serial_no']), {})
+        self.assertEqual(AssertDevice.objects.lookup_by_codes(['SCAN1']), {})
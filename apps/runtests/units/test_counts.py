@@ -0,0 +1,48 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/17
+#
+
+#
+
+import logging
+
+from base.counts import CachedCount, EstimatedCount
+from nmis.hospitals.models import Department
+from runtests import BaseTestCase
+
+logger = logging.getLogger(__name__)
+
+
+class CountStrategyTestCase(BaseTestCase):
+
+    def test_cached_count(self):
+        strategy = CachedCount(timeout=60)
+        queryset = Department.objects.filter(organ=self.organ)
+        total_count, estimated = strategy.count(queryset)
+        self.assertEqual(total_count, queryset.count())
+        self.assertFalse(estimated)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(strategy.count(Department.objects.filter(organ=self.organ))[0], total_count)
+
+        # 新增数据后缓存失效
+        self.create_department(self.organ, dept_name='科室_%s' % self.get_random_suffix())
+        self.assertEqual(strategy.count(Department.objects.filter(organ=self.organ))[0], total_count + 1)
+
+        # 删除数据后缓存失效
+        Department.objects.filter(organ=self.organ).delete()
+        self.assertEqual(strategy.count(Department.objects.filter(organ=self.organ))[0], 0)
+
+    def test_estimated_count_below_threshold(self):
+        strategy = EstimatedCount(threshold=10000)
+        queryset = Department.objects.filter(organ=self.organ)
+        self.assertEqual(strategy.count(queryset), (queryset.count(), False))
+
+    def test_estimated_count_of_subquery(self):
+        """
+        子查询等多表查询不使用EXPLAIN估算值
+        """
+        strategy = EstimatedCount(threshold=0)
+        queryset = Department.objects.filter(id__in=Department.objects.filter(organ=self.organ).values('id'))
+        self.assertEqual(strategy.count(queryset), (queryset.count(), False))
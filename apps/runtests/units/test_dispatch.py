@@ -0,0 +1,86 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/25
+#
+
+"""
+报修单分派队列及自动分派测试
+"""
+
+import datetime
+import logging
+
+from nmis.devices import dispatch as dispatch_queue
+from nmis.devices.consts import PRIORITY_LOW, PRIORITY_MEDIUM, PRIORITY_HIGH, PRIORITY_URGENT, \
+    REPAIR_ORDER_STATUS_DOING, REPAIR_ORDER_DEFAULT_PRIORITY
+from nmis.devices.models import RepairOrder
+from runtests import BaseTestCase
+from runtests.common.mixins import AssertDevicesMixin
+from utils import times
+
+logger = logging.getLogger(__name__)
+
+
+class RepairOrderDispatchTestCase(BaseTestCase, AssertDevicesMixin):
+
+    def setUp(self):
+        super(RepairOrderDispatchTestCase, self).setUp()
+        self.fault_types = self.init_fault_types(self.admin_staff)
+        self.maintainers = [
+            self.create_completed_staff(self.organ, self.dept, name='维修工程师%s' % i) for i in range(2)
+        ]
+
+    def create_order(self, priority=''):
+        success, repair_order = RepairOrder.objects.create_order(
+            self.admin_staff, self.fault_types[0], self.admin_staff, desc='office无法使用', priority=priority
+        )
+        self.assertTrue(success)
+        return repair_order
+
+    def test_queue_order(self):
+        low = self.create_order(PRIORITY_LOW)
+        urgent = self.create_order(PRIORITY_URGENT)
+        unset = self.create_order()
+        # 事务提交后入队
+        self.assertEqual(dispatch_queue.get_queued_ids(10), [])
+        self.run_commit_hooks()
+        self.assertEqual(dispatch_queue.get_queued_ids(10), [urgent.id, unset.id, low.id])
+
+        # 等待足够久的低优先级报修单排在新提交的高优先级报修单之前
+        high = self.create_order(PRIORITY_HIGH)
+        self.run_commit_hooks()
+        RepairOrder.objects.filter(id=low.id).update(created_time=times.now() - datetime.timedelta(days=1))
+        dispatch_queue.enqueue_orders([RepairOrder.objects.get(id=low.id)])
+        self.assertEqual(dispatch_queue.get_queued_ids(10), [low.id, urgent.id, high.id, unset.id])
+
+    def test_auto_dispatch(self):
+        # 维修工程师0已有2个处理中的报修单
+        for _ in range(2):
+            RepairOrder.objects.dispatch_repair_order(
+                self.create_order(), self.admin_staff, self.maintainers[0], PRIORITY_MEDIUM
+            )
+        repair_orders = [self.create_order() for _ in range(3)] + [self.create_order(PRIORITY_URGENT)]
+        self.run_commit_hooks()
+        self.assertEqual(dispatch_queue.get_queue_size(), 4)
+
+        assignments = RepairOrder.objects.auto_dispatch_repair_orders(self.admin_staff, self.maintainers, 10)
+        self.assertEqual(
+            [repair_order.id for repair_order, _ in assignments],
+            [repair_orders[3].id] + [repair_order.id for repair_order in repair_orders[:3]]
+        )
+        self.assertEqual(
+            [maintainer.id for _, maintainer in assignments],
+            [self.maintainers[1].id, self.maintainers[1].id, self.maintainers[0].id, self.maintainers[1].id]
+        )
+        self.assertEqual(
+            RepairOrder.objects.get_maintainer_workloads(self.maintainers),
+            {self.maintainers[0].id: 3, self.maintainers[1].id: 3}
+        )
+
+        repair_order = RepairOrder.objects.get(id=repair_orders[0].id)
+        self.assertEqual(repair_order.status, REPAIR_ORDER_STATUS_DOING)
+        self.assertEqual(repair_order.priority, REPAIR_ORDER_DEFAULT_PRIORITY)
+        self.assertEqual(repair_order.modifier_id, self.admin_staff.id)
+
+        # 已分派的报修单在事务提交后出队(测试中未提交, 为过期项), 自动分派时校验并删除, 队列中已无待分派的报修单
+        self.assertEqual(RepairOrder.objects.auto_dispatch_repair_orders(self.admin_staff, self.maintainers, 10), [])
@@ -0,0 +1,99 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/22
+#
+
+#
+
+import csv
+import io
+import logging
+
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from openpyxl import load_workbook
+
+from base.exports import clean_cell_value, attachment_header
+from nmis.devices.exports import FaultSolutionExporter, AssertDeviceExporter
+from nmis.devices.models import FaultSolution, AssertDevice
+from runtests import BaseTestCase
+from runtests.common.mixins import AssertDevicesMixin, HospitalMixin
+
+logger = logging.getLogger(__name__)
+
+
+def test_clean_cell_value():
+    assert clean_cell_value('故障\x07处理') == '故障处理'
+    assert clean_cell_value(3) == 3
+
+
+def test_attachment_header():
+    assert attachment_header('知识库.xlsx') == \
+        'attachment;filename="%E7%9F%A5%E8%AF%86%E5%BA%93.xlsx";filename*=UTF-8\'\'%E7%9F%A5%E8%AF%86%E5%BA%93.xlsx'
+
+
+class FaultSolutionExporterTestCase(BaseTestCase, AssertDevicesMixin):
+
+    def setUp(self):
+        super(FaultSolutionExporterTestCase, self).setUp()
+        fault_types = self.init_fault_types(self.admin_staff)
+        for i in range(5):
+            self.create_fault_solution(
+                '故障解决方案%s' % i, fault_types[0], '故障描述', '解决方案\x0b%s' % i, self.admin_staff
+            )
+
+    def test_write_xlsx(self):
+        output = io.BytesIO()
+        exporter = FaultSolutionExporter(FaultSolution.objects.order_by('id'))
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(exporter.write_xlsx(output), 5)
+        # 关联字段在同一查询中获取
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+        output.seek(0)
+        rows = list(load_workbook(output).active.values)
+        self.assertEqual(list(rows[0]), exporter.get_headers())
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[1][0], '故障解决方案0')
+        self.assertEqual(rows[1][1], '解决方案0')
+        self.assertEqual(rows[1][3], self.admin_staff.name)
+
+    def test_xlsx_response(self):
+        response = FaultSolutionExporter(FaultSolution.objects.all()).xlsx_response()
+        content = b''.join(response.streaming_content)
+        response.close()
+        self.assertEqual(int(response['Content-Length']), len(content))
+        self.assertEqual(load_workbook(io.BytesIO(content)).active.max_row, 6)
+
+    def test_csv_response(self):
+        response = FaultSolutionExporter(FaultSolution.objects.order_by('id')).csv_response()
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[0][0], '标题')
+        self.assertEqual(rows[5][0], '故障解决方案4')
+
+
+class AssertDeviceExporterTestCase(BaseTestCase, AssertDevicesMixin, HospitalMixin):
+
+    def setUp(self):
+        super(AssertDeviceExporterTestCase, self).setUp()
+        storage_place = self.create_storage_place(
+            dept=self.dept, parent=self.create_hospital_address(title='信息综合大楼'), title='信息设备存储室'
+        )
+        for i in range(5):
+            self.create_assert_device(
+                title='电脑%s' % i, dept=self.dept, storage_place=storage_place, creator=self.admin_staff,
+                assert_no='EXPORT%s' % i, bar_code='EXPORTBC%s' % i, serial_no='EXPORTSN%s' % i,
+            )
+
+    def test_keyset_iter_rows(self):
+        exporter = AssertDeviceExporter(AssertDevice.objects.all())
+        exporter.chunk_size = 2
+        with CaptureQueriesContext(connection) as ctx:
+            rows = list(exporter.iter_rows())
+        # 5行数据分3批查询
+        self.assertEqual(len(ctx.captured_queries), 3)
+        self.assertEqual([row[0] for row in rows], ['EXPORT%s' % i for i in range(4, -1, -1)])
+        self.assertEqual(rows[0][7], None)
+        self.assertEqual(rows[0][13], '信息设备存储室')
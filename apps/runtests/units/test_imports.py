@@ -0,0 +1,99 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/20
+#
+
+#
+
+import logging
+
+from nmis.devices.consts import ASSERT_DEVICE_CATE_INFORMATION
+from nmis.devices.forms import AssertDeviceBatchUploadForm
+from nmis.devices.imports import AssertDeviceImporter
+from nmis.devices.models import AssertDevice
+from runtests import BaseTestCase
+from runtests.common.mixins import AssertDevicesMixin, HospitalMixin
+from utils.eggs import chunked
+
+logger = logging.getLogger(__name__)
+
+
+def test_chunked():
+    assert list(chunked(iter(range(5)), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(chunked([], 2)) == []
+
+
+class AssertDeviceImporterTestCase(BaseTestCase, AssertDevicesMixin, HospitalMixin):
+
+    def setUp(self):
+        super(AssertDeviceImporterTestCase, self).setUp()
+        self.performer = self.create_completed_staff(self.organ, self.dept, name='导入负责人')
+        hospital_address = self.create_hospital_address(title='信息综合大楼')
+        self.storage_place = self.create_storage_place(dept=self.dept, parent=hospital_address, title='导入存储室')
+
+    def make_row(self, i, **kwargs):
+        row_data = {
+            'assert_no': 'IMP%04d' % i, 'title': '电脑%s' % i, 'serial_no': 'IMPSN%04d' % i,
+            'type_spec': 'BN3004', 'service_life': 3, 'performer': self.performer.name,
+            'responsible_dept': self.dept.name, 'use_dept': self.dept.name,
+            'production_date': '2018-09-12', 'bar_code': '', 'status': '使用中',
+            'storage_place': self.storage_place.title, 'producer': '联想', 'purchase_date': '2018-10-09',
+        }
+        row_data.update(kwargs)
+        return row_data
+
+    def test_import_in_chunks(self):
+        rows = [(i + 2, self.make_row(i)) for i in range(5)]
+        rows[3] = (5, self.make_row(3, status='不存在的状态'))   # 第2块中的一行校验失败
+        progress = []
+
+        result = AssertDeviceImporter(
+            iter(rows), creator=self.admin_staff, cate=ASSERT_DEVICE_CATE_INFORMATION,
+            chunk_size=2, expected=len(rows), progress_callback=lambda r: progress.append(r.progress),
+        ).run()
+
+        self.assertEqual(result.total, 5)
+        self.assertEqual(result.imported, 4)
+        self.assertEqual(result.failed, 1)
+        self.assertEqual(progress, [40, 80, 100])
+        self.assertEqual(result.errors[0].row_no, 5)
+        self.assertEqual(result.errors[0].field, 'status')
+        self.assertEqual(
+            set(AssertDevice.objects.filter(assert_no__startswith='IMP').values_list('assert_no', flat=True)),
+            {'IMP0000', 'IMP0001', 'IMP0002', 'IMP0004'}
+        )
+
+    def test_collect_all_row_errors(self):
+        self.create_assert_device(
+            title='已有设备', dept=self.dept, storage_place=self.storage_place, creator=self.admin_staff,
+            assert_no='IMP0000', bar_code='IMPBC0000', serial_no='IMPSN_EXISTS',
+        )
+        data = [
+            self.make_row(0),                                       # 资产编号已存在
+            self.make_row(1, use_dept='不存在的科室', title=''),     # 同一行多个错误
+            self.make_row(2),
+            self.make_row(3, serial_no='IMPSN0002'),                # 序列号与表中第4行重复
+        ]
+        form = AssertDeviceBatchUploadForm(data, creator=self.admin_staff, cate=ASSERT_DEVICE_CATE_INFORMATION)
+        self.assertFalse(form.is_valid())
+        self.assertEqual(
+            sorted((row_no, field) for row_no, field, _ in form.row_errors),
+            [(2, 'assert_no'), (3, 'assert_title'), (3, 'use_dept'), (5, 'serial_no')]
+        )
+        self.assertEqual(form.valid_count, 1)
+        self.assertTrue(form.save())
+        self.assertTrue(AssertDevice.objects.filter(assert_no='IMP0002').exists())
+
+    def test_existing_value_differs_in_case(self):
+        """
+        测试表中资产编号与系统中已有编号仅大小写不同时记录为行错误
+        """
+        self.create_assert_device(
+            title='已有设备', dept=self.dept, storage_place=self.storage_place, creator=self.admin_staff,
+            assert_no='IMPAB-001', serial_no='IMPSN_EXISTS',
+        )
+        data = [self.make_row(0, assert_no='impab-001'), self.make_row(1)]
+        form = AssertDeviceBatchUploadForm(data, creator=self.admin_staff, cate=ASSERT_DEVICE_CATE_INFORMATION)
+        self.assertFalse(form.is_valid())
+        self.assertEqual([(row_no, field) for row_no, field, _ in form.row_errors], [(2, 'assert_no')])
+        self.assertEqual(form.valid_count, 1)
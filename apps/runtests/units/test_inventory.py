@@ -0,0 +1,73 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/23
+#
+
+#
+
+import logging
+
+from nmis.devices.consts import ASSERT_DEVICE_INVENTORY_HOSPITAL, ASSERT_DEVICE_INVENTORY_USE_DEPT, \
+    ASSERT_DEVICE_INVENTORY_STORAGE_PLACE, ASSERT_DEVICE_STATUS_USING, ASSERT_DEVICE_STATUS_SCRAPPED, \
+    ASSERT_DEVICE_CATE_INFORMATION, ASSERT_DEVICE_CATE_MEDICAL
+from nmis.devices.models import AssertDevice, AssertDeviceInventory
+from runtests import BaseTestCase
+from runtests.common.mixins import AssertDevicesMixin, HospitalMixin
+
+logger = logging.getLogger(__name__)
+
+
+class AssertDeviceInventoryTestCase(BaseTestCase, AssertDevicesMixin, HospitalMixin):
+
+    def setUp(self):
+        super(AssertDeviceInventoryTestCase, self).setUp()
+        self.building = self.create_hospital_address(title='信息综合大楼')
+        self.storage_place = self.create_storage_place(dept=self.dept, parent=self.building, title='信息设备存储室')
+        self.devices = [
+            self.create_assert_device(
+                title='电脑%s' % i, dept=self.dept, storage_place=self.storage_place, creator=self.admin_staff,
+                assert_no='INV%s' % i, bar_code='INVBC%s' % i, serial_no='INVSN%s' % i,
+            ) for i in range(3)
+        ]
+
+    def get_summary(self, dimension, cate=None):
+        return {group['group_id']: group for group in AssertDeviceInventory.objects.get_summary(dimension, cate)}
+
+    def test_track_create(self):
+        hospital = self.get_summary(ASSERT_DEVICE_INVENTORY_HOSPITAL)
+        self.assertEqual(hospital[0]['total'], 3)
+        self.assertEqual(hospital[0]['status'], {ASSERT_DEVICE_STATUS_USING: 3})
+
+        # 设备同时计入存放地点及其上级地址
+        places = self.get_summary(ASSERT_DEVICE_INVENTORY_STORAGE_PLACE)
+        self.assertEqual(places[self.storage_place.id]['total'], 3)
+        self.assertEqual(places[self.building.id]['total'], 3)
+        self.assertFalse(self.get_summary(ASSERT_DEVICE_INVENTORY_HOSPITAL, cate=ASSERT_DEVICE_CATE_MEDICAL))
+        self.assertEqual(self.get_summary(ASSERT_DEVICE_INVENTORY_USE_DEPT)[0]['total'], 3)
+
+    def test_track_allocate_scrap_delete(self):
+        use_dept = self.create_department(self.organ, dept_name='使用科室')
+        AssertDevice.objects.update_assert_devices_use_dept(self.devices[:2], use_dept, self.admin_staff)
+        depts = self.get_summary(ASSERT_DEVICE_INVENTORY_USE_DEPT)
+        self.assertEqual(depts[use_dept.id]['total'], 2)
+        self.assertEqual(depts[0]['total'], 1)
+
+        self.assertTrue(self.devices[0].assert_device_scrapped(self.admin_staff))
+        hospital = self.get_summary(ASSERT_DEVICE_INVENTORY_HOSPITAL, cate=ASSERT_DEVICE_CATE_INFORMATION)
+        self.assertEqual(hospital[0]['status'], {ASSERT_DEVICE_STATUS_USING: 2, ASSERT_DEVICE_STATUS_SCRAPPED: 1})
+
+        self.assertTrue(self.devices[2].deleted(self.admin_staff))
+        depts = self.get_summary(ASSERT_DEVICE_INVENTORY_USE_DEPT)
+        self.assertNotIn(0, depts)
+        self.assertEqual(self.get_summary(ASSERT_DEVICE_INVENTORY_HOSPITAL)[0]['total'], 2)
+        self.assertEqual(AssertDeviceInventory.objects.rebuild(), 0)
+
+    def test_rebuild(self):
+        # 直接修改数据库数据后对账修正
+        AssertDevice.objects.filter(id=self.devices[0].id).update(status=ASSERT_DEVICE_STATUS_SCRAPPED)
+        AssertDeviceInventory.objects.all().delete()
+        self.assertTrue(AssertDeviceInventory.objects.rebuild() > 0)
+        hospital = self.get_summary(ASSERT_DEVICE_INVENTORY_HOSPITAL)
+        self.assertEqual(hospital[0]['status'], {ASSERT_DEVICE_STATUS_USING: 2, ASSERT_DEVICE_STATUS_SCRAPPED: 1})
+        self.assertEqual(self.get_summary(ASSERT_DEVICE_INVENTORY_STORAGE_PLACE)[self.building.id]['total'], 3)
+        self.assertEqual(AssertDeviceInventory.objects.rebuild(), 0)
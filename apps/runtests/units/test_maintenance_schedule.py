@@ -0,0 +1,151 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/25
+#
+
+"""
+维护计划周期生成及到期分组查询测试
+"""
+
+import datetime
+import logging
+
+from dateutil.relativedelta import relativedelta
+
+from nmis.devices.consts import MAINTENANCE_PLAN_PERIOD_MEASURE_WEEK, MAINTENANCE_PLAN_PERIOD_MEASURE_MONTH, \
+    MAINTENANCE_PLAN_STATUS_NEW, MAINTENANCE_PLAN_STATUS_DONE, MAINTENANCE_PLAN_EXPIRED_DATE_BE_OVERDUE, \
+    MAINTENANCE_PLAN_EXPIRED_DATE_NOW_DAY, MAINTENANCE_PLAN_EXPIRED_DATE_THREE_DAY, \
+    MAINTENANCE_PLAN_EXPIRED_DATE_ON_WEEK, MAINTENANCE_PLAN_EXPIRED_DATE_ON_MONTH
+from nmis.devices.models import MaintenancePlan, MaintenancePlanOccurrence
+from runtests import BaseTestCase
+from runtests.common.mixins import AssertDevicesMixin
+from utils import times
+
+logger = logging.getLogger(__name__)
+
+
+class MaintenancePlanScheduleTestCase(BaseTestCase, AssertDevicesMixin):
+
+    def setUp(self):
+        super(MaintenancePlanScheduleTestCase, self).setUp()
+        self.today = datetime.datetime.combine(times.today(), datetime.time.min)
+
+    def create_plan(self, days, start_days=0, period_measure=None, period_num=None):
+        data = {
+            'title': '维护计划', 'type': 'PL',
+            'start_date': self.today + datetime.timedelta(days=start_days),
+            'expired_date': self.today + datetime.timedelta(days=days),
+            'executor': self.admin_staff, 'creator': self.admin_staff,
+        }
+        if period_measure:
+            data.update({'period_measure': period_measure, 'period_num': period_num})
+        plan = MaintenancePlan.objects.create_maintenance_plan([], [], **data)
+        self.assertIsNotNone(plan)
+        return plan
+
+    def get_due_dates(self, plan):
+        return list(plan.occurrences.order_by('seq').values_list('due_date', flat=True))
+
+    def test_schedule_single_period(self):
+        plan = self.create_plan(20)
+        self.assertEqual(self.get_due_dates(plan), [plan.expired_date])
+
+    def test_schedule_periodic(self):
+        plan = self.create_plan(30, period_measure=MAINTENANCE_PLAN_PERIOD_MEASURE_WEEK, period_num=1)
+        self.assertEqual(self.get_due_dates(plan), [
+            self.today + datetime.timedelta(days=7), self.today + datetime.timedelta(days=14),
+            self.today + datetime.timedelta(days=21), self.today + datetime.timedelta(days=28),
+            self.today + datetime.timedelta(days=30),
+        ])
+        self.assertEqual(
+            list(plan.occurrences.order_by('seq').values_list('seq', flat=True)), [0, 1, 2, 3, 4]
+        )
+
+        # 重复生成不产生新周期
+        self.assertEqual(MaintenancePlanOccurrence.objects.schedule_plans([plan]), 0)
+        self.assertEqual(MaintenancePlanOccurrence.objects.roll_horizon(), 0)
+
+    def test_roll_horizon(self):
+        plan = self.create_plan(365, period_measure=MAINTENANCE_PLAN_PERIOD_MEASURE_MONTH, period_num=1)
+        # 仅生成滚动范围内的周期
+        self.assertEqual(len(self.get_due_dates(plan)), 2)
+
+        horizon = times.now() + datetime.timedelta(days=100)
+        self.assertEqual(MaintenancePlanOccurrence.objects.schedule_plans([plan], horizon=horizon), 1)
+        self.assertEqual(self.get_due_dates(plan)[-1], plan.start_date + relativedelta(months=3))
+        self.assertEqual(list(plan.occurrences.values_list('seq', flat=True).order_by('seq')), [0, 1, 2])
+
+        # 已执行的计划不再生成周期
+        MaintenancePlan.objects.filter(id=plan.id).update(status=MAINTENANCE_PLAN_STATUS_DONE)
+        horizon = times.now() + datetime.timedelta(days=400)
+        plan = MaintenancePlan.objects.get(id=plan.id)
+        self.assertEqual(MaintenancePlanOccurrence.objects.schedule_plans([plan], horizon=horizon), 0)
+
+    def test_due_buckets(self):
+        overdue_plan = self.create_plan(-1, start_days=-10)
+        tomorrow_plan = self.create_plan(1)
+        self.create_plan(20)
+
+        def get_plan_ids(bucket):
+            return set(MaintenancePlanOccurrence.objects.get_due_queryset(bucket).values_list('plan_id', flat=True))
+
+        self.assertEqual(get_plan_ids(MAINTENANCE_PLAN_EXPIRED_DATE_BE_OVERDUE), {overdue_plan.id})
+        self.assertEqual(get_plan_ids(MAINTENANCE_PLAN_EXPIRED_DATE_NOW_DAY), set())
+        self.assertEqual(get_plan_ids(MAINTENANCE_PLAN_EXPIRED_DATE_THREE_DAY), {tomorrow_plan.id})
+        self.assertEqual(get_plan_ids(MAINTENANCE_PLAN_EXPIRED_DATE_ON_WEEK), {tomorrow_plan.id})
+        self.assertEqual(len(get_plan_ids(MAINTENANCE_PLAN_EXPIRED_DATE_ON_MONTH)), 2)
+
+        self.assertEqual(MaintenancePlanOccurrence.objects.count_due_buckets(), [
+            {'bucket': MAINTENANCE_PLAN_EXPIRED_DATE_BE_OVERDUE, 'count': 1},
+            {'bucket': MAINTENANCE_PLAN_EXPIRED_DATE_NOW_DAY, 'count': 0},
+            {'bucket': MAINTENANCE_PLAN_EXPIRED_DATE_THREE_DAY, 'count': 1},
+            {'bucket': MAINTENANCE_PLAN_EXPIRED_DATE_ON_WEEK, 'count': 1},
+            {'bucket': MAINTENANCE_PLAN_EXPIRED_DATE_ON_MONTH, 'count': 2},
+        ])
+
+        # 已执行的周期不计入
+        self.assertTrue(tomorrow_plan.change_status('已执行'))
+        self.assertEqual(get_plan_ids(MAINTENANCE_PLAN_EXPIRED_DATE_THREE_DAY), set())
+
+    def test_execute_periodic_plan(self):
+        plan = self.create_plan(30, period_measure=MAINTENANCE_PLAN_PERIOD_MEASURE_WEEK, period_num=1)
+        for i in range(4):
+            self.assertTrue(plan.change_status('已执行'))
+            self.assertEqual(MaintenancePlan.objects.get(id=plan.id).status, MAINTENANCE_PLAN_STATUS_NEW)
+        self.assertEqual(plan.occurrences.filter(status=MAINTENANCE_PLAN_STATUS_DONE).count(), 4)
+
+        # 最后一个周期执行后计划为已执行
+        self.assertTrue(plan.change_status('已执行'))
+        self.assertEqual(MaintenancePlan.objects.get(id=plan.id).status, MAINTENANCE_PLAN_STATUS_DONE)
+
+    def test_execute_beyond_horizon(self):
+        plan = self.create_plan(365, period_measure=MAINTENANCE_PLAN_PERIOD_MEASURE_MONTH, period_num=1)
+        for i in range(3):
+            self.assertTrue(plan.change_status('已执行'))
+        # 提前执行超出滚动范围的周期时生成下一个周期, 计划仍为未执行
+        self.assertEqual(plan.occurrences.count(), 3)
+        self.assertEqual(MaintenancePlan.objects.get(id=plan.id).status, MAINTENANCE_PLAN_STATUS_NEW)
+
+    def test_plan_list_period_filter(self):
+        # 周期计划已执行过去的周期, 不属于逾期
+        periodic_plan = self.create_plan(30, start_days=-8, period_measure=MAINTENANCE_PLAN_PERIOD_MEASURE_WEEK,
+                                         period_num=1)
+        self.assertTrue(periodic_plan.change_status('已执行'))
+        # 已执行且无周期数据的历史计划按计划截止日期筛选
+        done_plan = MaintenancePlan.objects.create(
+            plan_no='HISTORY0001', title='历史维护计划', start_date=self.today - datetime.timedelta(days=10),
+            expired_date=self.today - datetime.timedelta(days=2), executor=self.admin_staff,
+            creator=self.admin_staff, status=MAINTENANCE_PLAN_STATUS_DONE,
+        )
+
+        def get_plan_ids(period, status=None):
+            return set(MaintenancePlan.objects.get_maintenance_plan_list(period=period, status=status)
+                       .values_list('id', flat=True))
+
+        self.assertEqual(get_plan_ids(MAINTENANCE_PLAN_EXPIRED_DATE_BE_OVERDUE), {done_plan.id})
+        self.assertEqual(
+            get_plan_ids(MAINTENANCE_PLAN_EXPIRED_DATE_BE_OVERDUE, status=MAINTENANCE_PLAN_STATUS_DONE), {done_plan.id}
+        )
+        # 下一个未执行周期6天后到期
+        self.assertEqual(get_plan_ids(MAINTENANCE_PLAN_EXPIRED_DATE_ON_WEEK), {periodic_plan.id})
+        self.assertEqual(get_plan_ids(MAINTENANCE_PLAN_EXPIRED_DATE_THREE_DAY), set())
@@ -0,0 +1,59 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/12
+#
+
+#
+
+import logging
+
+from nmis.hospitals.consts import ROLE_CODE_HOSP_SUPER_ADMIN, ROLE_CODE_NORMAL_STAFF
+from nmis.hospitals.models import Role
+from runtests import BaseTestCase
+from users.models import User
+from users.perms import get_role_version
+
+logger = logging.getLogger(__name__)
+
+
+class UserPermsTestCase(BaseTestCase):
+
+    def test_has_role_codename_cached(self):
+        user = User.objects.get(id=self.user.id)
+        self.assertTrue(user.has_role_codename(ROLE_CODE_HOSP_SUPER_ADMIN))
+        self.assertFalse(user.has_role_codename('NOT_EXISTS'))
+
+        # 同一请求内: 集合查找, 不再查库
+        with self.assertNumQueries(0):
+            self.assertTrue(user.has_role_codename(ROLE_CODE_NORMAL_STAFF, ROLE_CODE_HOSP_SUPER_ADMIN))
+
+        # 跨请求: 从Redis中读取快照
+        user = User.objects.get(id=self.user.id)
+        with self.assertNumQueries(0):
+            self.assertTrue(user.has_role_codename(ROLE_CODE_HOSP_SUPER_ADMIN))
+
+    def test_perms_dept_domains(self):
+        perms = User.objects.get(id=self.user.id).get_perms()
+        for role_id in perms.role_ids:
+            self.assertEqual(perms.get_role_dept_ids(role_id), [self.dept.id])
+        self.assertTrue(perms.perm_ids)
+
+    def test_assign_roles_bump_version(self):
+        user = User.objects.get(id=self.user.id)
+        self.assertTrue(user.has_role_codename(ROLE_CODE_HOSP_SUPER_ADMIN))
+
+        version = get_role_version()
+        normal_role = Role.objects.get_role_by_keyword(codename=ROLE_CODE_NORMAL_STAFF)
+        success, _ = User.objects.assign_roles([self.user], [normal_role])
+        self.assertTrue(success)
+        self.assertGreater(get_role_version(), version)
+
+        user = User.objects.get(id=self.user.id)
+        self.assertFalse(user.has_role_codename(ROLE_CODE_HOSP_SUPER_ADMIN))
+        self.assertTrue(user.has_role(normal_role))
+
+    def test_snapshot_not_pickled(self):
+        self.user.has_role_codename(ROLE_CODE_HOSP_SUPER_ADMIN)
+        self.user.cache()
+        cached_user = User.objects.get_cached(self.user.id)
+        self.assertFalse(hasattr(cached_user, '_cached_perms'))
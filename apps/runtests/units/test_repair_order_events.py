@@ -0,0 +1,84 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/25
+#
+
+"""
+报修单状态变更事件测试
+"""
+
+import logging
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from nmis.devices.consts import PRIORITY_HIGH, REPAIR_ORDER_OPERATION_SUBMIT, REPAIR_ORDER_OPERATION_DISPATCH, \
+    REPAIR_ORDER_OPERATION_HANDLE, REPAIR_ORDER_OPERATION_COMMENT
+from nmis.devices.events import RepairOrderEvent, send_notices
+from nmis.devices.models import RepairOrder, RepairOrderRecord
+from nmis.notices.models import Notice
+from runtests import BaseTestCase
+from runtests.common.mixins import AssertDevicesMixin
+
+logger = logging.getLogger(__name__)
+
+
+class RepairOrderEventTestCase(BaseTestCase, AssertDevicesMixin):
+
+    def setUp(self):
+        super(RepairOrderEventTestCase, self).setUp()
+        self.fault_types = self.init_fault_types(self.admin_staff)
+        self.maintainer = self.create_completed_staff(self.organ, self.dept, name='维修工程师')
+        success, self.repair_order = RepairOrder.objects.create_order(
+            self.admin_staff, self.fault_types[0], self.admin_staff, desc='office无法使用'
+        )
+        self.assertTrue(success)
+
+    def get_operations(self):
+        return list(
+            RepairOrderRecord.objects.filter(repair_order=self.repair_order).order_by('id')
+            .values_list('operation', flat=True)
+        )
+
+    def test_transitions(self):
+        self.assertEqual(self.get_operations(), [REPAIR_ORDER_OPERATION_SUBMIT])
+
+        with CaptureQueriesContext(connection) as ctx:
+            RepairOrder.objects.dispatch_repair_order(
+                self.repair_order, self.admin_staff, self.maintainer, PRIORITY_HIGH
+            )
+        # 分派的查询数为常数: 更新报修单及写入操作记录(含savepoint)
+        self.assertLessEqual(len(ctx), 5)
+
+        record = RepairOrderRecord.objects.filter(
+            repair_order=self.repair_order, operation=REPAIR_ORDER_OPERATION_DISPATCH
+        ).first()
+        self.assertEqual(record.receiver_id, self.maintainer.id)
+        self.assertIn(self.repair_order.order_no, record.msg_content)
+
+        # 与状态变更无关的保存不再产生操作记录
+        self.repair_order.update({'desc': '鼠标无法使用'})
+        self.assertEqual(self.get_operations(), [REPAIR_ORDER_OPERATION_SUBMIT, REPAIR_ORDER_OPERATION_DISPATCH])
+
+        RepairOrder.objects.handle_repair_order(self.repair_order, self.maintainer, '已更换鼠标')
+        RepairOrder.objects.comment_repair_order(
+            self.repair_order, self.admin_staff, comment_grade=5, comment_content='满意'
+        )
+        self.assertEqual(self.get_operations(), [
+            REPAIR_ORDER_OPERATION_SUBMIT, REPAIR_ORDER_OPERATION_DISPATCH,
+            REPAIR_ORDER_OPERATION_HANDLE, REPAIR_ORDER_OPERATION_COMMENT,
+        ])
+
+    def test_notices(self):
+        RepairOrder.objects.dispatch_repair_order(self.repair_order, self.admin_staff, self.maintainer, PRIORITY_HIGH)
+        event = RepairOrderEvent(
+            self.repair_order, REPAIR_ORDER_OPERATION_DISPATCH, self.admin_staff, receiver=self.maintainer
+        )
+        notices = event.get_notices()
+        self.assertEqual(
+            [notice['staff_ids'] for notice in notices], [[self.maintainer.id], [self.admin_staff.id]]
+        )
+
+        # TestCase中事务不会提交, 直接推送(notice_celery_app测试时为eager模式)
+        send_notices(notices)
+        self.assertEqual(Notice.objects.count(), 2)
@@ -0,0 +1,99 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/25
+#
+
+"""
+报修单每日统计测试
+"""
+
+import logging
+
+from nmis.devices.consts import PRIORITY_HIGH, REPAIR_ORDER_STATUS_SUBMITTED, REPAIR_ORDER_STATUS_DONE, \
+    REPAIR_ORDER_STATUS_DOING
+from nmis.devices.models import RepairOrder, RepairOrderDailyStat
+from nmis.hospitals.models import Staff
+from runtests import BaseTestCase
+from runtests.common.mixins import AssertDevicesMixin
+from utils import times
+
+logger = logging.getLogger(__name__)
+
+
+class RepairOrderDailyStatTestCase(BaseTestCase, AssertDevicesMixin):
+
+    def setUp(self):
+        super(RepairOrderDailyStatTestCase, self).setUp()
+        self.fault_types = self.init_fault_types(self.admin_staff)
+        self.maintainer = self.create_completed_staff(self.organ, self.dept, name='维修工程师')
+        self.today = times.today()
+
+    def create_order(self, fault_type):
+        success, repair_order = RepairOrder.objects.create_order(
+            self.admin_staff, fault_type, self.admin_staff, desc='office无法使用'
+        )
+        self.assertTrue(success)
+        return repair_order
+
+    def get_stats(self):
+        return sorted(RepairOrderDailyStat.objects.filter(count__gt=0).values_list(
+            'date', 'status', 'fault_type_id', 'dept_id', 'count'
+        ))
+
+    def test_track_transitions(self):
+        self.create_order(self.fault_types[0])
+        repair_order = self.create_order(self.fault_types[1])
+        RepairOrder.objects.dispatch_repair_order(repair_order, self.admin_staff, self.maintainer, PRIORITY_HIGH)
+        RepairOrder.objects.handle_repair_order(repair_order, self.maintainer, '已处理')
+
+        report = RepairOrderDailyStat.objects.get_report(self.today, self.today)
+        self.assertEqual(report['rp_order_nums_status'], [
+            {'status': REPAIR_ORDER_STATUS_DONE, 'nums': 1}, {'status': REPAIR_ORDER_STATUS_SUBMITTED, 'nums': 1},
+        ])
+        self.assertEqual(
+            sorted(row['fault_type_title'] for row in report['rp_order_nums_fault_type']),
+            sorted([self.fault_types[0].title, self.fault_types[1].title])
+        )
+        self.assertEqual(report['rp_order_nums_top_dept'], [{'dept': self.dept.name, 'nums': 2}])
+        self.assertGreaterEqual(report['mean_time_to_dispatch'], 0)
+        self.assertGreaterEqual(report['mean_time_to_repair'], 0)
+
+        # 其他日期无数据
+        report = RepairOrderDailyStat.objects.get_report(times.yesterday(), times.yesterday())
+        self.assertEqual(report['rp_order_nums_status'], [])
+        self.assertIsNone(report['mean_time_to_dispatch'])
+
+    def test_rebuild(self):
+        self.create_order(self.fault_types[0])
+        repair_order = self.create_order(self.fault_types[0])
+        RepairOrder.objects.dispatch_repair_order(repair_order, self.admin_staff, self.maintainer, PRIORITY_HIGH)
+        expected = self.get_stats()
+
+        # 重建结果与增量更新一致
+        RepairOrderDailyStat.objects.all().delete()
+        self.assertEqual(RepairOrderDailyStat.objects.rebuild(), 2)
+        self.assertEqual(self.get_stats(), expected)
+        report = RepairOrderDailyStat.objects.get_report(self.today, self.today)
+        self.assertIsNotNone(report['mean_time_to_dispatch'])
+        self.assertIsNone(report['mean_time_to_repair'])
+
+        # 回填未经状态变更事件写入的报修单
+        self.create_repair_order(self.admin_staff, self.fault_types[1], '呼吸机无法使用', self.admin_staff, 'BX0001')
+        self.assertEqual(RepairOrderDailyStat.objects.rebuild(self.today, self.today), 3)
+        report = RepairOrderDailyStat.objects.get_report(self.today, self.today)
+        self.assertEqual(sum(row['nums'] for row in report['rp_order_nums_status']), 3)
+
+    def test_applicant_changes_dept(self):
+        repair_order = self.create_order(self.fault_types[0])
+        self.assertEqual(repair_order.applicant_dept_id, self.dept.id)
+
+        # 申请人调动科室后, 后续状态变更仍计入提交时的科室分组
+        other_dept = self.create_department(self.organ, dept_name='其他科室')
+        Staff.objects.filter(id=self.admin_staff.id).update(dept=other_dept)
+        repair_order = RepairOrder.objects.get(id=repair_order.id)
+        RepairOrder.objects.dispatch_repair_order(repair_order, self.admin_staff, self.maintainer, PRIORITY_HIGH)
+        self.assertEqual(
+            list(RepairOrderDailyStat.objects.filter(count__gt=0).values_list('dept_id', 'status', 'count')),
+            [(self.dept.id, REPAIR_ORDER_STATUS_DOING, 1)]
+        )
+        self.assertFalse(RepairOrderDailyStat.objects.filter(count__lt=0).exists())
@@ -0,0 +1,89 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/15
+#
+
+#
+
+import logging
+
+from base import resp
+from base.audits import SerializeRecord, audit_serializer_queries, find_n_plus_one
+from base.resp import SerializerRegistry, serializer_registry
+from nmis.devices.models import FaultSolution
+from nmis.devices.serializers import FaultSolutionSerializer
+from nmis.documents.models import File
+from nmis.hospitals.models import Department
+from nmis.hospitals.serializers import DepartmentSerializer, SimpleDepartmentSerializer
+from runtests import BaseTestCase
+from runtests.common.mixins import AssertDevicesMixin
+
+logger = logging.getLogger(__name__)
+
+
+def test_serializer_registry_resolve():
+    assert serializer_registry.get(Department) is DepartmentSerializer
+    assert serializer_registry.get(
+        Department, srl_cls_name='SimpleDepartmentSerializer') is SimpleDepartmentSerializer
+    assert serializer_registry.get(
+        Department, app_name='nmis.hospitals', srl_cls_name='SimpleDepartmentSerializer') is SimpleDepartmentSerializer
+
+
+def test_serializer_registry_register():
+    registry = SerializerRegistry()
+    registry.register(Department, SimpleDepartmentSerializer)
+    assert registry.get(Department) is SimpleDepartmentSerializer
+
+
+def test_find_n_plus_one():
+    records = [
+        SerializeRecord('ASerializer', 10, 10),     # 每个对象一次查询
+        SerializeRecord('BSerializer', 1, 1),
+        SerializeRecord('BSerializer', 5, 5),       # 查询数随对象数增长
+        SerializeRecord('CSerializer', 1, 2),
+        SerializeRecord('CSerializer', 50, 2),      # 查询数固定
+    ]
+    assert find_n_plus_one(records) == ['ASerializer', 'BSerializer']
+
+
+class SerializeQueryAuditTestCase(BaseTestCase):
+
+    def test_detect_n_plus_one(self):
+        for i in range(3):
+            self.create_department(self.organ, dept_name='科室_%s_%s' % (i, self.get_random_suffix()))
+
+        with audit_serializer_queries() as auditor:
+            resp.serialize_data(Department.objects.filter(organ=self.organ))
+        self.assertEqual(auditor.find_n_plus_one(), ['DepartmentSerializer'])
+
+        with audit_serializer_queries() as auditor:
+            resp.serialize_data(DepartmentSerializer.setup_eager_loading(Department.objects.filter(organ=self.organ)))
+        self.assertEqual(auditor.records[0].queries, 0)
+        self.assertEqual(auditor.find_n_plus_one(), [])
+
+
+class PrefetchListSerializerTestCase(BaseTestCase, AssertDevicesMixin):
+
+    def test_batch_load_files(self):
+        fault_types = self.init_fault_types(self.admin_staff)
+        for i in range(4):
+            files = [
+                File.objects.create(name='附件_%s_%s' % (i, j), path='/upload/%s_%s.pdf' % (i, j), creator=self.user)
+                for j in range(2)
+            ]
+            solution = self.create_fault_solution('方案_%s' % i, fault_types[0], 'desc', 'solution', self.admin_staff)
+            solution.files = ','.join(str(f.id) for f in files)
+            solution.save()
+        self.create_fault_solution('无附件方案', fault_types[0], 'desc', 'solution', self.admin_staff)
+
+        solutions = FaultSolutionSerializer.setup_eager_loading(FaultSolution.objects.order_by('id'))
+        with audit_serializer_queries() as auditor:
+            data = resp.serialize_data(solutions)
+        self.assertEqual(auditor.find_n_plus_one(), [])
+        self.assertEqual(len(data), 5)
+        self.assertEqual([f['name'] for f in data[1]['files']], ['附件_1_0', '附件_1_1'])
+        self.assertEqual(data[4]['files'], [])
+
+        # 序列化单个对象
+        single = resp.serialize_data(FaultSolution.objects.get(id=data[2]['id']))
+        self.assertEqual(single['files'], data[2]['files'])
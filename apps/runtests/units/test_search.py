@@ -0,0 +1,75 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/19
+#
+
+#
+
+import logging
+
+from nmis.devices.consts import ASSERT_DEVICE_STATUS_FREE, ASSERT_DEVICE_STATUS_SCRAPPED
+from nmis.devices.models import AssertDevice, AssertDeviceSearchToken
+from runtests import BaseTestCase
+from runtests.common.mixins import AssertDevicesMixin, HospitalMixin
+
+logger = logging.getLogger(__name__)
+
+
+class AssertDeviceSearchTestCase(BaseTestCase, AssertDevicesMixin, HospitalMixin):
+
+    def setUp(self):
+        super(AssertDeviceSearchTestCase, self).setUp()
+        hospital_address = self.create_hospital_address(title='信息综合大楼')
+        self.storage_place = self.create_storage_place(dept=self.dept, parent=hospital_address, title='设备存储室')
+
+    def _create_device(self, title, assert_no, serial_no, bar_code):
+        return self.create_assert_device(
+            title=title, dept=self.dept, storage_place=self.storage_place, creator=self.admin_staff,
+            assert_no=assert_no, bar_code=bar_code, serial_no=serial_no,
+        )
+
+    def test_search_device_ids(self):
+        monitor = self._create_device('多参数监护仪', 'ZC0001', 'SN1001', 'BC2001')
+        ultrasound = self._create_device('彩色超声诊断仪', 'ZC0002', 'SN1002', 'BC2002')
+        monitor_two = self._create_device('监护仪', 'ZC00021', 'SN1003', 'BC2003')
+
+        search = AssertDeviceSearchToken.objects.search_device_ids
+        self.assertEqual(set(search('监护仪')), {monitor.id, monitor_two.id})
+        self.assertEqual(search('监护仪')[0], monitor_two.id)        # 完全相同排在前面
+        self.assertEqual(search('zc0002'), [ultrasound.id, monitor_two.id])
+        self.assertEqual(search('sn1002'), [ultrasound.id])
+        self.assertEqual(search('超声诊'), [ultrasound.id])
+        self.assertEqual(search('超诊'), [])                       # 词元不连续
+        self.assertIsNone(search('仪'))                             # 关键词过短
+
+        # 修改设备后索引同步更新
+        ultrasound.title = '呼吸机'
+        ultrasound.save()
+        self.assertEqual(search('超声诊'), [])
+        self.assertEqual(search('呼吸'), [ultrasound.id])
+
+        # 列表查询按相关度排序
+        devices = AssertDevice.objects.get_assert_devices(search_key='监护仪')
+        self.assertEqual([device.id for device in devices], [monitor_two.id, monitor.id])
+        devices = AssertDevice.objects.get_assert_devices(search_key='仪')
+        self.assertEqual({device.id for device in devices}, {monitor.id, monitor_two.id})
+
+        # 其他筛选条件与搜索作用于同一查询, 结果不截断
+        AssertDevice.objects.filter(id=monitor_two.id).update(status=ASSERT_DEVICE_STATUS_FREE)
+        devices = AssertDevice.objects.get_assert_devices(search_key='监护仪', status=[ASSERT_DEVICE_STATUS_FREE])
+        self.assertEqual([device.id for device in devices], [monitor_two.id])
+        self.assertEqual(
+            AssertDevice.objects.get_assert_devices(search_key='监护仪', status=[ASSERT_DEVICE_STATUS_SCRAPPED]).count(), 0
+        )
+
+    def test_bulk_create_index(self):
+        devices = [
+            AssertDevice(
+                title='输液泵_%s' % i, assert_no='BULK%04d' % i, serial_no='BULKSN%04d' % i, type_spec='BN3004',
+                production_date='2018-09-12', purchase_date='2018-10-09', creator=self.admin_staff,
+            ) for i in range(5)
+        ]
+        self.assertTrue(AssertDevice.objects.bulk_create_assert_device(devices))
+        self.assertEqual(len(AssertDeviceSearchToken.objects.search_device_ids('输液泵')), 5)
+        device_ids = AssertDeviceSearchToken.objects.search_device_ids('bulksn0003')
+        self.assertEqual(AssertDevice.objects.get(id=device_ids[0]).assert_no, 'BULK0003')
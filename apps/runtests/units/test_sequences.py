@@ -0,0 +1,63 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/24
+#
+
+#
+
+import logging
+
+from django_redis import get_redis_connection
+
+from nmis.devices.consts import REPAIR_ORDER_NO_PREFIX, REPAIR_ORDER_NO_SEQ_CODE
+from nmis.devices.models import RepairOrder
+from nmis.hospitals.models import Sequence
+from runtests import BaseTestCase
+from runtests.common.mixins import AssertDevicesMixin
+from utils import times
+
+logger = logging.getLogger(__name__)
+
+
+class DailySequenceTestCase(BaseTestCase, AssertDevicesMixin):
+
+    def setUp(self):
+        super(DailySequenceTestCase, self).setUp()
+        self.fault_types = self.init_fault_types(self.admin_staff)
+        self.day = times.datetime_to_str(times.now(), format='%Y%m%d')
+        self.day_prefix = REPAIR_ORDER_NO_PREFIX + self.day
+
+    def create_order(self):
+        success, repair_order = RepairOrder.objects.create_order(
+            self.admin_staff, self.fault_types[0], self.admin_staff, desc='office无法使用'
+        )
+        self.assertTrue(success)
+        return repair_order
+
+    def test_next_daily_value(self):
+        self.assertEqual(Sequence.objects.next_daily_value('TEST_SEQ', '20181224'), 1)
+        self.assertEqual(Sequence.objects.next_daily_value('TEST_SEQ', '20181224'), 2)
+        # 每天从1开始
+        self.assertEqual(Sequence.objects.next_daily_value('TEST_SEQ', '20181225'), 1)
+        # 首次分配时按当天已使用的最大值校准
+        self.assertEqual(Sequence.objects.next_daily_value('TEST_SEQ', '20181226', get_used_max=lambda: 7), 8)
+
+    def test_create_order_no(self):
+        self.assertEqual(self.create_order().order_no, self.day_prefix + '001')
+        self.assertEqual(self.create_order().order_no, self.day_prefix + '002')
+
+    def test_calibrate_after_redis_data_lost(self):
+        self.create_order()
+        self.create_order()
+        get_redis_connection('default').delete(
+            Sequence.objects.make_daily_value_key(REPAIR_ORDER_NO_SEQ_CODE, self.day)
+        )
+        self.assertEqual(self.create_order().order_no, self.day_prefix + '003')
+
+    def test_reallocate_used_order_no(self):
+        self.create_order()
+        # 编号已被占用时重新分配
+        self.create_repair_order(
+            self.admin_staff, self.fault_types[0], '呼吸机无法使用', self.admin_staff, self.day_prefix + '002'
+        )
+        self.assertEqual(self.create_order().order_no, self.day_prefix + '003')
@@ -36,3 +36,11 @@ def expired_on(year, month, day):
         return year + 1, 1, incr_month_day(year+1, 1, day)
 
     return year, tmp, incr_month_day(year, tmp, day)
+
+
+def test_make_ngrams():
+    from utils.search import make_ngrams, normalize_text
+    assert normalize_text(' GE 彩超 ') == 'ge彩超'
+    assert make_ngrams('GE 彩超', 2) == {'ge', 'e彩', '彩超'}
+    assert make_ngrams('彩', 2) == set()
+    assert make_ngrams(None, 2) == set()
@@ -184,7 +184,8 @@ INSTALLED_APPS = [
     'nmis.devices',
     'nmis.projects',
     'nmis.documents',
-    'nmis.notices'
+    'nmis.notices',
+    'nmis.jobs',
 
     # 'runtests',
 ]
@@ -223,6 +224,30 @@ REST_FRAMEWORK = {
 # 设置自定义Token过期时长（计量单位：分钟）
 TOKEN_EXPIRED_MINUTES = 30 * 2 * 24 * 30
 
+# Token解析缓存设置: 进程内LRU最大条目数, 进程内条目存活时长(秒), Redis中条目存活时长(秒).
+# 其他进程刷新/删除token后, 旧token在本进程中最多仍可用TOKEN_LRU_TIMEOUT秒
+TOKEN_LRU_MAX_SIZE = 10000
+TOKEN_LRU_TIMEOUT = 10
+TOKEN_CACHE_TIMEOUT = 30 * 60
+
+# 对象缓存版本号在进程内的缓存时长(秒). 模型缓存版本号变更后, 其他进程最多在该时长后感知
+OBJECT_CACHE_VERSION_LOCAL_TIMEOUT = 5
+# QuerySet.update()影响的行数超过该值时, 直接递增模型缓存版本号而非逐个删除缓存
+OBJECT_CACHE_BULK_INVALIDATE_THRESHOLD = 500
+# 对象缓存编解码器: 'fields' 仅缓存字段值(紧凑JSON), 'pickle' 缓存整个模型实例
+OBJECT_CACHE_CODEC = 'fields'
+
+# 是否在运行时统计每次序列化的SQL数量, 并对疑似N+1查询的Serializer输出warning日志
+SERIALIZER_QUERY_AUDIT = False
+
+# Excel流式批量导入: 每批校验及写入的行数, 导入结果中最多返回的行错误数
+IMPORT_CHUNK_SIZE = 500
+IMPORT_MAX_REPORTED_ERRORS = 200
+
+# Excel/CSV流式导出: 每次从数据库读取的行数, 导出文件响应每次读取的字节数
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_RESPONSE_BLOCK_SIZE = 64 * 1024
+
 FIXTURE_DIRS = [
     os.path.join(PROJECT_ROOT, "resources/fixtures"),
 
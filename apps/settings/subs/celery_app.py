@@ -42,3 +42,73 @@ email_celery_app = Celery(
     ]
 )
 email_celery_app.config_from_object(config)
+
+
+# #####################################################################
+#                           Excel后台导入
+# #####################################################################
+
+import_config = {
+    'CELERY_TIMEZONE': 'Asia/Shanghai',
+    'CELERY_ACCEPT_CONTENT': ['pickle', 'json', 'msgpack', 'yaml'],
+
+    'CELERY_QUEUES': [
+        Queue('import_job_queue', exchange=Exchange('import_job_queue'), routing_key='import_job_queue'),
+    ],
+
+    'CELERY_ROUTES': {
+        'nmis.jobs.tasks.run_import_job': {'queue': 'import_job_queue'}
+    },
+
+    # 导入任务耗时较长, worker每次只预取一个任务
+    'CELERYD_PREFETCH_MULTIPLIER': 1,
+    'CELERY_ACKS_LATE': True,
+}
+
+
+IMPORT_CELERY_BROKER_URL = '%s/2' % BASE_BROKER_URL
+IMPORT_CELERY_BACKEND_URL = IMPORT_CELERY_BROKER_URL
+
+# 需要为该celery实例启动对应的worker, 且worker与web服务需共享MEDIA_ROOT目录
+import_celery_app = Celery(
+    'import_celery_app',
+    broker=IMPORT_CELERY_BROKER_URL,
+    backend=IMPORT_CELERY_BACKEND_URL,
+    include=[
+        'nmis.jobs.tasks',
+    ]
+)
+import_celery_app.config_from_object(import_config)
+
+
+# #####################################################################
+#                           消息异步推送
+# #####################################################################
+
+notice_config = {
+    'CELERY_TIMEZONE': 'Asia/Shanghai',
+    'CELERY_ACCEPT_CONTENT': ['pickle', 'json', 'msgpack', 'yaml'],
+
+    'CELERY_QUEUES': [
+        Queue('notice_queue', exchange=Exchange('notice_queue'), routing_key='notice_queue'),
+    ],
+
+    'CELERY_ROUTES': {
+        'nmis.notices.tasks.send_notice': {'queue': 'notice_queue'}
+    },
+}
+
+
+NOTICE_CELERY_BROKER_URL = '%s/3' % BASE_BROKER_URL
+NOTICE_CELERY_BACKEND_URL = NOTICE_CELERY_BROKER_URL
+
+# 需要为该celery实例启动对应的worker
+notice_celery_app = Celery(
+    'notice_celery_app',
+    broker=NOTICE_CELERY_BROKER_URL,
+    backend=NOTICE_CELERY_BACKEND_URL,
+    include=[
+        'nmis.notices.tasks',
+    ]
+)
+notice_celery_app.config_from_object(notice_config)
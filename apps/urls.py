@@ -25,7 +25,9 @@ urlpatterns = [
     path('api/v1/hospitals/',   include('nmis.hospitals.urls')),
     path('api/v1/devices/',     include('nmis.devices.urls')),
     path('api/v1/documents/',   include('nmis.documents.urls')),
-    path('api/v1/notices/',    include('nmis.notices.urls'))
+    path('api/v1/notices/',    include('nmis.notices.urls')),
+    path('api/v1/jobs/',       include('nmis.jobs.urls')),
+    path('api/v1/systems/',    include('nmis.systems.urls'))
 
 ]
 
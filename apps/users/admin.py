@@ -14,6 +14,7 @@ from django.contrib.auth.forms import AdminPasswordChangeForm
 from django.contrib.auth.forms import UserCreationForm, UserChangeForm
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
+from base.authtoken import CustomToken
 from users.models import User
 
 csrf_protect_m = method_decorator(csrf_protect)
@@ -22,10 +23,14 @@ sensitive_post_parameters_m = method_decorator(sensitive_post_parameters)
 
 def set_user_not_active(modeladmin, request, queryset):
     queryset.filter(is_superuser=False).update(is_active=False)
+    User.objects.clear_cache(queryset)
+    CustomToken.clear_users_resolved_cache(queryset)
 set_user_not_active.short_description = u'封禁账号'
 
 def set_user_active(modeladmin, request, queryset):
     queryset.update(is_active=True)
+    User.objects.clear_cache(queryset)
+    CustomToken.clear_users_resolved_cache(queryset)
 set_user_active.short_description = u'激活账号'
 
 
@@ -14,6 +14,7 @@ from django.utils import timezone
 from base.models import BaseManager
 from base import resp
 from users.forms import is_valid_password, PASSWORD_ERROR_MSG
+from users.perms import bump_role_version
 
 logger = logging.getLogger(__name__)
 
@@ -153,7 +154,6 @@ class UserManager(BaseUserManager, BaseManager):
                         ship.save()
                         if depts and ship.role == pro_dispatcher_role:
                             ship.dept_domains.set(depts)
-                        ship.cache()
                 if old_ships:
                     for ship in old_ships:
                         ship.clear_cache()
@@ -163,6 +163,7 @@ class UserManager(BaseUserManager, BaseManager):
                         if s.role == pro_dispatcher_role:
                             s.dept_domains.set(depts)
                             s.cache
+                bump_role_version()
                 return True, "操作成功"
         except Exception as e:
             logger.exception(e)
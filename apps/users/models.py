@@ -22,6 +22,7 @@ from django.utils.timezone import now
 from utils import eggs, images
 from base.authtoken import CustomToken
 from users.managers import UserManager
+from users.perms import get_user_perms, bump_role_version
 
 logger = logging.getLogger(__name__)
 
@@ -88,6 +89,12 @@ class User(AbstractBaseUser, PermissionsMixin, BaseModel):
     def __init__(self, *args, **kwargs):
         super(User, self).__init__(*args, **kwargs)
 
+    def __getstate__(self):
+        # 权限快照仅在请求内有效, 不随user对象缓存
+        state = super(User, self).__getstate__().copy()
+        state.pop('_cached_perms', None)
+        return state
+
     def __unicode__(self):
         return u'%s' % self.id
 
@@ -123,7 +130,6 @@ class User(AbstractBaseUser, PermissionsMixin, BaseModel):
 
         # self.incr_login_count()  # 登录次数+1
         self.save()
-        self.cache()
 
     def get_authtoken(self):
         """ 返回登录鉴权token """
@@ -146,7 +152,6 @@ class User(AbstractBaseUser, PermissionsMixin, BaseModel):
 
         try:
             self._cached_profile = getattr(self, settings.USER_PROFILE, None)
-            self.cache()
             return self._cached_profile
         except Exception as e:
             logger.exception(e)
@@ -164,13 +169,21 @@ class User(AbstractBaseUser, PermissionsMixin, BaseModel):
         """获取用户拥有的角色"""
         return self.roles.all()
 
+    def get_perms(self):
+        """获取用户角色权限快照(请求内及Redis缓存)"""
+        return get_user_perms(self)
+
     def has_role(self, role):
         from nmis.hospitals.models import Role
         if not isinstance(role, Role):
             return False
-        if role not in self.get_roles():
-            return False
-        return True
+        return self.get_perms().has_role_id(role.id)
+
+    def has_role_codename(self, *codenames):
+        """
+        是否拥有指定角色, 传入多个角色代码时拥有其中任意一个即可
+        """
+        return self.get_perms().has_role_codename(*codenames)
 
     def set_roles(self, roles):
         from nmis.hospitals.models import Role, UserRoleShip
@@ -183,7 +196,10 @@ class User(AbstractBaseUser, PermissionsMixin, BaseModel):
             ship = UserRoleShip(user=self, role=role)
             ships.append(ship)
         try:
-            return UserRoleShip.objects.bulk_create(ships)
+            ships = UserRoleShip.objects.bulk_create(ships)
+            bump_role_version()
+            self.__dict__.pop('_cached_perms', None)
+            return ships
         except Exception as e:
             logger.exception(e)
             return
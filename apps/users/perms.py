@@ -0,0 +1,140 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/12
+#
+
+"""
+用户角色/权限/权限域解析.
+
+一次性加载用户的角色、权限及角色对应的部门域, 形成快照:
+    - 同一请求内缓存在user对象上(_cached_perms), 权限检查仅为集合查找;
+    - 跨请求缓存在Redis中, key由 user_id + 角色版本号 组成.
+角色、权限或用户角色关系变更时, 调用 bump_role_version() 使所有快照失效.
+"""
+
+import logging
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+ROLE_VERSION_CACHE_KEY = '%s.RoleVersion' % __name__
+USER_PERMS_CACHE_TIMEOUT = 30 * 60
+
+
+def get_role_version():
+    """返回当前角色版本号"""
+    return cache.get(ROLE_VERSION_CACHE_KEY, 0)
+
+
+def bump_role_version():
+    """
+    角色版本号+1, 使所有用户权限快照失效.
+    在用户角色分配、角色权限变更、角色删除后调用
+    """
+    try:
+        return cache.incr(ROLE_VERSION_CACHE_KEY)
+    except ValueError:  # key不存在
+        cache.set(ROLE_VERSION_CACHE_KEY, 1, timeout=None)
+        return 1
+
+
+def make_user_perms_key(user_id, version):
+    return '%s.UserPerms.%s.%s' % (__name__, user_id, version)
+
+
+class UserPerms(object):
+    """
+    用户角色权限快照
+    """
+
+    def __init__(self, role_codes=None, role_perm_ids=None, perm_codenames=None, role_dept_ids=None):
+        """
+        :param role_codes: 字典, 角色id -> 角色codename
+        :param role_perm_ids: 字典, 角色id -> 权限id集合
+        :param perm_codenames: 字典, 权限id -> 权限codename
+        :param role_dept_ids: 字典, 角色id -> 部门域id列表
+        """
+        self.role_codes = role_codes or {}
+        self.role_perm_ids = role_perm_ids or {}
+        self.perm_codenames = perm_codenames or {}
+        self.role_dept_ids = role_dept_ids or {}
+
+        self.role_ids = frozenset(self.role_codes.keys())
+        self.role_codenames = frozenset(self.role_codes.values())
+        self.perm_ids = frozenset(self.perm_codenames.keys())
+        self.perm_codename_set = frozenset(self.perm_codenames.values())
+
+    def has_role_id(self, role_id):
+        return role_id in self.role_ids
+
+    def has_role_codename(self, *codenames):
+        """拥有其中任意一个角色即返回True"""
+        for codename in codenames:
+            if codename in self.role_codenames:
+                return True
+        return False
+
+    def has_perm(self, perm_key):
+        """
+        :param perm_key: 权限id或codename
+        """
+        if isinstance(perm_key, int):
+            return perm_key in self.perm_ids
+        return perm_key in self.perm_codename_set
+
+    def get_role_dept_ids(self, role_id):
+        return self.role_dept_ids.get(role_id, [])
+
+
+def load_user_perms(user_id):
+    """
+    从数据库加载用户权限快照, 共3次查询
+    """
+    from nmis.hospitals.models import Role, UserRoleShip
+
+    ships = UserRoleShip.objects.filter(user_id=user_id).select_related('role')
+    role_codes = {}
+    ship_roles = {}
+    for ship in ships:
+        role_codes[ship.role_id] = ship.role.codename
+        ship_roles[ship.id] = ship.role_id
+    if not role_codes:
+        return UserPerms()
+
+    role_perm_ids = {}
+    perm_codenames = {}
+    role_perms = Role.permissions.through.objects.filter(role_id__in=role_codes.keys()).values_list(
+        'role_id', 'permission_id', 'permission__codename'
+    )
+    for role_id, perm_id, codename in role_perms:
+        role_perm_ids.setdefault(role_id, set()).add(perm_id)
+        perm_codenames[perm_id] = codename
+
+    role_dept_ids = {}
+    ship_depts = UserRoleShip.dept_domains.through.objects.filter(
+        userroleship_id__in=ship_roles.keys()).values_list('userroleship_id', 'department_id')
+    for ship_id, dept_id in ship_depts:
+        role_dept_ids.setdefault(ship_roles[ship_id], []).append(dept_id)
+
+    return UserPerms(role_codes, role_perm_ids, perm_codenames, role_dept_ids)
+
+
+def get_user_perms(user):
+    """
+    返回用户权限快照: 优先取请求内缓存, 其次Redis缓存, 最后查库
+    """
+    if hasattr(user, '_cached_perms'):
+        return user._cached_perms
+
+    key = make_user_perms_key(user.id, get_role_version())
+    perms = cache.get(key)
+    if perms is None:
+        try:
+            perms = load_user_perms(user.id)
+        except Exception as e:
+            logger.exception(e)
+            return UserPerms()
+        cache.set(key, perms, timeout=USER_PERMS_CACHE_TIMEOUT)
+    user._cached_perms = perms
+    return perms
@@ -153,6 +153,7 @@ class LogoutView(BaseAPIView):
         if not req.user.is_authenticated():
             return resp.failed(u'非登录状态')
 
+        CustomToken.clear_users_resolved_cache(req.user)
         system_logout(req)
         return resp.ok()
 
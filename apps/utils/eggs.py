@@ -305,6 +305,20 @@ class BaseEnum(Enum):
         return tuple([(item.value, item.value_name) for name, item in cls.members()])
 
 
+def chunked(iterable, size):
+    """
+    将可迭代对象按固定大小分块, 逐块返回list, 不会一次性读入全部数据
+    """
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
 def unique_enum(enumeration):
     """Class decorator for enumerations ensuring unique member values."""
     duplicates = []
@@ -409,6 +409,41 @@ class ExcelBasedOXL(object):
 
         return sheet_data
 
+    @staticmethod
+    def iter_sheet(ws, header_dict):
+        """
+        逐行读取单个sheet数据(只读模式下内存占用与文件大小无关), 行数据封装方式与read_sheet一致,
+        全部单元格为空的行将被跳过
+        :param ws: Worksheet对象
+        :param header_dict: 表头字典，K:键，一般为model属性；V:对应表头单元格数据
+        :return: (True, 行数据迭代器) 或 (False, 错误消息). 迭代器每次返回(Excel行号, 行数据Dict)
+        """
+        try:
+            header_row = next(ws.iter_rows(min_row=1, max_row=1), ())
+            header_values = dict((value, key) for key, value in header_dict.items())
+            header_keys = [header_values.get(cell.value) for cell in header_row]
+        except Exception as e:
+            logger.exception(e)
+            return False, 'Excel文件解析异常'
+        if len([key for key in header_keys if key]) != len(header_dict):
+            return False, '表头数据和指定的标准不一致'
+
+        def iter_rows():
+            for row_no, row in enumerate(ws.iter_rows(min_row=2), 2):
+                row_data, empty = dict((key, '') for key in header_keys if key), True
+                for key, cell in zip(header_keys, row):
+                    if not key:
+                        continue
+                    if cell.value and cell.is_date:
+                        value = cell.value.strftime('%Y-%m-%d')
+                    else:
+                        value = cell.value if cell.value else ''
+                    row_data[key] = value
+                    empty = empty and value == ''
+                if not empty:
+                    yield row_no, row_data
+        return True, iter_rows()
+
     @staticmethod
     def gen_sheet_name(param):
         return param.__unicode__()
@@ -0,0 +1,31 @@
+# coding=utf-8
+#
+# Created by junn, on 2018/12/19
+#
+
+"""
+n-gram搜索分词工具. 文本统一转为小写并去除空白字符后按固定长度滑动切分, 中文及编号等无需词典:
+
+    make_ngrams('GE 彩超', 2)  -> {'ge', 'e彩', '彩超'}
+"""
+
+import re
+
+_BLANK_RE = re.compile(r'\s+')
+
+
+def normalize_text(text):
+    """
+    规范化待索引/查询的文本: 转为小写, 去除所有空白字符
+    """
+    if not text:
+        return ''
+    return _BLANK_RE.sub('', str(text)).lower()
+
+
+def make_ngrams(text, n=2):
+    """
+    将文本切分为长度为n的词元集合. 文本长度不足n时返回空集合
+    """
+    text = normalize_text(text)
+    return set(text[i:i + n] for i in range(len(text) - n + 1))